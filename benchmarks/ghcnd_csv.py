@@ -0,0 +1,91 @@
+"""Benchmark the parsing of GHCN-Daily per-station CSV files.
+
+Usage::
+
+    python benchmarks/ghcnd_csv.py --years 120 --elements 8 --repeat 3
+
+Builds a synthetic gzipped ``by_station`` file (one row per day and
+element, -9999 missing values, some quality flags), then times the former
+pandas parser (``read_csv(low_memory=False)``, dates parsed twice,
+``pivot_table``) against :func:`agrometflow.climate.ghcnd.parse_station_csv`
+on the full record and on a 30-year window of three elements. Both parsers
+must return the same frame; peak traced memory is reported with tracemalloc
+(pandas/numpy buffers only, Arrow buffers are not traced).
+"""
+
+import argparse
+import gzip
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from agrometflow.climate import ghcnd
+
+ELEMENTS = ["TMAX", "TMIN", "PRCP", "SNOW", "SNWD", "TAVG", "AWND", "EVAP", "WSFG", "WT01"]
+
+
+def synthetic_station(years, n_elements, seed=0):
+    rng = np.random.default_rng(seed)
+    days = pd.date_range("1901-01-01", periods=int(365.25 * years), freq="D").strftime("%Y%m%d")
+    frames = []
+    for element in ELEMENTS[:n_elements]:
+        values = rng.integers(-300, 400, len(days))
+        values[rng.random(len(days)) < 0.03] = -9999
+        qflag = np.where(rng.random(len(days)) < 0.01, "I", "")
+        frames.append(
+            pd.DataFrame(
+                {"id": "USC00000001", "date": days, "element": element, "value": values,
+                 "mflag": "", "qflag": qflag, "sflag": "7", "time": "0700"}
+            )
+        )
+    table = pd.concat(frames).sort_values(["date", "element"], kind="stable")
+    return gzip.compress(table.to_csv(header=False, index=False).encode(), compresslevel=6)
+
+
+def timed(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - started)
+    # Separate run: tracing slows allocations down.
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--years", type=int, default=120)
+    parser.add_argument("--elements", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    payload = synthetic_station(args.years, args.elements)
+    print(f"Station file: {len(payload) / 1e6:.1f} MB gzipped, {args.years} years x {args.elements} elements")
+
+    end_year = 1901 + args.years - 1
+    cases = {
+        "full record": ("1901-01-01", f"{end_year}-12-31", ELEMENTS[: args.elements]),
+        "30 years, 3 elements": (f"{end_year - 29}-01-01", f"{end_year}-12-31", ["TMAX", "TMIN", "PRCP"]),
+    }
+    for case, (start, end, variables) in cases.items():
+        arguments = (payload, "USC00000001", start, end, variables, True)
+        legacy_s, legacy_mem, legacy = timed(
+            lambda: ghcnd._parse_station_csv_legacy(*arguments, logger=None), args.repeat
+        )
+        new_s, new_mem, new = timed(lambda: ghcnd.parse_station_csv(*arguments), args.repeat)
+        print(f"{case}:")
+        print(f"  {'legacy (read_csv + pivot_table)':<34} {legacy_s * 1000:8.1f} ms  {legacy_mem / 1e6:7.1f} MB")
+        print(f"  {'streamed (arrow + dense pivot)':<34} {new_s * 1000:8.1f} ms  {new_mem / 1e6:7.1f} MB")
+
+        legacy["date"] = legacy["date"].astype("datetime64[ns]")
+        pd.testing.assert_frame_equal(new, legacy.reset_index(drop=True))
+
+
+if __name__ == "__main__":
+    main()
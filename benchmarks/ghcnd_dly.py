@@ -0,0 +1,97 @@
+"""Benchmark the parsing of raw GHCN-Daily ``.dly`` station files.
+
+Usage::
+
+    python benchmarks/ghcnd_dly.py --years 120 --elements 8 --repeat 3
+
+Builds a synthetic ``.dly`` file (one 269-character line per month and
+element, -9999 missing days, some quality flags), then times
+``pandas.read_fwf`` on ``_DLY_COLSPECS`` followed by a melt and a pivot
+against :func:`agrometflow.climate.ghcnd.parse_dly` (byte slicing of the
+memory-mapped file through :func:`~agrometflow.climate.ghcnd.read_dly`), on
+the full record and on a 30-year window of three elements. Both must
+return the same frame.
+"""
+
+import argparse
+import io
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from agrometflow.climate import ghcnd
+
+ELEMENTS = ["TMAX", "TMIN", "PRCP", "SNOW", "SNWD", "TAVG", "AWND", "EVAP", "WSFG", "WT01"]
+
+
+def synthetic_station(years, n_elements, seed=0):
+    rng = np.random.default_rng(seed)
+    lines = []
+    for month in pd.period_range("1901-01", periods=12 * years, freq="M"):
+        for element in sorted(ELEMENTS[:n_elements]):
+            values = rng.integers(-300, 400, 31)
+            values[(rng.random(31) < 0.03) | (np.arange(31) >= month.days_in_month)] = -9999
+            qflags = np.where(rng.random(31) < 0.01, "I", " ")
+            days = "".join(f"{v:5d} {q}7" for v, q in zip(values, qflags))
+            lines.append(f"USC00000001{month.year}{month.month:02d}{element}{days}")
+    return ("\n".join(lines) + "\n").encode()
+
+
+def read_fwf(content, start, end, variables, convert):
+    names = ["ID", "YEAR", "MONTH", "ELEMENT"] + [f"{kind}{d}" for kind in ("VALUE", "M", "Q", "S") for d in range(1, 32)]
+    df = pd.read_fwf(io.BytesIO(content), colspecs=ghcnd._DLY_COLSPECS, header=None, names=names)
+    df = df[df["ELEMENT"].isin(variables)]
+    long = df.melt(id_vars=["ID", "YEAR", "MONTH", "ELEMENT"], value_vars=[f"VALUE{d}" for d in range(1, 32)])
+    long["DAY"] = long["variable"].str[5:].astype(int)
+    long["DATE"] = pd.to_datetime(
+        {"year": long["YEAR"], "month": long["MONTH"], "day": long["DAY"]}, errors="coerce"
+    )
+    long = long[long["DATE"].notna() & (long["value"] != -9999)]
+    long = long[(long["DATE"] >= start) & (long["DATE"] <= end)]
+    long = long.rename(columns={"ID": "STATION", "value": "DATA_VALUE"})
+    return ghcnd._pivot_elements(long, variables, convert)
+
+
+def timed(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--years", type=int, default=120)
+    parser.add_argument("--elements", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    content = synthetic_station(args.years, args.elements)
+    print(f"Station file: {len(content) / 1e6:.1f} MB, {args.years} years x {args.elements} elements")
+
+    end_year = 1901 + args.years - 1
+    cases = {
+        "full record": ("1901-01-01", f"{end_year}-12-31", ELEMENTS[: args.elements]),
+        "30 years, 3 elements": (f"{end_year - 29}-01-01", f"{end_year}-12-31", ["TMAX", "TMIN", "PRCP"]),
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "USC00000001.dly"
+        path.write_bytes(content)
+        for case, (start, end, variables) in cases.items():
+            fwf_s, fwf = timed(lambda: read_fwf(content, start, end, variables, True), args.repeat)
+            new_s, new = timed(lambda: ghcnd.read_dly(path, start, end, variables), args.repeat)
+            print(f"{case}:")
+            print(f"  {'read_fwf + melt + pivot_table':<34} {fwf_s * 1000:8.1f} ms")
+            print(f"  {'read_dly (memmap + byte slicing)':<34} {new_s * 1000:8.1f} ms")
+
+            fwf["date"] = fwf["date"].astype("datetime64[ns]")
+            pd.testing.assert_frame_equal(new.drop(columns=["lat", "lon", "elevation"]), fwf)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Benchmark the parsing of NASA POWER JSON responses.
+
+Usage::
+
+    python benchmarks/power_json.py --years 40 --variables 10 --repeat 5
+
+Builds a synthetic daily point response (``properties.parameter``, with
+-999 fill values), then times the former parser (one ``pd.concat`` per
+variable, ``Date`` parsed again as strings) against
+:func:`agrometflow.climate.power.parameters_to_frame`, decoding the body with
+the ``json`` module and, when installed, with orjson. All parsers must
+return the same values.
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+from agrometflow.climate import power
+
+
+def synthetic_response(years, n_variables, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("1981-01-01", periods=int(365.25 * years), freq="D").strftime("%Y%m%d")
+    parameter = {}
+    for k in range(n_variables):
+        values = rng.normal(20, 5, len(dates)).round(2)
+        values[rng.integers(0, len(dates), 20)] = -999.0
+        parameter[f"VAR{k:02d}"] = dict(zip(dates, values.tolist()))
+    return json.dumps({"properties": {"parameter": parameter}}).encode()
+
+
+def legacy_parse(body):
+    records = json.loads(body)["properties"]["parameter"]
+    df = pd.DataFrame()
+    for var, daily_values in records.items():
+        series = pd.Series(daily_values).rename(var)
+        df = pd.concat([df, series], axis=1)
+    df.index.name = "Date"
+    df.reset_index(inplace=True)
+    df["Date"] = pd.to_datetime(df["Date"].astype(str))
+    return df
+
+
+def new_parse(body, fast):
+    loads = power.loads_json if fast else json.loads
+    return power.parameters_to_frame(loads(body)["properties"]["parameter"])
+
+
+def timed(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--years", type=int, default=40)
+    parser.add_argument("--variables", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    body = synthetic_response(args.years, args.variables)
+    print(f"Response: {len(body) / 1e6:.1f} MB, {args.years} years x {args.variables} variables")
+
+    runs = {"legacy (json + concat loop)": lambda: legacy_parse(body)}
+    runs["columnar (json)"] = lambda: new_parse(body, fast=False)
+    if power.orjson is not None:
+        runs["columnar (orjson)"] = lambda: new_parse(body, fast=True)
+    else:
+        print("orjson is not installed: pip install 'agrometflow[json]'")
+
+    results = {}
+    for name, func in runs.items():
+        seconds, results[name] = timed(func, args.repeat)
+        print(f"{name:<30} {seconds * 1000:8.1f} ms")
+
+    legacy = results.pop("legacy (json + concat loop)")
+    legacy = legacy.replace(-999.0, np.nan)
+    for name, df in results.items():
+        for column in df.columns[1:]:
+            np.testing.assert_array_equal(df[column], legacy[column].to_numpy(np.float32), err_msg=name)
+        assert (df["Date"].to_numpy() == legacy["Date"].to_numpy()).all(), name
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Benchmark the columnar daily QC engine against the per-test functions.
+
+Usage::
+
+    python benchmarks/qc_engine.py --stations 200 --years 30 --workers 8
+
+Builds a synthetic multi-station daily dataset (Tx, Tn, rr, w), runs
+``run_qc_pipeline`` with ``engine="legacy"`` and ``engine="columnar"`` (and,
+with ``--workers``, the columnar engine sharded over a process pool), checks
+that all runs return the same flags and prints the timings.
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from agrometflow.dataquality.qc import run_qc_pipeline
+
+
+def synthetic_stations(n_stations, years, seed=0):
+	rng = np.random.default_rng(seed)
+	dates = pd.date_range("1990-01-01", periods=int(365.25 * years), freq="D")
+	n = len(dates)
+	doy = dates.dayofyear.to_numpy()
+	frames = []
+	for k in range(n_stations):
+		tx = 30 + 5 * np.sin(doy / 58) + rng.normal(0, 2, n)
+		tn = tx - 10 + rng.normal(0, 1, n)
+		rr = np.where(rng.random(n) < 0.7, 0.0, rng.gamma(0.8, 8, n))
+		w = np.abs(rng.normal(3, 1.5, n))
+		tx[rng.integers(0, n, 10)] += 30
+		tx[100:106] = 31.0
+		frames.append(
+			pd.DataFrame(
+				{
+					"station": f"ST{k:05d}",
+					"Year": dates.year,
+					"Month": dates.month,
+					"Day": dates.day,
+					"Tx": tx.round(1),
+					"Tn": tn.round(1),
+					"rr": rr.round(1),
+					"w": w.round(1),
+				}
+			)
+		)
+	return pd.concat(frames, ignore_index=True)
+
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument("--stations", type=int, default=200)
+	parser.add_argument("--years", type=int, default=30)
+	parser.add_argument("--repeat", type=int, default=1)
+	parser.add_argument("--workers", type=int, default=None)
+	args = parser.parse_args(argv)
+
+	df = synthetic_stations(args.stations, args.years)
+	print(f"{args.stations} stations x {args.years} years = {len(df):,} rows")
+
+	timings = {}
+	results = {}
+	runs = {"legacy": {"engine": "legacy"}, "columnar": {"engine": "columnar"}}
+	if args.workers:
+		runs[f"columnar x{args.workers}"] = {"engine": "columnar", "workers": args.workers}
+	for name, kwargs in runs.items():
+		best = float("inf")
+		for _ in range(args.repeat):
+			t0 = time.perf_counter()
+			results[name] = run_qc_pipeline(df, variable_cols=["Tx", "Tn", "rr", "w"], **kwargs)
+			best = min(best, time.perf_counter() - t0)
+		timings[name] = best
+		print(f"{name:>13}: {best:8.2f} s")
+
+	for name in runs:
+		pd.testing.assert_frame_equal(results["legacy"]["all_flags"], results[name]["all_flags"])
+	print(f"identical flags: {len(results['columnar']['all_flags']):,}")
+	for name in list(runs)[1:]:
+		print(f"speedup ({name}): {timings['legacy'] / timings[name]:.1f}x")
+
+
+if __name__ == "__main__":
+	main()
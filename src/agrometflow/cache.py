@@ -0,0 +1,445 @@
+"""
+Persistent cache of raw downloaded files, shared by all sources and runs.
+
+Files are stored once under the SHA-256 of their content
+(``blobs/ab/abcdef...``) and indexed by source URL (``index/<sha256(url)>.json``)
+together with the ``ETag``/``Last-Modified`` validators of the response:
+
+- a cached URL is revalidated with a conditional request and served from
+  disk on ``304 Not Modified`` (or when the server cannot be reached);
+- entries are checked against their recorded size before use; a damaged or
+  missing blob drops the entry and the file is fetched again;
+- every write goes to a temporary file renamed into place, and blobs are
+  read-only: the files linked to them (:meth:`RawCache.fetch_to`) must be
+  replaced, not written in place;
+- the total size is bounded (``max_bytes``): once it is exceeded, least
+  recently used entries are evicted down to ``EVICT_TARGET * max_bytes``,
+  except those pinned by a reader of this process.
+
+The index is scanned once per process and then kept in memory with a running
+byte total. Evictions rescan the folder (to pick up the entries written by
+other processes) at most every ``RESCAN_INTERVAL`` seconds.
+Last-use times of cache hits are kept in memory and written to the index at
+most every ``TOUCH_INTERVAL`` seconds per entry.
+
+The default location is ``$AGROMETFLOW_CACHE_DIR`` or
+``~/.cache/agrometflow/raw`` and the default bound
+``$AGROMETFLOW_CACHE_MAX_BYTES`` or 10 GiB.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from agrometflow.download import get_client
+
+
+DEFAULT_MAX_BYTES = 10 * 1024 ** 3
+
+#: Seconds between two writes of the last-use time of a cached entry.
+TOUCH_INTERVAL = 600
+#: Fraction of ``max_bytes`` left in the cache by an eviction.
+EVICT_TARGET = 0.9
+#: Minimum seconds between two rescans of the index folder by evictions.
+RESCAN_INTERVAL = 60
+#: Permissions of the blobs (and of the files hard-linked to them).
+BLOB_MODE = 0o444
+
+logger = logging.getLogger(__name__)
+
+
+def _default_root():
+    root = os.environ.get("AGROMETFLOW_CACHE_DIR")
+    if root:
+        return Path(root)
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "agrometflow" / "raw"
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def link_or_copy(src, dest):
+    """Hard-link ``src`` to ``dest`` (copy across file systems), atomically."""
+    dest = Path(dest)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=dest.parent, prefix=f".{dest.name}.", suffix=".part")
+    os.close(fd)
+    os.unlink(tmp)
+    try:
+        try:
+            os.link(src, tmp)
+        except OSError:
+            shutil.copyfile(src, tmp)
+        os.replace(tmp, dest)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+    return dest
+
+
+class RawCache:
+    """
+    Content-addressed cache of raw files keyed by URL.
+
+    Parameters
+    ----------
+    root : str or Path, optional
+        Cache folder (default: ``$AGROMETFLOW_CACHE_DIR`` or
+        ``~/.cache/agrometflow/raw``).
+    max_bytes : int, optional
+        Size bound of the cache (default: ``$AGROMETFLOW_CACHE_MAX_BYTES`` or
+        10 GiB).
+    client : HttpClient, optional
+        Client used for downloads (default: :func:`agrometflow.download.get_client`).
+    """
+
+    def __init__(self, root=None, max_bytes=None, client=None):
+        self.root = Path(root) if root is not None else _default_root()
+        if max_bytes is None:
+            max_bytes = int(os.environ.get("AGROMETFLOW_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES))
+        self.max_bytes = int(max_bytes)
+        self._client = client
+        self._lock = threading.RLock()
+        self._pins = {}
+        # In-memory index: index file name -> entry, blob refs and unique blob total.
+        self._entries = None
+        self._refs = {}
+        self._total = 0
+        self._scanned = None
+        for sub in ("index", "blobs", "tmp"):
+            (self.root / sub).mkdir(parents=True, exist_ok=True)
+
+    @property
+    def client(self):
+        return self._client or get_client()
+
+    # ------------------------------------------------------------------
+    # Index
+    # ------------------------------------------------------------------
+
+    def _index_path(self, url):
+        return self.root / "index" / f"{hashlib.sha256(url.encode()).hexdigest()}.json"
+
+    def _blob_path(self, sha256):
+        return self.root / "blobs" / sha256[:2] / sha256
+
+    def _read_entry(self, index_path):
+        try:
+            with open(index_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_entry(self, url, entry):
+        path = self._index_path(url)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        self._remember(path.name, entry)
+
+    def _remove_entry(self, index_path):
+        index_path.unlink(missing_ok=True)
+        self._forget(index_path.name)
+
+    def _scan(self):
+        """(Re)load the in-memory index from the index folder; newer in-memory use times are kept."""
+        previous = self._entries or {}
+        self._entries, self._refs, self._total = {}, {}, 0
+        self._scanned = time.monotonic()
+        for index_path in (self.root / "index").glob("*.json"):
+            entry = self._read_entry(index_path)
+            if entry is None:
+                continue
+            known = previous.get(index_path.name)
+            if known is not None and known["sha256"] == entry["sha256"]:
+                entry["used"] = max(entry.get("used", 0), known.get("used", 0))
+            self._remember(index_path.name, entry)
+
+    def _remember(self, name, entry):
+        if self._entries is None:
+            return
+        self._forget(name)
+        self._entries[name] = entry
+        sha256 = entry["sha256"]
+        if sha256 not in self._refs:
+            self._total += entry["size"]
+        self._refs[sha256] = self._refs.get(sha256, 0) + 1
+
+    def _forget(self, name):
+        if self._entries is None:
+            return
+        entry = self._entries.pop(name, None)
+        if entry is None:
+            return
+        sha256 = entry["sha256"]
+        self._refs[sha256] -= 1
+        if self._refs[sha256] == 0:
+            del self._refs[sha256]
+            self._total -= entry["size"]
+
+    def _entry(self, url):
+        """Return the valid index entry of ``url`` or ``None``; drop damaged ones."""
+        index_path = self._index_path(url)
+        entry = self._read_entry(index_path)
+        if entry is None:
+            return None
+        blob = self._blob_path(entry["sha256"])
+        try:
+            intact = blob.stat().st_size == entry["size"]
+        except OSError:
+            intact = False
+        if not intact:
+            logger.warning(f"Dropping damaged cache entry for {url}")
+            self._remove_entry(index_path)
+            return None
+        return entry
+
+    def _touch(self, url, entry):
+        now = time.time()
+        written = entry.get("used", 0)
+        entry["used"] = now
+        if now - written >= TOUCH_INTERVAL:
+            self._write_entry(url, entry)
+        elif self._entries is not None and self._index_path(url).name in self._entries:
+            self._entries[self._index_path(url).name]["used"] = now
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def lookup(self, url, pin=False):
+        """Path of the cached copy of ``url`` without revalidation, or ``None``."""
+        with self._lock:
+            entry = self._entry(url)
+            if entry is None:
+                return None
+            return self._hit(url, entry, pin)
+
+    def materialize(self, url, path):
+        """Link the cached copy of ``url`` to ``path``; ``None`` when not cached."""
+        blob = self.lookup(url, pin=True)
+        if blob is None:
+            return None
+        try:
+            return link_or_copy(blob, path)
+        finally:
+            self.release(blob)
+
+    def add(self, url, path, etag=None, last_modified=None):
+        """Store the file ``path`` as the content of ``url`` and return the blob path.
+
+        ``path`` is hard-linked to the blob when possible and becomes read-only.
+        """
+        tmp = self.root / "tmp" / f"{os.getpid()}-{threading.get_ident()}-{time.monotonic_ns()}"
+        link_or_copy(path, tmp)
+        return self._insert(url, tmp, etag, last_modified)
+
+    def _insert(self, url, tmp, etag, last_modified, sha256=None):
+        sha256 = sha256 or _file_sha256(tmp)
+        blob = self._blob_path(sha256)
+        with self._lock:
+            try:
+                intact = blob.stat().st_size == os.path.getsize(tmp)
+            except OSError:
+                intact = False
+            if intact:
+                Path(tmp).unlink(missing_ok=True)
+            else:
+                blob.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(tmp, blob)
+            os.chmod(blob, BLOB_MODE)
+            entry = {
+                "url": url,
+                "sha256": sha256,
+                "size": blob.stat().st_size,
+                "etag": etag,
+                "last_modified": last_modified,
+                "used": time.time(),
+            }
+            if self._entries is None:
+                self._scan()
+            self._write_entry(url, entry)
+            if self._total > self.max_bytes:
+                if time.monotonic() - self._scanned >= RESCAN_INTERVAL:
+                    self._scan()
+                self._evict(keep={sha256})
+        return blob
+
+    def fetch(self, url, check=None, missing_ok=False, revalidate=True, pin=False, **kwargs):
+        """
+        Return the path of an up-to-date cached copy of ``url``.
+
+        The cached copy is revalidated with ``If-None-Match`` /
+        ``If-Modified-Since`` unless ``revalidate`` is False. With ``pin=True``
+        the blob is protected from eviction until :meth:`release`.
+        ``check``, ``missing_ok`` and ``kwargs`` are as in
+        :meth:`agrometflow.download.HttpClient.download`.
+        """
+        with self._lock:
+            entry = self._entry(url)
+        if entry is not None and not revalidate:
+            return self._hit(url, entry, pin)
+
+        headers = dict(kwargs.pop("headers", None) or {})
+        if entry is not None:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        def consume(response):
+            if entry is not None and response.status_code == 304:
+                return None, 0
+            if missing_ok and response.status_code == 404:
+                return False, 0
+            response.raise_for_status()
+            if check is not None:
+                check(response)
+            digest = hashlib.sha256()
+            fd, tmp = tempfile.mkstemp(dir=self.root / "tmp", suffix=".part")
+            size = 0
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    for chunk in response.iter_content(chunk_size=1024 * 1024):
+                        if chunk:
+                            f.write(chunk)
+                            digest.update(chunk)
+                            size += len(chunk)
+            except BaseException:
+                Path(tmp).unlink(missing_ok=True)
+                raise
+            validators = (response.headers.get("ETag"), response.headers.get("Last-Modified"))
+            return (tmp, digest.hexdigest(), validators), size
+
+        try:
+            result = self.client.request(url, consume, headers=headers, **kwargs)
+        except Exception as e:
+            if entry is None:
+                raise
+            logger.warning(f"Could not revalidate {url} ({e}); using the cached copy")
+            return self._hit(url, entry, pin)
+
+        if result is None:
+            return self._hit(url, entry, pin)
+        if result is False:
+            return None
+        tmp, sha256, (etag, last_modified) = result
+        with self._lock:
+            blob = self._insert(url, tmp, etag, last_modified, sha256=sha256)
+            if pin:
+                self._pin(blob)
+        return blob
+
+    def _hit(self, url, entry, pin):
+        with self._lock:
+            self._touch(url, entry)
+            blob = self._blob_path(entry["sha256"])
+            if pin:
+                self._pin(blob)
+        return blob
+
+    def fetch_to(self, url, path, **kwargs):
+        """Fetch ``url`` through the cache and link (or copy) it to ``path``."""
+        blob = self.fetch(url, pin=True, **kwargs)
+        if blob is None:
+            return None
+        try:
+            return link_or_copy(blob, path)
+        finally:
+            self.release(blob)
+
+    def _pin(self, blob):
+        self._pins[str(blob)] = self._pins.get(str(blob), 0) + 1
+
+    def release(self, blob):
+        """Undo one ``fetch(..., pin=True)`` of ``blob``."""
+        with self._lock:
+            key = str(blob)
+            count = self._pins.get(key, 0) - 1
+            if count > 0:
+                self._pins[key] = count
+            else:
+                self._pins.pop(key, None)
+
+    def evict(self, keep=()):
+        """Remove least recently used entries until the cache fits ``max_bytes``."""
+        with self._lock:
+            # Rescan: other processes sharing the folder may have added entries.
+            self._scan()
+            if self._total > self.max_bytes:
+                self._evict(keep)
+
+    def _evict(self, keep):
+        """Remove least recently used entries of the in-memory index down to ``EVICT_TARGET * max_bytes``."""
+        target = int(self.max_bytes * EVICT_TARGET)
+        index = self.root / "index"
+        with self._lock:
+            for name, entry in sorted(self._entries.items(), key=lambda item: item[1].get("used", 0)):
+                if self._total <= target:
+                    break
+                sha256 = entry["sha256"]
+                blob = self._blob_path(sha256)
+                if sha256 in keep or str(blob) in self._pins:
+                    continue
+                self._remove_entry(index / name)
+                if sha256 not in self._refs:
+                    blob.unlink(missing_ok=True)
+                    logger.debug(f"Evicted {entry['url']} from the raw cache")
+
+    def size(self):
+        """Total size of the blobs in bytes."""
+        return sum(p.stat().st_size for p in (self.root / "blobs").glob("*/*"))
+
+    def verify(self):
+        """Re-hash every blob, drop the entries of corrupt ones and return their URLs."""
+        dropped = []
+        with self._lock:
+            for index_path in (self.root / "index").glob("*.json"):
+                entry = self._read_entry(index_path)
+                if entry is None:
+                    self._remove_entry(index_path)
+                    continue
+                blob = self._blob_path(entry["sha256"])
+                if not blob.exists() or _file_sha256(blob) != entry["sha256"]:
+                    self._remove_entry(index_path)
+                    blob.unlink(missing_ok=True)
+                    dropped.append(entry["url"])
+        return dropped
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """Return the process-wide :class:`RawCache`, created on first use."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = RawCache()
+        return _cache
+
+
+def configure_cache(**kwargs):
+    """Replace the process-wide cache by ``RawCache(**kwargs)``."""
+    global _cache
+    with _cache_lock:
+        _cache = RawCache(**kwargs)
+        return _cache
@@ -18,6 +18,12 @@ def main(argv=None):
         default=None,
         help="Number of parallel downloads for compatible sources.",
     )
+    parser.add_argument(
+        "--backend",
+        choices=["threads", "async"],
+        default=None,
+        help="Download backend for daily-file sources (async requires httpx).",
+    )
     parser.add_argument(
         "--log-file",
         default=None,
@@ -61,6 +67,8 @@ def main(argv=None):
     if climate_cfg:
         if args.max_workers is not None:
             climate_cfg["max_workers"] = args.max_workers
+        if args.backend is not None:
+            climate_cfg["backend"] = args.backend
         if args.force_parallel:
             climate_cfg["force_parallel"] = True
         if args.lsasaf_username:
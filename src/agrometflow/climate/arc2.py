@@ -1,21 +1,30 @@
-import requests
 import rioxarray
 import xarray as xr
 from pathlib import Path
 from zipfile import ZipFile
-from io import BytesIO
 from datetime import datetime, timedelta
 from collections import defaultdict
-from concurrent.futures import ThreadPoolExecutor, as_completed
 
+from agrometflow.cache import get_cache
+from agrometflow.cube import get_cube
+from agrometflow.download import download_many, get_client
+from agrometflow.subset import PROTOCOLS, fetch_subset, select_subset, subset_url_for
 from agrometflow.utils import get_logger
 
 
+ACCESS_MODES = ("download", "subset")
+
+
 class Arc2Downloader:
     BASE_URL = "https://ftp.cpc.ncep.noaa.gov/fews/fewsdata/africa/arc2/geotiff"
+    # OPeNDAP/NCSS endpoint of the daily grids (``{year}`` is filled in when
+    # the server holds one file per year); none is published with the
+    # GeoTIFFs, so ``access="subset"`` needs ``subset_url``.
+    SUBSET_URL = None
 
     def __init__(self, output_dir="data/arc2", log_file=None, verbose=False, max_workers=6):
         self.logger = get_logger("arc2", log_file, verbose)
+        self.max_workers = max_workers
 
 
     def _parse_date(self, date):
@@ -35,19 +44,33 @@ class Arc2Downloader:
 
         try:
             self.logger.debug(f"⬇ Downloading {url}")
-            response = requests.get(url, stream=True, timeout=30)
-            response.raise_for_status()
-            with ZipFile(BytesIO(response.content)) as thezip:
-                thezip.extractall(tif_dir)
+            zip_path = get_cache().fetch(url, pin=True, timeout=30)
+            try:
+                with ZipFile(zip_path) as thezip:
+                    thezip.extractall(tif_dir)
+            finally:
+                get_cache().release(zip_path)
             return tif_path
         except Exception as e:
             self.logger.warning(f"Failed for {zip_name}: {e}")
             return None
 
-    def convert_all_to_netcdf_per_year(self, files_by_year: dict, output_dir):
+    def _extract_zip(self, zip_path, tif_dir):
+        try:
+            with ZipFile(zip_path) as thezip:
+                thezip.extractall(tif_dir)
+            return tif_dir / zip_path.name.replace(".zip", "")
+        except Exception as e:
+            self.logger.warning(f"Failed for {zip_path.name}: {e}")
+            return None
+        finally:
+            zip_path.unlink(missing_ok=True)
+
+    def convert_all_to_netcdf_per_year(self, files_by_year: dict, output_dir, cube=None, bbox=None):
+        ingested = cube.ingested("arc2", "precip") if cube is not None else set()
         for year, tif_files in files_by_year.items():
             output_nc = output_dir / f"arc2_{year}.nc"
-            if output_nc.exists():
+            if cube is None and output_nc.exists():
                 self.logger.info(f"{output_nc} already exists. Skipping.")
                 continue
 
@@ -56,6 +79,8 @@ class Arc2Downloader:
                 try:
                     date_str = tif_file.stem.split(".")[-1]
                     timestamp = datetime.strptime(date_str, "%Y%m%d")
+                    if timestamp.isoformat() in ingested:
+                        continue
                     ds = rioxarray.open_rasterio(tif_file)
                     ds = ds.squeeze("band", drop=True)
                     ds = ds.expand_dims(time=[timestamp])
@@ -67,17 +92,79 @@ class Arc2Downloader:
                 try:
                     merged = xr.concat(datasets, dim="time")
                     merged.name = "precip"
-                    merged.to_netcdf(output_nc)
-                    self.logger.info(f"🎯 Yearly NetCDF saved: {output_nc}")
+                    if bbox:
+                        merged = select_subset(merged.to_dataset(), ["precip"], bbox)["precip"]
+                    if cube is not None:
+                        cube.append("arc2", merged)
+                        self.logger.info(f"🎯 {len(datasets)} days of {year} added to {cube.path('arc2', 'precip')}")
+                    else:
+                        merged.to_netcdf(output_nc)
+                        self.logger.info(f"🎯 Yearly NetCDF saved: {output_nc}")
                 except Exception as e:
                     self.logger.error(f"❌ Merge failed for {year}: {e}")
 
+    def download_subset(self, start, end, output_dir, bbox, subset_url, protocol="ncss", variable="precip", cube=None):
+        """
+        Write the years of [start, end] served by the OPeNDAP/NCSS endpoint
+        ``subset_url``, cut to ``bbox`` on the server.
+
+        Returns the years the endpoint could not serve.
+        """
+        missing = []
+        for year in range(start.year, end.year + 1):
+            output_nc = output_dir / f"arc2_{year}.nc"
+            if cube is None and output_nc.exists():
+                self.logger.info(f"{output_nc} already exists. Skipping.")
+                continue
+            part = output_dir / ".subset" / f"arc2_{year}.nc"
+            fetched = fetch_subset(
+                subset_url_for(subset_url, year),
+                part,
+                [variable],
+                bbox=bbox,
+                start=max(start, datetime(year, 1, 1)),
+                end=min(end, datetime(year, 12, 31)),
+                protocol=protocol,
+                timeout=30,
+                log=self.logger,
+            )
+            if fetched is None:
+                missing.append(year)
+                continue
+            try:
+                with xr.open_dataset(fetched) as ds:
+                    merged = ds[variable].load()
+                # Same layout as the years built from the GeoTIFFs.
+                merged = merged.rename({n: d for n, d in (("lon", "x"), ("lat", "y")) if n in merged.dims})
+                merged.name = "precip"
+                if cube is not None:
+                    cube.append("arc2", merged)
+                    self.logger.info(f"🎯 Subset of {year} added to {cube.path('arc2', 'precip')}")
+                else:
+                    merged.to_netcdf(output_nc)
+                    self.logger.info(f"🎯 Yearly NetCDF saved from the subset: {output_nc}")
+            except Exception as e:
+                self.logger.error(f"❌ Subset of {year} failed: {e}")
+                missing.append(year)
+            finally:
+                part.unlink(missing_ok=True)
+        return missing
+
     def download(self, **kwargs):
+        """
+        Download the daily ARC2 GeoTIFFs of [start_date, end_date] and write
+        one NetCDF per year in ``output_dir/PR`` (or the Zarr cube with
+        ``output_format="zarr"``), optionally clipped to ``bbox``.
+
+        With ``access="subset"`` and ``subset_url`` (THREDDS NCSS, or OPeNDAP
+        with ``subset_protocol="opendap"``; variable ``subset_var``), only the
+        bbox and period are requested from the server; the years it cannot
+        serve are downloaded as GeoTIFFs.
+        """
         try:
             start_date = kwargs["start_date"]
             end_date = kwargs["end_date"]
-            output_dir = kwargs["output_dir"] + "/PR"
-            max_workers = kwargs.get("max_workers", 6)
+            output_dir = Path(kwargs["output_dir"]) / "PR"
         except KeyError as e:
             raise ValueError(f"Missing required argument: {e}")
         
@@ -86,24 +173,62 @@ class Arc2Downloader:
         tif_dir = output_dir / "tifs"
         tif_dir.mkdir(parents=True, exist_ok=True)
 
+        backend = kwargs.get("backend", "threads")
+        bbox = kwargs.get("bbox")
+        access = kwargs.get("access", "download")
+        if access not in ACCESS_MODES:
+            raise ValueError(f"Unsupported ARC2 access '{access}'. Available: {list(ACCESS_MODES)}")
+        subset_url = kwargs.get("subset_url", self.SUBSET_URL)
+        subset_protocol = kwargs.get("subset_protocol", "ncss")
+        if subset_protocol not in PROTOCOLS:
+            raise ValueError(f"Unsupported subset protocol '{subset_protocol}'. Available: {list(PROTOCOLS)}")
+        cube = get_cube(kwargs.get("output_format", "netcdf"), kwargs.get("cube_dir", output_dir / "cube"))
+        self.max_workers = get_client().worker_count(self.BASE_URL, kwargs.get("max_workers", self.max_workers))
+
         start = self._parse_date(start_date)
         end = self._parse_date(end_date)
         all_dates = list(self._daterange(start, end))
 
+        if access == "subset":
+            if subset_url:
+                missing = self.download_subset(
+                    start, end, output_dir, bbox, subset_url,
+                    protocol=subset_protocol, variable=kwargs.get("subset_var", "precip"), cube=cube,
+                )
+                all_dates = [date for date in all_dates if date.year in missing]
+                if not all_dates:
+                    return
+                self.logger.warning(f"Subset endpoint failed for {missing}; downloading the GeoTIFFs.")
+            else:
+                self.logger.warning("No OPeNDAP/NCSS endpoint for ARC2 (subset_url); downloading the GeoTIFFs.")
+
         self.logger.info(f"Downloading {len(all_dates)} daily ARC2 files with {self.max_workers} workers...")
 
         files_by_year = defaultdict(list)
-
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            futures = {executor.submit(self.download_and_extract, date, tif_dir): date for date in all_dates}
-
-            for future in as_completed(futures):
-                date = futures[future]
-                tif_path = future.result()
-                if tif_path:
-                    files_by_year[date.year].append(tif_path)
-
-        self.convert_all_to_netcdf_per_year(files_by_year, output_dir)
+        jobs = []
+        for date in all_dates:
+            url = self.build_url(date)
+            zip_path = tif_dir / url.split("/")[-1]
+            tif_path = tif_dir / zip_path.name.replace(".zip", "")
+            if tif_path.exists():
+                files_by_year[date.year].append(tif_path)
+            else:
+                jobs.append((date, url, zip_path))
+
+        results = download_many(
+            [(url, zip_path) for _, url, zip_path in jobs],
+            backend=backend,
+            max_workers=kwargs.get("max_workers") if backend == "async" else self.max_workers,
+            on_complete=lambda _, zip_path: self._extract_zip(zip_path, tif_dir),
+            log=self.logger,
+            cache=get_cache(),
+            timeout=30,
+        )
+        for (date, _, _), tif_path in zip(jobs, results):
+            if tif_path:
+                files_by_year[date.year].append(tif_path)
+
+        self.convert_all_to_netcdf_per_year(files_by_year, output_dir, cube=cube, bbox=bbox)
 
     def _daterange(self, start, end):
         while start <= end:
@@ -1,15 +1,21 @@
 # -*- coding: utf-8 -*-
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from functools import partial
 from pathlib import Path
-import tempfile
 
 import pandas as pd
-import requests
 import xarray as xr
 from tqdm.auto import tqdm
 
 from .base import ClimateSource
+from agrometflow.cache import get_cache
+from agrometflow.cube import OrderedAppender, get_cube
+from agrometflow.download import RangeFile, get_client, run_pipeline
+from agrometflow.store import PointStore, point_ids
+from agrometflow.subset import PROTOCOLS, fetch_subset, points_bbox, subset_url_for
 from agrometflow.utils import (
+    PointIndex,
     dataset_points_to_dataframe,
     extract_points_from_tuples,
     get_logger,
@@ -18,6 +24,14 @@ from agrometflow.utils import (
 
 REMOTE_URL = "https://data.chc.ucsb.edu/products/CHIRPS-2.0"
 DEFAULT_SOURCE_VAR = "precip"
+
+#: Ways of reading the yearly files: full download, byte ranges of the
+#: remote NetCDF4 file, or a server-side subset from an OPeNDAP/NCSS
+#: endpoint (the last two for points/bbox only).
+ACCESS_MODES = ("download", "remote", "subset")
+#: OPeNDAP/NCSS endpoint of the yearly files (``{year}`` is filled in);
+#: the CHC does not publish one, so ``access="subset"`` needs ``subset_url``.
+SUBSET_URL = None
 DEFAULT_TARGET_VAR = "PR"
 
 
@@ -41,10 +55,43 @@ class ChirpsDownloader(ClimateSource):
         Télécharge CHIRPS annuel et extrait directement les points ou la bbox
         quand une géométrie est fournie.
 
-        Avec points ou bbox, les fichiers annuels globaux ne sont pas conservés:
-        ils sont téléchargés en temporaire, sous-échantillonnés, puis supprimés.
+        Avec points ou bbox, les fichiers annuels globaux ne sont pas copiés dans
+        output_dir: ils sont lus depuis le cache de fichiers bruts partagé
+        (voir :mod:`agrometflow.cache`), de sorte qu'un changement de points ou
+        de bbox ne les retélécharge pas.
         Sans points ni bbox, le comportement historique est conservé et les
         NetCDF annuels complets sont écrits dans output_dir/PR.
+
+        Avec ``access="remote"``, les fichiers annuels ne sont pas téléchargés:
+        ils sont ouverts à distance par requêtes HTTP Range et seuls les blocs
+        couvrant les points ou la bbox sont transférés. Les blocs sont gardés
+        dans ``chunk_cache_dir`` (défaut: output_dir/.chunk_cache).
+
+        Avec ``access="subset"``, le serveur découpe lui-même la bbox (ou
+        l'emprise des points) et la période: ``subset_url`` est l'adresse
+        NCSS de THREDDS (``subset_protocol="ncss"``, défaut) ou OPeNDAP
+        (``subset_protocol="opendap"``) des fichiers annuels, ``{year}``
+        étant remplacé par l'année. Une année que le serveur ne sert pas est
+        téléchargée en entier; sans ``subset_url``, tout est téléchargé.
+
+        Les séries extraites aux points sont rangées dans le magasin Parquet
+        ``store_dir`` (défaut: output_dir/points, voir :mod:`agrometflow.store`)
+        par point et par année: seuls les couples (point, année) absents du
+        magasin sont extraits, le reste est relu
+        (``overwrite_points_cache=True`` force une nouvelle extraction).
+
+        Avec bbox et ``output_format="zarr"``, les années découpées sont
+        ajoutées, dans l'ordre, à un cube Zarr par variable dans ``cube_dir``
+        (défaut: output_dir/cube, voir :mod:`agrometflow.cube`) au lieu d'un
+        NetCDF par année; les dates déjà présentes dans le cube sont ignorées.
+        Un ``cube_dir`` ne contient qu'une seule grille (une seule bbox).
+
+        En mode ``access="download"``, téléchargement, extraction et écriture
+        se recouvrent (voir :func:`agrometflow.download.run_pipeline`):
+        l'extraction tourne dans un pool séparé de ``extract_workers``
+        threads, ou processus avec ``extract_executor="processes"`` (décodage
+        et compression NetCDF), et le nombre de fichiers en attente
+        d'extraction est borné.
         """
         try:
             start_date = kwargs["start_date"]
@@ -57,9 +104,23 @@ class ChirpsDownloader(ClimateSource):
         bbox = kwargs.get("bbox")
         points = kwargs.get("points") or kwargs.get("multipoints")
         timeout = kwargs.get("timeout", 180)
+        access = kwargs.get("access", "download")
+        if access not in ACCESS_MODES:
+            raise ValueError(f"Unsupported CHIRPS access '{access}'. Available: {list(ACCESS_MODES)}")
+        chunk_cache_dir = Path(kwargs.get("chunk_cache_dir", output_dir / ".chunk_cache"))
+        subset = {
+            "url": kwargs.get("subset_url", SUBSET_URL),
+            "protocol": kwargs.get("subset_protocol", "ncss"),
+            "dir": output_dir / ".subset",
+        }
+        if subset["protocol"] not in PROTOCOLS:
+            raise ValueError(f"Unsupported subset protocol '{subset['protocol']}'. Available: {list(PROTOCOLS)}")
+        if access == "subset" and not subset["url"]:
+            self.logger.warning("No OPeNDAP/NCSS endpoint for CHIRPS (subset_url); downloading full yearly files.")
+            access = "download"
 
         is_notebook = _is_notebook_environment()
-        max_workers = kwargs.get("max_workers", 4)
+        max_workers = get_client().worker_count(REMOTE_URL, kwargs.get("max_workers"))
         if is_notebook and not kwargs.get("force_parallel", False):
             max_workers = 1
 
@@ -74,50 +135,132 @@ class ChirpsDownloader(ClimateSource):
             self.logger.info(f"Points: {points}")
 
         if points:
-            points_csv = build_points_csv_path(output_dir, start, end, points)
-            if points_csv.exists() and not kwargs.get("overwrite_points_cache", False):
-                self.logger.info(f"Using cached points CSV: {points_csv}")
-                self.data = pd.read_csv(points_csv)
-                return
-
-            requests_to_run = build_requests(years, output_dir, variables, bbox=None)
-            self.data = download_points_stream(
-                requests_to_run=requests_to_run,
-                timeout=timeout,
-                points=points,
-                start_date=start_date,
-                end_date=end_date,
-                logger=self.logger,
-                max_workers=max_workers,
-            )
-            if self.data is not None and not self.data.empty:
-                points_csv.parent.mkdir(parents=True, exist_ok=True)
-                self.data.to_csv(points_csv, index=False)
-                self.logger.info(f"Saved points CSV: {points_csv}")
+            store = PointStore(kwargs.get("store_dir", output_dir / "points"))
+            targets = [target_var for _, target_var in variables]
+            if kwargs.get("overwrite_points_cache", False):
+                batches = [(points, years)]
+            else:
+                batches = store.pending("chirps", targets, points, start, end)
+            if not batches:
+                self.logger.info(f"Using stored point data: {store.root}")
+
+            for batch_points, batch_years in batches:
+                self.logger.info(f"Extracting {len(batch_points)} point(s) for year(s) {batch_years}")
+                requests_to_run = build_requests(batch_years, output_dir, variables, bbox=None)
+                if access == "remote":
+                    data = read_points_remote(
+                        requests_to_run=requests_to_run,
+                        timeout=timeout,
+                        points=batch_points,
+                        start_date=start_date,
+                        end_date=end_date,
+                        logger=self.logger,
+                        cache_dir=chunk_cache_dir,
+                        max_workers=max_workers,
+                    )
+                elif access == "subset":
+                    data = read_points_subset(
+                        requests_to_run=requests_to_run,
+                        subset=subset,
+                        timeout=timeout,
+                        points=batch_points,
+                        start_date=start_date,
+                        end_date=end_date,
+                        logger=self.logger,
+                        max_workers=max_workers,
+                    )
+                else:
+                    data = download_points_stream(
+                        requests_to_run=requests_to_run,
+                        timeout=timeout,
+                        points=batch_points,
+                        start_date=start_date,
+                        end_date=end_date,
+                        logger=self.logger,
+                        max_workers=max_workers,
+                        extract_workers=kwargs.get("extract_workers"),
+                        extract_executor=kwargs.get("extract_executor", "threads"),
+                    )
+                if data is not None and not data.empty:
+                    stored = [v for v in targets if v in data.columns]
+                    store.write_years("chirps", data, batch_years, start, end, variables=stored)
+                    self.logger.info(f"Stored point data in {store.root}")
+
+            self.data = store.read("chirps", targets, start, end, points=points)
             return
 
         requests_to_run = build_requests(years, output_dir, variables, bbox=bbox)
         if bbox:
-            requests_to_run = [
-                request
-                for request in requests_to_run
-                if not request["group"]["final_nc"].exists()
-            ]
+            cube = get_cube(kwargs.get("output_format", "netcdf"), kwargs.get("cube_dir", output_dir / "cube"))
+            if cube is None:
+                requests_to_run = [
+                    request
+                    for request in requests_to_run
+                    if not request["group"]["final_nc"].exists()
+                ]
+            else:
+                days = pd.date_range(start.normalize(), end.normalize(), freq="D")
+                requests_to_run = [
+                    request
+                    for request in requests_to_run
+                    if not cube.covers(
+                        "chirps",
+                        request["group"]["target_var"],
+                        days[days.year == request["group"]["year"]],
+                    )
+                ]
             if not requests_to_run:
                 self.logger.info("All CHIRPS bbox outputs already exist.")
                 return
 
-            download_bbox_stream(
-                requests_to_run=requests_to_run,
-                timeout=timeout,
-                bbox=bbox,
-                start_date=start_date,
-                end_date=end_date,
-                logger=self.logger,
-                max_workers=max_workers,
-            )
+            appender = None
+            if cube is not None:
+                appender = OrderedAppender(cube, "chirps", [_cube_key(r) for r in requests_to_run])
+                for request in requests_to_run:
+                    request["group"]["appender"] = appender
+
+            try:
+                if access == "remote":
+                    read_bbox_remote(
+                        requests_to_run=requests_to_run,
+                        timeout=timeout,
+                        bbox=bbox,
+                        start_date=start_date,
+                        end_date=end_date,
+                        logger=self.logger,
+                        cache_dir=chunk_cache_dir,
+                        max_workers=max_workers,
+                    )
+                elif access == "subset":
+                    read_bbox_subset(
+                        requests_to_run=requests_to_run,
+                        subset=subset,
+                        timeout=timeout,
+                        bbox=bbox,
+                        start_date=start_date,
+                        end_date=end_date,
+                        logger=self.logger,
+                        max_workers=max_workers,
+                    )
+                else:
+                    download_bbox_stream(
+                        requests_to_run=requests_to_run,
+                        timeout=timeout,
+                        bbox=bbox,
+                        start_date=start_date,
+                        end_date=end_date,
+                        logger=self.logger,
+                        max_workers=max_workers,
+                        extract_workers=kwargs.get("extract_workers"),
+                        extract_executor=kwargs.get("extract_executor", "threads"),
+                    )
+            finally:
+                if appender is not None:
+                    appender.close()
             return
 
+        if access in ("remote", "subset"):
+            self.logger.warning(f"access='{access}' needs points or bbox; downloading full yearly files.")
         download_full_years(
             requests_to_run=requests_to_run,
             timeout=timeout,
@@ -126,10 +269,19 @@ class ChirpsDownloader(ClimateSource):
         )
 
     def extract(self, variables=None, start_date=None, end_date=None, as_long=False, **kwargs):
-        if self.data is None:
+        """
+        Filtre les données aux points. Avec ``store_dir``, elles sont lues
+        directement dans le magasin Parquet (filtres poussés sur la période et
+        sur ``points``) au lieu des données en mémoire.
+        """
+        if kwargs.get("store_dir") is not None:
+            df = PointStore(kwargs["store_dir"]).read(
+                "chirps", variables, start_date, end_date, points=kwargs.get("points")
+            )
+        elif self.data is None:
             raise ValueError("No point data available. Run download(points=...) first.")
-
-        df = self.data.copy()
+        else:
+            df = self.data.copy()
         if "time" in df.columns:
             df["time"] = pd.to_datetime(df["time"])
             if start_date:
@@ -182,13 +334,27 @@ def build_requests(years, output_dir, variables, bbox=None):
     return requests_to_run
 
 
-def download_points_stream(requests_to_run, timeout, points, start_date, end_date, logger, max_workers=4):
+def download_points_stream(
+    requests_to_run,
+    timeout,
+    points,
+    start_date,
+    end_date,
+    logger,
+    max_workers=4,
+    extract_workers=None,
+    extract_executor="threads",
+):
     frames_by_var = {}
     progress_desc = "Downloading CHIRPS files and extracting points"
 
+    def collect(request, result):
+        frames_by_var.setdefault(result["target_var"], []).append(result["df"])
+        return result
+
     if max_workers == 1:
         for request in tqdm(requests_to_run, total=len(requests_to_run), desc=progress_desc):
-            download = _download_request_to_tempfile(request, timeout, logger)
+            download = _download_request_to_cache(request, timeout, logger)
             if download is None:
                 continue
             result = _extract_points_subset_from_file(
@@ -200,37 +366,40 @@ def download_points_stream(requests_to_run, timeout, points, start_date, end_dat
                 logger,
             )
             if result is not None:
-                frames_by_var.setdefault(result["target_var"], []).append(result["df"])
+                collect(request, result)
     else:
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            futures = {
-                executor.submit(_download_request_to_tempfile, request, timeout, logger): request
-                for request in requests_to_run
-            }
-            for future in tqdm(as_completed(futures), total=len(futures), desc=progress_desc):
-                download = future.result()
-                if download is None:
-                    continue
-                result = _extract_points_subset_from_file(
-                    download["request"],
-                    download["path"],
-                    points,
-                    start_date,
-                    end_date,
-                    logger,
-                )
-                if result is not None:
-                    frames_by_var.setdefault(result["target_var"], []).append(result["df"])
+        run_pipeline(
+            requests_to_run,
+            partial(_cached_request, timeout=timeout, logger=logger),
+            partial(_points_from_file, points=points, start_date=start_date, end_date=end_date, logger=logger),
+            write=collect,
+            release=_release_cached,
+            max_workers=max_workers,
+            extract_workers=extract_workers,
+            extract_executor=extract_executor,
+            log=logger,
+            desc=progress_desc,
+        )
 
     return _merge_frames_by_var(frames_by_var)
 
 
-def download_bbox_stream(requests_to_run, timeout, bbox, start_date, end_date, logger, max_workers=4):
+def download_bbox_stream(
+    requests_to_run,
+    timeout,
+    bbox,
+    start_date,
+    end_date,
+    logger,
+    max_workers=4,
+    extract_workers=None,
+    extract_executor="threads",
+):
     progress_desc = "Downloading CHIRPS files and clipping bbox"
 
     if max_workers == 1:
         for request in tqdm(requests_to_run, total=len(requests_to_run), desc=progress_desc):
-            download = _download_request_to_tempfile(request, timeout, logger)
+            download = _download_request_to_cache(request, timeout, logger)
             if download is None:
                 continue
             _write_bbox_subset_from_file(
@@ -241,24 +410,98 @@ def download_bbox_stream(requests_to_run, timeout, bbox, start_date, end_date, l
                 end_date,
                 logger,
             )
-    else:
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            futures = {
-                executor.submit(_download_request_to_tempfile, request, timeout, logger): request
-                for request in requests_to_run
-            }
-            for future in tqdm(as_completed(futures), total=len(futures), desc=progress_desc):
-                download = future.result()
-                if download is None:
-                    continue
-                _write_bbox_subset_from_file(
-                    download["request"],
-                    download["path"],
-                    bbox,
-                    start_date,
-                    end_date,
-                    logger,
-                )
+        return
+
+    # Clipping and compression run in the extraction pool; appends to a
+    # cube are serialised in the writer stage.
+    appender = next((r["group"]["appender"] for r in requests_to_run if "appender" in r["group"]), None)
+    items = [
+        dict(request, group={k: v for k, v in request["group"].items() if k != "appender"})
+        for request in requests_to_run
+    ]
+    run_pipeline(
+        items,
+        partial(_cached_request, timeout=timeout, logger=logger),
+        partial(
+            _bbox_from_file,
+            bbox=bbox,
+            start_date=start_date,
+            end_date=end_date,
+            logger=logger,
+            to_cube=appender is not None,
+        ),
+        write=(lambda request, ds: appender.add(_cube_key(request), ds)) if appender is not None else None,
+        release=_release_cached,
+        max_workers=max_workers,
+        extract_workers=extract_workers,
+        extract_executor=extract_executor,
+        log=logger,
+        desc=progress_desc,
+    )
+
+
+def read_points_remote(requests_to_run, timeout, points, start_date, end_date, logger, cache_dir, max_workers=4):
+    results = _run_requests(
+        lambda request: _extract_points_subset_remote(
+            request, timeout, points, start_date, end_date, logger, cache_dir
+        ),
+        requests_to_run,
+        max_workers,
+        "Reading CHIRPS points remotely",
+    )
+    frames_by_var = {}
+    for result in results:
+        if result is not None:
+            frames_by_var.setdefault(result["target_var"], []).append(result["df"])
+    return _merge_frames_by_var(frames_by_var)
+
+
+def read_bbox_remote(requests_to_run, timeout, bbox, start_date, end_date, logger, cache_dir, max_workers=4):
+    _run_requests(
+        lambda request: _write_bbox_subset_remote(
+            request, timeout, bbox, start_date, end_date, logger, cache_dir
+        ),
+        requests_to_run,
+        max_workers,
+        "Reading CHIRPS bbox remotely",
+    )
+
+
+def read_points_subset(requests_to_run, subset, timeout, points, start_date, end_date, logger, max_workers=4):
+    results = _run_requests(
+        lambda request: _extract_points_subset_served(
+            request, subset, timeout, points, start_date, end_date, logger
+        ),
+        requests_to_run,
+        max_workers,
+        "Requesting CHIRPS point subsets",
+    )
+    frames_by_var = {}
+    for result in results:
+        if result is not None:
+            frames_by_var.setdefault(result["target_var"], []).append(result["df"])
+    return _merge_frames_by_var(frames_by_var)
+
+
+def read_bbox_subset(requests_to_run, subset, timeout, bbox, start_date, end_date, logger, max_workers=4):
+    _run_requests(
+        lambda request: _write_bbox_subset_served(
+            request, subset, timeout, bbox, start_date, end_date, logger
+        ),
+        requests_to_run,
+        max_workers,
+        "Requesting CHIRPS bbox subsets",
+    )
+
+
+def _run_requests(func, requests_to_run, max_workers, progress_desc):
+    if max_workers == 1:
+        return [func(request) for request in tqdm(requests_to_run, total=len(requests_to_run), desc=progress_desc)]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(func, request) for request in requests_to_run]
+        for _ in tqdm(as_completed(futures), total=len(futures), desc=progress_desc):
+            pass
+        return [future.result() for future in futures]
 
 
 def download_full_years(requests_to_run, timeout, logger, max_workers=4):
@@ -289,106 +532,225 @@ def fetch(request, timeout, logger):
 
     try:
         logger.debug(f"Downloading {request['url']}")
-        path.parent.mkdir(parents=True, exist_ok=True)
-        with requests.get(request["url"], stream=True, timeout=timeout) as response:
-            response.raise_for_status()
-            _raise_if_html(response)
-            with open(path, "wb") as f:
-                for chunk in response.iter_content(chunk_size=1024 * 1024):
-                    if chunk:
-                        f.write(chunk)
-        return path
+        return get_cache().fetch_to(request["url"], path, check=_raise_if_html, timeout=timeout)
     except Exception as e:
         logger.warning(f"Failed for {request['filename']}: {e}")
-        path.unlink(missing_ok=True)
         return None
 
 
-def _download_request_to_tempfile(request, timeout, logger):
-    local_path = _download_to_tempfile(request["url"], request["filename"], timeout, logger)
+def _download_request_to_cache(request, timeout, logger):
+    local_path = _download_to_cache(request["url"], request["filename"], timeout, logger)
     if local_path is None:
         return None
     return {"request": request, "path": local_path}
 
 
-def _download_to_tempfile(url, filename, timeout, logger):
-    tmp = tempfile.NamedTemporaryFile(prefix="chirps_", suffix=".nc", delete=False)
-    tmp_path = Path(tmp.name)
-    tmp.close()
-
+def _download_to_cache(url, filename, timeout, logger):
+    """Fetch ``url`` through the raw-file cache; the returned file is pinned until released."""
     try:
         logger.debug(f"Downloading {url}")
-        with requests.get(url, stream=True, timeout=timeout) as response:
-            response.raise_for_status()
-            _raise_if_html(response)
-            with open(tmp_path, "wb") as f:
-                for chunk in response.iter_content(chunk_size=1024 * 1024):
-                    if chunk:
-                        f.write(chunk)
-        return tmp_path
+        return get_cache().fetch(url, check=_raise_if_html, pin=True, timeout=timeout)
     except Exception as e:
         logger.warning(f"Failed for {filename}: {e}")
-        tmp_path.unlink(missing_ok=True)
         return None
 
 
+def _cached_request(request, timeout, logger):
+    return _download_to_cache(request["url"], request["filename"], timeout, logger)
+
+
+def _release_cached(request, local_path):
+    get_cache().release(local_path)
+
+
 def _extract_points_subset_from_file(request, local_path, points, start_date, end_date, logger):
+    try:
+        return _points_from_file(request, local_path, points, start_date, end_date, logger)
+    finally:
+        get_cache().release(local_path)
+
+
+def _points_from_file(request, local_path, points, start_date, end_date, logger):
+    try:
+        with xr.open_dataset(local_path) as ds:
+            return _points_subset(ds, request, points, start_date, end_date)
+    except Exception as e:
+        logger.warning(f"Failed to extract points from {request['filename']}: {e}")
+        return None
+
+
+def _extract_points_subset_remote(request, timeout, points, start_date, end_date, logger, cache_dir):
+    try:
+        with _open_remote_dataset(request["url"], timeout, cache_dir) as ds:
+            return _points_subset(ds, request, points, start_date, end_date, by_point=True)
+    except Exception as e:
+        logger.warning(f"Failed to read points remotely from {request['filename']}: {e}")
+        return None
+
+
+def _points_subset(ds, request, points, start_date, end_date, by_point=False):
     group = request["group"]
     source_var = group["source_var"]
     target_var = group["target_var"]
 
+    ds = _prepare_dataset(ds, source_var=source_var, bbox=None)
+    ds = _subset_time(ds, start_date, end_date)
+    ds_pts = _select_points_by_column(ds, points) if by_point else extract_points_from_tuples(ds, points)
+    df = dataset_points_to_dataframe(ds_pts)
+
+    if "time" in df.columns:
+        df["time"] = pd.to_datetime(df["time"])
+    base_cols = [c for c in ["time", "lon", "lat"] if c in df.columns]
+    keep_cols = base_cols + [c for c in [source_var] if c in df.columns]
+    df = df[keep_cols]
+    if source_var in df.columns and source_var != target_var:
+        df = df.rename(columns={source_var: target_var})
+    return {"target_var": target_var, "df": df}
+
+
+def _select_points_by_column(ds, points):
+    """
+    Same result as ``extract_points_from_tuples``, but each point is read as
+    its own (time,) column. On a lazily opened remote file this only touches
+    the chunks holding the points, whereas vectorized indexing may read the
+    whole lon/lat range spanned by the points.
+    """
+    return PointIndex.for_grid(ds, points).extract_by_point(ds)
+
+
+def _write_bbox_subset_from_file(request, local_path, bbox, start_date, end_date, logger):
+    try:
+        return _bbox_from_file(request, local_path, bbox, start_date, end_date, logger)
+    finally:
+        get_cache().release(local_path)
+
+
+def _bbox_from_file(request, local_path, bbox, start_date, end_date, logger, to_cube=False):
+    """Write the bbox NetCDF of ``request``, or return the clipped year with ``to_cube``."""
     try:
         with xr.open_dataset(local_path) as ds:
-            ds = _prepare_dataset(ds, source_var=source_var, bbox=None)
-            ds = _subset_time(ds, start_date, end_date)
-            ds_pts = extract_points_from_tuples(ds, points)
-            df = dataset_points_to_dataframe(ds_pts)
+            if to_cube:
+                return _bbox_subset(ds, request, bbox, start_date, end_date)
+            return _write_bbox_subset(ds, request, bbox, start_date, end_date, logger)
+    except Exception as e:
+        logger.warning(f"Failed to clip bbox from {request['filename']}: {e}")
+        return None
 
-        if "time" in df.columns:
-            df["time"] = pd.to_datetime(df["time"])
-        base_cols = [c for c in ["time", "lon", "lat"] if c in df.columns]
-        keep_cols = base_cols + [c for c in [source_var] if c in df.columns]
-        df = df[keep_cols]
-        if source_var in df.columns and source_var != target_var:
-            df = df.rename(columns={source_var: target_var})
-        return {"target_var": target_var, "df": df}
+
+def _write_bbox_subset_remote(request, timeout, bbox, start_date, end_date, logger, cache_dir):
+    if "appender" not in request["group"] and Path(request["group"]["final_nc"]).exists():
+        logger.info(f"Already exists: {request['group']['final_nc']}")
+        return request["group"]["final_nc"]
+    try:
+        with _open_remote_dataset(request["url"], timeout, cache_dir) as ds:
+            return _write_bbox_subset(ds, request, bbox, start_date, end_date, logger)
     except Exception as e:
-        logger.warning(f"Failed to extract points from {request['filename']}: {e}")
+        logger.warning(f"Failed to read bbox remotely from {request['filename']}: {e}")
         return None
-    finally:
-        Path(local_path).unlink(missing_ok=True)
 
 
-def _write_bbox_subset_from_file(request, local_path, bbox, start_date, end_date, logger):
+def _extract_points_subset_served(request, subset, timeout, points, start_date, end_date, logger):
+    try:
+        with _open_subset(request, subset, points_bbox(points), start_date, end_date, timeout, logger) as ds:
+            if ds is not None:
+                return _points_subset(ds, request, points, start_date, end_date)
+    except Exception as e:
+        logger.warning(f"Failed to extract points from the subset of {request['filename']}: {e}")
+    logger.info(f"Falling back to the full download of {request['filename']}")
+    download = _download_request_to_cache(request, timeout, logger)
+    if download is None:
+        return None
+    return _extract_points_subset_from_file(request, download["path"], points, start_date, end_date, logger)
+
+
+def _write_bbox_subset_served(request, subset, timeout, bbox, start_date, end_date, logger):
+    if "appender" not in request["group"] and Path(request["group"]["final_nc"]).exists():
+        logger.info(f"Already exists: {request['group']['final_nc']}")
+        return request["group"]["final_nc"]
+    try:
+        with _open_subset(request, subset, bbox, start_date, end_date, timeout, logger) as ds:
+            if ds is not None:
+                return _write_bbox_subset(ds, request, bbox, start_date, end_date, logger)
+    except Exception as e:
+        logger.warning(f"Failed to clip the subset of {request['filename']}: {e}")
+    logger.info(f"Falling back to the full download of {request['filename']}")
+    download = _download_request_to_cache(request, timeout, logger)
+    if download is None:
+        return None
+    return _write_bbox_subset_from_file(request, download["path"], bbox, start_date, end_date, logger)
+
+
+def _write_bbox_subset(ds, request, bbox, start_date, end_date, logger):
     group = request["group"]
     final_nc = Path(group["final_nc"])
-    source_var = group["source_var"]
     target_var = group["target_var"]
+    appender = group.get("appender")
 
-    if final_nc.exists():
+    if appender is None and final_nc.exists():
         logger.info(f"Already exists: {final_nc}")
-        Path(local_path).unlink(missing_ok=True)
         return final_nc
 
+    ds = _bbox_subset(ds, request, bbox, start_date, end_date)
+
+    if appender is not None:
+        appender.add(_cube_key(request), ds)
+        logger.info(f"Queued CHIRPS bbox {group['year']} for {appender.cube.path('chirps', target_var)}")
+        return appender.cube.path("chirps", target_var)
+
+    final_nc.parent.mkdir(parents=True, exist_ok=True)
+    encoding = {target_var: {"zlib": True, "complevel": 4}}
+    ds.to_netcdf(final_nc, encoding=encoding)
+    ds.close()
+    logger.info(f"Saved CHIRPS bbox NetCDF: {final_nc}")
+    return final_nc
+
+
+def _bbox_subset(ds, request, bbox, start_date, end_date):
+    source_var = request["group"]["source_var"]
+    target_var = request["group"]["target_var"]
+    ds = _prepare_dataset(ds, source_var=source_var, bbox=bbox)
+    ds = _subset_time(ds, start_date, end_date)
+    if source_var != target_var:
+        ds = ds.rename({source_var: target_var})
+    return ds.load()
+
+
+def _cube_key(request):
+    return request["group"]["target_var"], request["group"]["year"]
+
+
+@contextmanager
+def _open_remote_dataset(url, timeout, cache_dir):
+    with RangeFile(url, cache_dir=cache_dir, timeout=timeout) as remote:
+        with xr.open_dataset(remote, engine="h5netcdf") as ds:
+            yield ds
+
+
+@contextmanager
+def _open_subset(request, subset, bbox, start_date, end_date, timeout, logger):
+    """Yield the hyperslab of ``request`` served by the subset endpoint, or ``None``."""
+    group = request["group"]
+    year = group["year"]
+    path = Path(subset["dir"]) / f"{group['target_var']}_{year}.nc"
+    fetched = fetch_subset(
+        subset_url_for(subset["url"], year),
+        path,
+        [group["source_var"]],
+        bbox=bbox,
+        start=max(pd.to_datetime(start_date), pd.Timestamp(year, 1, 1)),
+        end=min(pd.to_datetime(end_date), pd.Timestamp(year, 12, 31, 23, 59, 59)),
+        protocol=subset["protocol"],
+        timeout=timeout,
+        log=logger,
+    )
+    if fetched is None:
+        yield None
+        return
     try:
-        with xr.open_dataset(local_path) as ds:
-            ds = _prepare_dataset(ds, source_var=source_var, bbox=bbox)
-            ds = _subset_time(ds, start_date, end_date)
-            if source_var != target_var:
-                ds = ds.rename({source_var: target_var})
-            ds = ds.load()
-
-        final_nc.parent.mkdir(parents=True, exist_ok=True)
-        encoding = {target_var: {"zlib": True, "complevel": 4}}
-        ds.to_netcdf(final_nc, encoding=encoding)
-        ds.close()
-        logger.info(f"Saved CHIRPS bbox NetCDF: {final_nc}")
-        return final_nc
-    except Exception as e:
-        logger.warning(f"Failed to clip bbox from {request['filename']}: {e}")
-        return None
+        with xr.open_dataset(fetched) as ds:
+            yield ds
     finally:
-        Path(local_path).unlink(missing_ok=True)
+        path.unlink(missing_ok=True)
 
 
 def _prepare_dataset(ds, source_var, bbox=None):
@@ -487,13 +849,6 @@ def _raise_if_html(response):
         raise PermissionError("Received HTML instead of NetCDF.")
 
 
-def build_points_csv_path(output_dir, start_date, end_date, points):
-    output_dir = Path(output_dir)
-    start = pd.to_datetime(start_date)
-    end = pd.to_datetime(end_date)
-    return output_dir / f"chirps_{start:%Y%m%d}_{end:%Y%m%d}_{_points_suffix(points)}.csv"
-
-
 def build_yearly_nc_path(output_dir, target_var, year, bbox=None):
     output_dir = Path(output_dir)
     var_dir = output_dir / target_var
@@ -503,13 +858,6 @@ def build_yearly_nc_path(output_dir, target_var, year, bbox=None):
     return var_dir / f"chirps_{target_var}_{year}{suffix}.nc"
 
 
-def _points_suffix(points):
-    tokens = []
-    for lon, lat in points:
-        tokens.append(f"pt_{_coord_token(lon)}_{_coord_token(lat)}")
-    return "__".join(tokens)
-
-
 def _bbox_suffix(bbox):
     lon_min, lat_min, lon_max, lat_max = bbox
     return (
@@ -1,9 +1,9 @@
 import gzip
 import shutil
-import requests
 from datetime import datetime, timedelta
 from pathlib import Path
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from agrometflow.cache import get_cache
+from agrometflow.download import download_many
 from agrometflow.utils import get_logger
 
 
@@ -35,38 +35,46 @@ class Cmorphv1Downloader:
         url = f"{self.BASE_URL}/{year}/{yearmonth}/{filename}"
         return url, filename
 
-    def _download_and_extract(self, date):
-        url, filename = self._build_url(date)
-        gz_path = self.raw_dir / filename
+    def _extract(self, gz_path):
         bin_path = gz_path.with_suffix("")  # remove .gz
-
-        if bin_path.exists():
-            self.logger.debug(f"✔ Already downloaded: {bin_path.name}")
-            return
-
         try:
-            response = requests.get(url, stream=True, timeout=60)
-            response.raise_for_status()
-
-            with open(gz_path, "wb") as f:
-                f.write(response.content)
-
             with gzip.open(gz_path, "rb") as f_in, open(bin_path, "wb") as f_out:
                 shutil.copyfileobj(f_in, f_out)
-
-            self.logger.info(f"✅ Downloaded and extracted: {filename}")
+            self.logger.info(f"✅ Downloaded and extracted: {gz_path.name}")
+            return bin_path
         except Exception as e:
-            self.logger.error(f"❌ Failed to download {url}: {e}")
+            self.logger.error(f"❌ Failed to extract {gz_path.name}: {e}")
+            return None
+
+    def download(self, start_date, end_date, backend="threads"):
+        """
+        Download CMORPH data from start_date to end_date (inclusive).
 
-    def download(self, start_date, end_date):
-        """Download CMORPH data from start_date to end_date (inclusive)."""
+        ``backend="async"`` fetches the daily files on an asyncio event loop,
+        with up to ``agrometflow.download.ASYNC_MAX_PER_HOST`` requests in
+        flight, instead of a thread pool of ``max_workers`` threads.
+        """
         start = datetime.strptime(start_date, "%Y-%m-%d") if isinstance(start_date, str) else start_date
         end = datetime.strptime(end_date, "%Y-%m-%d") if isinstance(end_date, str) else end_date
         dates = list(self._daterange(start, end))
 
         self.logger.info(f"📦 Downloading CMORPH data for {len(dates)} days with {self.max_workers} workers...")
 
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            futures = [executor.submit(self._download_and_extract, d) for d in dates]
-            for future in as_completed(futures):
-                _ = future.result()
+        jobs = []
+        for date in dates:
+            url, filename = self._build_url(date)
+            gz_path = self.raw_dir / filename
+            if gz_path.with_suffix("").exists():
+                self.logger.debug(f"✔ Already downloaded: {gz_path.with_suffix('').name}")
+                continue
+            jobs.append((url, gz_path))
+
+        download_many(
+            jobs,
+            backend=backend,
+            max_workers=None if backend == "async" else self.max_workers,
+            on_complete=lambda _, gz_path: self._extract(gz_path),
+            log=self.logger,
+            cache=get_cache(),
+            timeout=60,
+        )
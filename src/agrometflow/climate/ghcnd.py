@@ -9,18 +9,35 @@ Supported access methods
 1. By station ID(s)  — downloads the per-station CSV from the NOAA HTTP endpoint
 2. By bounding box   — searches the station inventory and downloads all matching stations
 3. Inventory only    — download/parse the full station metadata table
+4. Local mirror      — ingests the bulk ``by_year`` files once and answers station
+   and bbox queries locally (``mirror_dir``, see :mod:`agrometflow.climate.ghcnd_mirror`)
+5. Raw archive      — parses the fixed-width ``.dly`` files of ``ghcnd_all.tar.gz``
+   (:func:`read_dly`, :func:`iter_dly_archive`)
 """
 
+import gzip
 import io
+import tarfile
 import time
-import requests
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pcsv
 from pathlib import Path
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from tqdm import tqdm
 
 from agrometflow.climate.base import ClimateSource
+from agrometflow.climate.ghcnd_metadata import (  # noqa: F401 (re-exported)
+    GHCND_INVENTORY_URL,
+    GHCND_STATIONS_URL,
+    get_metadata,
+    parse_stations,
+)
+from agrometflow.climate.ghcnd_mirror import GhcndMirror
+from agrometflow.download import get_client
+from agrometflow.store import PointStore
 from agrometflow.utils import get_logger
 
 
@@ -31,12 +48,6 @@ from agrometflow.utils import get_logger
 #: Base URL for per-station CSV files (NOAA HTTPS endpoint)
 GHCND_CSV_BASE = "https://www.ncei.noaa.gov/pub/data/ghcn/daily/by_station"
 
-#: Full station inventory (fixed-width text)
-GHCND_INVENTORY_URL = "https://www.ncei.noaa.gov/pub/data/ghcn/daily/ghcnd-inventory.txt"
-
-#: Station metadata (fixed-width text)
-GHCND_STATIONS_URL = "https://www.ncei.noaa.gov/pub/data/ghcn/daily/ghcnd-stations.txt"
-
 #: Standard variables and their descriptions
 GHCND_VARIABLES = {
     "TMAX": "Maximum temperature (°C × 10)",
@@ -53,6 +64,18 @@ GHCND_VARIABLES = {
 # Variables whose raw values are in tenths and need ÷10 conversion
 _TENTHS_VARS = {"TMAX", "TMIN", "TAVG", "PRCP", "AWND", "EVAP", "WSFG"}
 
+#: Quality flags (Q-FLAG, NOAA readme.txt); any of them means "failed a NOAA check"
+GHCND_QFLAGS = "DGIKLMNORSTWXZ"
+
+#: Measurement flags (M-FLAG)
+GHCND_MFLAGS = "BDHKLOPTW"
+
+#: Suffix of the flag column of each variable (``keep_flags=True``)
+FLAGS_SUFFIX = "_flags"
+
+# Code of a flag letter outside the NOAA lists
+_OTHER_FLAG = 15
+
 # Fixed-width column specs for the raw dly file (per NOAA readme.txt)
 _DLY_COLSPECS = (
     [(0, 11), (11, 15), (15, 17), (17, 21)]
@@ -62,6 +85,45 @@ _DLY_COLSPECS = (
     + [(28 + i * 8, 29 + i * 8) for i in range(31)]   # sflag
 )
 
+# ---------------------------------------------------------------------------
+# Flags
+# ---------------------------------------------------------------------------
+
+def _flag_codes(flags, alphabet):
+    """Code of each flag: 0 blank, 1.. position in ``alphabet``, 15 other letters."""
+    lut = {letter: i + 1 for i, letter in enumerate(alphabet)}
+    lut[""] = 0
+    flags = pd.Series(flags, dtype=object).fillna("").astype(str).str.strip()
+    return flags.map(lut).fillna(_OTHER_FLAG).to_numpy(dtype=np.uint8)
+
+
+def encode_flags(qflag, mflag):
+    """
+    Encode Q-FLAG and M-FLAG letters into one uint8 per value.
+
+    The quality flag is in the low 4 bits (0 when the value passed every
+    NOAA check, else its position in :data:`GHCND_QFLAGS` plus one) and the
+    measurement flag in the high 4 bits (position in :data:`GHCND_MFLAGS`
+    plus one). Unknown letters are coded 15.
+    """
+    q = _flag_codes(qflag, GHCND_QFLAGS)
+    m = _flag_codes(mflag, GHCND_MFLAGS)
+    return (m << 4) | q
+
+
+def decode_flags(codes):
+    """Inverse of :func:`encode_flags`: arrays of (Q-FLAG, M-FLAG) letters, "" when blank."""
+    codes = np.asarray(codes, dtype=np.uint8)
+    q_letters = np.array([""] + list(GHCND_QFLAGS) + ["?"] * (16 - len(GHCND_QFLAGS) - 1), dtype=object)
+    m_letters = np.array([""] + list(GHCND_MFLAGS) + ["?"] * (16 - len(GHCND_MFLAGS) - 1), dtype=object)
+    return q_letters[codes & 0x0F], m_letters[codes >> 4]
+
+
+# Flag code of every byte, for the raw .dly records
+_QFLAG_BYTES = _flag_codes([chr(b) for b in range(256)], GHCND_QFLAGS)
+_MFLAG_BYTES = _flag_codes([chr(b) for b in range(256)], GHCND_MFLAGS)
+
+
 # ---------------------------------------------------------------------------
 # Downloader class
 # ---------------------------------------------------------------------------
@@ -121,15 +183,37 @@ class GHCNDDownloader(ClimateSource):
         variables : list of str
             Variable codes, e.g. ``["TMAX", "TMIN", "PRCP"]``.
         output_dir : str or Path
-            Directory where merged CSV is saved.
+            Directory of the Parquet point store (``output_dir/points``
+            unless ``store_dir`` is given, see :mod:`agrometflow.store`).
+            Stations, variables and period already stored are read back
+            from it unless ``overwrite_points_cache=True``.
         max_workers : int, optional
-            Number of parallel download threads (default: 8).
+            Number of parallel download threads (default: derived by the
+            shared HTTP client, see :func:`agrometflow.download.get_client`).
         min_years : int, optional
-            When using ``bbox``: skip stations with fewer than this many
-            years of data for **any** of the requested variables.
+            When using ``bbox``: keep the stations whose record of any of the
+            requested variables spans at least this many years of the period,
+            ``min(last, end) - max(first, start)`` (see
+            :func:`agrometflow.climate.ghcnd_metadata.record_years`), with or
+            without ``mirror_dir``.
         convert_units : bool, optional
             If True (default), divide tenths-unit variables by 10 and
             replace missing values (-9999) with NaN.
+        mirror_dir : str or Path, optional
+            Local GHCN-Daily mirror (see
+            :mod:`agrometflow.climate.ghcnd_mirror`). The ``by_year`` files of
+            the period are ingested into it (only the years changed upstream
+            on later runs) and stations or bbox are read from it, without
+            per-station requests nor point store.
+        update_mirror : bool, optional
+            With ``mirror_dir``: check NOAA for new yearly files first
+            (default: True).
+        mirror_elements : list of str, optional
+            With ``mirror_dir``: elements kept at ingest (default: all).
+        keep_flags : bool, optional
+            Keep the NOAA quality and measurement flags of every value in a
+            ``<VAR>_flags`` uint8 column (see :func:`encode_flags`), stored
+            with the values. Default: False.
         """
         try:
             start_date = kwargs["start_date"]
@@ -139,10 +223,32 @@ class GHCNDDownloader(ClimateSource):
         except KeyError as e:
             raise ValueError(f"Missing required argument: {e}")
 
-        max_workers = kwargs.get("max_workers", 8)
+        max_workers = get_client().worker_count(GHCND_CSV_BASE, kwargs.get("max_workers"))
         convert = kwargs.get("convert_units", True)
+        keep_flags = kwargs.get("keep_flags", False)
         output_dir.mkdir(parents=True, exist_ok=True)
 
+        if kwargs.get("mirror_dir") is not None:
+            mirror = GhcndMirror(kwargs["mirror_dir"], elements=kwargs.get("mirror_elements"))
+            if kwargs.get("update_mirror", True):
+                mirror.update(
+                    range(int(start_date[:4]), int(end_date[:4]) + 1),
+                    stations_url=GHCND_STATIONS_URL,
+                    parse_stations=parse_stations,
+                    max_workers=kwargs.get("max_workers") or 2,
+                    logger=self.logger,
+                )
+            station_ids = kwargs.get("station_ids")
+            if station_ids is None and "bbox" not in kwargs:
+                raise ValueError("Provide either 'station_ids' or 'bbox'")
+            self.data = _read_mirror(
+                mirror, variables, start_date, end_date, convert,
+                station_ids=station_ids, bbox=kwargs.get("bbox"), min_years=kwargs.get("min_years", 0),
+                flags=keep_flags,
+            )
+            self.logger.info(f"Read {len(self.data)} rows from the GHCN-Daily mirror {mirror.root}")
+            return
+
         # -- resolve station list ----------------------------------------
         if "station_ids" in kwargs:
             station_ids = kwargs["station_ids"]
@@ -163,6 +269,18 @@ class GHCNDDownloader(ClimateSource):
             self.logger.warning("No stations found — nothing to download.")
             return
 
+        store = PointStore(kwargs.get("store_dir", output_dir / "points"))
+        source = _store_source(convert)
+        columns = variables + ([f"{v}{FLAGS_SUFFIX}" for v in variables] if keep_flags else [])
+        if not kwargs.get("overwrite_points_cache", False) and store.covers(
+            source, columns, station_ids, start_date, end_date
+        ):
+            self.logger.info(f"Using stored station data: {store.root}")
+            self.data = _restore_flags(
+                store.read(source, columns, start_date, end_date, ids=station_ids, time_col="date", id_col="station")
+            )
+            return
+
         stations_df = self.get_stations()
         metadata_cols = ["station_id", "lat", "lon", "elevation"]
         station_meta = (
@@ -180,7 +298,8 @@ class GHCNDDownloader(ClimateSource):
             future_to_sid = {
                 executor.submit(
                     _fetch_station_csv,
-                    sid, start_date, end_date, variables, convert, self.logger, station_meta_map.get(sid)
+                    sid, start_date, end_date, variables, convert, self.logger, station_meta_map.get(sid),
+                    keep_flags,
                 ): sid
                 for sid in station_ids
             }
@@ -208,12 +327,19 @@ class GHCNDDownloader(ClimateSource):
         merged = pd.concat(all_frames, ignore_index=True)
         self.data = merged
 
-        # Save merged CSV
-        start_tag = start_date.replace("-", "")
-        end_tag = end_date.replace("-", "")
-        out_file = output_dir / f"ghcnd_{start_tag}_{end_tag}.csv"
-        merged.to_csv(out_file, index=False)
-        self.logger.info(f"Saved {len(merged)} rows → {out_file}")
+        # Append to the point store
+        stored = [v for v in columns if v in merged.columns]
+        store.write(
+            source,
+            merged,
+            variables=stored,
+            time_col="date",
+            id_col="station",
+            attrs=["elevation"],
+            start=start_date,
+            end=end_date,
+        )
+        self.logger.info(f"Stored {len(merged)} rows → {store.root}")
 
     def extract(
         self,
@@ -239,17 +365,60 @@ class GHCNDDownloader(ClimateSource):
             If True, prepare data for quality control by adding Year, Month, Day
             columns and standardizing variable names (TMAX→Tx, TMIN→Tn, etc.).
             Requires at least one variable in ``variables``.
+        store_dir : str or Path, optional
+            Parquet point store to read instead of the in-memory data
+            (date and station filters are pushed down to the files).
+        mirror_dir : str or Path, optional
+            Local GHCN-Daily mirror to read (``station_ids`` or ``bbox``,
+            see :meth:`download`).
+        convert_units : bool, optional
+            With ``store_dir``: read the converted (default) or raw values.
         source : str or Path, optional
             Path to an existing CSV to load instead of using in-memory data.
         station_ids : list of str, optional
             Keep only these station IDs.
+        keep_flags : bool, optional
+            With ``store_dir`` or ``mirror_dir``: read the ``<VAR>_flags``
+            columns too (see :meth:`download`). Flag columns of the data are
+            kept with their variable; in long format they become a ``flags``
+            column and with ``qc_format`` they are renamed after the QC name
+            of the variable (``Tx_flags``...), as read by
+            :func:`agrometflow.dataquality.qc.run_qc_pipeline`.
         """
         source = kwargs.get("source")
-        if self.data is None and source is None:
-            raise ValueError("No data available. Run download() first or pass source=<path>.")
-
-        if source is not None:
-            df = pd.read_csv(source, parse_dates=["date"])
+        store_dir = kwargs.get("store_dir")
+        mirror_dir = kwargs.get("mirror_dir")
+        if self.data is None and source is None and store_dir is None and mirror_dir is None:
+            raise ValueError("No data available. Run download() first or pass store_dir=<path>.")
+
+        if mirror_dir is not None:
+            df = _read_mirror(
+                GhcndMirror(mirror_dir),
+                variables,
+                start_date,
+                end_date,
+                kwargs.get("convert_units", True),
+                station_ids=kwargs.get("station_ids"),
+                bbox=kwargs.get("bbox"),
+                flags=kwargs.get("keep_flags", False),
+            )
+        elif store_dir is not None:
+            columns = variables
+            if variables and kwargs.get("keep_flags", False):
+                columns = variables + [f"{v}{FLAGS_SUFFIX}" for v in variables]
+            df = _restore_flags(
+                PointStore(store_dir).read(
+                    _store_source(kwargs.get("convert_units", True)),
+                    columns,
+                    start_date,
+                    end_date,
+                    ids=kwargs.get("station_ids"),
+                    time_col="date",
+                    id_col="station",
+                )
+            )
+        elif source is not None:
+            df = _restore_flags(pd.read_csv(source, parse_dates=["date"]))
         else:
             df = self.data.copy()
             df["date"] = pd.to_datetime(df["date"])
@@ -265,11 +434,18 @@ class GHCNDDownloader(ClimateSource):
         if variables:
             keep = ["date", "station", "lat", "lon", "elevation"]
             keep += [v for v in variables if v in df.columns]
+            keep += [f"{v}{FLAGS_SUFFIX}" for v in variables if f"{v}{FLAGS_SUFFIX}" in df.columns]
             df = df[[c for c in keep if c in df.columns]]
 
         if as_long:
             id_vars = [c for c in ["date", "station", "lat", "lon", "elevation"] if c in df.columns]
-            df = df.melt(id_vars=id_vars, var_name="variable", value_name="value")
+            flag_cols = [c for c in df.columns if c.endswith(FLAGS_SUFFIX)]
+            value_cols = [c for c in df.columns if c not in id_vars and c not in flag_cols]
+            long = df.melt(id_vars=id_vars, value_vars=value_cols, var_name="variable", value_name="value")
+            if flag_cols:
+                flags = df.reindex(columns=[f"{v}{FLAGS_SUFFIX}" for v in value_cols], fill_value=0)
+                long["flags"] = flags.to_numpy(dtype=np.uint8).ravel(order="F")
+            df = long
 
         # Prepare for QC: add date parts (Year, Month, Day) and standardize variable names
         if qc_format:
@@ -301,10 +477,13 @@ class GHCNDDownloader(ClimateSource):
                 qc_var_name = var_mapping.get(var_name, var_name)
                 rename_dict[var_name] = qc_var_name
                 qc_var_names.append(qc_var_name)
+                if f"{var_name}{FLAGS_SUFFIX}" in df.columns:
+                    rename_dict[f"{var_name}{FLAGS_SUFFIX}"] = f"{qc_var_name}{FLAGS_SUFFIX}"
+                    qc_var_names.append(f"{qc_var_name}{FLAGS_SUFFIX}")
             
             df = df.rename(columns=rename_dict)
             
-            # Keep only required columns for QC (station + date parts + all renamed variables)
+            # Keep only required columns for QC (station + date parts + all renamed variables and flags)
             keep_cols = ["station", "Year", "Month", "Day"] + qc_var_names
             df = df[[c for c in keep_cols if c in df.columns]]
 
@@ -318,6 +497,10 @@ class GHCNDDownloader(ClimateSource):
         """
         Load and return the GHCN-Daily station metadata table.
 
+        The table is cached on disk and revalidated with NOAA at most once a
+        day (see :mod:`agrometflow.climate.ghcnd_metadata`);
+        ``force_reload=True`` revalidates it now.
+
         Returns
         -------
         pd.DataFrame
@@ -326,22 +509,7 @@ class GHCNDDownloader(ClimateSource):
         if self._stations is not None and not force_reload:
             return self._stations
 
-        self.logger.info("Fetching GHCN-Daily station list …")
-        resp = requests.get(GHCND_STATIONS_URL, timeout=60)
-        resp.raise_for_status()
-
-        colspecs = [(0, 11), (12, 20), (21, 30), (31, 37), (41, 71)]
-        names = ["station_id", "lat", "lon", "elevation", "name"]
-        df = pd.read_fwf(
-            io.StringIO(resp.text),
-            colspecs=colspecs,
-            header=None,
-            names=names,
-        )
-        df["lat"] = pd.to_numeric(df["lat"], errors="coerce")
-        df["lon"] = pd.to_numeric(df["lon"], errors="coerce")
-        df["elevation"] = pd.to_numeric(df["elevation"], errors="coerce")
-        df["country"] = df["station_id"].str[:2]
+        df = get_metadata().stations(refresh=force_reload)
         self._stations = df
         self.logger.info(f"Loaded {len(df)} stations")
         return df
@@ -367,14 +535,11 @@ class GHCNDDownloader(ClimateSource):
         -------
         pd.DataFrame
         """
-        df = self.get_stations()
-
         if bbox is not None:
-            min_lon, min_lat, max_lon, max_lat = bbox
-            df = df[
-                (df["lat"] >= min_lat) & (df["lat"] <= max_lat)
-                & (df["lon"] >= min_lon) & (df["lon"] <= max_lon)
-            ]
+            df = get_metadata().in_bbox(bbox)
+        else:
+            df = self.get_stations()
+
         if country is not None:
             df = df[df["country"] == country.upper()]
         if name_contains is not None:
@@ -390,23 +555,10 @@ class GHCNDDownloader(ClimateSource):
         Returns
         -------
         pd.DataFrame
-            Columns: station_id, variable, firstyear, lastyear
+            Columns: station_id, lat, lon, variable, firstyear, lastyear
+            (cached like :meth:`get_stations`)
         """
-        self.logger.info("Fetching GHCN-Daily inventory …")
-        resp = requests.get(GHCND_INVENTORY_URL, timeout=120)
-        resp.raise_for_status()
-
-        colspecs = [(0, 11), (12, 20), (21, 30), (31, 35), (36, 40), (41, 45)]
-        names = ["station_id", "lat", "lon", "variable", "firstyear", "lastyear"]
-        df = pd.read_fwf(
-            io.StringIO(resp.text),
-            colspecs=colspecs,
-            header=None,
-            names=names,
-        )
-        df["firstyear"] = pd.to_numeric(df["firstyear"], errors="coerce")
-        df["lastyear"] = pd.to_numeric(df["lastyear"], errors="coerce")
-        return df
+        return get_metadata().inventory()
 
     # ------------------------------------------------------------------
     # Internal helpers
@@ -421,42 +573,98 @@ class GHCNDDownloader(ClimateSource):
         min_years=0,
     ) -> list[str]:
         """Return station IDs inside bbox that cover the requested period."""
-        inventory = self.get_inventory()
-        stations = self.get_stations()
+        started = time.perf_counter()
+        results = get_metadata().find_stations(variables, start_year, end_year, bbox=bbox, min_years=min_years)
+        self.logger.debug(f"Station index query: {(time.perf_counter() - started) * 1000:.2f} ms")
+        return results
 
-        min_lon, min_lat, max_lon, max_lat = bbox
 
-        # Spatial filter on inventory
-        inv = inventory.merge(
-            stations[["station_id", "lat", "lon"]],
-            on="station_id",
-            how="left",
+# ---------------------------------------------------------------------------
+# Module-level helpers (private)
+# ---------------------------------------------------------------------------
+
+def _read_mirror(
+    mirror, variables, start_date, end_date, convert, station_ids=None, bbox=None, min_years=0, flags=False
+):
+    """Wide frame (as :meth:`GHCNDDownloader.download`) of stations or a bbox read from a mirror."""
+    start = pd.to_datetime(start_date) if start_date else None
+    end = pd.to_datetime(end_date) if end_date else None
+    if station_ids is None:
+        station_ids = mirror.find_stations(
+            variables,
+            start.year if start is not None else None,
+            end.year if end is not None else None,
+            bbox=bbox,
+            min_years=min_years,
         )
-        inv = inv[
-            (inv["lat"] >= min_lat) & (inv["lat"] <= max_lat)
-            & (inv["lon"] >= min_lon) & (inv["lon"] <= max_lon)
-        ]
+    columns = ["station", "date", "element", "value"] + (["qflag", "mflag"] if flags else [])
+    long = mirror.read(station_ids, variables, start, end, columns=columns)
+    long = long.rename(
+        columns={
+            "station": "STATION", "date": "DATE", "element": "ELEMENT", "value": "DATA_VALUE",
+            "qflag": "Q_FLAG", "mflag": "M_FLAG",
+        }
+    )
+    long["DATE"] = pd.to_datetime(long["DATE"]).astype("datetime64[ns]")
+    elements = variables or sorted(long["ELEMENT"].unique())
+    wide = _pivot_elements(long, elements, convert)
+    if flags:
+        wide = _add_flag_columns(wide, long, elements)
 
-        # Variable + temporal filter
-        results = set()
-        for var in variables:
-            sub = inv[inv["variable"] == var]
-            # Keep stations whose record overlaps the requested period
-            sub = sub[
-                (sub["firstyear"] <= end_year)
-                & (sub["lastyear"] >= start_year)
-            ]
-            if min_years > 0:
-                overlap = sub["lastyear"].clip(upper=end_year) - sub["firstyear"].clip(lower=start_year)
-                sub = sub[overlap >= min_years]
-            results |= set(sub["station_id"].tolist())
+    meta = mirror.stations()[["station_id", "lat", "lon", "elevation"]].drop_duplicates("station_id")
+    wide = wide.merge(meta.rename(columns={"station_id": "station"}), on="station", how="left")
+    return wide.sort_values(["station", "date"]).reset_index(drop=True)
+
+
+def _pivot_elements(df, variables, convert):
+    """
+    Pivot long GHCN-Daily rows (STATION, DATE, ELEMENT, DATA_VALUE) to one
+    column per element, -9999 being NaN and tenths converted with ``convert``.
+    """
+    df_wide = df.pivot_table(
+        index=["STATION", "DATE"],
+        columns="ELEMENT",
+        values="DATA_VALUE",
+        aggfunc="first",
+    ).reset_index()
+    df_wide.columns.name = None
+    df_wide = df_wide.rename(columns={"STATION": "station", "DATE": "date"})
+    for var in variables:
+        if var in df_wide.columns:
+            df_wide[var] = pd.to_numeric(df_wide[var], errors="coerce")
+            df_wide[var] = df_wide[var].replace(-9999, np.nan)
+            if convert and var in _TENTHS_VARS:
+                df_wide[var] = df_wide[var] / 10.0
+    return df_wide
 
-        return sorted(results)
 
+def _add_flag_columns(df_wide, df, variables):
+    """Add the ``<VAR>_flags`` columns pivoted from the Q_FLAG/M_FLAG of long rows ``df``."""
+    codes = df[["STATION", "DATE", "ELEMENT"]].assign(FLAGS=encode_flags(df["Q_FLAG"], df["M_FLAG"]))
+    flags = codes.pivot_table(index=["STATION", "DATE"], columns="ELEMENT", values="FLAGS", aggfunc="first")
+    flags = flags.reindex(pd.MultiIndex.from_frame(df_wide[["station", "date"]]))
+    for var in sorted(variables):
+        if var not in df_wide.columns:
+            continue
+        if var in flags.columns:
+            df_wide[f"{var}{FLAGS_SUFFIX}"] = flags[var].fillna(0).to_numpy(dtype=np.uint8)
+        else:
+            df_wide[f"{var}{FLAGS_SUFFIX}"] = np.zeros(len(df_wide), dtype=np.uint8)
+    return df_wide
+
+
+def _restore_flags(df):
+    """Flag columns come back as floats from outer merges and CSV files: make them uint8 again."""
+    for column in df.columns:
+        if column.endswith(FLAGS_SUFFIX):
+            df[column] = df[column].fillna(0).astype(np.uint8)
+    return df
+
+
+def _store_source(convert_units):
+    """Store source name: converted and raw values are kept apart."""
+    return "ghcnd" if convert_units else "ghcnd_raw"
 
-# ---------------------------------------------------------------------------
-# Module-level helpers (private)
-# ---------------------------------------------------------------------------
 
 def _fetch_station_csv(
     station_id: str,
@@ -466,6 +674,7 @@ def _fetch_station_csv(
     convert: bool,
     logger,
     station_meta: dict | None = None,
+    flags: bool = False,
 ) -> pd.DataFrame | None:
     """
     Fetch a single station's CSV file from NOAA, parse it, filter by date
@@ -476,25 +685,157 @@ def _fetch_station_csv(
     One row per (station, date, element).
     """
     url = f"{GHCND_CSV_BASE}/{station_id}.csv.gz"
-    for attempt in range(3):
-        try:
-            resp = requests.get(url, timeout=60)
-            if resp.status_code == 404:
-                logger.debug(f"Station {station_id} not found (404)")
-                return None
-            resp.raise_for_status()
-            break
-        except requests.RequestException as exc:
-            if attempt == 2:
-                raise
-            time.sleep(2 ** attempt)
+    resp = get_client().get(url, timeout=60)
+    if resp.status_code == 404:
+        logger.debug(f"Station {station_id} not found (404)")
+        return None
+    resp.raise_for_status()
+
+    try:
+        df_wide = parse_station_csv(resp.content, station_id, start_date, end_date, variables, convert, flags)
+    except (pa.ArrowInvalid, ValueError):
+        # Header variants, wide layout or non YYYYMMDD dates
+        df_wide = _parse_station_csv_legacy(
+            resp.content, station_id, start_date, end_date, variables, convert, logger, flags
+        )
+    if df_wide is None:
+        return None
 
+    return _attach_coordinates(df_wide, station_meta)
+
+
+def _attach_coordinates(df_wide, station_meta):
+    """Attach station coordinates from metadata (best-effort)."""
+    station_meta = station_meta or {}
+    df_wide["lat"] = station_meta.get("lat", np.nan)
+    df_wide["lon"] = station_meta.get("lon", np.nan)
+    df_wide["elevation"] = station_meta.get("elevation", np.nan)
+    return df_wide
+
+
+def parse_station_csv(content, station_id, start_date, end_date, variables, convert=True, flags=False):
+    """
+    Parse a gzipped per-station CSV (long layout) into the wide frame of
+    :meth:`GHCNDDownloader.download`, without the station coordinates.
+
+    The payload is decompressed and parsed block by block; rows outside
+    ``variables`` or [start_date, end_date] are dropped per block, dates are
+    kept as ``YYYYMMDD`` integers and values as int32, then scattered into a
+    dense (day x element) array (the first value of duplicates is kept).
+    With ``flags``, Q-FLAG and M-FLAG are read as dictionaries and kept as
+    ``<VAR>_flags`` uint8 columns (see :func:`encode_flags`).
+
+    Returns ``None`` when no row matches. Raises ``ValueError`` (or
+    ``pyarrow.ArrowInvalid``) when the file is not in the canonical layout.
+    """
+    with pa.input_stream(pa.py_buffer(content), compression="gzip") as stream:
+        first_line = stream.read(256).split(b"\n", 1)[0].decode("ascii", "replace")
+    fields = [f.strip().upper() for f in first_line.split(",")]
+    header = bool(fields) and fields[0] in {"ID", "STATION"}
+    if header and "ELEMENT" not in fields:
+        raise ValueError("Per-station CSV without an ELEMENT column")
+
+    csv_columns = ["ID", "DATE", "ELEMENT", "DATA_VALUE", "M_FLAG", "Q_FLAG", "S_FLAG", "OBS_TIME"]
+    lo = int(pd.Timestamp(start_date).strftime("%Y%m%d"))
+    hi = int(pd.Timestamp(end_date).strftime("%Y%m%d"))
+    elements = pa.array(variables, pa.string())
+    column_types = {"DATE": pa.int32(), "ELEMENT": pa.string(), "DATA_VALUE": pa.int32()}
+    if flags:
+        column_types.update(dict.fromkeys(["Q_FLAG", "M_FLAG"], pa.dictionary(pa.int32(), pa.string())))
+    dates, codes, values, flag_codes = [], [], [], []
+    with pa.input_stream(pa.py_buffer(content), compression="gzip") as stream:
+        reader = pcsv.open_csv(
+            stream,
+            read_options=pcsv.ReadOptions(column_names=csv_columns, skip_rows=int(header), block_size=1 << 22),
+            convert_options=pcsv.ConvertOptions(column_types=column_types, include_columns=list(column_types)),
+        )
+        for batch in reader:
+            code = pc.index_in(batch["ELEMENT"], value_set=elements)
+            keep = pc.and_(
+                pc.is_valid(code),
+                pc.and_(pc.greater_equal(batch["DATE"], lo), pc.less_equal(batch["DATE"], hi)),
+            )
+            dates.append(pc.filter(batch["DATE"], keep).to_numpy(zero_copy_only=False))
+            codes.append(pc.filter(code, keep).to_numpy(zero_copy_only=False))
+            values.append(pc.filter(batch["DATA_VALUE"], keep).to_numpy(zero_copy_only=False))
+            if flags:
+                q = _dictionary_flag_codes(pc.filter(batch["Q_FLAG"], keep), GHCND_QFLAGS)
+                m = _dictionary_flag_codes(pc.filter(batch["M_FLAG"], keep), GHCND_MFLAGS)
+                flag_codes.append((m << 4) | q)
+
+    date = np.concatenate(dates) if dates else np.array([], "int32")
+    if date.size == 0:
+        return None
+
+    # YYYYMMDD → days since epoch
+    months = (date // 10000 - 1970) * 12 + (date // 100 % 100 - 1)
+    day = (months.astype("datetime64[M]").astype("datetime64[D]") + (date % 100 - 1)).astype("int64")
+    return _dense_wide(
+        station_id, day, np.concatenate(codes), np.concatenate(values), variables, convert,
+        np.concatenate(flag_codes) if flags else None,
+    )
+
+
+def _dense_wide(station_id, day, code, value, variables, convert, flag_codes=None):
+    """
+    Wide frame of (day since epoch, element code in ``variables``, raw value)
+    triplets: dense (day x element) pivot keeping the first of duplicated
+    cells, -9999 as NaN, tenths converted with ``convert``, ``<VAR>_flags``
+    columns when ``flag_codes`` are given.
+    """
+    value = value.astype("float64")
+    first_day = day.min()
+    row = day - first_day
+
+    grid = np.full((row.max() + 1, len(variables)), np.nan)
+    cell = row * len(variables) + code
+    cell, first = np.unique(cell, return_index=True)
+    grid.flat[cell] = value[first]
+    seen = np.zeros(len(grid), dtype=bool)
+    seen[row] = True
+    if flag_codes is not None:
+        flag_grid = np.zeros(grid.shape, dtype=np.uint8)
+        flag_grid.flat[cell] = flag_codes[first]
+    present = np.zeros(len(variables), dtype=bool)
+    present[np.unique(code)] = True
+
+    df_wide = pd.DataFrame(
+        {
+            "station": station_id,
+            "date": (np.flatnonzero(seen) + first_day).astype("datetime64[D]").astype("datetime64[ns]"),
+        }
+    )
+    grid = grid[seen]
+    present = sorted(np.flatnonzero(present), key=lambda i: variables[i])
+    for i in present:
+        column = grid[:, i]
+        column[column == -9999] = np.nan
+        if convert and variables[i] in _TENTHS_VARS:
+            column = column / 10.0
+        df_wide[variables[i]] = column
+    if flag_codes is not None:
+        flag_grid = flag_grid[seen]
+        for i in present:
+            df_wide[f"{variables[i]}{FLAGS_SUFFIX}"] = flag_grid[:, i]
+    return df_wide
+
+
+def _dictionary_flag_codes(array, alphabet):
+    """:func:`_flag_codes` of a dictionary-encoded flag column (one lookup per distinct letter)."""
+    array = array.combine_chunks() if isinstance(array, pa.ChunkedArray) else array
+    lut = np.append(_flag_codes(array.dictionary.to_pylist(), alphabet), np.uint8(0))
+    indices = pc.fill_null(array.indices, len(lut) - 1).to_numpy(zero_copy_only=False)
+    return lut[indices]
+
+
+def _parse_station_csv_legacy(content, station_id, start_date, end_date, variables, convert, logger, flags=False):
+    """Tolerant pandas parser of per-station CSV files (any header, long or wide layout)."""
     # Parse gzipped CSV payload.
     # NOAA by-station files can arrive with or without a header line,
     # so we always enforce the canonical 8-column layout.
     csv_columns = ["ID", "DATE", "ELEMENT", "DATA_VALUE", "M_FLAG", "Q_FLAG", "S_FLAG", "OBS_TIME"]
     df = pd.read_csv(
-        io.BytesIO(resp.content),
+        io.BytesIO(content),
         compression="gzip",
         header=None,
         names=csv_columns,
@@ -555,53 +896,213 @@ def _fetch_station_csv(
         if df.empty:
             return None
 
-        # Pivot to wide
-        df_wide = df.pivot_table(
-            index=["STATION", "DATE"],
-            columns="ELEMENT",
-            values="DATA_VALUE",
-            aggfunc="first",
-        ).reset_index()
-        df_wide.columns.name = None
+        # Pivot to wide, -9999 → NaN, tenths → units
+        df_wide = _pivot_elements(df, variables, convert)
+        if flags:
+            df_wide = _add_flag_columns(df_wide, df, variables)
     else:
         # Wide format (some versions of the endpoint)
         df_wide = df.rename(columns={"STATION": "STATION", "DATE": "DATE"})
         keep = ["STATION", "DATE"] + [v for v in variables if v in df_wide.columns]
         df_wide = df_wide[keep]
 
-    # Rename
-    df_wide = df_wide.rename(columns={"STATION": "station", "DATE": "date"})
-
-    # Replace missing value sentinel
-    for var in variables:
-        if var in df_wide.columns:
-            df_wide[var] = pd.to_numeric(df_wide[var], errors="coerce")
-            df_wide[var] = df_wide[var].replace(-9999, np.nan)
-            if convert and var in _TENTHS_VARS:
-                df_wide[var] = df_wide[var] / 10.0
+        # Rename
+        df_wide = df_wide.rename(columns={"STATION": "station", "DATE": "date"})
 
-    # Attach station coordinates from metadata (best-effort)
-    station_meta = station_meta or {}
-    df_wide["lat"] = station_meta.get("lat", np.nan)
-    df_wide["lon"] = station_meta.get("lon", np.nan)
-    df_wide["elevation"] = station_meta.get("elevation", np.nan)
+        # Replace missing value sentinel
+        for var in variables:
+            if var in df_wide.columns:
+                df_wide[var] = pd.to_numeric(df_wide[var], errors="coerce")
+                df_wide[var] = df_wide[var].replace(-9999, np.nan)
+                if convert and var in _TENTHS_VARS:
+                    df_wide[var] = df_wide[var] / 10.0
 
     return df_wide
 
 
+# ---------------------------------------------------------------------------
+# Raw .dly files (ghcnd_all archive)
+# ---------------------------------------------------------------------------
+
+_DLY_WIDTH = _DLY_COLSPECS[-1][1]
+_DLY_VALUES = np.array([np.arange(start, end) for start, end in _DLY_COLSPECS[4:35]])
+_DLY_MFLAGS = np.array([start for start, _ in _DLY_COLSPECS[35:66]])
+_DLY_QFLAGS = np.array([start for start, _ in _DLY_COLSPECS[66:97]])
+
+
+def _dly_records(buffer):
+    """(records x 269) uint8 array of a .dly buffer; a strided view when all lines have the same length."""
+    buffer = buffer if isinstance(buffer, np.ndarray) else np.frombuffer(buffer, dtype=np.uint8)
+    ends = np.flatnonzero(buffer == ord("\n"))
+    if buffer.size and buffer[-1] != ord("\n"):
+        ends = np.append(ends, buffer.size)
+    starts = np.concatenate([[0], ends[:-1] + 1]) if ends.size else ends
+    lengths = ends - starts
+    starts = starts[lengths > 1]  # blank lines, lone "\r"
+    if starts.size == 0:
+        return np.empty((0, _DLY_WIDTH), dtype=np.uint8)
+    if (lengths[lengths > 1] < _DLY_WIDTH).any():
+        raise ValueError(f"Truncated .dly record (expected {_DLY_WIDTH} characters per line)")
+    stride = starts[1] - starts[0] if starts.size > 1 else _DLY_WIDTH
+    if starts[0] == 0 and (np.diff(starts) == stride).all():
+        return np.lib.stride_tricks.as_strided(
+            buffer, shape=(starts.size, _DLY_WIDTH), strides=(stride, 1), writeable=False
+        )
+    return buffer[starts[:, None] + np.arange(_DLY_WIDTH)]
+
+
+def _dly_integers(digits):
+    """Right-aligned signed integers of fixed-width ASCII fields (last axis)."""
+    width = digits.shape[-1]
+    is_digit = (digits >= ord("0")) & (digits <= ord("9"))
+    magnitude = (np.where(is_digit, digits - ord("0"), 0).astype("int32") * 10 ** np.arange(width - 1, -1, -1)).sum(-1)
+    return np.where((digits == ord("-")).any(-1), -magnitude, magnitude)
+
+
+def parse_dly(content, station_id=None, start_date=None, end_date=None, variables=None, convert=True, flags=False):
+    """
+    Parse a raw ``.dly`` station file (one line per station, month and
+    element, 31 fixed-width days, see ``_DLY_COLSPECS``) into the wide frame
+    of :func:`parse_station_csv`.
+
+    The records are sliced as a (lines x 269) byte array: element, year and
+    month are decoded for every line first, the lines outside ``variables``
+    (default: :data:`GHCND_VARIABLES`) or the period are dropped, and only
+    then are the 31 values (and flags) of the remaining lines decoded. Days
+    past the end of the month and -9999 values are dropped, as they are
+    absent from the per-station CSV files.
+
+    ``content`` is a bytes-like object or a uint8 array (e.g. a memory-mapped
+    file, see :func:`read_dly`); ``station_id`` defaults to the ID of the
+    first record. Returns ``None`` when no value matches. Raises
+    ``ValueError`` on truncated records.
+    """
+    records = _dly_records(content)
+    if len(records) == 0:
+        return None
+    (id_start, id_end), (y_start, y_end), (m_start, m_end), (e_start, e_end) = _DLY_COLSPECS[:4]
+    if station_id is None:
+        station_id = bytes(records[0, id_start:id_end]).decode("ascii").strip()
+    variables = list(variables) if variables is not None else list(GHCND_VARIABLES)
+    if not variables:
+        return None
+
+    # Line filters: element, then month range.
+    element = np.ascontiguousarray(records[:, e_start:e_end]).view(f"S{e_end - e_start}").ravel()
+    wanted = np.array([v.encode("ascii") for v in variables], dtype=element.dtype)
+    order = np.argsort(wanted)
+    position = np.minimum(np.searchsorted(wanted[order], element), len(wanted) - 1)
+    code = order[position]
+    month = (_dly_integers(records[:, y_start:y_end]) - 1970) * 12 + _dly_integers(records[:, m_start:m_end]) - 1
+    keep = wanted[code] == element
+    lo = pd.Timestamp(start_date) if start_date is not None else None
+    hi = pd.Timestamp(end_date) if end_date is not None else None
+    if lo is not None:
+        keep &= month >= (lo.year - 1970) * 12 + lo.month - 1
+    if hi is not None:
+        keep &= month <= (hi.year - 1970) * 12 + hi.month - 1
+    if not keep.any():
+        return None
+    records, code, month = records[keep], code[keep], month[keep]
+
+    # Day cells of the kept lines.
+    values = _dly_integers(records[:, _DLY_VALUES])
+    first_day = month.astype("datetime64[M]").astype("datetime64[D]").astype("int64")
+    month_days = (month + 1).astype("datetime64[M]").astype("datetime64[D]").astype("int64") - first_day
+    offset = np.arange(_DLY_VALUES.shape[0])
+    day = first_day[:, None] + offset
+    valid = (offset < month_days[:, None]) & (values != -9999)
+    if lo is not None:
+        valid &= day >= lo.to_datetime64().astype("datetime64[D]").astype("int64")
+    if hi is not None:
+        valid &= day <= hi.to_datetime64().astype("datetime64[D]").astype("int64")
+    if not valid.any():
+        return None
+    flag_codes = None
+    if flags:
+        flag_codes = (_MFLAG_BYTES[records[:, _DLY_MFLAGS]] << 4) | _QFLAG_BYTES[records[:, _DLY_QFLAGS]]
+        flag_codes = flag_codes[valid]
+    code = np.broadcast_to(code[:, None], valid.shape)[valid]
+    return _dense_wide(station_id, day[valid], code, values[valid], variables, convert, flag_codes)
+
+
+def read_dly(path, start_date=None, end_date=None, variables=None, convert=True, flags=False, station_meta=None):
+    """
+    Read a ``.dly`` file (``<station_id>.dly``, gzipped when it ends in
+    ``.gz``) into the wide frame of :meth:`GHCNDDownloader.download`.
+
+    Plain files are memory-mapped: only the pages of the kept records are
+    copied. ``station_meta`` (lat, lon, elevation) is attached as by the
+    by-station download. Returns ``None`` when no value matches.
+    """
+    path = Path(path)
+    station_id = path.name.split(".")[0]
+    if path.suffix == ".gz":
+        with gzip.open(path, "rb") as f:
+            content = f.read()
+    elif path.stat().st_size == 0:
+        return None
+    else:
+        content = np.memmap(path, dtype=np.uint8, mode="r")
+    df_wide = parse_dly(content, station_id, start_date, end_date, variables, convert, flags)
+    if df_wide is None:
+        return None
+    return _attach_coordinates(df_wide, station_meta)
+
+
+def iter_dly_archive(
+    archive, variables=None, start_date=None, end_date=None, station_ids=None, convert=True, flags=False,
+    stations=None,
+):
+    """
+    Yield the wide frame of every station of a ``ghcnd_all`` archive.
+
+    ``archive`` is either the ``ghcnd_all.tar.gz`` file, read as a stream
+    (members are decompressed once, in archive order), or a folder of
+    extracted ``.dly`` files (each one memory-mapped by :func:`read_dly`).
+    Only ``station_ids`` are parsed when given; stations without matching
+    values are skipped. ``stations`` (the table of
+    :meth:`GHCNDDownloader.get_stations`) supplies lat/lon/elevation.
+    """
+    wanted = set(station_ids) if station_ids is not None else None
+    meta = {}
+    if stations is not None:
+        meta = (
+            stations[["station_id", "lat", "lon", "elevation"]]
+            .drop_duplicates("station_id").set_index("station_id").to_dict(orient="index")
+        )
+    archive = Path(archive)
+    if archive.is_dir():
+        for path in sorted(archive.glob("*.dly")):
+            if wanted is not None and path.stem not in wanted:
+                continue
+            df_wide = read_dly(path, start_date, end_date, variables, convert, flags, meta.get(path.stem))
+            if df_wide is not None:
+                yield df_wide
+        return
+
+    with tarfile.open(archive, mode="r|*") as tar:
+        for member in tar:
+            name = member.name.rsplit("/", 1)[-1]
+            if not member.isfile() or not name.endswith(".dly"):
+                continue
+            station_id = name[: -len(".dly")]
+            if wanted is not None and station_id not in wanted:
+                continue
+            content = tar.extractfile(member).read()
+            df_wide = parse_dly(content, station_id, start_date, end_date, variables, convert, flags)
+            if df_wide is not None:
+                yield _attach_coordinates(df_wide, meta.get(station_id))
+
+
 def fetch_station_metadata(station_ids: list[str]) -> pd.DataFrame:
     """
     Convenience function: fetch metadata for a list of station IDs
-    from the NOAA station list.
+    from the (cached) NOAA station list.
 
     Returns
     -------
     pd.DataFrame  with columns: station_id, lat, lon, elevation, name, country
     """
-    resp = requests.get(GHCND_STATIONS_URL, timeout=60)
-    resp.raise_for_status()
-    colspecs = [(0, 11), (12, 20), (21, 30), (31, 37), (41, 71)]
-    names = ["station_id", "lat", "lon", "elevation", "name"]
-    df = pd.read_fwf(io.StringIO(resp.text), colspecs=colspecs, header=None, names=names)
-    df["country"] = df["station_id"].str[:2]
+    df = get_metadata().stations()
     return df[df["station_id"].isin(station_ids)].reset_index(drop=True)
@@ -0,0 +1,318 @@
+"""
+On-disk cache and indexes of the GHCN-Daily station and inventory tables.
+
+``ghcnd-stations.txt`` and ``ghcnd-inventory.txt`` are fetched through the
+raw cache (:mod:`agrometflow.cache`, ETag/Last-Modified revalidation), parsed
+once and kept as Parquet tables next to it::
+
+    <cache root>/derived/ghcnd/stations.parquet   sorted by 1° grid cell
+    <cache root>/derived/ghcnd/inventory.parquet  sorted by station, element
+    <cache root>/derived/ghcnd/<table>.json       source blob and last check
+
+The NOAA files are revalidated at most once per ``ttl`` seconds; a ``304``
+or an identical blob keeps the parsed table. Other processes sharing the
+cache read the same tables.
+
+Both tables are stored in the order of their index:
+
+- stations are grouped by grid cell (``cell``), so a bounding box maps to
+  one contiguous run of rows per band of latitude (binary searches), then
+  to an exact coordinate test on those rows only;
+- inventory rows are grouped by station row (``station_pos``), so the
+  records of the stations of a bbox are found from per-station offsets and
+  the coverage test is a vectorised interval test on ``firstyear`` /
+  ``lastyear`` of those records only.
+
+Station searches are rectangle queries, which the grid order answers from the
+stored table itself: nothing is built when a process loads it, and the rows of
+a bbox come out as contiguous slices. A ``scipy.spatial.cKDTree`` suits
+nearest-neighbour and radius queries, but it would have to be rebuilt in every
+process and would still need a coordinate test on its candidates.
+"""
+
+import io
+import json
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from agrometflow.cache import get_cache
+from agrometflow.download import _atomic_file
+
+
+#: Station metadata (fixed-width text)
+GHCND_STATIONS_URL = "https://www.ncei.noaa.gov/pub/data/ghcn/daily/ghcnd-stations.txt"
+
+#: Full station inventory (fixed-width text)
+GHCND_INVENTORY_URL = "https://www.ncei.noaa.gov/pub/data/ghcn/daily/ghcnd-inventory.txt"
+
+#: Seconds between two revalidations of the NOAA files.
+DEFAULT_TTL = 24 * 3600
+
+#: Size of the grid cells of the station index (degrees).
+CELL_SIZE = 1.0
+
+_N_LON_CELLS = int(round(360 / CELL_SIZE))
+_N_LAT_CELLS = int(round(180 / CELL_SIZE))
+
+
+def parse_stations(text):
+    """Parse ``ghcnd-stations.txt`` (station_id, lat, lon, elevation, name, country)."""
+    colspecs = [(0, 11), (12, 20), (21, 30), (31, 37), (41, 71)]
+    names = ["station_id", "lat", "lon", "elevation", "name"]
+    df = pd.read_fwf(
+        io.StringIO(text),
+        colspecs=colspecs,
+        header=None,
+        names=names,
+    )
+    df["lat"] = pd.to_numeric(df["lat"], errors="coerce")
+    df["lon"] = pd.to_numeric(df["lon"], errors="coerce")
+    df["elevation"] = pd.to_numeric(df["elevation"], errors="coerce")
+    df["country"] = df["station_id"].str[:2]
+    return df
+
+
+def parse_inventory(text):
+    """Parse ``ghcnd-inventory.txt`` (station_id, lat, lon, variable, firstyear, lastyear)."""
+    colspecs = [(0, 11), (12, 20), (21, 30), (31, 35), (36, 40), (41, 45)]
+    names = ["station_id", "lat", "lon", "variable", "firstyear", "lastyear"]
+    df = pd.read_fwf(
+        io.StringIO(text),
+        colspecs=colspecs,
+        header=None,
+        names=names,
+    )
+    df["firstyear"] = pd.to_numeric(df["firstyear"], errors="coerce")
+    df["lastyear"] = pd.to_numeric(df["lastyear"], errors="coerce")
+    return df
+
+
+def grid_cell(lat, lon):
+    """Index cell of coordinates (``-1`` where unknown)."""
+    lat = np.asarray(lat, dtype="float64")
+    lon = np.asarray(lon, dtype="float64")
+    row = np.clip(np.floor((lat + 90) / CELL_SIZE), 0, _N_LAT_CELLS - 1)
+    col = np.clip(np.floor((lon + 180) / CELL_SIZE), 0, _N_LON_CELLS - 1)
+    cell = row * _N_LON_CELLS + col
+    return np.where(np.isfinite(cell), cell, -1).astype("int32")
+
+
+def record_years(first, last, start_year=None, end_year=None):
+    """
+    Length in years of the part of a ``first``-``last`` record within
+    [start_year, end_year]: ``min(last, end_year) - max(first, start_year)``.
+
+    This is the measure compared with ``min_years`` by station searches,
+    from the inventory as from a mirror index; a record of 2000 to 2005
+    counts 5 years.
+    """
+    first = np.asarray(first)
+    last = np.asarray(last)
+    if start_year is not None:
+        first = np.maximum(first, start_year)
+    if end_year is not None:
+        last = np.minimum(last, end_year)
+    return last - first
+
+
+class GhcndMetadata:
+    """
+    Cached, indexed GHCN-Daily station and inventory tables (see the module
+    docstring).
+
+    Parameters
+    ----------
+    root : str or Path, optional
+        Folder of the parsed tables (default: ``derived/ghcnd`` in the raw
+        cache folder).
+    ttl : float, optional
+        Seconds between two revalidations of the NOAA files.
+    cache : RawCache, optional
+        Raw cache used to fetch them (default: :func:`agrometflow.cache.get_cache`).
+    """
+
+    def __init__(self, root=None, ttl=DEFAULT_TTL, cache=None):
+        self._cache = cache
+        self.root = Path(root) if root is not None else self.cache.root / "derived" / "ghcnd"
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._loaded = {}
+
+    @property
+    def cache(self):
+        return self._cache or get_cache()
+
+    # ------------------------------------------------------------------
+    # Tables
+    # ------------------------------------------------------------------
+
+    def _state(self, name):
+        try:
+            with open(self.root / f"{name}.json", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_state(self, name, state):
+        with _atomic_file(self.root / f"{name}.json") as f:
+            f.write(json.dumps(state).encode("utf-8"))
+
+    def _table(self, name, url, build, index, refresh=False, depends=None):
+        path = self.root / f"{name}.parquet"
+        with self._lock:
+            state = self._state(name)
+            fresh = (
+                path.exists()
+                and state.get("depends") == depends
+                and time.time() - state.get("checked", 0) < self.ttl
+            )
+            if refresh or not fresh:
+                self.root.mkdir(parents=True, exist_ok=True)
+                blob = self.cache.fetch(url, pin=True, timeout=120)
+                try:
+                    if blob.name != state.get("sha256") or state.get("depends") != depends or not path.exists():
+                        table = build(blob.read_text(encoding="utf-8", errors="replace"))
+                        with _atomic_file(path) as f:
+                            pq.write_table(pa.Table.from_pandas(table, preserve_index=False), f)
+                finally:
+                    self.cache.release(blob)
+                state = {"url": url, "sha256": blob.name, "depends": depends, "checked": time.time()}
+                self._write_state(name, state)
+
+            stamp = path.stat().st_mtime_ns
+            loaded = self._loaded.get(name)
+            if loaded is None or loaded[0] != stamp:
+                table = pq.read_table(path).to_pandas()
+                loaded = (stamp, table, index(table))
+                self._loaded[name] = loaded
+            return loaded[1], loaded[2]
+
+    def _stations_table(self, refresh=False):
+        return self._table("stations", GHCND_STATIONS_URL, _build_stations, _stations_index, refresh)
+
+    def _inventory_table(self, refresh=False):
+        # Inventory rows point to station rows: rebuilt when the stations change.
+        stations, _ = self._stations_table(refresh)
+        return self._table(
+            "inventory",
+            GHCND_INVENTORY_URL,
+            lambda text: _build_inventory(text, stations),
+            _inventory_index,
+            refresh,
+            depends=self._state("stations").get("sha256"),
+        )
+
+    def stations(self, refresh=False):
+        """Station table (station_id, lat, lon, elevation, name, country), in grid order."""
+        return self._stations_table(refresh)[0].drop(columns="cell")
+
+    def inventory(self, refresh=False):
+        """Inventory table (station_id, lat, lon, variable, firstyear, lastyear)."""
+        return self._inventory_table(refresh)[0].drop(columns="station_pos")
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def _bbox_rows(self, bbox):
+        _, index = self._stations_table()
+        min_lon, min_lat, max_lon, max_lat = bbox
+        low = grid_cell([min_lat], [min_lon])[0]
+        high = grid_cell([max_lat], [max_lon])[0]
+        rows = np.arange(low // _N_LON_CELLS, high // _N_LON_CELLS + 1)
+        starts = np.searchsorted(index["cell"], rows * _N_LON_CELLS + low % _N_LON_CELLS, side="left")
+        ends = np.searchsorted(index["cell"], rows * _N_LON_CELLS + high % _N_LON_CELLS, side="right")
+        candidates = np.concatenate([np.arange(s, e) for s, e in zip(starts, ends)] or [np.array([], int)])
+        lat = index["lat"][candidates]
+        lon = index["lon"][candidates]
+        inside = (lat >= min_lat) & (lat <= max_lat) & (lon >= min_lon) & (lon <= max_lon)
+        return candidates[inside]
+
+    def in_bbox(self, bbox):
+        """Stations inside ``bbox`` (min_lon, min_lat, max_lon, max_lat)."""
+        return self.stations().iloc[self._bbox_rows(bbox)].reset_index(drop=True)
+
+    def find_stations(self, elements, start_year, end_year, bbox=None, min_years=0):
+        """
+        IDs of the stations (inside ``bbox`` when given) whose record of any
+        of ``elements`` overlaps [start_year, end_year], by at least
+        ``min_years`` years when given (see :func:`record_years`).
+        """
+        _, stations = self._stations_table()
+        _, inventory = self._inventory_table()
+        offsets = inventory["offsets"]
+        if bbox is not None:
+            # Records of the stations inside the bbox, from their offsets.
+            positions = self._bbox_rows(bbox)
+            positions = positions[positions < len(offsets) - 1]
+            starts, counts = offsets[positions], offsets[positions + 1] - offsets[positions]
+            rows = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+        else:
+            rows = np.arange(offsets[0], offsets[-1])
+
+        codes = [inventory["codes"][e] for e in elements if e in inventory["codes"]]
+        first = inventory["firstyear"][rows]
+        last = inventory["lastyear"][rows]
+        keep = np.isin(inventory["variable"][rows], codes) & (first <= end_year) & (last >= start_year)
+        if min_years > 0:
+            keep &= record_years(first, last, start_year, end_year) >= min_years
+        found = np.unique(inventory["station_pos"][rows[keep]])
+        return sorted(stations["station_id"][found].tolist())
+
+
+def _build_stations(text):
+    df = parse_stations(text)
+    df["cell"] = grid_cell(df["lat"], df["lon"])
+    return df.sort_values(["cell", "lat", "lon"], kind="stable").reset_index(drop=True)
+
+
+def _build_inventory(text, stations):
+    df = parse_inventory(text)
+    position = pd.Series(np.arange(len(stations), dtype="int32"), index=stations["station_id"])
+    position = position[~position.index.duplicated()]
+    df["station_pos"] = df["station_id"].map(position).fillna(-1).astype("int32")
+    df["variable"] = df["variable"].astype(str)
+    return df.sort_values(["station_pos", "variable"], kind="stable").reset_index(drop=True)
+
+
+def _stations_index(df):
+    return {
+        "cell": df["cell"].to_numpy(),
+        "lat": df["lat"].to_numpy(),
+        "lon": df["lon"].to_numpy(),
+        "station_id": df["station_id"].to_numpy(dtype=object),
+    }
+
+
+def _inventory_index(df):
+    variable = pd.Categorical(df["variable"])
+    station_pos = df["station_pos"].to_numpy()
+    n_stations = int(station_pos.max()) + 1 if len(df) else 0
+    return {
+        # rows of station i: offsets[i] to offsets[i + 1] (unknown stations come first)
+        "offsets": np.searchsorted(station_pos, np.arange(n_stations + 1)),
+        "codes": {name: code for code, name in enumerate(variable.categories)},
+        "variable": variable.codes,
+        "firstyear": df["firstyear"].to_numpy(dtype="float64"),
+        "lastyear": df["lastyear"].to_numpy(dtype="float64"),
+        "station_pos": station_pos,
+    }
+
+
+_instances = {}
+_instances_lock = threading.Lock()
+
+
+def get_metadata():
+    """Return the :class:`GhcndMetadata` of the current raw cache, created on first use."""
+    root = get_cache().root / "derived" / "ghcnd"
+    with _instances_lock:
+        if root not in _instances:
+            _instances[root] = GhcndMetadata(root)
+        return _instances[root]
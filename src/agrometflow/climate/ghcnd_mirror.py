@@ -0,0 +1,350 @@
+"""
+Local mirror of GHCN-Daily built from the bulk ``by_year`` files.
+
+Instead of one request per station (``by_station/<id>.csv.gz``), every
+``by_year/<yyyy>.csv.gz`` file is ingested once into a columnar store::
+
+    <root>/year=<yyyy>/data.parquet   station, date, element, value, mflag, qflag, sflag
+    <root>/index.parquet              station, element, year, first, last, count
+    <root>/stations.parquet           station metadata (ghcnd-stations.txt)
+    <root>/manifest.json              ETag/Last-Modified of every ingested file
+
+Rows of a year are sorted by (station, element, date) and written in small
+row groups, so a query on a few stations only reads the row groups holding
+them (the Parquet statistics prune the rest). The index answers coverage
+and bbox queries without touching the data files.
+
+Updates are incremental: each yearly file is requested with the validators
+recorded at its last ingest and only years changed upstream (typically the
+current one) are downloaded and rewritten.
+"""
+
+import json
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pcsv
+import pyarrow.dataset as pads
+import pyarrow.parquet as pq
+
+from agrometflow.climate.ghcnd_metadata import record_years
+from agrometflow.download import _atomic_file, get_client
+
+
+#: Yearly files of every station
+GHCND_BY_YEAR_BASE = "https://www.ncei.noaa.gov/pub/data/ghcn/daily/by_year"
+
+#: Rows per Parquet row group of the yearly files.
+ROW_GROUP_ROWS = 64 * 1024
+
+_CSV_COLUMNS = ["station", "date", "element", "value", "mflag", "qflag", "sflag", "obs_time"]
+_CSV_TYPES = {
+    "station": pa.string(),
+    "date": pa.timestamp("s"),
+    "element": pa.string(),
+    "value": pa.int32(),
+    "mflag": pa.string(),
+    "qflag": pa.string(),
+    "sflag": pa.string(),
+}
+_STORED_TYPES = dict(_CSV_TYPES, date=pa.date32())
+_SORT_KEYS = [("station", "ascending"), ("element", "ascending"), ("date", "ascending")]
+
+
+def read_by_year_csv(path, elements=None):
+    """
+    Parse a ``by_year`` CSV (gzipped or not) into an Arrow table sorted by
+    station, element and date, keeping only ``elements`` when given.
+    """
+    table = pcsv.read_csv(
+        path,
+        read_options=pcsv.ReadOptions(column_names=_CSV_COLUMNS),
+        convert_options=pcsv.ConvertOptions(
+            column_types=_CSV_TYPES,
+            timestamp_parsers=["%Y%m%d"],
+            include_columns=list(_CSV_TYPES),
+            strings_can_be_null=True,
+        ),
+    )
+    table = table.set_column(1, "date", table["date"].cast(pa.date32()))
+    if elements:
+        table = table.filter(pc.is_in(table["element"], value_set=pa.array(sorted(elements))))
+    return table.sort_by(_SORT_KEYS)
+
+
+def _year_index(table, year):
+    index = table.group_by(["station", "element"]).aggregate(
+        [("date", "min"), ("date", "max"), ("value", "count")]
+    )
+    index = index.rename_columns(["station", "element", "first", "last", "count"])
+    return index.append_column("year", pa.array([year] * index.num_rows, pa.int16()))
+
+
+def _fetch_if_changed(url, path, validators, timeout=None):
+    """
+    Stream ``url`` to ``path`` unless it matches ``validators``.
+
+    Returns the new validators, ``None`` when unchanged (304) and
+    ``False`` when the file does not exist (404).
+    """
+    headers = {}
+    if validators.get("etag"):
+        headers["If-None-Match"] = validators["etag"]
+    if validators.get("last_modified"):
+        headers["If-Modified-Since"] = validators["last_modified"]
+
+    def consume(response):
+        if response.status_code == 304:
+            return None, 0
+        if response.status_code == 404:
+            return False, 0
+        response.raise_for_status()
+        size = 0
+        with _atomic_file(path) as f:
+            for chunk in response.iter_content(chunk_size=1024 * 1024):
+                f.write(chunk)
+                size += len(chunk)
+        return {
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "size": size,
+        }, size
+
+    options = {"timeout": timeout} if timeout is not None else {}
+    return get_client().request(url, consume, headers=headers, **options)
+
+
+class GhcndMirror:
+    """
+    Columnar local mirror of GHCN-Daily (see the module docstring).
+
+    Parameters
+    ----------
+    root : str or Path
+        Folder of the mirror.
+    elements : list of str, optional
+        Elements kept at ingest (default: all of them).
+    """
+
+    def __init__(self, root, elements=None):
+        self.root = Path(root)
+        self.elements = sorted(elements) if elements else None
+
+    # ------------------------------------------------------------------
+    # Layout
+    # ------------------------------------------------------------------
+
+    def _year_path(self, year):
+        return self.root / f"year={year}" / "data.parquet"
+
+    @property
+    def _index_path(self):
+        return self.root / "index.parquet"
+
+    @property
+    def _stations_path(self):
+        return self.root / "stations.parquet"
+
+    def manifest(self):
+        """``{"years": {yyyy: validators}, "stations": validators}`` of the ingested files."""
+        try:
+            with open(self.root / "manifest.json", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"years": {}, "stations": {}}
+
+    def _write_manifest(self, manifest):
+        self.root.mkdir(parents=True, exist_ok=True)
+        with _atomic_file(self.root / "manifest.json") as f:
+            f.write(json.dumps(manifest, indent=1).encode("utf-8"))
+
+    def years(self):
+        """Years present in the mirror."""
+        return sorted(int(year) for year in self.manifest()["years"] if self._year_path(year).exists())
+
+    # ------------------------------------------------------------------
+    # Ingest
+    # ------------------------------------------------------------------
+
+    def update(self, years, stations_url=None, parse_stations=None, max_workers=2, logger=None, timeout=None):
+        """
+        Bring ``years`` (and the station table) up to date with NOAA.
+
+        Each yearly file is requested conditionally; unchanged years cost
+        one ``304`` response. A year that cannot be fetched is logged and
+        skipped; it is requested again by the next update. The index and the
+        manifest record the years ingested before any error.
+        ``stations_url`` / ``parse_stations(text)`` refresh
+        ``stations.parquet`` the same way.
+
+        Returns
+        -------
+        list of int
+            The years (re)ingested.
+        """
+        manifest = self.manifest()
+        self.root.mkdir(parents=True, exist_ok=True)
+        if stations_url is not None and parse_stations is not None:
+            self._update_stations(stations_url, parse_stations, manifest, timeout)
+
+        tmp_dirs = []
+
+        def fetch(year):
+            tmp_dir = Path(tempfile.mkdtemp(dir=self.root, prefix=".ingest-"))
+            tmp_dirs.append(tmp_dir)
+            tmp = tmp_dir / f"{year}.csv.gz"
+            validators = manifest["years"].get(str(year), {}) if self._year_path(year).exists() else {}
+            try:
+                return year, tmp, _fetch_if_changed(f"{GHCND_BY_YEAR_BASE}/{year}.csv.gz", tmp, validators, timeout)
+            except Exception as e:
+                if logger:
+                    logger.warning(f"Failed to fetch GHCN-Daily {year}: {e}")
+                return year, tmp, e
+
+        updated = []
+        index_parts = {}
+        try:
+            # Downloads overlap; parsing and writing run one year at a time to
+            # bound memory (a yearly file holds tens of millions of rows).
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                for year, tmp, result in executor.map(fetch, sorted(set(years))):
+                    try:
+                        if result is None:
+                            if logger:
+                                logger.debug(f"GHCN-Daily {year} unchanged")
+                            continue
+                        if result is False:
+                            if logger:
+                                logger.warning(f"No GHCN-Daily by_year file for {year}")
+                            continue
+                        if isinstance(result, Exception):
+                            continue
+                        index_parts[year] = self.ingest_file(year, tmp)
+                        manifest["years"][str(year)] = dict(result, ingested=time.time())
+                        updated.append(year)
+                        if logger:
+                            logger.info(f"Ingested GHCN-Daily {year} into {self.root}")
+                    finally:
+                        shutil.rmtree(tmp.parent, ignore_errors=True)
+        finally:
+            # The executor has finished: also drop the files of the years
+            # fetched after an error, then record what was ingested.
+            for tmp_dir in tmp_dirs:
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+            if index_parts:
+                self._update_index(index_parts)
+            self._write_manifest(manifest)
+        return updated
+
+    def ingest_file(self, year, path):
+        """Rewrite the partition of ``year`` from a ``by_year`` CSV; returns its index rows."""
+        table = read_by_year_csv(path, self.elements)
+        target = self._year_path(year)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        with _atomic_file(target) as f:
+            pq.write_table(table, f, row_group_size=ROW_GROUP_ROWS, compression="zstd")
+        return _year_index(table, year)
+
+    def _update_index(self, parts):
+        tables = list(parts.values())
+        if self._index_path.exists():
+            index = pq.read_table(self._index_path)
+            keep = pc.invert(pc.is_in(index["year"], value_set=pa.array(list(parts), pa.int16())))
+            tables.insert(0, index.filter(keep))
+        index = pa.concat_tables(tables).sort_by([("station", "ascending"), ("element", "ascending"), ("year", "ascending")])
+        with _atomic_file(self._index_path) as f:
+            pq.write_table(index, f)
+
+    def _update_stations(self, url, parse, manifest, timeout):
+        tmp = self.root / ".stations.txt"
+        validators = manifest.get("stations", {}) if self._stations_path.exists() else {}
+        result = _fetch_if_changed(url, tmp, validators, timeout)
+        if not result:
+            return
+        try:
+            stations = parse(tmp.read_text(encoding="utf-8", errors="replace"))
+        finally:
+            tmp.unlink(missing_ok=True)
+        with _atomic_file(self._stations_path) as f:
+            pq.write_table(pa.Table.from_pandas(stations, preserve_index=False), f)
+        manifest["stations"] = dict(result, ingested=time.time())
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def index(self):
+        """Coverage of the mirror: one row per (station, element, year)."""
+        if not self._index_path.exists():
+            return pd.DataFrame(columns=["station", "element", "first", "last", "count", "year"])
+        return pq.read_table(self._index_path).to_pandas()
+
+    def stations(self):
+        """Station metadata table stored with the mirror (empty before the first update)."""
+        if not self._stations_path.exists():
+            return pd.DataFrame(columns=["station_id", "lat", "lon", "elevation", "name", "country"])
+        return pq.read_table(self._stations_path).to_pandas()
+
+    def find_stations(self, elements=None, start_year=None, end_year=None, bbox=None, min_years=0):
+        """
+        Stations holding any of ``elements`` (default: any) within
+        [start_year, end_year], inside ``bbox`` (min_lon, min_lat, max_lon,
+        max_lat) when given and with at least ``min_years`` years of data
+        for that element, measured from its first to its last year with data
+        in the period as for the inventory (see
+        :func:`~agrometflow.climate.ghcnd_metadata.record_years`).
+        """
+        index = self.index()
+        if elements:
+            index = index[index["element"].isin(elements)]
+        if start_year is not None:
+            index = index[index["year"] >= start_year]
+        if end_year is not None:
+            index = index[index["year"] <= end_year]
+        if min_years > 0:
+            span = index.groupby(["station", "element"])["year"].agg(["min", "max"])
+            span = span[record_years(span["min"], span["max"], start_year, end_year) >= min_years]
+            index = index[index.set_index(["station", "element"]).index.isin(span.index)]
+        found = set(index["station"])
+        if bbox is not None:
+            min_lon, min_lat, max_lon, max_lat = bbox
+            meta = self.stations()
+            inside = meta[
+                (meta["lat"] >= min_lat) & (meta["lat"] <= max_lat)
+                & (meta["lon"] >= min_lon) & (meta["lon"] <= max_lon)
+            ]
+            found &= set(inside["station_id"])
+        return sorted(found)
+
+    def read(self, station_ids, elements=None, start=None, end=None, columns=None):
+        """
+        Long table (station, date, element, value, mflag, qflag, sflag) of
+        ``station_ids`` over [start, end]; only the matching years and row
+        groups are read.
+        """
+        years = self.years()
+        start = pd.Timestamp(start) if start is not None else None
+        end = pd.Timestamp(end) if end is not None else None
+        paths = [
+            self._year_path(year)
+            for year in years
+            if (start is None or year >= start.year) and (end is None or year <= end.year)
+        ]
+        names = columns or ["station", "date", "element", "value", "mflag", "qflag", "sflag"]
+        if not paths or not station_ids:
+            return pa.table({name: pa.array([], _STORED_TYPES[name]) for name in names}).to_pandas()
+        expr = pads.field("station").isin(sorted(station_ids))
+        if elements:
+            expr = expr & pads.field("element").isin(sorted(elements))
+        if start is not None:
+            expr = expr & (pads.field("date") >= pa.scalar(start.date(), pa.date32()))
+        if end is not None:
+            expr = expr & (pads.field("date") <= pa.scalar(end.date(), pa.date32()))
+        dataset = pads.dataset([str(p) for p in paths], format="parquet")
+        return dataset.to_table(columns=names, filter=expr).to_pandas()
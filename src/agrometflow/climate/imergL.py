@@ -1,9 +1,10 @@
 import os
-import requests
 import xarray as xr
 from datetime import datetime, timedelta
 from pathlib import Path
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from agrometflow.cache import get_cache
+from agrometflow.cube import get_cube
+from agrometflow.download import download_many
 from agrometflow.utils import get_logger
 import numpy as np
 
@@ -37,35 +38,18 @@ class ImergDownloader:
         filename = f"3B-DAY-L.MS.MRG.3IMERG.{yyyymmdd}-S000000-E235959.V06.nc4"
         return f"{folder}/{filename}", filename
 
-    def _download_file(self, date):
-        url, filename = self._get_url_and_filename(date)
-        local_path = self.output_dir / filename
-        if local_path.exists():
-            self.logger.debug(f"Already downloaded: {filename}")
-            return local_path, date
-
-        try:
-            headers = {"Authorization": f"Bearer {self.token}"} if self.token else {}
-            with requests.get(url, headers=headers, stream=True, timeout=60) as r:
-                r.raise_for_status()
-                with open(local_path, "wb") as f:
-                    for chunk in r.iter_content(chunk_size=8192):
-                        f.write(chunk)
-            self.logger.info(f"Downloaded: {filename}")
-            return local_path, date
-        except Exception as e:
-            self.logger.error(f"Failed to download {filename}: {e}")
-            return None, date
-
-    def _merge_yearly(self, files_by_year):
+    def _merge_yearly(self, files_by_year, cube=None):
+        ingested = cube.ingested_by_all("imerg") if cube is not None else set()
         for year, file_date_pairs in files_by_year.items():
             outfile = self.output_dir / f"imerg_{year}.nc"
-            if outfile.exists():
+            if cube is None and outfile.exists():
                 self.logger.info(f"⏩ Skipping merge for {year}, already exists.")
                 continue
 
             arrays = []
             for f, date in sorted(file_date_pairs, key=lambda x: x[1]):
+                if date.isoformat() in ingested:
+                    continue
                 try:
                     ds = xr.open_dataset(f)
                     ds = ds.expand_dims(time=[np.datetime64(date)])
@@ -75,23 +59,55 @@ class ImergDownloader:
 
             if arrays:
                 combined = xr.concat(arrays, dim="time")
-                combined.to_netcdf(outfile)
-                self.logger.info(f"💾 Saved yearly file: {outfile}")
-
-    def download(self, start_date, end_date):
+                if cube is not None:
+                    cube.append("imerg", combined)
+                    self.logger.info(f"💾 {len(arrays)} days of {year} added to the IMERG cubes in {cube.root}")
+                else:
+                    combined.to_netcdf(outfile)
+                    self.logger.info(f"💾 Saved yearly file: {outfile}")
+
+    def download(self, start_date, end_date, backend="threads", output_format="netcdf", cube_dir=None):
+        """
+        Download daily IMERG files and merge them into one NetCDF per year, or
+        append them to the Zarr cubes of ``cube_dir`` (default:
+        ``output_dir/cube``) with ``output_format="zarr"``.
+
+        ``backend="async"`` fetches the daily files on an asyncio event loop,
+        with up to ``agrometflow.download.ASYNC_MAX_PER_HOST`` requests in
+        flight, instead of a thread pool of ``max_workers`` threads.
+        """
         start = datetime.strptime(start_date, "%Y-%m-%d")
         end = datetime.strptime(end_date, "%Y-%m-%d")
         dates = list(self._daterange(start, end))
+        cube = get_cube(output_format, cube_dir or self.output_dir / "cube")
 
         self.logger.info(f"🚀 Downloading IMERG data from {start.date()} to {end.date()}")
 
-        files_by_year = {}
+        paths = []
+        jobs = []
+        for date in dates:
+            url, filename = self._get_url_and_filename(date)
+            local_path = self.output_dir / filename
+            if local_path.exists():
+                self.logger.debug(f"Already downloaded: {filename}")
+            else:
+                jobs.append((url, local_path))
+            paths.append(local_path)
+
+        headers = {"Authorization": f"Bearer {self.token}"} if self.token else {}
+        download_many(
+            jobs,
+            backend=backend,
+            max_workers=None if backend == "async" else self.max_workers,
+            log=self.logger,
+            cache=get_cache(),
+            headers=headers,
+            timeout=60,
+        )
 
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            futures = {executor.submit(self._download_file, date): date for date in dates}
-            for future in as_completed(futures):
-                f, date = future.result()
-                if f:
-                    files_by_year.setdefault(date.year, []).append((f, date))
+        files_by_year = {}
+        for date, path in zip(dates, paths):
+            if path.exists():
+                files_by_year.setdefault(date.year, []).append((path, date))
 
-        self._merge_yearly(files_by_year)
+        self._merge_yearly(files_by_year, cube=cube)
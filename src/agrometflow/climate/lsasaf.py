@@ -1,14 +1,19 @@
 import os
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import partial
 from pathlib import Path
 import tempfile
+import threading
 
 import pandas as pd
-import requests
 import xarray as xr
 from tqdm.auto import tqdm
 
 from .base import ClimateSource
+from agrometflow.cache import get_cache
+from agrometflow.cube import get_cube
+from agrometflow.download import download_many, get_client, run_pipeline
+from agrometflow.store import PointStore, point_ids
 from agrometflow.utils import (
     dataset_points_to_dataframe,
     extract_points_from_tuples,
@@ -58,6 +63,27 @@ class LSASAFDownloader(ClimateSource):
         bbox : list [lon_min, lat_min, lon_max, lat_max], optional
         product : str, default "mdmetv3"
         username/password : optional credentials for protected access
+        backend : {"threads", "async"}, default "threads"
+            "async" garde de nombreuses requêtes en vol sur une boucle asyncio
+            (voir :func:`agrometflow.download.download_many`) ; ``max_workers``
+            y fixe alors le nombre de requêtes simultanées.
+        store_dir : str, default output_dir/points
+            Magasin Parquet des séries aux points (voir :mod:`agrometflow.store`),
+            tenu par point et par année: seuls les couples (point, année)
+            absents sont extraits (``overwrite_points_cache=True`` force une
+            nouvelle extraction).
+        output_format : {"netcdf", "zarr"}, default "netcdf"
+            "zarr" ajoute les jours, dans l'ordre, à un cube Zarr par variable
+            (source ``lsasaf_<product>``) dans ``cube_dir`` (défaut:
+            output_dir/cube, voir :mod:`agrometflow.cube`) au lieu d'écrire un
+            NetCDF par année; seuls les jours absents du cube sont téléchargés.
+        extract_workers : int, optional
+            Taille du pool d'extraction (points ou bbox) qui tourne en
+            parallèle des téléchargements (voir
+            :func:`agrometflow.download.run_pipeline`); le nombre de fichiers
+            téléchargés en attente d'extraction est borné.
+        extract_executor : {"threads", "processes"}, default "threads"
+            "processes" décode les NetCDF dans des processus séparés.
         """
         try:
             start_date = kwargs["start_date"]
@@ -76,11 +102,14 @@ class LSASAFDownloader(ClimateSource):
         bbox = kwargs.get("bbox")
         points = kwargs.get("points")
         is_notebook = _is_notebook_environment()
-        max_workers = kwargs.get("max_workers", 4)
+        max_workers = get_client().worker_count(PRODUCTS[product]["base_url"], kwargs.get("max_workers"))
         if is_notebook and not kwargs.get("force_parallel", False):
             max_workers = 1
         timeout = kwargs.get("timeout", 120)
         auth = _build_auth(kwargs)
+        backend = kwargs.get("backend", "threads")
+        if backend == "async":
+            max_workers = kwargs.get("max_workers")
 
         start = pd.to_datetime(start_date)
         end = pd.to_datetime(end_date)
@@ -94,53 +123,63 @@ class LSASAFDownloader(ClimateSource):
         if points:
             self.logger.info(f"Points: {points}")
 
-            points_csv = build_points_csv_path(output_dir, product, start, end, points)
-        if points and points_csv.exists() and not kwargs.get("overwrite_points_cache", False):
-            self.logger.info(f"Using cached points CSV: {points_csv}")
-            self.data = pd.read_csv(points_csv)
-            return
+        if points:
+            store = PointStore(kwargs.get("store_dir", output_dir / "points"))
+            source = f"lsasaf_{product}"
+            targets = [target_var for _, target_var in variables]
+            if kwargs.get("overwrite_points_cache", False):
+                batches = [(points, sorted({d.year for d in all_dates}))]
+            else:
+                batches = store.pending(source, targets, points, start, end)
+            if not batches:
+                self.logger.info(f"Using stored point data: {store.root}")
+
+            for batch_points, batch_years in batches:
+                self.logger.info(f"Extracting {len(batch_points)} point(s) for year(s) {batch_years}")
+                data = self._extract_points(
+                    variables=variables,
+                    dates=[d for d in all_dates if d.year in batch_years],
+                    output_dir=output_dir,
+                    product=product,
+                    bbox=bbox,
+                    points=batch_points,
+                    start_date=start_date,
+                    end_date=end_date,
+                    auth=auth,
+                    timeout=timeout,
+                    max_workers=max_workers,
+                    backend=backend,
+                    prefer_redownload=kwargs.get("prefer_redownload", False),
+                    extract_workers=kwargs.get("extract_workers"),
+                    extract_executor=kwargs.get("extract_executor", "threads"),
+                )
+                if data is not None and not data.empty:
+                    stored = [v for v in targets if v in data.columns]
+                    store.write_years(source, data, batch_years, start, end, variables=stored)
+                    self.logger.info(f"Stored point data in {store.root}")
 
-        final_files = collect_final_files(variables, all_dates, output_dir, product, bbox=bbox)
-        if points and final_files and not kwargs.get("prefer_redownload", False):
-            self.logger.info("Using existing yearly NetCDF file(s) to rebuild point extractions")
-            self.data = extract_points_from_yearly_files(
-                final_files=final_files,
-                points=points,
-                start_date=start_date,
-                end_date=end_date,
-                logger=self.logger,
-            )
-            if self.data is not None and not self.data.empty:
-                self.data.to_csv(points_csv, index=False)
-                self.logger.info(f"Saved points CSV: {points_csv}")
-                return
+            self.data = store.read(source, targets, start, end, points=points)
+            return
 
+        cube = get_cube(kwargs.get("output_format", "netcdf"), kwargs.get("cube_dir", output_dir / "cube"))
         requests_to_run = build_requests(
             variables,
             all_dates,
             output_dir,
             product,
             bbox=bbox,
-            skip_existing_final=not bool(points),
+            skip_existing_final=cube is None,
         )
+        if cube is not None:
+            ingested = {target_var: cube.ingested(f"lsasaf_{product}", target_var) for _, target_var in variables}
+            requests_to_run = [
+                request
+                for request in requests_to_run
+                if _date_from_daily_file(request["path"]).isoformat()
+                not in ingested[request["group"]["target_var"]]
+            ]
         self.logger.info(f"Prepared {len(requests_to_run)} daily request(s)")
 
-        if points:
-            self.data = download_points_stream(
-                requests_to_run=requests_to_run,
-                auth=auth,
-                timeout=timeout,
-                points=points,
-                start_date=start_date,
-                end_date=end_date,
-                logger=self.logger,
-                max_workers=max_workers,
-            )
-            if self.data is not None and not self.data.empty:
-                self.data.to_csv(points_csv, index=False)
-                self.logger.info(f"Saved points CSV: {points_csv}")
-            return
-
         if bbox:
             download_bbox_stream(
                 requests_to_run=requests_to_run,
@@ -149,35 +188,129 @@ class LSASAFDownloader(ClimateSource):
                 bbox=bbox,
                 logger=self.logger,
                 max_workers=max_workers,
+                backend=backend,
+                cube=cube,
+                extract_workers=kwargs.get("extract_workers"),
+                extract_executor=kwargs.get("extract_executor", "threads"),
             )
             return
 
-        files_by_group = {}
+        # Each year is written while its days are still being downloaded.
+        mergers = {}
+        for request in requests_to_run:
+            key = _group_key(request["group"])
+            mergers.setdefault(key, []).append(_date_from_daily_file(request["path"]))
+        mergers = {
+            key: YearlyMerger(key, dates, bbox=None, logger=self.logger, cube=cube)
+            for key, dates in mergers.items()
+        }
+
+        def merge(request, path):
+            date = _date_from_daily_file(request["path"])
+            mergers[_group_key(request["group"])].add(date, path)
+            return path
+
         progress_desc = "Downloading LSA SAF daily files"
-        if max_workers == 1:
-            for request in tqdm(requests_to_run, total=len(requests_to_run), desc=progress_desc):
-                result = fetch(request, auth, timeout, self.logger)
-                if result:
-                    files_by_group.setdefault(result["group"], []).append(result["path"])
-        else:
-            with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                futures = {
-                    executor.submit(fetch, request, auth, timeout, self.logger): request
-                    for request in requests_to_run
-                }
-                for future in tqdm(as_completed(futures), total=len(futures), desc=progress_desc):
-                    result = future.result()
-                    if result:
-                        files_by_group.setdefault(result["group"], []).append(result["path"])
-
-        for group, files in files_by_group.items():
-            merge_yearly(group, files, bbox=None, logger=self.logger)
+        try:
+            if backend == "async":
+                download_many(
+                    [(request["url"], request["path"]) for request in requests_to_run],
+                    backend=backend,
+                    max_workers=max_workers,
+                    on_complete=lambda i, path: merge(requests_to_run[i], path),
+                    log=self.logger,
+                    desc=progress_desc,
+                    cache=get_cache(),
+                    check=_raise_if_html,
+                    missing_ok=True,
+                    auth=auth,
+                    timeout=timeout,
+                )
+            elif max_workers == 1:
+                for request in tqdm(requests_to_run, total=len(requests_to_run), desc=progress_desc):
+                    result = fetch(request, auth, timeout, self.logger)
+                    merge(request, result["path"] if result else None)
+            else:
+                with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    futures = {
+                        executor.submit(fetch, request, auth, timeout, self.logger): request
+                        for request in requests_to_run
+                    }
+                    for future in tqdm(as_completed(futures), total=len(futures), desc=progress_desc):
+                        result = future.result()
+                        merge(futures[future], result["path"] if result else None)
+        finally:
+            for key in sorted(mergers):
+                mergers[key].close()
+
+    def _extract_points(
+        self,
+        variables,
+        dates,
+        output_dir,
+        product,
+        bbox,
+        points,
+        start_date,
+        end_date,
+        auth,
+        timeout,
+        max_workers,
+        backend,
+        prefer_redownload=False,
+        extract_workers=None,
+        extract_executor="threads",
+    ):
+        final_files = collect_final_files(variables, dates, output_dir, product, bbox=bbox)
+        if final_files and not prefer_redownload:
+            self.logger.info("Using existing yearly NetCDF file(s) to rebuild point extractions")
+            data = extract_points_from_yearly_files(
+                final_files=final_files,
+                points=points,
+                start_date=start_date,
+                end_date=end_date,
+                logger=self.logger,
+            )
+            if data is not None and not data.empty:
+                return data
+
+        requests_to_run = build_requests(
+            variables,
+            dates,
+            output_dir,
+            product,
+            bbox=bbox,
+            skip_existing_final=False,
+        )
+        self.logger.info(f"Prepared {len(requests_to_run)} daily request(s)")
+        return download_points_stream(
+            requests_to_run=requests_to_run,
+            auth=auth,
+            timeout=timeout,
+            points=points,
+            start_date=start_date,
+            end_date=end_date,
+            logger=self.logger,
+            max_workers=max_workers,
+            backend=backend,
+            extract_workers=extract_workers,
+            extract_executor=extract_executor,
+        )
 
     def extract(self, variables=None, start_date=None, end_date=None, as_long=False, **kwargs):
-        if self.data is None:
+        """
+        Filtre les données aux points. Avec ``store_dir`` (et ``product``),
+        elles sont lues directement dans le magasin Parquet.
+        """
+        if kwargs.get("store_dir") is not None:
+            product = kwargs.get("product", "mdmetv3").lower()
+            df = PointStore(kwargs["store_dir"]).read(
+                f"lsasaf_{product}", variables, start_date, end_date, points=kwargs.get("points")
+            )
+        elif self.data is None:
             raise ValueError("No point data available. Run download(points=...) first.")
-
-        df = self.data.copy()
+        else:
+            df = self.data.copy()
 
         time_col = "time" if "time" in df.columns else "Date" if "Date" in df.columns else None
         if time_col:
@@ -273,13 +406,38 @@ def collect_final_files(variables, dates, output_dir, product, bbox=None):
     return final_files
 
 
-def download_points_stream(requests_to_run, auth, timeout, points, start_date, end_date, logger, max_workers=4):
+def download_points_stream(
+    requests_to_run,
+    auth,
+    timeout,
+    points,
+    start_date,
+    end_date,
+    logger,
+    max_workers=4,
+    backend="threads",
+    extract_workers=None,
+    extract_executor="threads",
+):
     frames_by_var = {}
     progress_desc = "Downloading LSA SAF files and extracting points"
 
-    if max_workers == 1:
+    if backend == "async":
+        results = _stream_async(
+            requests_to_run,
+            auth,
+            timeout,
+            logger,
+            lambda request, path: _extract_points_subset_from_file(request, path, points, start_date, end_date, logger),
+            max_workers,
+            progress_desc,
+        )
+        for result in results:
+            if result is not None:
+                frames_by_var.setdefault(result["target_var"], []).append(result["df"])
+    elif max_workers == 1:
         for request in tqdm(requests_to_run, total=len(requests_to_run), desc=progress_desc):
-            download = _download_request_to_tempfile(request, auth, timeout, logger)
+            download = _download_request_to_cache(request, auth, timeout, logger)
             if download is None:
                 continue
             result = _extract_points_subset_from_file(
@@ -294,146 +452,93 @@ def download_points_stream(requests_to_run, auth, timeout, points, start_date, e
                 continue
             frames_by_var.setdefault(result["target_var"], []).append(result["df"])
     else:
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            futures = {
-                executor.submit(
-                    _download_request_to_tempfile,
-                    request,
-                    auth,
-                    timeout,
-                    logger,
-                ): request
-                for request in requests_to_run
-            }
-            for future in tqdm(as_completed(futures), total=len(futures), desc=progress_desc):
-                download = future.result()
-                if download is None:
-                    continue
-                result = _extract_points_subset_from_file(
-                    download["request"],
-                    download["path"],
-                    points,
-                    start_date,
-                    end_date,
-                    logger,
-                )
-                if result is None:
-                    continue
-                frames_by_var.setdefault(result["target_var"], []).append(result["df"])
+        run_pipeline(
+            requests_to_run,
+            partial(_cached_request, auth=auth, timeout=timeout, logger=logger),
+            partial(_points_from_file, points=points, start_date=start_date, end_date=end_date, logger=logger),
+            write=lambda request, result: frames_by_var.setdefault(result["target_var"], []).append(result["df"]),
+            release=_release_cached,
+            max_workers=max_workers,
+            extract_workers=extract_workers,
+            extract_executor=extract_executor,
+            log=logger,
+            desc=progress_desc,
+        )
 
     return _merge_frames_by_var(frames_by_var)
 
 
-def download_bbox_stream(requests_to_run, auth, timeout, bbox, logger, max_workers=4):
-    datasets_by_group = {}
-    progress_desc = "Downloading LSA SAF files and clipping bbox"
+def download_bbox_stream(
+    requests_to_run,
+    auth,
+    timeout,
+    bbox,
+    logger,
+    max_workers=4,
+    backend="threads",
+    cube=None,
+    extract_workers=None,
+    extract_executor="threads",
+):
+    """
+    Download the daily files of ``requests_to_run``, clip them to ``bbox``
+    and write one yearly NetCDF (or cube) per group.
+
+    Clipped days go to one :class:`YearlyMerger` per group as they are
+    extracted and are written in date order, so only the days arriving ahead
+    of a missing predecessor are held in memory; failed days release their
+    slot at once (with the async backend, when the download completes).
+    """
+    mergers = {}
+    for request in requests_to_run:
+        mergers.setdefault(_group_key(request["group"]), []).append(_date_from_daily_file(request["path"]))
+    mergers = {key: YearlyMerger(key, dates, bbox, logger, cube=cube) for key, dates in mergers.items()}
+
+    def write(request, result):
+        mergers[result["group"]].add(result["date"], result["dataset"])
+
+    def skip(request):
+        mergers[_group_key(request["group"])].add(_date_from_daily_file(request["path"]), None)
+
+    def download(request):
+        local_path = _cached_request(request, auth, timeout, logger)
+        if local_path is None:
+            skip(request)
+        return local_path
 
-    if max_workers == 1:
-        for request in tqdm(requests_to_run, total=len(requests_to_run), desc=progress_desc):
-            download = _download_request_to_tempfile(request, auth, timeout, logger)
-            if download is None:
-                continue
-            result = _extract_bbox_subset_from_file(
-                download["request"],
-                download["path"],
-                bbox,
+    progress_desc = "Downloading LSA SAF files and clipping bbox"
+    try:
+        if backend == "async":
+            results = _stream_async(
+                requests_to_run,
+                auth,
+                timeout,
                 logger,
+                lambda request, path: write(request, _bbox_from_file(request, path, bbox, logger)),
+                max_workers,
+                progress_desc,
             )
-            if result is None:
-                continue
-            datasets_by_group.setdefault(result["group"], []).append(result["dataset"])
-    else:
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            futures = {
-                executor.submit(_download_request_to_tempfile, request, auth, timeout, logger): request
-                for request in requests_to_run
-            }
-            for future in tqdm(as_completed(futures), total=len(futures), desc=progress_desc):
-                download = future.result()
-                if download is None:
-                    continue
-                result = _extract_bbox_subset_from_file(
-                    download["request"],
-                    download["path"],
-                    bbox,
-                    logger,
-                )
-                if result is None:
-                    continue
-                datasets_by_group.setdefault(result["group"], []).append(result["dataset"])
-
-    for group_key, datasets in datasets_by_group.items():
-        _write_yearly_subset(group_key, datasets, logger)
-
-
-def extract_points_from_files(files_by_group, points, start_date, end_date, logger):
-    frames_by_var = {}
-
-    for group_key, files in files_by_group.items():
-        group = _group_from_key(group_key)
-        target_var = group["target_var"]
-        source_var = group["source_var"]
-
-        for path in sorted(Path(f) for f in files):
-            try:
-                file_date = _date_from_daily_file(path)
-                ds = xr.open_dataset(path)
-                ds = _prepare_dataset(ds, source_var=source_var, bbox=None)
-                if "time" in ds.coords and ds.sizes.get("time", 0) == 1:
-                    ds = ds.assign_coords(time=[file_date])
-                ds_pts = extract_points_from_tuples(ds, points)
-                df = dataset_points_to_dataframe(ds_pts)
-                if "time" in df.columns:
-                    df["time"] = pd.to_datetime(df["time"])
-                    df = df[
-                        (df["time"] >= pd.to_datetime(start_date))
-                        & (df["time"] <= pd.to_datetime(end_date))
-                    ]
-
-                base_cols = [c for c in ["time", "lon", "lat"] if c in df.columns]
-                keep_cols = base_cols + [c for c in [source_var] if c in df.columns]
-                df = df[keep_cols]
-                if source_var in df.columns and source_var != target_var:
-                    df = df.rename(columns={source_var: target_var})
-                frames_by_var.setdefault(target_var, []).append(df)
-                ds.close()
-            except Exception as e:
-                logger.warning(f"Failed to extract points from {path.name}: {e}")
-
-    return _merge_frames_by_var(frames_by_var)
-
-
-def extract_points_from_yearly_files(final_files, points, start_date, end_date, logger):
-    frames_by_var = {}
-
-    for item in final_files:
-        path = Path(item["path"])
-        target_var = item["target_var"]
-        year = item["year"]
-        try:
-            ds = xr.open_dataset(path)
-            if "time" in ds.coords:
-                ds = ds.assign_coords(
-                    time=pd.date_range(f"{year}-01-01", periods=ds.sizes["time"], freq="D")
-                )
-            ds_pts = extract_points_from_tuples(ds, points)
-            df = dataset_points_to_dataframe(ds_pts)
-            if "time" in df.columns:
-                df["time"] = pd.to_datetime(df["time"])
-                df = df[
-                    (df["time"] >= pd.to_datetime(start_date))
-                    & (df["time"] <= pd.to_datetime(end_date))
-                ]
-
-            base_cols = [c for c in ["time", "lon", "lat"] if c in df.columns]
-            keep_cols = base_cols + [c for c in [target_var] if c in df.columns]
-            df = df[keep_cols]
-            frames_by_var.setdefault(target_var, []).append(df)
-            ds.close()
-        except Exception as e:
-            logger.warning(f"Failed to extract points from yearly file {path.name}: {e}")
-
-    return _merge_frames_by_var(frames_by_var)
+        elif max_workers == 1:
+            for request in tqdm(requests_to_run, total=len(requests_to_run), desc=progress_desc):
+                local_path = download(request)
+                if local_path is not None:
+                    write(request, _extract_bbox_subset_from_file(request, local_path, bbox, logger))
+        else:
+            run_pipeline(
+                requests_to_run,
+                download,
+                partial(_bbox_from_file, bbox=bbox, logger=logger),
+                write=write,
+                release=_release_cached,
+                max_workers=max_workers,
+                extract_workers=extract_workers,
+                extract_executor=extract_executor,
+                log=logger,
+                desc=progress_desc,
+            )
+    finally:
+        for key in sorted(mergers):
+            mergers[key].close()
 
 
 def fetch(request, auth, timeout, logger):
@@ -446,91 +551,205 @@ def fetch(request, auth, timeout, logger):
 
     try:
         logger.debug(f"Downloading {url}")
-        with requests.get(url, auth=auth, stream=True, timeout=timeout) as response:
-            if response.status_code == 404:
-                logger.warning(f"Missing file: {url}")
-                return None
-            response.raise_for_status()
-
-            content_type = response.headers.get("content-type", "")
-            if "text/html" in content_type.lower():
-                raise PermissionError(
-                    "Received HTML instead of NetCDF. Check LSA SAF credentials/access."
-                )
-
-            path.parent.mkdir(parents=True, exist_ok=True)
-            with open(path, "wb") as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
-
+        downloaded = get_cache().fetch_to(
+            url, path, check=_raise_if_html, missing_ok=True, auth=auth, timeout=timeout
+        )
+        if downloaded is None:
+            logger.warning(f"Missing file: {url}")
+            return None
         return {"group": _group_key(group), "path": path}
     except Exception as e:
         logger.warning(f"Failed for {path.name}: {e}")
         return None
 
 
-def merge_yearly(group, files, bbox, logger):
-    group = _group_from_key(group)
+def merge_yearly(group, files, bbox, logger, cube=None):
     files = sorted(Path(f) for f in files)
     if not files:
         return
 
-    final_nc = Path(group["final_nc"])
-    if final_nc.exists():
+    final_nc = Path(_group_from_key(group)["final_nc"])
+    if cube is None and final_nc.exists():
         logger.info(f"Already exists: {final_nc}")
         return
 
-    try:
-        logger.info(
-            f"Merging {len(files)} daily file(s) into {final_nc.name}"
-        )
-        datasets = []
-        crs_var = None
+    logger.info(f"Merging {len(files)} daily file(s) into {final_nc.name}")
+    dates = [_date_from_daily_file(f) for f in files]
+    merger = YearlyMerger(group, dates, bbox, logger, cube=cube)
+    for date, file_path in zip(dates, files):
+        merger.add(date, file_path)
+    merger.close()
 
-        for file_path in files:
-            file_date = _date_from_daily_file(file_path)
-            ds_day = xr.open_dataset(file_path)
-            ds_day = _prepare_dataset(ds_day, source_var=group["source_var"], bbox=bbox)
 
-            source_var = _resolve_data_var(ds_day, group["source_var"])
-            ds_day = ds_day[[source_var]].assign_coords(time=[file_date])
+# Encoding keys that define the values stored on disk
+_CF_ENCODING_KEYS = ("dtype", "scale_factor", "add_offset", "_FillValue", "missing_value")
 
-            if "crs" in ds_day.variables and crs_var is None:
-                crs_var = ds_day["crs"]
 
-            datasets.append(ds_day.load())
-            ds_day.close()
+class YearlyNetcdfWriter:
+    """
+    NetCDF with an unlimited ``time`` dimension, written one day at a time.
 
-        if not datasets:
-            logger.warning(f"No dataset available for {final_nc.name}")
-            return
+    Every day is CF-encoded with the encoding of the first day (scale factor,
+    offset, fill value, dtype), the one of the variable on disk, and appended
+    in place, so only the day being written is in memory. The file is built
+    under a temporary name and moved to ``path`` by :meth:`close`.
+    """
 
-        ds = xr.concat(datasets, dim="time")
-        if group["source_var"] != group["target_var"]:
-            ds = ds.rename({group["source_var"]: group["target_var"]})
-        if crs_var is not None and "crs" not in ds.variables:
-            ds["crs"] = crs_var
-
-        encoding = {
-            group["target_var"]: {
-                "zlib": True,
-                "complevel": 4,
-            }
-        }
-        ds.to_netcdf(final_nc, encoding=encoding)
-        ds.close()
-        logger.info(f"Saved yearly NetCDF: {final_nc}")
-    except Exception as e:
-        logger.error(f"Failed to merge {final_nc.name}: {e}")
-        return
-    finally:
-        for file_path in files:
-            if file_path.exists():
-                file_path.unlink()
-        tmp_dir = final_nc.parent / "tmp" / str(group["year"])
-        if tmp_dir.exists() and not any(tmp_dir.iterdir()):
-            tmp_dir.rmdir()
+    TIME_UNITS = "days since 1970-01-01 00:00:00"
+
+    def __init__(self, path, first_day, variable, space_chunk=512):
+        import h5netcdf
+
+        self.path = Path(path)
+        self.variable = variable
+        self.tmp = self.path.with_name(f".{self.path.name}.part")
+        self.size = 0
+        da = first_day[variable].transpose("time", ...)
+        self._file = h5netcdf.File(self.tmp, "w")
+        try:
+            self._file.dimensions["time"] = None
+            for dim in da.dims[1:]:
+                self._file.dimensions[dim] = da.sizes[dim]
+                if dim in first_day.coords:
+                    self._create(dim, xr.conventions.encode_cf_variable(first_day[dim].variable, name=dim))
+            time_var = self._file.create_variable("time", ("time",), "f8")
+            time_var.attrs.update({"units": self.TIME_UNITS, "calendar": "standard"})
+            if "crs" in first_day.variables:
+                self._create("crs", xr.conventions.encode_cf_variable(first_day["crs"].variable, name="crs"))
+
+            self._encoding = {k: v for k, v in da.encoding.items() if k in _CF_ENCODING_KEYS}
+            encoded = self._encode(da)
+            attrs = dict(encoded.attrs)
+            fill = attrs.pop("_FillValue", None)
+            self._var = self._file.create_variable(
+                variable,
+                da.dims,
+                encoded.dtype,
+                fillvalue=fill,
+                chunks=(1,) + tuple(min(n, space_chunk) for n in da.shape[1:]),
+                compression="gzip",
+                compression_opts=4,
+            )
+            self._var.attrs.update(attrs)
+        except BaseException:
+            self.abort()
+            raise
+
+    def _create(self, name, encoded):
+        attrs = dict(encoded.attrs)
+        fill = attrs.pop("_FillValue", None)
+        var = self._file.create_variable(name, encoded.dims, encoded.dtype, fillvalue=fill)
+        var[...] = encoded.values
+        var.attrs.update(attrs)
+
+    def _encode(self, da):
+        variable = da.variable.copy(deep=False)
+        variable.encoding = dict(self._encoding)
+        return xr.conventions.encode_cf_variable(variable, name=self.variable)
+
+    def append(self, ds_day):
+        da = ds_day[self.variable].transpose("time", ...)
+        encoded = self._encode(da)
+        steps = da.sizes["time"]
+        days = (pd.DatetimeIndex(da["time"].values) - pd.Timestamp("1970-01-01")) / pd.Timedelta(days=1)
+        self._file.resize_dimension("time", self.size + steps)
+        self._var[self.size:self.size + steps] = encoded.values
+        self._file.variables["time"][self.size:self.size + steps] = days.values
+        self.size += steps
+
+    def close(self):
+        self._file.close()
+        os.replace(self.tmp, self.path)
+        return self.path
+
+    def abort(self):
+        try:
+            self._file.close()
+        finally:
+            self.tmp.unlink(missing_ok=True)
+
+
+class YearlyMerger:
+    """
+    Merge the daily files of one yearly group while they are downloaded.
+
+    ``add(date, path)`` may be called from any thread in any order: days are
+    written in date order through a :class:`YearlyNetcdfWriter`, each daily
+    file being opened, clipped, appended and deleted before the next one, so
+    peak memory is one daily field; days arriving early wait on disk. An
+    already clipped day (see :func:`_read_day`) may be added instead of a
+    path; it then waits in memory.
+    :meth:`close` writes the days still waiting (missing days are skipped)
+    and, with a cube, appends the finished year to it chunk by chunk.
+    """
+
+    def __init__(self, group_key, dates, bbox, logger, cube=None):
+        self.group = _group_from_key(group_key)
+        self.final_nc = Path(self.group["final_nc"])
+        self.bbox = bbox
+        self.logger = logger
+        self.cube = cube
+        self._dates = sorted(set(dates))
+        self._next = 0
+        self._pending = {}
+        self._writer = None
+        self._lock = threading.Lock()
+
+    def add(self, date, path):
+        """Queue the daily file (or dataset) of ``date`` (``None`` when it is missing)."""
+        with self._lock:
+            self._pending[date] = path
+            while self._next < len(self._dates) and self._dates[self._next] in self._pending:
+                path = self._pending.pop(self._dates[self._next])
+                self._next += 1
+                if path is not None:
+                    self._write(path)
+
+    def _write(self, path):
+        group = self.group
+        if isinstance(path, xr.Dataset):
+            ds_day, path = path, None
+        try:
+            if path is not None:
+                with xr.open_dataset(path) as ds:
+                    ds_day = _read_day(ds, group, _date_from_daily_file(path), self.bbox)
+            if self._writer is None:
+                target = self.final_nc
+                if self.cube is not None:
+                    target = self.final_nc.with_name(f".{self.final_nc.stem}.cube.nc")
+                self._writer = YearlyNetcdfWriter(target, ds_day, group["target_var"])
+            self._writer.append(ds_day)
+        except Exception as e:
+            name = Path(path).name if path is not None else f"{pd.Timestamp(ds_day.time.values[0]):%Y%m%d}"
+            self.logger.error(f"Failed to merge {name} into {self.final_nc.name}: {e}")
+        finally:
+            if path is not None:
+                Path(path).unlink(missing_ok=True)
+
+    def close(self):
+        with self._lock:
+            for date in sorted(self._pending):
+                path = self._pending.pop(date)
+                if path is not None:
+                    self._write(path)
+            self._next = len(self._dates)
+            try:
+                if self._writer is None:
+                    self.logger.warning(f"No dataset available for {self.final_nc.name}")
+                    return
+                path = self._writer.close()
+                if self.cube is None:
+                    self.logger.info(f"Saved yearly NetCDF: {path}")
+                    return
+                with xr.open_dataset(path, chunks={}) as ds:
+                    _write_yearly(ds, self.group, self.final_nc, self.logger, self.cube)
+                path.unlink()
+            except Exception as e:
+                self.logger.error(f"Failed to merge {self.final_nc.name}: {e}")
+            finally:
+                tmp_dir = self.final_nc.parent / "tmp" / str(self.group["year"])
+                if tmp_dir.exists() and not any(tmp_dir.iterdir()):
+                    tmp_dir.rmdir()
 
 
 def cleanup_group_tempdirs(files_by_group, logger):
@@ -617,15 +836,44 @@ def _merge_frames_by_var(frames_by_var):
     return merged.sort_values(["time", "lon", "lat"]).reset_index(drop=True)
 
 
-def _download_request_to_tempfile(request, auth, timeout, logger):
-    local_path = _download_to_tempfile(request["url"], auth, timeout, logger)
+def _stream_async(requests_to_run, auth, timeout, logger, extract, max_workers, desc):
+    """
+    Download ``requests_to_run`` with the asyncio backend, through the raw
+    file cache, into a temporary folder and run ``extract(request, local_path)``
+    on each file as soon as it is complete.
+    """
+    def extract_and_remove(i, path):
+        try:
+            return extract(requests_to_run[i], path)
+        finally:
+            path.unlink(missing_ok=True)
+
+    cache = get_cache()
+    with tempfile.TemporaryDirectory(prefix="lsasaf_", dir=cache.root / "tmp") as tmp_dir:
+        return download_many(
+            [(request["url"], Path(tmp_dir) / f"{i}.nc") for i, request in enumerate(requests_to_run)],
+            backend="async",
+            max_workers=max_workers,
+            on_complete=extract_and_remove,
+            log=logger,
+            desc=desc,
+            cache=cache,
+            check=_raise_if_html,
+            missing_ok=True,
+            auth=auth,
+            timeout=timeout,
+        )
+
+
+def _download_request_to_cache(request, auth, timeout, logger):
+    local_path = _download_to_cache(request["url"], auth, timeout, logger)
     if local_path is None:
         return None
     return {"request": request, "path": local_path}
 
 
 def _fetch_points_subset(request, auth, timeout, points, start_date, end_date, logger):
-    local_path = _download_to_tempfile(request["url"], auth, timeout, logger)
+    local_path = _download_to_cache(request["url"], auth, timeout, logger)
     if local_path is None:
         return None
 
@@ -639,7 +887,22 @@ def _fetch_points_subset(request, auth, timeout, points, start_date, end_date, l
     )
 
 
+def _cached_request(request, auth, timeout, logger):
+    return _download_to_cache(request["url"], auth, timeout, logger)
+
+
+def _release_cached(request, local_path):
+    get_cache().release(local_path)
+
+
 def _extract_points_subset_from_file(request, local_path, points, start_date, end_date, logger):
+    try:
+        return _points_from_file(request, local_path, points, start_date, end_date, logger)
+    finally:
+        get_cache().release(local_path)
+
+
+def _points_from_file(request, local_path, points, start_date, end_date, logger):
     group = request["group"]
     source_var = group["source_var"]
     target_var = group["target_var"]
@@ -669,12 +932,10 @@ def _extract_points_subset_from_file(request, local_path, points, start_date, en
     except Exception as e:
         logger.warning(f"Failed to extract points from {request['path'].name}: {e}")
         return None
-    finally:
-        Path(local_path).unlink(missing_ok=True)
 
 
 def _fetch_bbox_subset(request, auth, timeout, bbox, logger):
-    local_path = _download_to_tempfile(request["url"], auth, timeout, logger)
+    local_path = _download_to_cache(request["url"], auth, timeout, logger)
     if local_path is None:
         return None
 
@@ -682,87 +943,75 @@ def _fetch_bbox_subset(request, auth, timeout, bbox, logger):
 
 
 def _extract_bbox_subset_from_file(request, local_path, bbox, logger):
-    group = request["group"]
-    source_var = group["source_var"]
+    try:
+        return _bbox_from_file(request, local_path, bbox, logger)
+    finally:
+        get_cache().release(local_path)
+
 
+def _bbox_from_file(request, local_path, bbox, logger):
+    """Clipped day of ``request`` (``dataset`` is ``None`` when it cannot be read)."""
+    group = request["group"]
+    file_date = _date_from_daily_file(request["path"])
+    result = {"group": _group_key(group), "date": file_date, "dataset": None}
     try:
-        file_date = _date_from_daily_file(request["path"])
-        ds = xr.open_dataset(local_path)
-        ds = _prepare_dataset(ds, source_var=source_var, bbox=bbox)
-        ds = ds[[source_var]].assign_coords(time=[file_date]).load()
-        ds.close()
-        return {"group": _group_key(group), "dataset": ds}
+        with xr.open_dataset(local_path) as ds:
+            result["dataset"] = _read_day(ds, group, file_date, bbox)
     except Exception as e:
         logger.warning(f"Failed to clip bbox from {request['path'].name}: {e}")
-        return None
-    finally:
-        Path(local_path).unlink(missing_ok=True)
+    return result
 
 
-def _download_to_tempfile(url, auth, timeout, logger):
-    tmp = tempfile.NamedTemporaryFile(prefix="lsasaf_", suffix=".nc", delete=False)
-    tmp_path = Path(tmp.name)
-    tmp.close()
+def _read_day(ds, group, date, bbox):
+    """Day of ``group["target_var"]`` in ``ds``, clipped to ``bbox`` and loaded."""
+    ds = _prepare_dataset(ds, source_var=group["source_var"], bbox=bbox)
+    source_var = _resolve_data_var(ds, group["source_var"])
+    ds = ds[[source_var]].assign_coords(time=[date])
+    if source_var != group["target_var"]:
+        ds = ds.rename({source_var: group["target_var"]})
+    return ds.load()
 
+
+def _download_to_cache(url, auth, timeout, logger):
+    """Fetch ``url`` through the raw-file cache; the returned file is pinned until released."""
     try:
         logger.debug(f"Downloading {url}")
-        with requests.get(url, auth=auth, stream=True, timeout=timeout) as response:
-            if response.status_code == 404:
-                logger.warning(f"Missing file: {url}")
-                tmp_path.unlink(missing_ok=True)
-                return None
-            response.raise_for_status()
-            content_type = response.headers.get("content-type", "")
-            if "text/html" in content_type.lower():
-                raise PermissionError(
-                    "Received HTML instead of NetCDF. Check LSA SAF credentials/access."
-                )
-
-            with open(tmp_path, "wb") as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
-        return tmp_path
+        local_path = get_cache().fetch(
+            url, check=_raise_if_html, missing_ok=True, pin=True, auth=auth, timeout=timeout
+        )
+        if local_path is None:
+            logger.warning(f"Missing file: {url}")
+        return local_path
     except Exception as e:
         logger.warning(f"Failed for {url}: {e}")
-        tmp_path.unlink(missing_ok=True)
         return None
 
 
-def _write_yearly_subset(group_key, datasets, logger):
-    group = _group_from_key(group_key)
-    final_nc = Path(group["final_nc"])
-    if final_nc.exists():
-        logger.info(f"Already exists: {final_nc}")
-        return
-    if not datasets:
-        logger.warning(f"No dataset available for {final_nc.name}")
-        return
+def _raise_if_html(response):
+    content_type = response.headers.get("content-type", "")
+    if "text/html" in content_type.lower():
+        raise PermissionError(
+            "Received HTML instead of NetCDF. Check LSA SAF credentials/access."
+        )
 
-    try:
-        datasets = sorted(datasets, key=lambda ds: pd.to_datetime(ds.time.values[0]))
-        ds = xr.concat(datasets, dim="time")
-        if group["source_var"] != group["target_var"]:
-            ds = ds.rename({group["source_var"]: group["target_var"]})
-        encoding = {group["target_var"]: {"zlib": True, "complevel": 4}}
-        ds.to_netcdf(final_nc, encoding=encoding)
+
+def _write_yearly(ds, group, final_nc, logger, cube=None):
+    if cube is not None:
+        source = f"lsasaf_{group['product']}"
+        cube.append(source, ds[[group["target_var"]]])
         ds.close()
-        logger.info(f"Saved yearly NetCDF: {final_nc}")
-    except Exception as e:
-        logger.error(f"Failed to write {final_nc.name}: {e}")
+        logger.info(f"Added {group['year']} to {cube.path(source, group['target_var'])}")
+        return
+    encoding = {group["target_var"]: {"zlib": True, "complevel": 4}}
+    ds.to_netcdf(final_nc, encoding=encoding)
+    ds.close()
+    logger.info(f"Saved yearly NetCDF: {final_nc}")
 
 
 def _date_from_daily_file(path):
     return pd.to_datetime(Path(path).stem, format="%Y%m%d").normalize()
 
 
-def build_points_csv_path(output_dir, product, start_date, end_date, points):
-    output_dir = Path(output_dir)
-    start = pd.to_datetime(start_date)
-    end = pd.to_datetime(end_date)
-    return output_dir / f"{product}_{start:%Y%m%d}_{end:%Y%m%d}_{_points_suffix(points)}.csv"
-
-
 def build_yearly_nc_path(output_dir, target_var, product, year, bbox=None):
     output_dir = Path(output_dir)
     var_dir = output_dir / target_var
@@ -772,13 +1021,6 @@ def build_yearly_nc_path(output_dir, target_var, product, year, bbox=None):
     return var_dir / f"{product}_{target_var}_{year}{suffix}.nc"
 
 
-def _points_suffix(points):
-    tokens = []
-    for lon, lat in points:
-        tokens.append(f"pt_{_coord_token(lon)}_{_coord_token(lat)}")
-    return "__".join(tokens)
-
-
 def _bbox_suffix(bbox):
     lon_min, lat_min, lon_max, lat_max = bbox
     return (
@@ -1,11 +1,12 @@
 import numpy as np
 import xarray as xr
-import requests
 import gzip
 import shutil
 from pathlib import Path
 from datetime import datetime, timedelta
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from agrometflow.cache import get_cache
+from agrometflow.cube import get_cube
+from agrometflow.download import download_many
 from agrometflow.utils import get_logger
 
 
@@ -27,28 +28,15 @@ class PersiannDownloader:
     def build_url(self, date):
         return f"{self.BASE_URL}/{self.build_filename(date)}"
 
-    def _download_and_extract(self, date):
-        url = self.build_url(date)
-        gz_filename = self.build_filename(date)
-        gz_path = self.raw_dir / gz_filename
-        bin_path = self.raw_dir / gz_filename.replace(".gz", "")
-
-        if bin_path.exists():
-            return bin_path
-
+    def _extract(self, gz_path):
+        bin_path = gz_path.with_suffix("")
         try:
-            response = requests.get(url, timeout=30)
-            response.raise_for_status()
-            with open(gz_path, "wb") as f:
-                f.write(response.content)
-
             with gzip.open(gz_path, "rb") as f_in, open(bin_path, "wb") as f_out:
                 shutil.copyfileobj(f_in, f_out)
-
-            self.logger.info(f"✅ Downloaded and extracted: {gz_filename}")
+            self.logger.info(f"✅ Downloaded and extracted: {gz_path.name}")
             return bin_path
         except Exception as e:
-            self.logger.error(f"❌ Error downloading {gz_filename}: {e}")
+            self.logger.error(f"❌ Error extracting {gz_path.name}: {e}")
             return None
 
     def _daterange(self, start_date, end_date):
@@ -76,15 +64,18 @@ class PersiannDownloader:
         da = da.expand_dims(time=[np.datetime64(date)])
         return da
 
-    def convert_downloaded_to_netcdf(self, bin_files_by_year):
+    def convert_downloaded_to_netcdf(self, bin_files_by_year, cube=None):
+        ingested = cube.ingested("persiann", "precip") if cube is not None else set()
         for year, file_date_pairs in bin_files_by_year.items():
             output_nc = self.output_dir / f"persiann_{year}.nc"
-            if output_nc.exists():
+            if cube is None and output_nc.exists():
                 self.logger.info(f"⏩ Skipping {year}, NetCDF already exists.")
                 continue
 
             arrays = []
             for bin_file, date in sorted(file_date_pairs, key=lambda x: x[1]):
+                if date.isoformat() in ingested:
+                    continue
                 try:
                     da = self.convert_bin_to_xarray(bin_file, date)
                     arrays.append(da)
@@ -93,34 +84,50 @@ class PersiannDownloader:
 
             if arrays:
                 combined = xr.concat(arrays, dim="time")
-                combined.to_netcdf(output_nc)
-                self.logger.info(f"💾 Saved NetCDF: {output_nc}")
+                if cube is not None:
+                    cube.append("persiann", combined)
+                    self.logger.info(f"💾 {len(arrays)} days of {year} added to {cube.path('persiann', 'precip')}")
+                else:
+                    combined.to_netcdf(output_nc)
+                    self.logger.info(f"💾 Saved NetCDF: {output_nc}")
+
+    def download(self, start_date, end_date, backend="threads", output_format="netcdf", cube_dir=None):
+        """
+        Download daily PERSIANN files and write one NetCDF per year, or append
+        them to a Zarr cube in ``cube_dir`` (default: ``output_dir/cube``)
+        with ``output_format="zarr"``.
 
-    def download(self, start_date, end_date):
+        ``backend="async"`` fetches the daily files on an asyncio event loop,
+        with up to ``agrometflow.download.ASYNC_MAX_PER_HOST`` requests in
+        flight, instead of a thread pool of ``max_workers`` threads.
+        """
         start = datetime.strptime(start_date, "%Y-%m-%d") if isinstance(start_date, str) else start_date
         end = datetime.strptime(end_date, "%Y-%m-%d") if isinstance(end_date, str) else end_date
         dates = list(self._daterange(start, end))
+        cube = get_cube(output_format, cube_dir or self.output_dir / "cube")
 
         self.logger.info(f"🚀 Downloading PERSIANN data from {start.date()} to {end.date()} using {self.max_workers} workers.")
 
+        bin_paths = [self.raw_dir / self.build_filename(d).replace(".gz", "") for d in dates]
+        todo = [i for i, path in enumerate(bin_paths) if not path.exists()]
+        results = download_many(
+            [(self.build_url(dates[i]), self.raw_dir / self.build_filename(dates[i])) for i in todo],
+            backend=backend,
+            max_workers=None if backend == "async" else self.max_workers,
+            on_complete=lambda _, gz_path: self._extract(gz_path),
+            log=self.logger,
+            cache=get_cache(),
+            timeout=30,
+        )
+        for i, path in zip(todo, results):
+            bin_paths[i] = path
+
         bin_files_by_year = {}
+        for date, bin_path in zip(dates, bin_paths):
+            if bin_path:
+                bin_files_by_year.setdefault(date.year, []).append((bin_path, date))
 
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            futures = {executor.submit(self._download_and_extract, date): date for date in dates}
-            for future in as_completed(futures):
-                bin_path = future.result()
-                if bin_path:
-                    try:
-                        fname = bin_path.stem
-                        yy = int(fname[8:10])
-                        doy = int(fname[10:13])
-                        year = 2000 + yy if yy < 50 else 1900 + yy
-                        date = datetime.strptime(f"{year}-{doy:03}", "%Y-%j")
-                        bin_files_by_year.setdefault(year, []).append((bin_path, date))
-                    except Exception as e:
-                        self.logger.warning(f"Failed to parse date from {bin_path.name}: {e}")
-
-        self.convert_downloaded_to_netcdf(bin_files_by_year)
+        self.convert_downloaded_to_netcdf(bin_files_by_year, cube=cube)
     
     def extract(self, start_date, end_date):
         """
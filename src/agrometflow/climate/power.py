@@ -1,14 +1,38 @@
-import requests
+import json
+import math
+import numpy as np
 import pandas as pd
+import xarray as xr
 from pathlib import Path
 from datetime import datetime
 from agrometflow.climate.base import ClimateSource
-from agrometflow.utils import get_logger
+from agrometflow.download import get_client
+from agrometflow.store import PointStore, point_ids
+from agrometflow.utils import PointIndex, dataset_points_to_dataframe, get_logger
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from tqdm import tqdm
 
+try:
+    import orjson
+except ImportError:  # optional fast path: pip install 'agrometflow[json]'
+    orjson = None
+
 #logger = get_logger(__name__)
 
+#: Fill value of missing data in POWER responses.
+FILL_VALUE = -999.0
+
+#: Default budget of requests per second sent to the POWER API.
+DEFAULT_MAX_RATE = 2.0
+#: The regional endpoint serves one parameter per request, over boxes of
+#: 2 to 10 degrees a side.
+REGIONAL_MIN_SIZE = 2.0
+REGIONAL_MAX_SIZE = 10.0
+#: Longest period of one regional request, in days.
+REGIONAL_WINDOW_DAYS = 366
+#: Margin kept around the points of a tile, in degrees (one grid cell).
+TILE_MARGIN = 0.625
+
 
 class PowerDownloader(ClimateSource):
     """
@@ -44,6 +68,23 @@ class PowerDownloader(ClimateSource):
                 Desired output spatial resolution in degrees
             - points : list of tuples (lat, lon)
             - format : str
+            - store_dir : str or Path
+                Parquet store of the point series (default: output_dir/points,
+                see :mod:`agrometflow.store`); points and period already
+                stored are read back from it unless overwrite_points_cache=True.
+                A parameter is not recorded for the points of a tile when one
+                of its windows failed, so that the next call fetches it again.
+            - tiling : bool
+                Group nearby points into regional tiles when that takes fewer
+                requests than one per point (default: True, see
+                :func:`plan_point_requests`).
+            - tile_size, window_days : float, int
+                Edge of the tiles in degrees and longest period of a regional
+                request in days.
+            - max_rate : float
+                Requests per second sent to the API (default: 2).
+            - max_workers : int
+                Number of requests in flight.
         """
         try:
             start_date = kwargs["start_date"]
@@ -61,37 +102,95 @@ class PowerDownloader(ClimateSource):
         if "points" in kwargs:
             points = kwargs["points"]
             all_data = []
-
-            with ThreadPoolExecutor(max_workers=8) as executor:
-                futures = [
+            store = PointStore(kwargs.get("store_dir", Path(output_dir) / "points"))
+            targets = [var[1] for var in variables]
+            ids = point_ids((lon, lat) for lat, lon in points)
+            if not kwargs.get("overwrite_points_cache", False) and store.covers(
+                "power", targets, ids, start_date, end_date
+            ):
+                self.logger.info(f"Using stored point data: {store.root}")
+                self.data = store.read("power", targets, start_date, end_date, ids=ids, time_col="Date")
+                return
+            max_workers = get_client().worker_count(self.BASE_URL_POINT, kwargs.get("max_workers"))
+            get_client().set_rate(self.BASE_URL_POINT, kwargs.get("max_rate", DEFAULT_MAX_RATE))
+
+            if kwargs.get("tiling", True):
+                tiles, singles = plan_point_requests(
+                    points,
+                    len(variables),
+                    start_date,
+                    end_date,
+                    tile_size=kwargs.get("tile_size", REGIONAL_MAX_SIZE),
+                    window_days=kwargs.get("window_days", REGIONAL_WINDOW_DAYS),
+                )
+            else:
+                tiles, singles = [], list(points)
+            windows = date_windows(start_date, end_date, kwargs.get("window_days", REGIONAL_WINDOW_DAYS))
+            tile_dir = Path(output_dir) / ".power_tiles"
+            self.logger.info(
+                f"POWER requests: {len(singles)} point(s), {len(tiles)} tile(s) x "
+                f"{len(variables)} parameter(s) x {len(windows)} window(s)"
+            )
+
+            tile_frames = {}
+            failed = set()
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = {
                     executor.submit(
                         _fetch_power_point, lat, lon, start, end, variables, self.BASE_URL_POINT, self.logger
-                    )
-                    for lat, lon in points
-                ]
+                    ): None
+                    for lat, lon in singles
+                }
+                for i, tile in enumerate(tiles):
+                    for var in variables:
+                        for window in windows:
+                            future = executor.submit(
+                                _fetch_power_tile, tile, var, window, self.BASE_URL_REGIONAL, tile_dir, self.logger
+                            )
+                            futures[future] = (i, var[1])
 
                 for f in tqdm(as_completed(futures), total=len(futures), desc="Downloading NASAPOWER data"):
                     result = f.result()
-                    if result is not None:
+                    if result is None:
+                        if futures[f] is not None:
+                            failed.add(futures[f])
+                        continue
+                    if futures[f] is None:
                         all_data.append(result)
+                    else:
+                        tile_frames.setdefault(futures[f], []).append(result)
 
+            all_data += _merge_tile_frames(tile_frames, [var[1] for var in variables])
             if not all_data:
                 raise RuntimeError("No data fetched from POWER.")
 
             full_df = pd.concat(all_data, ignore_index=True)
-            full_df = full_df.rename(columns={"Date": "Date"})
+            full_df = full_df.sort_values(["lat", "lon", "Date"], kind="stable").reset_index(drop=True)
             self.data = full_df
             
             
-            # Sauvegarde
-            Path(output_dir).mkdir(parents=True, exist_ok=True)
-            filename = Path(output_dir) / f"power_{start}_{end}.csv"
-            full_df.to_csv(filename, index=False)
-            self.logger.info(f"Data saved to {filename}")
+            # Sauvegarde : les points d'une tuile dont une fenêtre a échoué ne
+            # sont pas enregistrés pour ce paramètre, pour être redemandés.
+            stored = [v for v in targets if v in full_df.columns]
+            row_ids = pd.Series(point_ids(zip(full_df["lon"], full_df["lat"])), index=full_df.index)
+            incomplete = {}
+            for i, target in sorted(failed):
+                self.logger.warning(
+                    f"POWER tile {tiles[i]['bbox']} is missing windows of {target}; not stored for its points"
+                )
+                incomplete.setdefault(target, set()).update(point_ids((lon, lat) for lat, lon in tiles[i]["points"]))
+            complete = [v for v in stored if v not in incomplete]
+            store.write("power", full_df, variables=complete, time_col="Date", start=start_date, end=end_date)
+            for target in [v for v in stored if v in incomplete]:
+                rows = full_df[~row_ids.isin(incomplete[target]).to_numpy()]
+                store.write("power", rows, variables=[target], time_col="Date", start=start_date, end=end_date)
+            self.logger.info(f"Data stored in {store.root}")
         
         elif "bbox" in kwargs:
             requests_list = build_requests_box(self.BASE_URL_REGIONAL, variables, start_date, end_date, kwargs["bbox"], output_dir)
-            with ThreadPoolExecutor(max_workers=5) as executor:
+            max_workers = get_client().worker_count(self.BASE_URL_REGIONAL, kwargs.get("max_workers"))
+            get_client().set_rate(self.BASE_URL_REGIONAL, kwargs.get("max_rate", DEFAULT_MAX_RATE))
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
                 futures = [
                     executor.submit(fetch_and_save, url, params, path)
                     for url, params, path in requests_list
@@ -105,15 +204,21 @@ class PowerDownloader(ClimateSource):
 
 
     def extract(self, variables=None, start_date=None, end_date=None, as_long=False, **kwargs):
-        
-        source = None
-        if "source" in kwargs:
-            source = kwargs["source"]
-        if self.data is None and source is None:
+        """
+        Filtre les données aux points. ``store_dir`` lit le magasin Parquet
+        (filtres poussés sur la période) ; ``source`` lit un ancien CSV.
+        """
+        source = kwargs.get("source")
+        if kwargs.get("store_dir") is not None:
+            df = PointStore(kwargs["store_dir"]).read("power", variables, start_date, end_date, time_col="Date")
+        elif source is not None:
+            df = pd.read_csv(source)
+        elif self.data is None:
             raise ValueError("No data available. Run download() first.")
-
-        df = self.data.copy()
-        df["Date"] = pd.to_datetime(df["Date"])
+        else:
+            df = self.data.copy()
+        if not pd.api.types.is_datetime64_any_dtype(df["Date"]):
+            df["Date"] = pd.to_datetime(df["Date"].astype(str), format="%Y%m%d")
 
         if start_date:
             df = df[df["Date"] >= pd.to_datetime(start_date)]
@@ -131,23 +236,42 @@ class PowerDownloader(ClimateSource):
 
     @staticmethod
     def _json_to_dataframe2(records):
-        df = pd.DataFrame()
-        for var, daily_values in records.items():
-            series = pd.Series(daily_values).rename(var)
-            df = pd.concat([df, series], axis=1)
-        df.index.name = "Date"
-        df.reset_index(inplace=True)
-        return df
-    
+        return parameters_to_frame(records)
 
     def _json_to_dataframe(self, records):
-        df = pd.DataFrame()
-        for var, daily_values in records.items():
-            series = pd.Series(daily_values).rename(var)
-            df = pd.concat([df, series], axis=1)
-        df.index.name = "Date"
-        df.reset_index(inplace=True)
-        return df
+        return parameters_to_frame(records)
+
+
+def loads_json(content):
+    """Decode a JSON response body (bytes), with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+def parameters_to_frame(parameters):
+    """
+    Wide frame of the ``properties.parameter`` dict of a POWER response.
+
+    Columns are built at once: ``Date`` from the ``YYYYMMDD`` keys (fixed
+    format), then one float32 column per parameter, fill values (-999)
+    being NaN.
+    """
+    names = list(parameters)
+    keys = list(parameters[names[0]]) if names else []
+    if any(list(parameters[name]) != keys for name in names[1:]):
+        keys = sorted(set().union(*(parameters[name] for name in names)))
+    columns = {"Date": pd.to_datetime(pd.Index(keys, dtype=object), format="%Y%m%d").astype("datetime64[ns]")}
+    for name in names:
+        daily = parameters[name]
+        if len(daily) == len(keys) and list(daily) == keys:
+            values = np.fromiter(daily.values(), dtype=np.float64, count=len(keys))
+        else:
+            values = np.array([daily.get(key, FILL_VALUE) for key in keys], dtype=np.float64)
+        values = values.astype(np.float32)
+        values[values == FILL_VALUE] = np.nan
+        columns[name] = values
+    return pd.DataFrame(columns)
 
 
 def build_requests_box(base_url, variables, start_date, end_date, bbox, output_dir):
@@ -177,16 +301,124 @@ def build_requests_box(base_url, variables, start_date, end_date, bbox, output_d
     return requests_list
 
 
-def fetch_and_save(base_url, params, save_path):
-    save_path.parent.mkdir(parents=True, exist_ok=True)
-
-    response = requests.get(base_url, params=params)
-    response.raise_for_status()
+def date_windows(start_date, end_date, window_days=REGIONAL_WINDOW_DAYS):
+    """Consecutive (start, end) periods of at most ``window_days`` days covering [start_date, end_date]."""
+    start = pd.to_datetime(start_date)
+    end = pd.to_datetime(end_date)
+    windows = []
+    while start <= end:
+        stop = min(end, start + pd.Timedelta(days=window_days - 1))
+        windows.append((start, stop))
+        start = stop + pd.Timedelta(days=1)
+    return windows
+
+
+def _tile_bbox(points, margin):
+    lats = [lat for lat, _ in points]
+    lons = [lon for _, lon in points]
+    bbox = [min(lons) - margin, min(lats) - margin, max(lons) + margin, max(lats) + margin]
+    for lo, hi in ((0, 2), (1, 3)):
+        missing = REGIONAL_MIN_SIZE - (bbox[hi] - bbox[lo])
+        if missing > 0:
+            bbox[lo] -= missing / 2
+            bbox[hi] += missing / 2
+    bbox[0], bbox[2] = max(bbox[0], -180.0), min(bbox[2], 180.0)
+    bbox[1], bbox[3] = max(bbox[1], -90.0), min(bbox[3], 90.0)
+    return [round(v, 4) for v in bbox]
+
+
+def plan_point_requests(
+    points, n_parameters, start_date, end_date, tile_size=REGIONAL_MAX_SIZE, window_days=REGIONAL_WINDOW_DAYS,
+    margin=TILE_MARGIN,
+):
+    """
+    Split ``points`` (lat, lon) between regional tiles and single-point requests.
+
+    Points are grouped on a grid of ``tile_size - 2 * margin`` degree cells.
+    A cell becomes a tile (the box of its points plus ``margin``, at least
+    2 degrees a side) when it takes fewer requests than its points: a tile
+    costs one request per parameter and per window of ``window_days`` days,
+    a point a single request.
+
+    Returns
+    -------
+    tiles : list of dict
+        ``{"bbox": [lon_min, lat_min, lon_max, lat_max], "points": [(lat, lon), ...]}``
+    singles : list of (lat, lon)
+    """
+    cell = tile_size - 2 * margin
+    if cell <= 0 or tile_size > REGIONAL_MAX_SIZE:
+        raise ValueError(f"tile_size must be in ({2 * margin}, {REGIONAL_MAX_SIZE}] degrees")
+    cost = n_parameters * len(date_windows(start_date, end_date, window_days))
+
+    cells = {}
+    for lat, lon in points:
+        cells.setdefault((math.floor(lon / cell), math.floor(lat / cell)), []).append((lat, lon))
+
+    tiles, singles = [], []
+    for key in sorted(cells):
+        members = cells[key]
+        if len(members) > cost:
+            tiles.append({"bbox": _tile_bbox(members, margin), "points": members})
+        else:
+            singles.extend(members)
+    return tiles, singles
+
+
+def _fetch_power_tile(tile, variable, window, base_url, tile_dir, logger):
+    """Series of ``variable`` (source, target) at the points of ``tile`` over ``window``, from one regional request."""
+    source_var, target_var = variable
+    start, end = window
+    lon_min, lat_min, lon_max, lat_max = tile["bbox"]
+    params = {
+        "latitude-min": lat_min,
+        "latitude-max": lat_max,
+        "longitude-min": lon_min,
+        "longitude-max": lon_max,
+        "parameters": source_var,
+        "community": "AG",
+        "start": start.strftime("%Y%m%d"),
+        "end": end.strftime("%Y%m%d"),
+        "format": "netcdf",
+    }
+    path = Path(tile_dir) / (
+        f"{source_var}_{lon_min}_{lat_min}_{lon_max}_{lat_max}_{params['start']}_{params['end']}.nc"
+    )
+    try:
+        logger.info(f"Fetching POWER tile {tile['bbox']} for {source_var} ({params['start']}-{params['end']})")
+        fetch_and_save(base_url, params, path)
+        with xr.open_dataset(path) as ds:
+            ds = ds[[source_var]]
+            pts = PointIndex.for_grid(ds, [(lon, lat) for lat, lon in tile["points"]]).extract(ds)
+            df = dataset_points_to_dataframe(pts.load())
+        df["Date"] = pd.to_datetime(df["time"]).astype("datetime64[ns]")
+        values = df[source_var].to_numpy(dtype=np.float32)
+        df[target_var] = np.where(values == FILL_VALUE, np.float32(np.nan), values)
+        return df[["Date", target_var, "lat", "lon"]]
+    except Exception as e:
+        logger.error(f"Failed for tile {tile['bbox']} ({source_var}): {e}")
+        return None
+    finally:
+        path.unlink(missing_ok=True)
+
+
+def _merge_tile_frames(tile_frames, targets):
+    """One wide frame (Date, targets..., lat, lon) per tile from its per-parameter, per-window frames."""
+    by_tile = {}
+    for (tile, target), frames in tile_frames.items():
+        by_tile.setdefault(tile, []).append(pd.concat(frames, ignore_index=True))
+    merged = []
+    for tile in sorted(by_tile):
+        frames = by_tile[tile]
+        df = frames[0]
+        for frame in frames[1:]:
+            df = df.merge(frame, on=["Date", "lat", "lon"], how="outer")
+        merged.append(df[["Date"] + [t for t in targets if t in df.columns] + ["lat", "lon"]])
+    return merged
 
-    with open(save_path, "wb") as f:
-        f.write(response.content)
 
-    return save_path
+def fetch_and_save(base_url, params, save_path):
+    return get_client().download(base_url, save_path, params=params)
 
 def _fetch_power_point(lat, lon, start, end, variables, base_url, logger):
     realvar = [el[1] for el in variables]
@@ -203,10 +435,10 @@ def _fetch_power_point(lat, lon, start, end, variables, base_url, logger):
         }
         logger.info(f"Fetching POWER data for ({lat}, {lon})")
 
-        response = requests.get(base_url, params=params)
+        response = get_client().get(base_url, params=params)
         logger.info(f"Response status: {response.url}")
         response.raise_for_status()
-        records = response.json()['properties']['parameter']
+        records = loads_json(response.content)['properties']['parameter']
         df = PowerDownloader._json_to_dataframe2(records)
         df["lat"] = lat
         df["lon"] = lon
@@ -1,13 +1,13 @@
-import requests
 import rioxarray
 import xarray as xr
 from pathlib import Path
 from zipfile import ZipFile
-from io import BytesIO
 from datetime import datetime, timedelta
 from collections import defaultdict
-from concurrent.futures import ThreadPoolExecutor, as_completed
 
+from agrometflow.cache import get_cache
+from agrometflow.cube import get_cube
+from agrometflow.download import download_many, get_client
 from agrometflow.utils import get_logger
 
 
@@ -16,6 +16,7 @@ class Rfe2Downloader:
 
     def __init__(self, output_dir="data/rfe2", log_file=None, verbose=False, max_workers=6):
         self.logger = get_logger("rfe2", log_file, verbose)
+        self.max_workers = max_workers
 
 
     def _parse_date(self, date):
@@ -35,19 +36,33 @@ class Rfe2Downloader:
 
         try:
             self.logger.debug(f"⬇ Downloading {url}")
-            response = requests.get(url, stream=True, timeout=30)
-            response.raise_for_status()
-            with ZipFile(BytesIO(response.content)) as thezip:
-                thezip.extractall(tif_dir)
+            zip_path = get_cache().fetch(url, pin=True, timeout=30)
+            try:
+                with ZipFile(zip_path) as thezip:
+                    thezip.extractall(tif_dir)
+            finally:
+                get_cache().release(zip_path)
             return tif_path
         except Exception as e:
             self.logger.warning(f"Failed for {zip_name}: {e}")
             return None
 
-    def convert_all_to_netcdf_per_year(self, files_by_year: dict, output_dir):
+    def _extract_zip(self, zip_path, tif_dir):
+        try:
+            with ZipFile(zip_path) as thezip:
+                thezip.extractall(tif_dir)
+            return tif_dir / zip_path.name.replace(".zip", "")
+        except Exception as e:
+            self.logger.warning(f"Failed for {zip_path.name}: {e}")
+            return None
+        finally:
+            zip_path.unlink(missing_ok=True)
+
+    def convert_all_to_netcdf_per_year(self, files_by_year: dict, output_dir, cube=None):
+        ingested = cube.ingested("rfe2", "precip") if cube is not None else set()
         for year, tif_files in files_by_year.items():
             output_nc = output_dir / f"rfe2_{year}.nc"
-            if output_nc.exists():
+            if cube is None and output_nc.exists():
                 self.logger.info(f"{output_nc} already exists. Skipping.")
                 continue
 
@@ -56,6 +71,8 @@ class Rfe2Downloader:
                 try:
                     date_str = tif_file.stem.split(".")[-1]
                     timestamp = datetime.strptime(date_str, "%Y%m%d")
+                    if timestamp.isoformat() in ingested:
+                        continue
                     ds = rioxarray.open_rasterio(tif_file)
                     ds = ds.squeeze("band", drop=True)
                     ds = ds.expand_dims(time=[timestamp])
@@ -67,8 +84,12 @@ class Rfe2Downloader:
                 try:
                     merged = xr.concat(datasets, dim="time")
                     merged.name = "precip"
-                    merged.to_netcdf(output_nc)
-                    self.logger.info(f"🎯 Yearly NetCDF saved: {output_nc}")
+                    if cube is not None:
+                        cube.append("rfe2", merged)
+                        self.logger.info(f"🎯 {len(datasets)} days of {year} added to {cube.path('rfe2', 'precip')}")
+                    else:
+                        merged.to_netcdf(output_nc)
+                        self.logger.info(f"🎯 Yearly NetCDF saved: {output_nc}")
                 except Exception as e:
                     self.logger.error(f"❌ Merge failed for {year}: {e}")
 
@@ -76,8 +97,7 @@ class Rfe2Downloader:
         try:
             start_date = kwargs["start_date"]
             end_date = kwargs["end_date"]
-            output_dir = kwargs["output_dir"] + "/PR"
-            max_workers = kwargs.get("max_workers", 6)
+            output_dir = Path(kwargs["output_dir"]) / "PR"
         except KeyError as e:
             raise ValueError(f"Missing required argument: {e}")
         
@@ -86,6 +106,10 @@ class Rfe2Downloader:
         tif_dir = output_dir / "tifs"
         tif_dir.mkdir(parents=True, exist_ok=True)
 
+        backend = kwargs.get("backend", "threads")
+        cube = get_cube(kwargs.get("output_format", "netcdf"), kwargs.get("cube_dir", output_dir / "cube"))
+        self.max_workers = get_client().worker_count(self.BASE_URL, kwargs.get("max_workers", self.max_workers))
+
         start = self._parse_date(start_date)
         end = self._parse_date(end_date)
         all_dates = list(self._daterange(start, end))
@@ -93,17 +117,30 @@ class Rfe2Downloader:
         self.logger.info(f"Downloading {len(all_dates)} daily RFE2 files with {self.max_workers} workers...")
 
         files_by_year = defaultdict(list)
-
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            futures = {executor.submit(self.download_and_extract, date, tif_dir): date for date in all_dates}
-
-            for future in as_completed(futures):
-                date = futures[future]
-                tif_path = future.result()
-                if tif_path:
-                    files_by_year[date.year].append(tif_path)
-
-        self.convert_all_to_netcdf_per_year(files_by_year, output_dir)
+        jobs = []
+        for date in all_dates:
+            url = self.build_url(date)
+            zip_path = tif_dir / url.split("/")[-1]
+            tif_path = tif_dir / zip_path.name.replace(".zip", "")
+            if tif_path.exists():
+                files_by_year[date.year].append(tif_path)
+            else:
+                jobs.append((date, url, zip_path))
+
+        results = download_many(
+            [(url, zip_path) for _, url, zip_path in jobs],
+            backend=backend,
+            max_workers=kwargs.get("max_workers") if backend == "async" else self.max_workers,
+            on_complete=lambda _, zip_path: self._extract_zip(zip_path, tif_dir),
+            log=self.logger,
+            cache=get_cache(),
+            timeout=30,
+        )
+        for (date, _, _), tif_path in zip(jobs, results):
+            if tif_path:
+                files_by_year[date.year].append(tif_path)
+
+        self.convert_all_to_netcdf_per_year(files_by_year, output_dir, cube=cube)
 
     def _daterange(self, start, end):
         while start <= end:
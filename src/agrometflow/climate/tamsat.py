@@ -1,13 +1,24 @@
 import zipfile
-import requests
+import pandas as pd
 import xarray as xr
 from pathlib import Path
 from concurrent.futures import ThreadPoolExecutor
 
+from agrometflow.cache import get_cache
+from agrometflow.cube import get_cube
+from agrometflow.subset import PROTOCOLS, fetch_subset, select_subset, subset_url_for
 from agrometflow.utils import get_logger
 
+
+ACCESS_MODES = ("download", "subset")
+
+
 class TamsatDownloader:
     BASE_URL = "http://gws-access.jasmin.ac.uk/public/tamsat/rfe/data_zipped/v3.1/daily"
+    # OPeNDAP/NCSS endpoint of the daily grids (``{year}`` is filled in when
+    # the server holds one file per year); the zipped archives have none, so
+    # ``access="subset"`` needs ``subset_url``.
+    SUBSET_URL = None
 
     def __init__(self, output_dir="data/tamsat", log_file=None, verbose=False, max_workers=4):
         self.output_dir = Path(output_dir)
@@ -17,29 +28,29 @@ class TamsatDownloader:
     def build_url(self, year):
         return f"{self.BASE_URL}/TAMSATv3.1_rfe_daily_{year}.zip"
 
-    def process_year(self, year):
+    def _covered(self, year, cube):
+        if cube is None:
+            return (self.output_dir / f"tamsat_{year}.nc").exists()
+        days = pd.date_range(f"{year}-01-01", f"{year}-12-31", freq="D")
+        return set(d.isoformat() for d in days) <= cube.ingested_by_all("tamsat")
+
+    def _fetch_year(self, year, cube=None):
         tmp_dir = self.output_dir / "tmp" / str(year)
         tmp_dir.mkdir(parents=True, exist_ok=True)
-
         zip_path = tmp_dir / f"{year}.zip"
-        output_file = self.output_dir / f"tamsat_{year}.nc"
 
-        if output_file.exists():
+        if self._covered(year, cube):
             self.logger.info(f" Skipping {year}, already processed.")
-            return
+            return None
 
         # Download
         url = self.build_url(year)
         try:
             self.logger.info(f"⬇ Downloading {url}")
-            response = requests.get(url, stream=True)
-            response.raise_for_status()
-            with open(zip_path, "wb") as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
+            get_cache().fetch_to(url, zip_path)
         except Exception as e:
             self.logger.error(f" Failed to download {url} — {e}")
-            return
+            return None
 
         # Extract
         try:
@@ -48,17 +59,57 @@ class TamsatDownloader:
             self.logger.info(f" Extracted {year}.zip")
         except Exception as e:
             self.logger.error(f" Extraction failed for {year}: {e}")
-            return
+            return None
+        return tmp_dir
+
+    def _subset_year(self, year, subset, cube=None):
+        """Write ``year`` from the hyperslab served by the subset endpoint; False if it is not served."""
+        if self._covered(year, cube):
+            self.logger.info(f" Skipping {year}, already processed.")
+            return True
+        part = self.output_dir / ".subset" / f"tamsat_{year}.nc"
+        fetched = fetch_subset(
+            subset_url_for(subset["url"], year),
+            part,
+            subset["variables"],
+            bbox=subset["bbox"],
+            start=f"{year}-01-01",
+            end=f"{year}-12-31",
+            protocol=subset["protocol"],
+            log=self.logger,
+        )
+        if fetched is None:
+            return False
+        try:
+            with xr.open_dataset(fetched) as ds:
+                self._write_year(year, ds, cube)
+            return True
+        except Exception as e:
+            self.logger.error(f" Subset of {year} failed: {e}")
+            return False
+        finally:
+            part.unlink(missing_ok=True)
 
+    def _write_year(self, year, ds, cube=None):
+        if cube is not None:
+            cube.append("tamsat", ds)
+            self.logger.info(f" {year} added to the TAMSAT cubes in {cube.root}")
+        else:
+            output_file = self.output_dir / f"tamsat_{year}.nc"
+            ds.to_netcdf(output_file)
+            self.logger.info(f" Yearly NetCDF saved: {output_file}")
+
+    def _merge_year(self, year, tmp_dir, cube=None, bbox=None):
         # Merge NetCDFs
         try:
             nc_files = sorted(tmp_dir.glob(f"{year}*.nc"))
             if not nc_files:
                 self.logger.warning(f"No NetCDF files found for {year}")
                 return
-            ds = xr.open_mfdataset(nc_files, combine="by_coords")
-            ds.to_netcdf(output_file)
-            self.logger.info(f" Yearly NetCDF saved: {output_file}")
+            with xr.open_mfdataset(nc_files, combine="by_coords") as ds:
+                if bbox:
+                    ds = select_subset(ds, list(ds.data_vars), bbox)
+                self._write_year(year, ds, cube)
         except Exception as e:
             self.logger.error(f" Merge failed for {year}: {e}")
             return
@@ -66,12 +117,60 @@ class TamsatDownloader:
         # Cleanup
         for f in tmp_dir.glob("*.nc"):
             f.unlink()
-        zip_path.unlink()
+        (tmp_dir / f"{year}.zip").unlink()
         tmp_dir.rmdir()
 
-    def download(self, start_year, end_year):
+    def process_year(self, year, cube=None, bbox=None):
+        tmp_dir = self._fetch_year(year, cube)
+        if tmp_dir is not None:
+            self._merge_year(year, tmp_dir, cube, bbox)
+
+    def download(
+        self,
+        start_year,
+        end_year,
+        output_format="netcdf",
+        cube_dir=None,
+        bbox=None,
+        access="download",
+        subset_url=None,
+        subset_protocol="ncss",
+        subset_vars=("rfe",),
+    ):
+        """
+        Download the yearly TAMSAT archives and write one NetCDF per year, or
+        append them to the Zarr cubes of ``cube_dir`` (default:
+        ``output_dir/cube``) with ``output_format="zarr"``; ``bbox`` clips the
+        yearly grids.
+
+        Archives are fetched in parallel; years are merged in order.
+
+        With ``access="subset"`` and ``subset_url`` (THREDDS NCSS, or OPeNDAP
+        with ``subset_protocol="opendap"``), only ``subset_vars`` over the
+        bbox are requested from the server; the years it cannot serve are
+        downloaded as archives.
+        """
+        if access not in ACCESS_MODES:
+            raise ValueError(f"Unsupported TAMSAT access '{access}'. Available: {list(ACCESS_MODES)}")
+        if subset_protocol not in PROTOCOLS:
+            raise ValueError(f"Unsupported subset protocol '{subset_protocol}'. Available: {list(PROTOCOLS)}")
+        cube = get_cube(output_format, cube_dir or self.output_dir / "cube")
         years = list(range(start_year, end_year + 1))
+
+        subset_url = subset_url or self.SUBSET_URL
+        if access == "subset" and not subset_url:
+            self.logger.warning("No OPeNDAP/NCSS endpoint for TAMSAT (subset_url); downloading the archives.")
+        elif access == "subset":
+            subset = {"url": subset_url, "protocol": subset_protocol, "variables": list(subset_vars), "bbox": bbox}
+            years = [year for year in years if not self._subset_year(year, subset, cube)]
+            if not years:
+                return
+            self.logger.warning(f"Subset endpoint failed for {years}; downloading the archives.")
+
         self.logger.info(f"🔁 Scheduling downloads for years: {years}")
 
         with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            executor.map(self.process_year, years)
+            fetched = executor.map(lambda year: self._fetch_year(year, cube), years)
+            for year, tmp_dir in zip(years, fetched):
+                if tmp_dir is not None:
+                    self._merge_year(year, tmp_dir, cube, bbox)
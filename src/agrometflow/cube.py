@@ -0,0 +1,344 @@
+"""
+Chunked, appendable data cubes of gridded sources.
+
+Instead of one monolithic NetCDF per year, a gridded source can write a single
+Zarr store per (source, variable)::
+
+    <root>/<source>/<variable>.zarr
+    <root>/<source>/<variable>.manifest.json
+
+The arrays are chunked for time-series access (long along ``time``, small in
+space, ``time_chunk`` x ``space_chunk`` x ``space_chunk``), so reading the
+whole series of a point touches one chunk per ``time_chunk`` steps instead of
+one file per year.  New dates are appended along ``time``; dates already in
+the cube are skipped and dates older than the end of the cube trigger a
+rewrite in time order.  The manifest records the ingested dates and every
+ingest (period, number of dates, time of the write).
+
+Zarr is an optional dependency: ``pip install 'agrometflow[zarr]'``.
+"""
+
+import json
+import shutil
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import xarray as xr
+
+from agrometflow.download import _atomic_file
+from agrometflow.utils import PointIndex, dataset_points_to_dataframe
+
+
+OUTPUT_FORMATS = ("netcdf", "zarr")
+
+DEFAULT_TIME_CHUNK = 3650
+DEFAULT_SPACE_CHUNK = 16
+
+# One lock per cube path, shared by every CubeStore of the process.
+_path_locks = {}
+_path_locks_lock = threading.Lock()
+
+_LON_NAMES = ("lon", "longitude", "x")
+_LAT_NAMES = ("lat", "latitude", "y")
+
+
+def _require_zarr():
+    try:
+        import zarr  # noqa: F401
+    except ImportError as e:
+        raise ImportError(
+            "output_format='zarr' requires zarr: pip install 'agrometflow[zarr]'"
+        ) from e
+
+
+def _stamps(index):
+    return [t.isoformat() for t in index]
+
+
+def _clear_encoding(ds):
+    ds = ds.copy()
+    for var in ds.variables.values():
+        var.encoding = {}
+    return ds
+
+
+def _as_dataset(data):
+    if isinstance(data, xr.DataArray):
+        if data.name is None:
+            raise ValueError("A DataArray written to a cube needs a name")
+        return data.to_dataset()
+    return data
+
+
+def _path_lock(path):
+    key = str(Path(path).resolve())
+    with _path_locks_lock:
+        return _path_locks.setdefault(key, threading.Lock())
+
+
+def get_cube(output_format, root, **kwargs):
+    """
+    Return a :class:`CubeStore` at ``root`` for ``output_format="zarr"``,
+    ``None`` for ``"netcdf"`` (one file per year).
+    """
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output_format {output_format!r}; expected one of {OUTPUT_FORMATS}")
+    if output_format == "netcdf":
+        return None
+    return CubeStore(root, **kwargs)
+
+
+class CubeStore:
+    """
+    Zarr cubes of gridded sources, one per (source, variable).
+
+    Parameters
+    ----------
+    root : str or Path
+        Folder of the cubes.
+    time_chunk : int, optional
+        Chunk length along ``time`` (default: 3650 steps).
+    space_chunk : int, optional
+        Chunk length along every other dimension (default: 16 cells).
+    """
+
+    def __init__(self, root, time_chunk=DEFAULT_TIME_CHUNK, space_chunk=DEFAULT_SPACE_CHUNK):
+        _require_zarr()
+        self.root = Path(root)
+        self.time_chunk = int(time_chunk)
+        self.space_chunk = int(space_chunk)
+
+    def path(self, source, variable):
+        return self.root / source / f"{variable}.zarr"
+
+    def _manifest_path(self, source, variable):
+        return self.root / source / f"{variable}.manifest.json"
+
+    def manifest(self, source, variable):
+        """Manifest of a cube (``{"dates": [...], "ingests": [...]}``)."""
+        try:
+            with open(self._manifest_path(source, variable), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"dates": [], "ingests": []}
+
+    def _write_manifest(self, source, variable, manifest):
+        path = self._manifest_path(source, variable)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with _atomic_file(path) as f:
+            f.write(json.dumps(manifest).encode("utf-8"))
+
+    def variables(self, source):
+        """Variables with a cube for ``source``."""
+        return sorted(p.stem for p in (self.root / source).glob("*.zarr"))
+
+    def ingested(self, source, variable):
+        """ISO time stamps already in the cube."""
+        return set(self.manifest(source, variable)["dates"])
+
+    def ingested_by_all(self, source):
+        """ISO time stamps in every cube of ``source`` (empty without cubes)."""
+        variables = self.variables(source)
+        if not variables:
+            return set()
+        return set.intersection(*(self.ingested(source, v) for v in variables))
+
+    def covers(self, source, variable, times):
+        """True when every time of ``times`` is in the cube."""
+        return set(_stamps(times)) <= self.ingested(source, variable)
+
+    def open(self, source, variable):
+        """Lazily open the cube of ``variable`` as an :class:`xarray.Dataset`."""
+        path = self.path(source, variable)
+        if not path.exists():
+            raise FileNotFoundError(f"No cube for {source}/{variable} in {self.root}")
+        return xr.open_zarr(path, consolidated=False)
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    def _chunks(self, ds, first=0):
+        """Dask chunks of ``ds`` aligned with the Zarr chunks of the cube."""
+        chunks = {}
+        for dim, size in ds.sizes.items():
+            if dim != "time":
+                chunks[dim] = self.space_chunk
+                continue
+            head = (self.time_chunk - first % self.time_chunk) % self.time_chunk
+            steps = [min(head, size)] if head else []
+            rest = size - sum(steps)
+            steps += [self.time_chunk] * (rest // self.time_chunk)
+            if rest % self.time_chunk:
+                steps.append(rest % self.time_chunk)
+            chunks[dim] = tuple(steps)
+        return chunks
+
+    def _encoding(self, ds):
+        encoding = {}
+        for name, var in ds.data_vars.items():
+            encoding[name] = {
+                "chunks": tuple(
+                    self.time_chunk if dim == "time" else self.space_chunk for dim in var.dims
+                )
+            }
+        if "time" in ds.variables and np.issubdtype(ds["time"].dtype, np.datetime64):
+            encoding["time"] = {"units": "seconds since 1970-01-01", "dtype": "int64"}
+        return encoding
+
+    def _write_new(self, path, ds):
+        tmp = path.with_name(f".{path.name}.tmp")
+        shutil.rmtree(tmp, ignore_errors=True)
+        ds.chunk(self._chunks(ds)).to_zarr(tmp, mode="w", encoding=self._encoding(ds), consolidated=False)
+        old = path.with_name(f".{path.name}.old")
+        if path.exists():
+            path.rename(old)
+        tmp.rename(path)
+        shutil.rmtree(old, ignore_errors=True)
+
+    def _check_grid(self, existing, ds, source, variable):
+        for dim in ds.dims:
+            if dim == "time":
+                continue
+            same = (
+                dim in existing.dims
+                and existing.sizes[dim] == ds.sizes[dim]
+                and (dim not in ds.indexes or np.allclose(existing[dim].values, ds[dim].values))
+            )
+            if not same:
+                raise ValueError(
+                    f"The grid of the new data does not match the cube {source}/{variable} "
+                    f"along {dim!r}"
+                )
+
+    def append(self, source, data):
+        """
+        Add the dates of ``data`` (Dataset or named DataArray with a ``time``
+        dimension) that are not in the cubes of ``source`` yet.
+
+        Returns the number of new time steps per variable. Appends to the
+        same cube from several threads are serialised.
+        """
+        ds = _as_dataset(data)
+        if "time" not in ds.dims:
+            raise ValueError("Data written to a cube needs a 'time' dimension")
+        ds = _clear_encoding(ds.sortby("time"))
+        added = {}
+        for variable in ds.data_vars:
+            added[variable] = self._append_variable(source, variable, ds[[variable]])
+        return added
+
+    def _append_variable(self, source, variable, ds):
+        with _path_lock(self.path(source, variable)):
+            return self._append_variable_locked(source, variable, ds)
+
+    def _append_variable_locked(self, source, variable, ds):
+        path = self.path(source, variable)
+        manifest = self.manifest(source, variable)
+        existing = None
+        if path.exists():
+            existing = xr.open_zarr(path, consolidated=False)
+            # The cube is the reference: a write interrupted before the
+            # manifest was updated must not append its dates twice.
+            done = set(_stamps(existing.indexes["time"]))
+            if done != set(manifest["dates"]):
+                manifest["dates"] = sorted(done)
+        else:
+            done = set()
+        stamps = _stamps(ds.indexes["time"])
+        new = [i for i, stamp in enumerate(stamps) if stamp not in done]
+        if not new:
+            return 0
+        ds = ds.isel(time=new)
+        # Variables without a time dimension (grid, CRS) are written once.
+        static = [name for name in ds.variables if "time" not in ds[name].dims and name not in ds.dims]
+
+        if existing is None:
+            self._write_new(path, ds)
+        else:
+            self._check_grid(existing, ds, source, variable)
+            if ds.indexes["time"][0] <= existing.indexes["time"][-1]:
+                merged = xr.concat([existing.drop_vars(static, errors="ignore"), ds.drop_vars(static)], dim="time")
+                merged = merged.sortby("time").assign_coords({name: ds[name] for name in static}).load()
+                existing.close()
+                self._write_new(path, _clear_encoding(merged))
+            else:
+                first = existing.sizes["time"]
+                existing.close()
+                ds = ds.drop_vars(static)
+                ds.chunk(self._chunks(ds, first=first)).to_zarr(path, append_dim="time", consolidated=False)
+
+        new_stamps = [stamps[i] for i in new]
+        manifest["dates"] = sorted(set(manifest["dates"]) | set(new_stamps))
+        manifest["ingests"].append(
+            {"start": new_stamps[0], "end": new_stamps[-1], "count": len(new_stamps), "written": time.time()}
+        )
+        self._write_manifest(source, variable, manifest)
+        return len(new_stamps)
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+
+    def read_point(self, source, variable, points, start=None, end=None):
+        """
+        Time series of ``variable`` at the nearest cells of ``points``
+        (list of (lon, lat)) as a long DataFrame (time, lon, lat, variable).
+        """
+        ds = self.open(source, variable)
+        rename = {}
+        for names, target in ((_LON_NAMES, "lon"), (_LAT_NAMES, "lat")):
+            name = next((n for n in names if n in ds.dims), None)
+            if name is None:
+                raise ValueError(f"Cube {source}/{variable} has no {target} dimension")
+            if name != target:
+                rename[name] = target
+        ds = ds.rename(rename)[[variable]].reset_coords(drop=True)
+        if start is not None or end is not None:
+            ds = ds.sel(time=slice(start, end))
+        pts = PointIndex.for_grid(ds, points).extract(ds)
+        return dataset_points_to_dataframe(pts.load())
+
+
+class OrderedAppender:
+    """
+    Append datasets produced out of order (e.g. by a thread pool) to the
+    cubes of ``source`` in the order of ``keys``, so that the cubes only grow
+    at their end instead of being rewritten.
+
+    ``add(key, ds)`` buffers ``ds`` until every smaller key was added;
+    :meth:`close` writes what is left (keys that never came are skipped).
+    """
+
+    def __init__(self, cube, source, keys):
+        self.cube = cube
+        self.source = source
+        self._keys = sorted(keys)
+        self._next = 0
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def add(self, key, data):
+        with self._lock:
+            self._pending[key] = data
+            while self._next < len(self._keys) and self._keys[self._next] in self._pending:
+                data = self._pending.pop(self._keys[self._next])
+                self._next += 1
+                if data is not None:
+                    self.cube.append(self.source, data)
+
+    def close(self):
+        with self._lock:
+            for key in sorted(self._pending):
+                data = self._pending.pop(key)
+                if data is not None:
+                    self.cube.append(self.source, data)
+            self._next = len(self._keys)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,219 @@
+"""Monthly quartiles for ``climatic_outliers`` and their on-disk cache.
+
+Quartiles are computed for every (station, month) group at once with one
+sort, using the arithmetic of ``numpy.percentile(method="linear")`` so they are
+bit-identical to ``pandas.Series.quantile``. With a cache directory, the
+quartiles of each station are stored in
+``climatology_<station>_<var>.npz`` together with a fingerprint of the values
+of each month (count and an order-independent 64-bit hash). On the next run
+only the months whose values changed are recomputed, e.g. the month that
+received new observations.
+"""
+
+from __future__ import annotations
+
+import os
+import tempfile
+from pathlib import Path
+from typing import Optional, Sequence, Union
+
+import numpy as np
+
+
+def _sorted_quantile(sorted_values: np.ndarray, starts: np.ndarray, counts: np.ndarray, q: float) -> np.ndarray:
+	"""Linear-interpolation quantile of contiguous sorted groups.
+
+	Follows the arithmetic of ``numpy.percentile(method="linear")`` so the
+	result is bit-identical to ``pandas.Series.quantile``.
+	"""
+	virtual = counts * q + (1 - q) - 1
+	prev = np.floor(virtual)
+	gamma = virtual - prev
+	lo = starts + prev.astype(np.intp)
+	hi = starts + np.minimum(prev + 1, counts - 1).astype(np.intp)
+	a = sorted_values[lo]
+	b = sorted_values[hi]
+	diff = b - a
+	return np.where(gamma >= 0.5, b - diff * (1 - gamma), a + diff * gamma)
+
+
+def _mix64(values: np.ndarray) -> np.ndarray:
+	"""splitmix64 finaliser applied to the bit pattern of float64 values."""
+	z = np.ascontiguousarray(values, dtype=np.float64).view(np.uint64)
+	z = z + np.uint64(0x9E3779B97F4A7C15)
+	z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+	z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+	return z ^ (z >> np.uint64(31))
+
+
+def group_fingerprints(
+	group_codes: np.ndarray,
+	values: np.ndarray,
+	n_groups: int,
+) -> tuple[np.ndarray, np.ndarray]:
+	"""Return ``(counts, digests)`` of the values of each group.
+
+	The digest is the wrapping sum of hashed values, so it does not depend on
+	the row order.
+	"""
+	counts = np.bincount(group_codes, minlength=n_groups)
+	digests = np.zeros(n_groups, dtype=np.uint64)
+	if len(values):
+		order = np.argsort(group_codes, kind="stable")
+		starts = np.cumsum(counts) - counts
+		present = np.flatnonzero(counts)
+		with np.errstate(over="ignore"):
+			digests[present] = np.add.reduceat(_mix64(values[order]), starts[present])
+	return counts, digests
+
+
+def group_quartiles(
+	group_codes: np.ndarray,
+	values: np.ndarray,
+	n_groups: int,
+	compute: Optional[np.ndarray] = None,
+) -> tuple[np.ndarray, np.ndarray]:
+	"""Return per-group first and third quartiles.
+
+	``group_codes`` and ``values`` describe the non-missing observations.
+	Groups without observations, or left out by the boolean ``compute`` mask,
+	get NaN.
+	"""
+	q1 = np.full(n_groups, np.nan)
+	q3 = np.full(n_groups, np.nan)
+	if compute is not None:
+		keep = compute[group_codes]
+		group_codes = group_codes[keep]
+		values = values[keep]
+	if len(values) == 0:
+		return q1, q3
+	order = np.lexsort((values, group_codes))
+	sorted_values = values[order].astype(np.float64)
+	counts = np.bincount(group_codes, minlength=n_groups)
+	starts = np.cumsum(counts) - counts
+	present = np.flatnonzero(counts)
+	q1[present] = _sorted_quantile(sorted_values, starts[present], counts[present], 0.25)
+	q3[present] = _sorted_quantile(sorted_values, starts[present], counts[present], 0.75)
+	return q1, q3
+
+
+def tukey_bounds(
+	group_codes: np.ndarray,
+	values: np.ndarray,
+	n_groups: int,
+	outrange: float,
+	q1: Optional[np.ndarray] = None,
+	q3: Optional[np.ndarray] = None,
+) -> tuple[np.ndarray, np.ndarray]:
+	"""Return per-group Tukey whiskers ``Q1 - k*IQR`` and ``Q3 + k*IQR``.
+
+	Quartiles are computed from ``group_codes`` and ``values`` unless given.
+	Groups without observations get NaN bounds.
+	"""
+	if q1 is None or q3 is None:
+		q1, q3 = group_quartiles(group_codes, values, n_groups)
+	i = q3 - q1
+	return q1 - outrange * i, q3 + outrange * i
+
+
+class ClimatologyCache:
+	"""Per-station monthly quartiles of one variable, stored as ``.npz`` files.
+
+	Parameters
+	----------
+	cache_dir : str or Path
+		Folder holding ``climatology_<station>_<var>.npz`` files.
+	var_name : str
+		Variable code.
+	"""
+
+	def __init__(self, cache_dir: Union[str, Path], var_name: str) -> None:
+		self.cache_dir = Path(cache_dir)
+		self.var_name = var_name
+
+	def path(self, station: object) -> Path:
+		return self.cache_dir / f"climatology_{station}_{self.var_name}.npz"
+
+	def _load(self, station: object) -> dict[str, tuple[int, int, float, float]]:
+		path = self.path(station)
+		if not path.exists():
+			return {}
+		try:
+			with np.load(path) as z:
+				return {
+					str(m): (int(c), int(d), float(a), float(b))
+					for m, c, d, a, b in zip(z["month"], z["count"], z["digest"], z["q1"], z["q3"])
+				}
+		except (OSError, ValueError, KeyError):
+			return {}
+
+	def _save(self, station: object, entries: dict[str, tuple[int, int, float, float]]) -> None:
+		self.cache_dir.mkdir(parents=True, exist_ok=True)
+		months = sorted(entries)
+		fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix=".npz.tmp")
+		try:
+			with os.fdopen(fd, "wb") as f:
+				np.savez(
+					f,
+					month=np.array(months, dtype=str),
+					count=np.array([entries[m][0] for m in months], dtype=np.int64),
+					digest=np.array([entries[m][1] for m in months], dtype=np.uint64),
+					q1=np.array([entries[m][2] for m in months], dtype=np.float64),
+					q3=np.array([entries[m][3] for m in months], dtype=np.float64),
+				)
+			os.replace(tmp, self.path(station))
+		except BaseException:
+			Path(tmp).unlink(missing_ok=True)
+			raise
+
+	def quartiles(
+		self,
+		stations: Sequence[object],
+		months: Sequence[object],
+		group_codes: np.ndarray,
+		values: np.ndarray,
+	) -> tuple[np.ndarray, np.ndarray]:
+		"""Quartiles of ``len(stations) * len(months)`` station-major groups.
+
+		Group ``g`` is station ``g // len(months)`` and month
+		``g % len(months)``. Cached quartiles are reused for the groups whose
+		fingerprint is unchanged; the others are computed and written back.
+		Stations without values are not read nor written.
+		"""
+		n_months = len(months)
+		n_groups = len(stations) * n_months
+		counts, digests = group_fingerprints(group_codes, values, n_groups)
+		q1 = np.full(n_groups, np.nan)
+		q3 = np.full(n_groups, np.nan)
+		month_keys = [str(m) for m in months]
+		has_values = counts.reshape(len(stations), n_months).any(axis=1)
+		cached = [self._load(sid) if has else {} for sid, has in zip(stations, has_values)]
+
+		missing = np.zeros(n_groups, dtype=bool)
+		for g in np.flatnonzero(counts):
+			entry = cached[g // n_months].get(month_keys[g % n_months])
+			if entry is not None and entry[0] == counts[g] and entry[1] == int(digests[g]):
+				q1[g], q3[g] = entry[2], entry[3]
+			else:
+				missing[g] = True
+		if not missing.any():
+			return q1, q3
+
+		new_q1, new_q3 = group_quartiles(group_codes, values, n_groups, compute=missing)
+		q1[missing] = new_q1[missing]
+		q3[missing] = new_q3[missing]
+		for s in np.unique(np.flatnonzero(missing) // n_months):
+			entries = cached[s]
+			for g in range(s * n_months, (s + 1) * n_months):
+				if counts[g]:
+					entries[month_keys[g % n_months]] = (int(counts[g]), int(digests[g]), q1[g], q3[g])
+			self._save(stations[s], entries)
+		return q1, q3
+
+
+__all__ = [
+	"ClimatologyCache",
+	"group_fingerprints",
+	"group_quartiles",
+	"tukey_bounds",
+]
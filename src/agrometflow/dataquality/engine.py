@@ -0,0 +1,582 @@
+"""Columnar engine for the daily tests of :func:`run_qc_pipeline`.
+
+The per-test functions of :mod:`agrometflow.dataquality.qc` each copy the
+input, coerce the variable and regroup it by station.  This module prepares the
+frame once (station codes, sort orders, duplicate-date mask) and evaluates
+``climatic_outliers``, ``daily_out_of_range``, ``temporal_coherence``,
+``daily_repetition`` and ``duplicate_dates`` as boolean masks over shared NumPy
+arrays.  The flagged rows, their order and the intermediate files are the same
+as those produced by the per-test functions.
+"""
+
+from __future__ import annotations
+
+import inspect
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from functools import cached_property
+from pathlib import Path
+from typing import Iterable, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from .climatology import ClimatologyCache, tukey_bounds
+from .qc import (
+	DAILY_BOUNDED_VARS,
+	DAILY_RANGE_PARAMS,
+	FLAG_STORE_MAX_ROWS,
+	TEMPORAL_COHERENCE_VARS,
+	FlagStore,
+	_append_or_write_flags,
+	_build_datetime,
+	_coerce_numeric,
+	_daily_output_path,
+	_default_iqr,
+	_jump_threshold,
+	_plot_climatic_boxplot,
+	_run_daily_tests_legacy,
+	check_units,
+	climatic_outliers,
+	daily_out_of_range,
+	daily_repetition,
+	temporal_coherence,
+)
+
+
+DAILY_TESTS = (
+	"climatic_outliers",
+	"daily_out_of_range",
+	"temporal_coherence",
+	"daily_repetition",
+	"duplicate_dates",
+)
+
+_FLAG_KEYS = ["Var", "Year", "Month", "Day", "Value"]
+
+
+def _test_kwargs(func, params: Optional[dict]) -> dict:
+	"""Return ``func`` defaults overridden by ``params``.
+
+	Unknown parameter names raise ``TypeError`` as they would when calling
+	``func`` directly.
+	"""
+	sig = inspect.signature(func)
+	bound = sig.bind_partial(**(params or {}))
+	kwargs = {
+		name: p.default
+		for name, p in sig.parameters.items()
+		if p.default is not inspect.Parameter.empty
+	}
+	kwargs.update(bound.arguments)
+	return kwargs
+
+
+def _sort_key(values: pd.Series) -> np.ndarray:
+	"""Integer sort key with missing values last, like ``sort_values``."""
+	codes, uniques = pd.factorize(values, sort=True)
+	codes = codes.astype(np.int64)
+	codes[codes < 0] = len(uniques)
+	return codes
+
+
+class DailyLayout:
+	"""Station codes, sort orders and date masks shared by every variable.
+
+	Sort orders and the duplicate-date mask are computed on first use.
+
+	Parameters
+	----------
+	df : pandas.DataFrame
+		Daily input with one variable per column.
+	station_col : str, optional
+		Station column. When ``None`` the whole frame is one station named
+		``station_id``.
+	station_id : str
+		Station name used for output files in single-station mode.
+	year_col, month_col, day_col : str
+		Date component columns.
+	"""
+
+	def __init__(
+		self,
+		df: pd.DataFrame,
+		station_col: Optional[str],
+		station_id: str,
+		year_col: str = "Year",
+		month_col: str = "Month",
+		day_col: str = "Day",
+	) -> None:
+		self.df = df
+		self.station_col = station_col
+		self.station_id = station_id
+		self.year_col = year_col
+		self.month_col = month_col
+		self.day_col = day_col
+		n = len(df)
+
+		if station_col is not None:
+			codes, self.station_keys = pd.factorize(df[station_col], sort=True)
+			codes = codes.astype(np.intp)
+		else:
+			codes = np.zeros(n, dtype=np.intp)
+			self.station_keys = pd.Index([station_id], dtype=object)
+		self.codes = codes
+		self.n_stations = len(self.station_keys)
+		self._valid = codes >= 0
+		self.month_codes, self.month_keys = pd.factorize(df[month_col])
+		self.n_months = len(self.month_keys)
+
+	@cached_property
+	def _positions(self) -> np.ndarray:
+		return np.flatnonzero(self._valid)
+
+	@cached_property
+	def order(self) -> np.ndarray:
+		"""Station-major, input order inside a station (groupby order)."""
+		positions = self._positions
+		return positions[np.argsort(self.codes[positions], kind="stable")]
+
+	@cached_property
+	def ymd_order(self) -> np.ndarray:
+		"""Station-major, sorted by raw Year/Month/Day (daily_repetition)."""
+		df = self.df
+		positions = self._positions
+		y_key = _sort_key(df[self.year_col])
+		m_key = _sort_key(df[self.month_col])
+		d_key = _sort_key(df[self.day_col])
+		return positions[
+			np.lexsort((d_key[positions], m_key[positions], y_key[positions], self.codes[positions]))
+		]
+
+	@cached_property
+	def _dt_layout(self) -> tuple[np.ndarray, np.ndarray]:
+		# Station-major, sorted by calendar date with NaT last (temporal_coherence).
+		codes = self.codes
+		positions = self._positions
+		dt = _build_datetime(self.df, self.year_col, self.month_col, self.day_col)
+		days = dt.to_numpy().astype("datetime64[D]").astype(np.int64)
+		nat = dt.isna().to_numpy()
+		day_key = np.where(nat, np.iinfo(np.int64).max, days)
+		dt_order = positions[np.lexsort((day_key[positions], codes[positions]))]
+		seq_codes = codes[dt_order]
+		seq_days = days[dt_order]
+		seq_nat = nat[dt_order]
+		step = np.zeros(len(dt_order), dtype=bool)
+		if len(step) > 1:
+			known = ~seq_nat[1:] & ~seq_nat[:-1]
+			gap = np.where(known, seq_days[1:] - np.where(known, seq_days[:-1], 0), 0)
+			step[1:] = known & (seq_codes[1:] == seq_codes[:-1]) & (gap == 1)
+		return dt_order, step
+
+	@property
+	def dt_order(self) -> np.ndarray:
+		return self._dt_layout[0]
+
+	@property
+	def dt_step(self) -> np.ndarray:
+		"""True where a row follows the previous one of ``dt_order`` by one day."""
+		return self._dt_layout[1]
+
+	@cached_property
+	def duplicated(self) -> np.ndarray:
+		dup_subset = [self.year_col, self.month_col, self.day_col]
+		if self.station_col is not None:
+			dup_subset = [self.station_col] + dup_subset
+		return self.df.duplicated(subset=dup_subset, keep=False).to_numpy() & self._valid
+
+	def values(self, var_name: str, units: Optional[str] = None) -> pd.Series:
+		"""Return ``var_name`` coerced to numbers and canonical units."""
+		values = _coerce_numeric(self.df[var_name])
+		if units:
+			values = check_units(values, var_name, units)
+		return values
+
+	def station_key(self, code: int) -> object:
+		return self.station_keys[code]
+
+	def flag_frame(self, positions: np.ndarray, values: pd.Series, var_name: str, test_name: str) -> pd.DataFrame:
+		"""Build the flag table for row ``positions`` in the per-test layout."""
+		df = self.df
+		columns = {}
+		if self.station_col is not None:
+			columns[self.station_col] = pd.Series(self.station_keys.take(self.codes[positions]))
+		columns["Var"] = var_name
+		columns["Year"] = df[self.year_col].iloc[positions].reset_index(drop=True)
+		columns["Month"] = df[self.month_col].iloc[positions].reset_index(drop=True)
+		columns["Day"] = df[self.day_col].iloc[positions].reset_index(drop=True)
+		columns["Value"] = values.iloc[positions].reset_index(drop=True)
+		columns["Test"] = test_name
+		return pd.DataFrame(columns, index=pd.RangeIndex(len(positions)))
+
+	def station_slices(self, codes: np.ndarray) -> Iterable[tuple[int, slice]]:
+		"""Yield ``(station_code, slice)`` for station-major ``codes``."""
+		if len(codes) == 0:
+			return
+		bounds = np.flatnonzero(np.diff(codes)) + 1
+		starts = np.concatenate(([0], bounds))
+		ends = np.concatenate((bounds, [len(codes)]))
+		for start, end in zip(starts, ends):
+			yield int(codes[start]), slice(int(start), int(end))
+
+
+def _write_flags(
+	layout: DailyLayout,
+	out: pd.DataFrame,
+	positions: np.ndarray,
+	var_name: str,
+	outpath: Union[str, Path],
+) -> None:
+	codes = layout.codes[positions]
+	for code, rows in layout.station_slices(codes):
+		_append_or_write_flags(
+			_daily_output_path(outpath, layout.station_key(code), var_name),
+			out.iloc[rows],
+			_FLAG_KEYS,
+		)
+
+
+def climatic_outlier_mask(
+	layout: DailyLayout,
+	v: np.ndarray,
+	var_name: str,
+	outrange: float,
+	cache: Optional[ClimatologyCache] = None,
+	eligible: Optional[np.ndarray] = None,
+) -> tuple[np.ndarray, np.ndarray]:
+	"""Return ``(flagged, candidates)`` row masks for ``climatic_outliers``.
+
+	``candidates`` are the rows of stations with more than five years of
+	data, without zero values for bounded variables; the monthly Tukey bounds
+	are computed from them, reusing the quartiles stored in ``cache`` for the
+	months whose values did not change. ``eligible`` overrides the five-year
+	rule with one boolean per station of ``layout``, for layouts that hold
+	part of a record.
+	"""
+	codes = layout.codes
+	valid = codes >= 0
+	notna = ~np.isnan(v)
+	if eligible is None:
+		counts = np.bincount(codes[valid & notna], minlength=layout.n_stations)
+		eligible = counts > 5 * 365
+	candidates = valid & eligible[np.where(valid, codes, 0)]
+	if var_name in DAILY_BOUNDED_VARS:
+		candidates &= v != 0
+	month_codes = layout.month_codes
+	usable = candidates & notna & (month_codes >= 0)
+	group = codes * max(layout.n_months, 1) + month_codes
+	n_groups = layout.n_stations * max(layout.n_months, 1)
+	q1 = q3 = None
+	if cache is not None and layout.n_months:
+		q1, q3 = cache.quartiles(
+			list(layout.station_keys),
+			list(layout.month_keys),
+			group[usable],
+			v[usable],
+		)
+	lower, upper = tukey_bounds(group[usable], v[usable], n_groups, outrange, q1, q3)
+	flagged = np.zeros(len(v), dtype=bool)
+	rows = np.flatnonzero(usable)
+	g = group[rows]
+	flagged[rows] = (v[rows] < lower[g]) | (v[rows] > upper[g])
+	return flagged, candidates
+
+
+def jump_flags(layout: DailyLayout, v: np.ndarray, jumps: float) -> np.ndarray:
+	"""Flag the rows of ``layout.dt_order`` that jump by more than ``jumps``
+	from the previous day of the same station."""
+	seq = v[layout.dt_order]
+	flags = np.zeros(len(seq), dtype=bool)
+	if len(seq) > 1:
+		with np.errstate(invalid="ignore"):
+			flags[1:] = layout.dt_step[1:] & (np.abs(seq[1:] - seq[:-1]) > jumps)
+	return flags
+
+
+def jump_endpoints(flags: np.ndarray) -> np.ndarray:
+	"""Select both days of every jump given by :func:`jump_flags`."""
+	selected = flags.copy()
+	selected[:-1] |= flags[1:]
+	return selected
+
+
+def repetition_runs(layout: DailyLayout, v: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+	"""Return ``(run_id, lengths)`` of equal consecutive values.
+
+	``run_id`` follows ``layout.ymd_order``; runs stop at station boundaries and
+	at missing values.
+	"""
+	seq = v[layout.ymd_order]
+	seq_codes = layout.codes[layout.ymd_order]
+	if len(seq) == 0:
+		return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp)
+	change = np.empty(len(seq), dtype=bool)
+	change[0] = True
+	change[1:] = (seq[1:] != seq[:-1]) | (seq_codes[1:] != seq_codes[:-1])
+	run_id = np.cumsum(change) - 1
+	return run_id, np.bincount(run_id)
+
+
+def run_daily_tests(
+	df: pd.DataFrame,
+	variable_list: Sequence[str],
+	station_col: Optional[str] = None,
+	station_id: str = "station",
+	units_map: Optional[dict[str, str]] = None,
+	outpath: Optional[Union[str, Path]] = None,
+	year_col: str = "Year",
+	month_col: str = "Month",
+	day_col: str = "Day",
+	climatic_outliers_params: Optional[dict] = None,
+	daily_out_of_range_params: Optional[dict] = None,
+	temporal_coherence_params: Optional[dict] = None,
+	daily_repetition_params: Optional[dict] = None,
+	bplot: bool = False,
+	layout: Optional[DailyLayout] = None,
+) -> list[tuple[str, pd.DataFrame]]:
+	"""Evaluate the single-variable daily tests for every variable.
+
+	Returns ``(test_name, flags)`` pairs in the order in which
+	:func:`run_qc_pipeline` calls the per-test functions (variable by
+	variable, then test by test), so that downstream concatenation is
+	unchanged. Empty results are omitted.
+	"""
+	units_map = units_map or {}
+	co_kwargs = _test_kwargs(climatic_outliers, climatic_outliers_params)
+	dr_kwargs = _test_kwargs(daily_out_of_range, daily_out_of_range_params)
+	tc_kwargs = _test_kwargs(temporal_coherence, temporal_coherence_params)
+	rep_kwargs = _test_kwargs(daily_repetition, daily_repetition_params)
+	if layout is None:
+		layout = DailyLayout(df, station_col, station_id, year_col, month_col, day_col)
+
+	results: list[tuple[str, pd.DataFrame]] = []
+
+	def _emit(test_name: str, positions: np.ndarray, values: pd.Series, var_name: str, dedupe: bool = False) -> None:
+		if len(positions) == 0:
+			return
+		out = layout.flag_frame(positions, values, var_name, test_name)
+		if dedupe:
+			keep = ~out.duplicated().to_numpy()
+			positions = positions[keep]
+			out = out[keep].reset_index(drop=True)
+		if outpath:
+			_write_flags(layout, out, positions, var_name, outpath)
+		results.append((test_name, out))
+
+	# climatic_outliers clips to ``station_id`` when a ``station`` column exists
+	# but no station_col was given; keep that behaviour on the per-test path.
+	clip_to_station = station_col is None and "station" in df.columns and str(station_id) != "station"
+
+	for var in variable_list:
+		units = units_map.get(var)
+		values = layout.values(var, units)
+		v = values.to_numpy(dtype=np.float64, na_value=np.nan)
+
+		# climatic_outliers
+		if clip_to_station:
+			out = climatic_outliers(
+				df,
+				bplot=bplot,
+				var_name=var,
+				station_id=station_id,
+				units=units,
+				outpath=outpath,
+				year_col=year_col,
+				month_col=month_col,
+				day_col=day_col,
+				**(climatic_outliers_params or {}),
+			)
+			if not out.empty:
+				results.append(("climatic_outliers", out))
+		else:
+			outrange = co_kwargs["iqr"] if co_kwargs["iqr"] is not None else _default_iqr(var)
+			cache = ClimatologyCache(co_kwargs["cache_dir"], var) if co_kwargs["cache_dir"] is not None else None
+			flagged, candidates = climatic_outlier_mask(layout, v, var, outrange, cache)
+			if station_col is None and np.count_nonzero(~np.isnan(v)) <= 5 * 365:
+				print("Not enough data for outliers test",
+				      "(minimum 5 years of non-zero values for daily data)")
+			if bplot:
+				cand_rows = layout.order[candidates[layout.order]]
+				for code, rows in layout.station_slices(layout.codes[cand_rows]):
+					rows = cand_rows[rows]
+					group = pd.DataFrame(
+						{
+							month_col: df[month_col].iloc[rows].to_numpy(),
+							var: values.iloc[rows].to_numpy(),
+						}
+					)
+					_plot_climatic_boxplot(
+						group,
+						layout.station_key(code),
+						station_col is not None,
+						var_name=var,
+						month_col=month_col,
+						outrange=outrange,
+						units=units,
+						outfile=co_kwargs["outfile"],
+						outpath=outpath,
+						show=co_kwargs["show"],
+					)
+			_emit("climatic_outliers", layout.order[flagged[layout.order]], values, var)
+
+		# daily_out_of_range
+		if var in DAILY_RANGE_PARAMS:
+			lower_name, upper_name = DAILY_RANGE_PARAMS[var]
+			lower, upper = dr_kwargs[lower_name], dr_kwargs[upper_name]
+			mask = (v > upper) | (v < lower)
+			_emit("daily_out_of_range", layout.order[mask[layout.order]], values, var)
+
+		# temporal_coherence
+		if var in TEMPORAL_COHERENCE_VARS:
+			jumps = _jump_threshold(
+				var,
+				tc_kwargs["temp_jumps"],
+				tc_kwargs["windspeed_jumps"],
+				tc_kwargs["snowdepth_jumps"],
+			)
+			selected = jump_endpoints(jump_flags(layout, v, jumps))
+			_emit("temporal_coherence", layout.dt_order[selected], values, var, dedupe=True)
+
+		# daily_repetition
+		run_id, lengths = repetition_runs(layout, v)
+		if len(run_id):
+			selected = lengths[run_id] >= rep_kwargs["n"]
+			if var in DAILY_BOUNDED_VARS:
+				selected &= v[layout.ymd_order] != 0
+			_emit("daily_repetition", layout.ymd_order[selected], values, var)
+
+		# duplicate_dates
+		_emit("duplicate_dates", layout.order[layout.duplicated[layout.order]], values, var)
+
+	return results
+
+
+def _column_array(s: pd.Series):
+	"""Plain array behind ``s``; extension arrays are kept to preserve dtype."""
+	if isinstance(s.dtype, pd.api.extensions.ExtensionDtype):
+		return s.array
+	return s.to_numpy()
+
+
+def station_shards(codes: np.ndarray, n_stations: int, n_shards: int) -> list[np.ndarray]:
+	"""Split rows into ``n_shards`` groups of whole, consecutive stations.
+
+	``codes`` are sorted station codes per row (``-1`` for a missing
+	station, which is left out). Shards are balanced on row count and keep the
+	input order of their rows.
+	"""
+	valid = codes >= 0
+	counts = np.bincount(codes[valid], minlength=n_stations)
+	total = counts.sum()
+	if total == 0 or n_stations == 0:
+		return []
+	before = np.cumsum(counts) - counts
+	shard_of_station = np.minimum((before * n_shards) // total, n_shards - 1)
+	shard_of_row = np.where(valid, shard_of_station[np.where(valid, codes, 0)], -1)
+	shards = [np.flatnonzero(shard_of_row == k) for k in range(n_shards)]
+	return [rows for rows in shards if len(rows)]
+
+
+def _run_shard(
+	columns: dict,
+	variable_list: Sequence[str],
+	engine: str,
+	kwargs: dict,
+) -> list[dict[str, pd.DataFrame]]:
+	"""Worker entry point: run the daily tests of one shard, variable by variable."""
+	df = pd.DataFrame(columns)
+	per_var = []
+	# Always open a store here: a forked worker inherits the parent's active
+	# store, which would never be flushed from this process.
+	with FlagStore(max_rows=FLAG_STORE_MAX_ROWS):
+		if engine == "columnar":
+			layout = DailyLayout(
+				df,
+				kwargs["station_col"],
+				kwargs["station_id"],
+				kwargs["year_col"],
+				kwargs["month_col"],
+				kwargs["day_col"],
+			)
+			for var in variable_list:
+				per_var.append(dict(run_daily_tests(df, [var], layout=layout, **kwargs)))
+		else:
+			for var in variable_list:
+				per_var.append(dict(_run_daily_tests_legacy(df, [var], **kwargs)))
+	return per_var
+
+
+def run_daily_sharded(
+	df: pd.DataFrame,
+	variable_list: Sequence[str],
+	station_col: str,
+	engine: str = "columnar",
+	workers: Optional[int] = None,
+	executor: Optional[Executor] = None,
+	n_shards: Optional[int] = None,
+	**kwargs,
+) -> list[tuple[str, pd.DataFrame]]:
+	"""Run the daily tests on station shards in a process pool.
+
+	Each shard is sent as a dict of column arrays and processed by
+	:func:`run_daily_tests` (or the per-test functions with
+	``engine="legacy"``). Shard results are concatenated in station order for
+	every variable and test, so the output is identical to a single-process
+	run. ``executor`` is used as is and not shut down; otherwise a
+	``ProcessPoolExecutor(workers)`` is created for the call. The stations
+	are split into ``n_shards`` shards, by default four per worker, with
+	``workers`` or ``os.cpu_count()`` workers.
+	"""
+	if n_shards is not None and n_shards < 1:
+		raise ValueError("n_shards must be a positive integer")
+	codes, keys = pd.factorize(df[station_col], sort=True)
+	if n_shards is None:
+		n_shards = 4 * (workers or os.cpu_count() or 1)
+	shards = station_shards(codes.astype(np.intp), len(keys), min(len(keys), n_shards))
+	year_col = kwargs.get("year_col", "Year")
+	month_col = kwargs.get("month_col", "Month")
+	day_col = kwargs.get("day_col", "Day")
+	needed = list(dict.fromkeys([station_col, year_col, month_col, day_col, *variable_list]))
+	arrays = {col: _column_array(df[col]) for col in needed}
+	kwargs["station_col"] = station_col
+
+	def _submit(pool: Executor):
+		return [
+			pool.submit(
+				_run_shard,
+				{col: values[rows] for col, values in arrays.items()},
+				list(variable_list),
+				engine,
+				kwargs,
+			)
+			for rows in shards
+		]
+
+	if executor is not None:
+		shard_results = [f.result() for f in _submit(executor)]
+	else:
+		with ProcessPoolExecutor(max_workers=workers) as pool:
+			shard_results = [f.result() for f in _submit(pool)]
+
+	results: list[tuple[str, pd.DataFrame]] = []
+	for i in range(len(variable_list)):
+		for test_name in DAILY_TESTS:
+			frames = [res[i][test_name] for res in shard_results if test_name in res[i]]
+			if not frames:
+				continue
+			out = frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+			results.append((test_name, out))
+	return results
+
+
+__all__ = [
+	"DAILY_TESTS",
+	"DailyLayout",
+	"climatic_outlier_mask",
+	"jump_endpoints",
+	"jump_flags",
+	"repetition_runs",
+	"run_daily_sharded",
+	"run_daily_tests",
+	"station_shards",
+]
@@ -0,0 +1,471 @@
+"""Incremental daily QC of observations appended to station records.
+
+An operational record grows by a few days at a time; re-running every test on
+the whole history to flag those days is wasteful. :func:`run_qc_incremental`
+keeps a checkpoint per station in ``checkpoint_dir/qc_checkpoint.json``:
+
+- the number of rows already tested and the last tested date;
+- the last rows of the record (the previous day of the jump test and the
+  trailing run of equal values, at most ``n - 1`` rows of ``daily_repetition``);
+- the length of the trailing run of each variable;
+- the number of values of each variable (the five-year rule of
+  ``climatic_outliers``).
+
+The monthly bounds of ``climatic_outliers`` only move for the (station,
+month) groups that receive values, i.e. the groups whose fingerprint in the
+:class:`~agrometflow.dataquality.climatology.ClimatologyCache` under
+``checkpoint_dir/climatology`` (or the ``cache_dir`` of the test) changes.
+All the rows of these groups are tested again, and of no other group; a
+station that just reached five years of data is tested in full.
+
+The input is the whole record, with the new observations appended at the end
+of each station. Only the rows after the checkpoint are tested; the result
+holds their flags plus the earlier rows that the new rows flag (the day
+before a jump, the start of a run that reaches ``n``), plus the
+``climatic_outliers`` flags of the re-tested groups, which replace those of
+the previous runs. With that replacement, the flags of the previous runs and
+of this one are the flag set of a full re-run. A station without a usable
+checkpoint (first run, changed parameters, rows that are not appended after
+the last tested date) is tested in full.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Iterable, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from .climatology import ClimatologyCache
+from .engine import (
+	DailyLayout,
+	_test_kwargs,
+	_write_flags,
+	climatic_outlier_mask,
+	jump_endpoints,
+	jump_flags,
+	repetition_runs,
+)
+from .qc import (
+	DAILY_BOUNDED_VARS,
+	DAILY_RANGE_PARAMS,
+	FLAG_STORE_MAX_ROWS,
+	INTERNAL_CONSISTENCY_PAIRS,
+	TEMPORAL_COHERENCE_VARS,
+	FlagStore,
+	_as_dataframe,
+	_build_datetime,
+	_coerce_numeric,
+	_daily_output_path,
+	_default_iqr,
+	_jump_threshold,
+	_resolve_pipeline_columns,
+	_summarize_flags,
+	climatic_outliers,
+	daily_out_of_range,
+	daily_repetition,
+	internal_consistency,
+	temporal_coherence,
+)
+
+
+CHECKPOINT_FILE = "qc_checkpoint.json"
+CHECKPOINT_VERSION = 2
+
+
+class QcCheckpoint:
+	"""Per-station state of the last incremental QC run.
+
+	Parameters
+	----------
+	checkpoint_dir : str or Path
+		Folder holding ``qc_checkpoint.json`` and the climatology cache.
+	"""
+
+	def __init__(self, checkpoint_dir: Union[str, Path]) -> None:
+		self.checkpoint_dir = Path(checkpoint_dir)
+		self.signature: Optional[str] = None
+		self.stations: dict[str, dict] = {}
+
+	@property
+	def path(self) -> Path:
+		return self.checkpoint_dir / CHECKPOINT_FILE
+
+	@property
+	def climatology_dir(self) -> Path:
+		return self.checkpoint_dir / "climatology"
+
+	def load(self) -> "QcCheckpoint":
+		"""Read the checkpoint file; a missing or unreadable file gives an empty checkpoint."""
+		try:
+			with self.path.open("r", encoding="utf-8") as f:
+				state = json.load(f)
+		except (OSError, ValueError):
+			return self
+		if state.get("version") == CHECKPOINT_VERSION:
+			self.signature = state.get("signature")
+			self.stations = state.get("stations", {})
+		return self
+
+	def save(self) -> None:
+		"""Write the checkpoint atomically."""
+		self.checkpoint_dir.mkdir(parents=True, exist_ok=True)
+		state = {"version": CHECKPOINT_VERSION, "signature": self.signature, "stations": self.stations}
+		fd, tmp = tempfile.mkstemp(dir=self.checkpoint_dir, suffix=".json.tmp")
+		try:
+			with os.fdopen(fd, "w", encoding="utf-8") as f:
+				json.dump(state, f)
+			os.replace(tmp, self.path)
+		except BaseException:
+			Path(tmp).unlink(missing_ok=True)
+			raise
+
+
+def _ymd_number(df: pd.DataFrame, year_col: str, month_col: str, day_col: str) -> np.ndarray:
+	"""``Year * 10000 + Month * 100 + Day`` as float, NaN when a part is missing."""
+	parts = [
+		pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+		for col in (year_col, month_col, day_col)
+	]
+	return parts[0] * 10000 + parts[1] * 100 + parts[2]
+
+
+def _retract_flags(path: Path, test_name: str, months: Iterable[object]) -> None:
+	"""Remove ``test_name`` from the rows of ``months`` in the flag file at ``path``."""
+	if not path.exists():
+		return
+	table = pd.read_csv(path, sep="\t")
+	month = pd.to_numeric(table["Month"], errors="coerce")
+	selected = np.flatnonzero(month.isin(pd.to_numeric(pd.Series(list(months)), errors="coerce")).to_numpy())
+	if len(selected) == 0:
+		return
+	tests = table["Test"].astype(object).to_numpy(copy=True)
+	for i in selected:
+		kept = [t for t in str(tests[i]).split(";") if t.strip() and t.strip() != test_name]
+		tests[i] = ";".join(kept) if kept else None
+	table["Test"] = tests
+	table[table["Test"].notna()].to_csv(path, sep="\t", index=False)
+
+
+def _signature(variable_list, units_map, dr_kwargs, tc_kwargs, rep_kwargs, columns) -> str:
+	"""Settings a checkpoint depends on; any change triggers a full run."""
+	return json.dumps(
+		{
+			"variables": list(variable_list),
+			"units": {var: units_map.get(var) for var in variable_list},
+			"columns": list(columns),
+			"daily_out_of_range": dr_kwargs,
+			"temporal_coherence": tc_kwargs,
+			"daily_repetition": rep_kwargs,
+		},
+		sort_keys=True,
+		default=str,
+	)
+
+
+def run_qc_incremental(
+	data: Union[str, Path, pd.DataFrame],
+	checkpoint_dir: Union[str, Path],
+	station_id: str = "station",
+	units_map: Optional[dict[str, str]] = None,
+	variable_cols: Optional[Iterable[str]] = None,
+	outpath: Optional[Union[str, Path]] = None,
+	year_col: str = "Year",
+	month_col: str = "Month",
+	day_col: str = "Day",
+	station_col: Optional[str] = "station",
+	climatic_outliers_params: Optional[dict] = None,
+	daily_out_of_range_params: Optional[dict] = None,
+	temporal_coherence_params: Optional[dict] = None,
+	daily_repetition_params: Optional[dict] = None,
+) -> dict[str, Union[pd.DataFrame, dict[str, pd.DataFrame]]]:
+	"""Run the daily QC tests on the rows appended since the last checkpoint.
+
+	Parameters are those of :func:`agrometflow.dataquality.qc.run_qc_pipeline`
+	for daily data. ``data`` is the whole record; rows of a station beyond the
+	number already tested, in input order, are the new rows and must be dated
+	after the last tested date. The checkpoint in ``checkpoint_dir`` is
+	updated at the end of the run.
+
+	Returns the same ``results_by_test``, ``all_flags`` and ``summary`` as
+	``run_qc_pipeline``, restricted to the new rows, the earlier rows they
+	flag and the ``climatic_outliers`` flags of the re-tested groups, listed
+	(station, ``Var``, ``Month``) in ``retested``: these flags replace the
+	``climatic_outliers`` flags of the same groups from earlier runs. With
+	``outpath``, the flag files are updated accordingly.
+	"""
+	df = _as_dataframe(data)
+	station_col, _, variable_list = _resolve_pipeline_columns(
+		df,
+		frequency="daily",
+		variable_cols=variable_cols,
+		station_col=station_col,
+		year_col=year_col,
+		month_col=month_col,
+		day_col=day_col,
+	)
+	units_map = units_map or {}
+	co_kwargs = _test_kwargs(climatic_outliers, climatic_outliers_params)
+	dr_kwargs = _test_kwargs(daily_out_of_range, daily_out_of_range_params)
+	tc_kwargs = _test_kwargs(temporal_coherence, temporal_coherence_params)
+	rep_kwargs = _test_kwargs(daily_repetition, daily_repetition_params)
+	n_rep = rep_kwargs["n"]
+	date_cols = [year_col, month_col, day_col]
+
+	checkpoint = QcCheckpoint(checkpoint_dir).load()
+	signature = _signature(variable_list, units_map, dr_kwargs, tc_kwargs, rep_kwargs, date_cols)
+	if checkpoint.signature != signature:
+		checkpoint.stations = {}
+	checkpoint.signature = signature
+
+	# Split each station into tested history and new rows.
+	layout = DailyLayout(df, station_col, station_id, year_col, month_col, day_col)
+	codes = layout.codes
+	valid = codes >= 0
+	safe_codes = np.where(valid, codes, 0)
+	keys = [str(k) for k in layout.station_keys]
+	counts = np.bincount(codes[valid], minlength=layout.n_stations)
+	rank = pd.Series(codes).groupby(codes).cumcount().to_numpy()
+
+	entries = [checkpoint.stations.get(k) for k in keys]
+	resumable = np.array(
+		[e is not None and e["resumable"] and e["rows"] <= c for e, c in zip(entries, counts)],
+		dtype=bool,
+	)
+	tested_rows = np.array([e["rows"] if ok else 0 for e, ok in zip(entries, resumable)], dtype=np.intp)
+	last_date = np.array([e["last"] if ok else np.nan for e, ok in zip(entries, resumable)], dtype=np.float64)
+
+	ymd = _ymd_number(df, year_col, month_col, day_col)
+	old = valid & (rank < tested_rows[safe_codes])
+	new = valid & ~old & resumable[safe_codes]
+	with np.errstate(invalid="ignore"):
+		bad = old & ~(ymd <= last_date[safe_codes])
+		bad |= new & ~(ymd > last_date[safe_codes])
+	new_rows = np.flatnonzero(new & ~bad)
+	if len(new_rows):
+		bad[new_rows] |= _build_datetime(df.iloc[new_rows], year_col, month_col, day_col).isna().to_numpy()
+	resumable &= np.bincount(codes[bad], minlength=layout.n_stations) == 0
+	evaluated = valid & ~(resumable[safe_codes] & (rank < tested_rows[safe_codes]))
+
+	# Evaluation frame: checkpointed tail rows followed by the rows to test.
+	needed = list(dict.fromkeys(([station_col] if station_col else []) + date_cols + list(variable_list)))
+	tail_parts = []
+	for s in np.flatnonzero(resumable & (counts > tested_rows)):
+		tail = entries[s]["tail"]
+		part = pd.DataFrame({col: tail[col] for col in date_cols + list(variable_list)})
+		if station_col:
+			part.insert(0, station_col, [layout.station_keys[s]] * len(part))
+		tail_parts.append(part[needed])
+	fresh_rows = np.flatnonzero(evaluated)
+	fresh = df.iloc[fresh_rows][needed]
+	if tail_parts:
+		tail_frame = pd.concat(tail_parts, ignore_index=True)
+		for col in date_cols:
+			try:
+				tail_frame[col] = tail_frame[col].astype(df[col].dtype)
+			except (TypeError, ValueError):
+				pass
+		frame = pd.concat([tail_frame, fresh], ignore_index=True)
+	else:
+		frame = fresh.reset_index(drop=True)
+	n_tail = len(frame) - len(fresh)
+	is_tail = np.zeros(len(frame), dtype=bool)
+	is_tail[:n_tail] = True
+
+	work = DailyLayout(frame, station_col, station_id, year_col, month_col, day_col)
+	work_keys = [str(k) for k in work.station_keys]
+	work_counts = np.bincount(work.codes[work.codes >= 0], minlength=work.n_stations)
+	ymd_starts = np.cumsum(work_counts) - work_counts
+	ymd_ends = ymd_starts + work_counts - 1
+	has_tail = np.bincount(work.codes[is_tail], minlength=work.n_stations) > 0
+	prior_runs = {
+		var: np.array(
+			[checkpoint.stations[k]["runs"][var] if t else 0 for k, t in zip(work_keys, has_tail)],
+			dtype=np.intp,
+		)
+		for var in variable_list
+	}
+	trailing_runs: dict[str, np.ndarray] = {}
+
+	# Climatology groups (station, month) of the whole record and of the new rows.
+	n_months = max(layout.n_months, 1)
+	month_codes = layout.month_codes
+	group = codes * n_months + month_codes
+	fresh_codes = codes[fresh_rows]
+	fresh_months = month_codes[fresh_rows]
+	prior_notna = {
+		var: np.array([e["notna"][var] if ok else 0 for e, ok in zip(entries, resumable)], dtype=np.intp)
+		for var in variable_list
+	}
+	notna_counts: dict[str, np.ndarray] = {}
+
+	results: dict[str, list[pd.DataFrame]] = {}
+	retested: list[pd.DataFrame] = []
+
+	def _emit(
+		lay: DailyLayout,
+		test_name: str,
+		positions: np.ndarray,
+		values: pd.Series,
+		var_name: str,
+		dedupe: bool = False,
+	) -> None:
+		if len(positions) == 0:
+			return
+		out = lay.flag_frame(positions, values, var_name, test_name)
+		if dedupe:
+			keep = ~out.duplicated().to_numpy()
+			positions = positions[keep]
+			out = out[keep].reset_index(drop=True)
+		if outpath:
+			_write_flags(lay, out, positions, var_name, outpath)
+		results.setdefault(test_name, []).append(out)
+
+	flag_store = FlagStore(max_rows=FLAG_STORE_MAX_ROWS) if outpath else nullcontext()
+	with flag_store:
+		for var in variable_list:
+			units = units_map.get(var)
+			work_values = work.values(var, units)
+			wv = work_values.to_numpy(dtype=np.float64, na_value=np.nan)
+
+			# climatic_outliers: every row of the groups whose bounds moved.
+			fv = wv[n_tail:]
+			usable = ~np.isnan(fv)
+			prior_count = prior_notna[var]
+			notna_counts[var] = prior_count + np.bincount(fresh_codes[usable], minlength=layout.n_stations)
+			eligible = notna_counts[var] > 5 * 365
+			whole = eligible & ~(prior_count > 5 * 365)
+			if var in DAILY_BOUNDED_VARS:
+				usable &= fv != 0
+			usable &= (fresh_months >= 0) & eligible[fresh_codes]
+			moved = np.unique(fresh_codes[usable] * n_months + fresh_months[usable])
+			retest = np.flatnonzero(valid & (month_codes >= 0) & (whole[safe_codes] | np.isin(group, moved)))
+			if len(retest):
+				part = DailyLayout(df.iloc[retest], station_col, station_id, year_col, month_col, day_col)
+				values = part.values(var, units)
+				v = values.to_numpy(dtype=np.float64, na_value=np.nan)
+				outrange = co_kwargs["iqr"] if co_kwargs["iqr"] is not None else _default_iqr(var)
+				cache_dir = co_kwargs["cache_dir"] if co_kwargs["cache_dir"] is not None else checkpoint.climatology_dir
+				flagged, _ = climatic_outlier_mask(
+					part,
+					v,
+					var,
+					outrange,
+					ClimatologyCache(cache_dir, var),
+					eligible=np.ones(part.n_stations, dtype=bool),
+				)
+				part_groups = np.unique(part.codes * part.n_months + part.month_codes)
+				group_stations = part_groups // part.n_months
+				group_months = part.month_keys.take(part_groups % part.n_months)
+				moved_groups = {"Var": var, "Month": group_months}
+				if station_col is not None:
+					moved_groups = {station_col: part.station_keys.take(group_stations), **moved_groups}
+				retested.append(pd.DataFrame(moved_groups))
+				if outpath:
+					for s in np.unique(group_stations):
+						_retract_flags(
+							_daily_output_path(outpath, part.station_key(s), var),
+							"climatic_outliers",
+							group_months[group_stations == s],
+						)
+				_emit(part, "climatic_outliers", part.order[flagged[part.order]], values, var)
+
+			# daily_out_of_range
+			if var in DAILY_RANGE_PARAMS:
+				lower_name, upper_name = DAILY_RANGE_PARAMS[var]
+				mask = (wv > dr_kwargs[upper_name]) | (wv < dr_kwargs[lower_name])
+				mask &= ~is_tail
+				_emit(work, "daily_out_of_range", work.order[mask[work.order]], work_values, var)
+
+			# temporal_coherence: jumps between two tail rows were tested before.
+			if var in TEMPORAL_COHERENCE_VARS:
+				jumps = _jump_threshold(
+					var,
+					tc_kwargs["temp_jumps"],
+					tc_kwargs["windspeed_jumps"],
+					tc_kwargs["snowdepth_jumps"],
+				)
+				flags = jump_flags(work, wv, jumps) & ~is_tail[work.dt_order]
+				_emit(work, "temporal_coherence", work.dt_order[jump_endpoints(flags)], work_values, var, dedupe=True)
+
+			# daily_repetition: a tail run of n or more rows is longer than the
+			# tail; tail rows are reported only when the new rows complete the run.
+			run_id, lengths = repetition_runs(work, wv)
+			if len(run_id):
+				prior = prior_runs[var]
+				extended = np.flatnonzero(has_tail & (prior >= n_rep))
+				lengths[run_id[ymd_starts[extended]]] += prior[extended]
+				seq_tail = is_tail[work.ymd_order]
+				seq_prior = prior[work.codes[work.ymd_order]]
+				reaches_new = np.bincount(run_id, weights=~seq_tail, minlength=len(lengths)) > 0
+				selected = lengths[run_id] >= n_rep
+				if var in DAILY_BOUNDED_VARS:
+					selected &= wv[work.ymd_order] != 0
+				selected &= ~seq_tail | (reaches_new[run_id] & (seq_prior < n_rep))
+				_emit(work, "daily_repetition", work.ymd_order[selected], work_values, var)
+				trailing_runs[var] = np.minimum(lengths[run_id[ymd_ends]], n_rep)
+			else:
+				trailing_runs[var] = np.zeros(work.n_stations, dtype=np.intp)
+
+			# duplicate_dates: new rows are dated after the tail.
+			dup = work.duplicated & ~is_tail
+			_emit(work, "duplicate_dates", work.order[dup[work.order]], work_values, var)
+
+		tested = frame[~is_tail]
+		for var_x, var_y in INTERNAL_CONSISTENCY_PAIRS:
+			if var_x in variable_list and var_y in variable_list:
+				out = internal_consistency(
+					tested,
+					var_x=var_x,
+					var_y=var_y,
+					station_id=station_id,
+					units_x=units_map.get(var_x),
+					units_y=units_map.get(var_y),
+					outpath=outpath,
+					year_col=year_col,
+					month_col=month_col,
+					day_col=day_col,
+				)
+				if not out.empty:
+					results.setdefault("internal_consistency", []).append(out)
+
+	# New checkpoint: tail rows in Year/Month/Day order, enough for the
+	# previous day and the trailing runs shorter than n.
+	if work.n_stations:
+		tail_len = np.ones(work.n_stations, dtype=np.intp)
+		for var in variable_list:
+			tail_len = np.maximum(tail_len, np.minimum(trailing_runs[var], n_rep - 1))
+		raw = {var: _coerce_numeric(frame[var]).to_numpy(dtype=np.float64, na_value=np.nan) for var in variable_list}
+		frame_ymd = _ymd_number(frame, year_col, month_col, day_col)
+		last_rows = work.ymd_order[ymd_ends]
+		key_codes = {key: code for code, key in enumerate(keys)}
+		last_ok = ~_build_datetime(frame.iloc[last_rows], year_col, month_col, day_col).isna().to_numpy()
+		for s, key in enumerate(work_keys):
+			rows = work.ymd_order[ymd_ends[s] - tail_len[s] + 1 : ymd_ends[s] + 1]
+			last = frame_ymd[last_rows[s]]
+			tail = {col: frame[col].iloc[rows].tolist() for col in date_cols}
+			tail.update({var: raw[var][rows].tolist() for var in variable_list})
+			checkpoint.stations[key] = {
+				"rows": int(counts[key_codes[key]]),
+				"last": float(last),
+				"resumable": bool(last_ok[s] and np.isfinite(last)),
+				"runs": {var: int(trailing_runs[var][s]) for var in variable_list},
+				"notna": {var: int(notna_counts[var][key_codes[key]]) for var in variable_list},
+				"tail": tail,
+			}
+	checkpoint.save()
+	result = _summarize_flags(results)
+	group_cols = ([station_col] if station_col is not None else []) + ["Var", "Month"]
+	result["retested"] = pd.concat(retested, ignore_index=True) if retested else pd.DataFrame(columns=group_cols)
+	return result
+
+
+__all__ = [
+	"QcCheckpoint",
+	"run_qc_incremental",
+]
@@ -1,6 +1,9 @@
 from __future__ import annotations
 
 import json
+from contextlib import nullcontext
+from concurrent.futures import Executor
+from contextvars import ContextVar
 from pathlib import Path
 from typing import Iterable, Optional, Sequence, Union
 
@@ -8,9 +11,16 @@ import numpy as np
 import pandas as pd
 import yaml
 
+from .climatology import ClimatologyCache, tukey_bounds
 
 DAILY_BOUNDED_VARS = {"rr", "sd", "fs", "sc", "sw"}
 
+# Suffix of the source flag column of a variable (e.g. ``Tx_flags``), holding
+# uint8 codes whose low 4 bits are non-zero when the value failed the QC of
+# the data provider (see agrometflow.climate.ghcnd.encode_flags).
+FLAGS_SUFFIX = "_flags"
+SOURCE_FLAG_MODES = {"skip", "seed"}
+
 
 def _as_dataframe(data: Union[str, Path, pd.DataFrame]) -> pd.DataFrame:
 	if isinstance(data, pd.DataFrame):
@@ -140,28 +150,135 @@ def check_units(values: pd.Series, var_code: str, units: str) -> pd.Series:
 	return x
 
 
+def _combine_tests(test_x: pd.Series, test_y: pd.Series) -> np.ndarray:
+	"""Join the ``Test`` labels of an outer merge, keeping first-seen order."""
+	a = test_x.astype("string")
+	b = test_y.astype("string")
+	a_na = a.isna().to_numpy()
+	b_na = b.isna().to_numpy()
+	combined = np.where(a_na, b.astype(object), a.astype(object))
+	combined[a_na & b_na] = None
+	for i in np.flatnonzero(~a_na & ~b_na):
+		flags = [x.strip() for x in str(a.iat[i]).split(";") if x.strip()]
+		if str(b.iat[i]) not in flags:
+			flags.append(str(b.iat[i]))
+		combined[i] = ";".join(flags)
+	return combined
+
+
+def _merge_flags(prev: pd.DataFrame, out: pd.DataFrame, key_cols: Sequence[str]) -> pd.DataFrame:
+	merged = prev.merge(out, on=list(key_cols), how="outer", suffixes=("_x", "_y"))
+	merged["Test"] = _combine_tests(merged["Test_x"], merged["Test_y"])
+	return merged[list(key_cols) + ["Test"]]
+
+
+def _union_flags(frames: Sequence[pd.DataFrame], key_cols: Sequence[str]) -> Optional[pd.DataFrame]:
+	"""Outer-merge several flag tables in one pass.
+
+	Only valid when every table has the same NumPy or string key dtypes, no
+	missing key or label and no repeated key; returns ``None`` otherwise so
+	that the merges are replayed one by one.
+	"""
+	keys = list(key_cols)
+	dtypes = [frames[0][c].dtype for c in keys]
+	if not all(isinstance(dt, (np.dtype, pd.StringDtype)) for dt in dtypes):
+		return None
+	for f in frames[1:]:
+		if any(f[c].dtype != dt for c, dt in zip(keys, dtypes)):
+			return None
+	columns = {c: np.concatenate([f[c].to_numpy() for f in frames]) for c in keys}
+	tests = np.concatenate([f["Test"].to_numpy(dtype=object) for f in frames])
+	if pd.isna(tests).any():
+		return None
+	codes = [pd.factorize(columns[c], sort=True)[0] for c in keys]
+	if any((c < 0).any() for c in codes):
+		return None
+	frame_id = np.repeat(np.arange(len(frames)), [len(f) for f in frames])
+
+	# Outer merges sort on the join keys; ties keep the table order.
+	order = np.lexsort(codes[::-1])
+	codes = np.column_stack([c[order] for c in codes])
+	frame_id = frame_id[order]
+	tests = tests[order]
+	same_key = (codes[1:] == codes[:-1]).all(axis=1)
+	if (same_key & (frame_id[1:] == frame_id[:-1])).any():
+		return None
+	starts = np.flatnonzero(np.concatenate(([True], ~same_key)))
+	ends = np.append(starts[1:], len(order))
+	combined = tests[starts].copy()
+	for k in np.flatnonzero(ends - starts > 1):
+		combined[k] = ";".join(dict.fromkeys(str(t) for t in tests[starts[k]:ends[k]]))
+	rows = order[starts]
+	out = pd.DataFrame({c: columns[c][rows] for c in keys})
+	out["Test"] = combined
+	return out
+
+
+class FlagStore:
+	"""Collect flag tables in memory and write each flag file once.
+
+	While a store is active (``with FlagStore(): ...``), every test that
+	writes to ``outpath`` hands its flags to the store instead of reading,
+	merging and rewriting the target file. Files are written when the block
+	exits, or as soon as more than ``max_rows`` flag rows are pending. The
+	files are the same as those written without a store, including flags
+	merged into files left by an earlier run.
+	"""
+
+	def __init__(self, max_rows: Optional[int] = None) -> None:
+		self.max_rows = max_rows
+		self._pending: dict[Path, tuple[list[pd.DataFrame], list[str]]] = {}
+		self._pending_rows = 0
+		self._token = None
+
+	def add(self, path: Path, out: pd.DataFrame, key_cols: Sequence[str]) -> None:
+		frames, _ = self._pending.setdefault(Path(path), ([], list(key_cols)))
+		frames.append(out)
+		self._pending_rows += len(out)
+		if self.max_rows is not None and self._pending_rows > self.max_rows:
+			self.flush()
+
+	def flush(self) -> None:
+		"""Write all pending files and release them from memory."""
+		for path, (frames, key_cols) in self._pending.items():
+			if path.exists():
+				frames = [pd.read_csv(path, sep="\t")] + frames
+			table = frames[0]
+			if len(frames) > 1:
+				table = _union_flags(frames, key_cols)
+				if table is None:
+					table = frames[0]
+					for out in frames[1:]:
+						table = _merge_flags(table, out, key_cols)
+			path.parent.mkdir(parents=True, exist_ok=True)
+			table.to_csv(path, sep="\t", index=False)
+		self._pending.clear()
+		self._pending_rows = 0
+
+	def __enter__(self) -> "FlagStore":
+		self._token = _ACTIVE_FLAG_STORE.set(self)
+		return self
+
+	def __exit__(self, exc_type, exc, tb) -> None:
+		_ACTIVE_FLAG_STORE.reset(self._token)
+		self._token = None
+		self.flush()
+
+
+FLAG_STORE_MAX_ROWS = 1_000_000
+
+_ACTIVE_FLAG_STORE: ContextVar[Optional[FlagStore]] = ContextVar("agrometflow_flag_store", default=None)
+
+
 def _append_or_write_flags(path: Path, out: pd.DataFrame, key_cols: Sequence[str]) -> None:
+	store = _ACTIVE_FLAG_STORE.get()
+	if store is not None:
+		store.add(path, out, key_cols)
+		return
 	path.parent.mkdir(parents=True, exist_ok=True)
 	if path.exists():
 		prev = pd.read_csv(path, sep="\t")
-		merged = prev.merge(out, on=list(key_cols), how="outer", suffixes=("_x", "_y"))
-		test_x = merged["Test_x"].astype("string")
-		test_y = merged["Test_y"].astype("string")
-
-		def combine_flags(a: Optional[str], b: Optional[str]) -> Optional[str]:
-			if pd.isna(a):
-				return None if pd.isna(b) else str(b)
-			if pd.isna(b):
-				return str(a)
-			flags = [x.strip() for x in str(a).split(";") if x.strip()]
-			if str(b) not in flags:
-				flags.append(str(b))
-			return ";".join(flags)
-
-		merged["Test"] = [combine_flags(a, b) for a, b in zip(test_x, test_y)]
-		cols = list(key_cols) + ["Test"]
-		merged = merged[cols]
-		merged.to_csv(path, sep="\t", index=False)
+		_merge_flags(prev, out, key_cols).to_csv(path, sep="\t", index=False)
 	else:
 		out.to_csv(path, sep="\t", index=False)
 
@@ -189,6 +306,91 @@ def _lookup_station_value(mapping: dict, key: object) -> Optional[object]:
 	return None
 
 
+DAILY_RANGE_PARAMS = {
+	"Tx": ("tmax_lower", "tmax_upper"),
+	"Tn": ("tmin_lower", "tmin_upper"),
+	"rr": ("rr_lower", "rr_upper"),
+	"w": ("w_lower", "w_upper"),
+	"dd": ("dd_lower", "dd_upper"),
+	"sc": ("sc_lower", "sc_upper"),
+	"sd": ("sd_lower", "sd_upper"),
+	"fs": ("fs_lower", "fs_upper"),
+}
+
+TEMPORAL_COHERENCE_VARS = {"Tx", "Tn", "w", "sd"}
+
+INTERNAL_CONSISTENCY_PAIRS = (
+	("Tx", "Tn"),
+	("w", "dd"),
+	("sc", "sd"),
+	("fs", "sd"),
+	("fs", "Tn"),
+	("sd", "Tn"),
+)
+
+
+def _default_iqr(var_name: str) -> float:
+	if var_name == "rr":
+		return 5
+	if var_name in {"Tx", "Tn", "ta"}:
+		return 3
+	return 4
+
+
+def _jump_threshold(var_name: str, temp_jumps: float, windspeed_jumps: float, snowdepth_jumps: float) -> float:
+	if var_name in {"Tx", "Tn"}:
+		return temp_jumps
+	if var_name == "w":
+		return windspeed_jumps
+	return snowdepth_jumps
+
+
+def _plot_climatic_boxplot(
+	group: pd.DataFrame,
+	sid: object,
+	titled: bool,
+	var_name: str,
+	month_col: str,
+	outrange: float,
+	units: Optional[str] = None,
+	outfile: Optional[Union[str, Path]] = None,
+	outpath: Optional[Union[str, Path]] = None,
+	show: bool = False,
+) -> None:
+	import matplotlib.pyplot as plt
+
+	if outfile is None:
+		if outpath is not None:
+			plot_path = Path(outpath) / f"climatic_outliers_boxplot_{sid}_{var_name}.pdf"
+		else:
+			plot_path = Path(f"climatic_outliers_boxplot_{sid}_{var_name}.pdf")
+	else:
+		plot_path = Path(outfile)
+		if titled and str(outfile).count("_") == 0:
+			plot_path = Path(str(outfile).replace(".pdf", f"_{sid}.pdf"))
+	plot_path.parent.mkdir(parents=True, exist_ok=True)
+	fig, ax = plt.subplots(figsize=(10, 4))
+	month_series = _coerce_numeric(group[month_col])
+	month_data: list[np.ndarray] = []
+	labels: list[str] = []
+	for m in range(1, 13):
+		vals = group.loc[month_series == m, var_name].dropna().to_numpy()
+		if vals.size > 0:
+			month_data.append(vals)
+			labels.append(str(m))
+	if month_data:
+		ax.boxplot(month_data, tick_labels=labels, whis=outrange)
+	ax.set_title(f"{var_name} - {sid}" if titled else var_name)
+	ax.set_xlabel("Months")
+	ax.set_ylabel(units if units else "Value")
+	fig.tight_layout()
+	fig.savefig(plot_path, format="pdf")
+	if show:
+		plt.show()
+	else:
+		plt.close(fig)
+
+
 def climatic_outliers(
 	data: Union[str, Path, pd.DataFrame],
 	var_name: str,
@@ -203,6 +405,7 @@ def climatic_outliers(
 	month_col: str = "Month",
 	day_col: str = "Day",
 	station_col: Optional[str] = None,
+	cache_dir: Optional[Union[str, Path]] = None,
 ) -> pd.DataFrame:
 	"""Flag monthly climatic outliers using Tukey whiskers by month.
 
@@ -212,6 +415,9 @@ def climatic_outliers(
 	If ``station_col`` is provided, applies the test to every station in that column.
 	Otherwise, if ``station_id`` names one or more stations and a ``station`` column
 	exists in the data, the test is clipped to those station ids before computing bounds.
+	If ``cache_dir`` is given, monthly quartiles are stored there per station
+	and reused for the months whose values did not change
+	(see :class:`agrometflow.dataquality.climatology.ClimatologyCache`).
 	"""
 	df = _as_dataframe(data)
 
@@ -241,14 +447,7 @@ def climatic_outliers(
 		required_cols.append(group_station_col)
 	_ensure_columns(df, required_cols, "climatic_outliers")
 
-	outrange = iqr
-	if outrange is None:
-		if var_name == "rr":
-			outrange = 5
-		elif var_name in {"Tx", "Tn", "ta"}:
-			outrange = 3
-		else:
-			outrange = 4
+	outrange = iqr if iqr is not None else _default_iqr(var_name)
 
 	wrk_cols = [year_col, month_col, day_col, var_name]
 	if group_station_col is not None:
@@ -258,11 +457,21 @@ def climatic_outliers(
 	if units:
 		work[var_name] = check_units(work[var_name], var_name, units)
 
-	def month_bounds(s: pd.Series) -> tuple[float, float]:
-		q1 = s.quantile(0.25)
-		q3 = s.quantile(0.75)
-		i = q3 - q1
-		return q1 - outrange * i, q3 + outrange * i
+	def _outside_bounds(station_work: pd.DataFrame, sid: object) -> np.ndarray:
+		month_codes, months = pd.factorize(station_work[month_col])
+		v = station_work[var_name].to_numpy(dtype=np.float64, na_value=np.nan)
+		usable = (month_codes >= 0) & ~np.isnan(v)
+		q1 = q3 = None
+		if cache_dir is not None and len(months):
+			q1, q3 = ClimatologyCache(cache_dir, var_name).quartiles(
+				[sid], list(months), month_codes[usable], v[usable]
+			)
+		lower, upper = tukey_bounds(month_codes[usable], v[usable], len(months), outrange, q1, q3)
+		flagged = np.zeros(len(v), dtype=bool)
+		rows = np.flatnonzero(usable)
+		m = month_codes[rows]
+		flagged[rows] = (v[rows] < lower[m]) | (v[rows] > upper[m])
+		return flagged
 
 	def _empty_result() -> pd.DataFrame:
 		if group_station_col is not None:
@@ -270,38 +479,18 @@ def climatic_outliers(
 		return pd.DataFrame(columns=["Var", "Year", "Month", "Day", "Value", "Test"])
 
 	def _plot_group(group: pd.DataFrame, sid: object, titled: bool) -> None:
-		import matplotlib.pyplot as plt
-
-		if outfile is None:
-			if outpath is not None:
-				plot_path = Path(outpath) / f"climatic_outliers_boxplot_{sid}_{var_name}.pdf"
-			else:
-				plot_path = Path(f"climatic_outliers_boxplot_{sid}_{var_name}.pdf")
-		else:
-			plot_path = Path(outfile)
-			if titled and str(outfile).count("_") == 0:
-				plot_path = Path(str(outfile).replace(".pdf", f"_{sid}.pdf"))
-		plot_path.parent.mkdir(parents=True, exist_ok=True)
-		fig, ax = plt.subplots(figsize=(10, 4))
-		month_series = _coerce_numeric(group[month_col])
-		month_data: list[np.ndarray] = []
-		labels: list[str] = []
-		for m in range(1, 13):
-			vals = group.loc[month_series == m, var_name].dropna().to_numpy()
-			if vals.size > 0:
-				month_data.append(vals)
-				labels.append(str(m))
-		if month_data:
-			ax.boxplot(month_data, tick_labels=labels, whis=outrange)
-		ax.set_title(f"{var_name} - {sid}" if titled else var_name)
-		ax.set_xlabel("Months")
-		ax.set_ylabel(units if units else "Value")
-		fig.tight_layout()
-		fig.savefig(plot_path, format="pdf")
-		if show:
-			plt.show()
-		else:
-			plt.close(fig)
+		_plot_climatic_boxplot(
+			group,
+			sid,
+			titled,
+			var_name=var_name,
+			month_col=month_col,
+			outrange=outrange,
+			units=units,
+			outfile=outfile,
+			outpath=outpath,
+			show=show,
+		)
 
 	def _flag_group(group: pd.DataFrame, sid: object) -> pd.DataFrame:
 		station_work = group.copy()
@@ -314,11 +503,8 @@ def climatic_outliers(
 			return _empty_result()
 		if bplot:
 			_plot_group(station_work, sid, titled=group_station_col is not None)
-		bounds = station_work.groupby(month_col)[var_name].apply(month_bounds)
-		bounds = bounds.rename("bounds").reset_index()
-		bounds[["lower", "upper"]] = pd.DataFrame(bounds["bounds"].tolist(), index=bounds.index)
-		merged = station_work.merge(bounds[[month_col, "lower", "upper"]], on=month_col, how="left")
-		out = merged[(merged[var_name] < merged["lower"]) | (merged[var_name] > merged["upper"])].copy()
+		station_work = station_work.reset_index(drop=True)
+		out = station_work[_outside_bounds(station_work, sid)].copy()
 		if out.empty:
 			return _empty_result()
 		out = out.rename(
@@ -362,11 +548,8 @@ def climatic_outliers(
 		return _empty_result()
 	if bplot:
 		_plot_group(work, station_id, titled=False)
-	bounds = work.groupby(month_col)[var_name].apply(month_bounds)
-	bounds = bounds.rename("bounds").reset_index()
-	bounds[["lower", "upper"]] = pd.DataFrame(bounds["bounds"].tolist(), index=bounds.index)
-	merged = work.merge(bounds[[month_col, "lower", "upper"]], on=month_col, how="left")
-	out = merged[(merged[var_name] < merged["lower"]) | (merged[var_name] > merged["upper"])].copy()
+	work = work.reset_index(drop=True)
+	out = work[_outside_bounds(work, str(station_id))].copy()
 	if out.empty:
 		return _empty_result()
 	out = out.rename(
@@ -511,10 +694,10 @@ def temporal_coherence(
 	if station_col is not None:
 		required_cols.append(station_col)
 	_ensure_columns(df, required_cols, "temporal_coherence")
-	if var_name not in {"Tx", "Tn", "w", "sd"}:
+	if var_name not in TEMPORAL_COHERENCE_VARS:
 		raise ValueError("Variable not supported by this test")
 
-	jumps = temp_jumps if var_name in {"Tx", "Tn"} else windspeed_jumps if var_name == "w" else snowdepth_jumps
+	jumps = _jump_threshold(var_name, temp_jumps, windspeed_jumps, snowdepth_jumps)
 
 	wrk_cols = [year_col, month_col, day_col, var_name]
 	if station_col is not None:
@@ -529,7 +712,7 @@ def temporal_coherence(
 		all_out = []
 		for sid, group in work.groupby(station_col):
 			dt = _build_datetime(group, year_col, month_col, day_col)
-			work_s = group.assign(_dt=dt).sort_values("_dt").reset_index(drop=True)
+			work_s = group.assign(_dt=dt).sort_values("_dt", kind="stable").reset_index(drop=True)
 			diff_val = work_s[var_name].diff()
 			diff_day = work_s["_dt"].diff().dt.days
 			flags = ((diff_val.abs() > jumps) & (diff_day == 1)).fillna(False)
@@ -557,7 +740,7 @@ def temporal_coherence(
 	else:
 		# Single station processing
 		dt = _build_datetime(work, year_col, month_col, day_col)
-		work = work.assign(_dt=dt).sort_values("_dt").reset_index(drop=True)
+		work = work.assign(_dt=dt).sort_values("_dt", kind="stable").reset_index(drop=True)
 		diff_val = work[var_name].diff()
 		diff_day = work["_dt"].diff().dt.days
 		flags = ((diff_val.abs() > jumps) & (diff_day == 1)).fillna(False)
@@ -1549,37 +1732,216 @@ def wmo_gross_errors(
 	return pd.concat(all_out, ignore_index=True).drop_duplicates()
 
 
-def run_qc_pipeline(
+def source_failed(flags: pd.Series) -> np.ndarray:
+	"""True where a source flag code marks a value that failed the provider's QC."""
+	codes = pd.to_numeric(flags, errors="coerce").fillna(0).to_numpy(dtype=np.int64)
+	return (codes & 0x0F) != 0
+
+
+def source_qc(
 	data: Union[str, Path, pd.DataFrame],
+	var_name: str,
+	station_id: str = "station",
+	units: Optional[str] = None,
+	outpath: Optional[Union[str, Path]] = None,
+	year_col: str = "Year",
+	month_col: str = "Month",
+	day_col: str = "Day",
+	flag_col: Optional[str] = None,
+	station_col: Optional[str] = None,
+) -> pd.DataFrame:
+	"""Flag the values that already failed the QC of the data provider.
+
+	``flag_col`` (default ``<var_name>_flags``) holds the source flag codes
+	of ``var_name``; see :func:`source_failed`. Values are reported in the
+	canonical units of the other tests (see :func:`check_units`).
+	"""
+	df = _as_dataframe(data)
+	flag_col = flag_col or f"{var_name}{FLAGS_SUFFIX}"
+	required_cols = [year_col, month_col, day_col, var_name, flag_col]
+	if station_col is not None:
+		required_cols.append(station_col)
+	_ensure_columns(df, required_cols, "source_qc")
+
+	wrk_cols = [year_col, month_col, day_col, var_name]
+	if station_col is not None:
+		wrk_cols.insert(0, station_col)
+	out = df.loc[source_failed(df[flag_col]), wrk_cols].copy()
+	out[var_name] = _coerce_numeric(out[var_name])
+	if units:
+		out[var_name] = check_units(out[var_name], var_name, units)
+	out = out.rename(columns={year_col: "Year", month_col: "Month", day_col: "Day", var_name: "Value"})
+	out.insert(1 if station_col is not None else 0, "Var", var_name)
+	out["Test"] = "source_qc"
+	out = out.reset_index(drop=True)
+
+	if outpath and not out.empty:
+		keys = ["Var", "Year", "Month", "Day", "Value"]
+		if station_col is not None:
+			for sid, group in out.groupby(station_col, sort=True):
+				_append_or_write_flags(_daily_output_path(outpath, sid, var_name), group, keys)
+		else:
+			_append_or_write_flags(_daily_output_path(outpath, station_id, var_name), out, keys)
+	return out
+
+
+def _summarize_flags(
+	results: dict[str, list[pd.DataFrame]],
+) -> dict[str, Union[pd.DataFrame, dict[str, pd.DataFrame]]]:
+	"""Build the ``run_qc_pipeline`` result from the flag tables of each test."""
+	results_by_test: dict[str, pd.DataFrame] = {}
+	for test_name, out_list in results.items():
+		if not out_list:
+			continue
+		results_by_test[test_name] = pd.concat(out_list, ignore_index=True).drop_duplicates()
+
+	if results_by_test:
+		all_flags = pd.concat(results_by_test.values(), ignore_index=True)
+		summary = (
+			all_flags.groupby(["Test", "Var"], dropna=False)
+			.size()
+			.rename("n_flags")
+			.reset_index()
+			.sort_values(["Test", "Var"])
+			.reset_index(drop=True)
+		)
+	else:
+		all_flags = pd.DataFrame()
+		summary = pd.DataFrame(columns=["Test", "Var", "n_flags"])
+
+	return {
+		"results_by_test": results_by_test,
+		"all_flags": all_flags,
+		"summary": summary,
+	}
+
+
+def _run_daily_tests_legacy(
+	df: pd.DataFrame,
+	variable_list: Sequence[str],
+	station_col: Optional[str] = None,
 	station_id: str = "station",
 	units_map: Optional[dict[str, str]] = None,
-	frequency: str = "auto",
-	variable_cols: Optional[Iterable[str]] = None,
 	outpath: Optional[Union[str, Path]] = None,
 	year_col: str = "Year",
 	month_col: str = "Month",
 	day_col: str = "Day",
-	hour_col: str = "Hour",
-	minute_col: str = "Minute",
-	station_col: Optional[str] = "station",
 	climatic_outliers_params: Optional[dict] = None,
 	daily_out_of_range_params: Optional[dict] = None,
 	temporal_coherence_params: Optional[dict] = None,
 	daily_repetition_params: Optional[dict] = None,
-	subdaily_out_of_range_params: Optional[dict] = None,
-	subdaily_repetition_params: Optional[dict] = None,
 	bplot: bool = False,
-) -> dict[str, Union[pd.DataFrame, dict[str, pd.DataFrame]]]:
-	"""Run all applicable QC checks for a station dataset.
+) -> list[tuple[str, pd.DataFrame]]:
+	"""Call the single-variable daily test functions one by one.
 
-	Inputs are CSV/DataFrame with variables in columns.
-	If station_col is provided and exists in data, will group by station and apply tests per-station.
-	Returns:
-	- results_by_test: dict[test_name -> flagged rows DataFrame]
-	- all_flags: concatenated flags
-	- summary: counts by test and variable (and station if multi-station)
+	Same signature and return value as
+	:func:`agrometflow.dataquality.engine.run_daily_tests`.
+	"""
+	units_map = units_map or {}
+	climatic_outliers_params = climatic_outliers_params or {}
+	daily_out_of_range_params = daily_out_of_range_params or {}
+	temporal_coherence_params = temporal_coherence_params or {}
+	daily_repetition_params = daily_repetition_params or {}
+	common = dict(
+		station_id=station_id,
+		outpath=outpath,
+		year_col=year_col,
+		month_col=month_col,
+		day_col=day_col,
+	)
+	results: list[tuple[str, pd.DataFrame]] = []
+
+	def _add_result(test_name: str, out: pd.DataFrame) -> None:
+		if out is not None and not out.empty:
+			results.append((test_name, out))
+
+	for var in variable_list:
+		units = units_map.get(var)
+
+		_add_result(
+			"climatic_outliers",
+			climatic_outliers(
+				df,
+				bplot=bplot,
+				var_name=var,
+				units=units,
+				station_col=station_col,
+				**common,
+				**climatic_outliers_params,
+			),
+		)
+
+		try:
+			_add_result(
+				"daily_out_of_range",
+				daily_out_of_range(
+					df,
+					station_col=station_col,
+					var_name=var,
+					units=units,
+					**common,
+					**daily_out_of_range_params,
+				),
+			)
+		except ValueError:
+			pass
+
+		try:
+			_add_result(
+				"temporal_coherence",
+				temporal_coherence(
+					df,
+					station_col=station_col,
+					var_name=var,
+					units=units,
+					**common,
+					**temporal_coherence_params,
+				),
+			)
+		except ValueError:
+			pass
+
+		_add_result(
+			"daily_repetition",
+			daily_repetition(
+				df,
+				station_col=station_col,
+				var_name=var,
+				units=units,
+				**common,
+				**daily_repetition_params,
+			),
+		)
+
+		_add_result(
+			"duplicate_dates",
+			duplicate_dates(
+				df,
+				station_col=station_col,
+				var_name=var,
+				units=units,
+				**common,
+			),
+		)
+
+	return results
+
+
+def _resolve_pipeline_columns(
+	df: pd.DataFrame,
+	frequency: str = "auto",
+	variable_cols: Optional[Iterable[str]] = None,
+	station_col: Optional[str] = "station",
+	year_col: str = "Year",
+	month_col: str = "Month",
+	day_col: str = "Day",
+	hour_col: str = "Hour",
+	minute_col: str = "Minute",
+) -> tuple[Optional[str], bool, list[str]]:
+	"""Return ``(station_col, is_subdaily, variable_list)`` for ``df``.
+
+	``station_col`` is ``None`` when the column is absent from ``df``.
 	"""
-	df = _as_dataframe(data)
 	required_cols = [year_col, month_col, day_col]
 	if station_col is not None and station_col in df.columns:
 		required_cols.append(station_col)
@@ -1588,9 +1950,6 @@ def run_qc_pipeline(
 		station_col_actual = None
 	_ensure_columns(df, required_cols, "run_qc_pipeline")
 
-	if frequency not in {"auto", "daily", "subdaily"}:
-		raise ValueError("frequency must be one of: auto, daily, subdaily")
-
 	if frequency == "auto":
 		is_subdaily = hour_col in df.columns and minute_col in df.columns
 	elif frequency == "subdaily":
@@ -1602,12 +1961,50 @@ def run_qc_pipeline(
 		_ensure_columns(df, [hour_col, minute_col], "run_qc_pipeline")
 
 	excluded = {year_col, month_col, day_col, hour_col, minute_col}
+	excluded |= {
+		c for c in df.columns
+		if c.endswith(FLAGS_SUFFIX) and c[: -len(FLAGS_SUFFIX)] in df.columns
+	}
 	if variable_cols is None:
 		variable_list = [c for c in df.columns if c not in excluded]
 	else:
 		variable_list = list(variable_cols)
 		_ensure_columns(df, variable_list, "run_qc_pipeline")
 
+	return station_col_actual, is_subdaily, variable_list
+
+
+def _collect_qc_results(
+	df: pd.DataFrame,
+	variable_list: Sequence[str],
+	is_subdaily: bool,
+	station_col: Optional[str] = None,
+	station_id: str = "station",
+	units_map: Optional[dict[str, str]] = None,
+	outpath: Optional[Union[str, Path]] = None,
+	year_col: str = "Year",
+	month_col: str = "Month",
+	day_col: str = "Day",
+	hour_col: str = "Hour",
+	minute_col: str = "Minute",
+	climatic_outliers_params: Optional[dict] = None,
+	daily_out_of_range_params: Optional[dict] = None,
+	temporal_coherence_params: Optional[dict] = None,
+	daily_repetition_params: Optional[dict] = None,
+	subdaily_out_of_range_params: Optional[dict] = None,
+	subdaily_repetition_params: Optional[dict] = None,
+	bplot: bool = False,
+	engine: str = "columnar",
+	workers: Optional[int] = None,
+	executor: Optional[Executor] = None,
+	source_flags: Optional[str] = None,
+) -> dict[str, list[pd.DataFrame]]:
+	"""Run every applicable test on ``df`` and return the non-empty flag
+	tables of each test, in call order.
+
+	With ``source_flags``, the values that failed the provider's QC are first
+	reported by ``source_qc`` (and blanked in ``df`` with ``"skip"``).
+	"""
 	units_map = units_map or {}
 	climatic_outliers_params = climatic_outliers_params or {}
 	daily_out_of_range_params = daily_out_of_range_params or {}
@@ -1622,89 +2019,57 @@ def run_qc_pipeline(
 			return
 		results.setdefault(test_name, []).append(out)
 
-	if is_subdaily:
-		for var in variable_list:
-			units = units_map.get(var)
-			try:
+	flag_store = FlagStore(max_rows=FLAG_STORE_MAX_ROWS) if outpath else nullcontext()
+	with flag_store:
+		if source_flags is not None and not is_subdaily:
+			for var in variable_list:
+				flag_col = f"{var}{FLAGS_SUFFIX}"
+				if flag_col not in df.columns:
+					continue
 				_add_result(
-					"subdaily_out_of_range",
-					subdaily_out_of_range(
+					"source_qc",
+					source_qc(
 						df,
 						var_name=var,
 						station_id=station_id,
-						units=units,
+						units=units_map.get(var),
 						outpath=outpath,
 						year_col=year_col,
 						month_col=month_col,
 						day_col=day_col,
-						hour_col=hour_col,
-						minute_col=minute_col,
-						**subdaily_out_of_range_params,
+						station_col=station_col,
 					),
 				)
-			except ValueError:
-				pass
-
-			_add_result(
-				"subdaily_repetition",
-				subdaily_repetition(
-					df,
-					var_name=var,
-					station_id=station_id,
-					units=units,
-					outpath=outpath,
-					year_col=year_col,
-					month_col=month_col,
-					day_col=day_col,
-					hour_col=hour_col,
-					minute_col=minute_col,
-					**subdaily_repetition_params,
-				),
-			)
-
-			_add_result(
-				"duplicate_times",
-				duplicate_times(
-					df,
-					var_name=var,
-					station_id=station_id,
-					units=units,
-					outpath=outpath,
-					year_col=year_col,
-					month_col=month_col,
-					day_col=day_col,
-					hour_col=hour_col,
-					minute_col=minute_col,
-				),
-			)
-
-	else:
-		for var in variable_list:
-			units = units_map.get(var)
-
-			_add_result(
-				"climatic_outliers",
-				climatic_outliers(
-					df,
-					bplot=bplot,
-					var_name=var,
-					station_id=station_id,
-					units=units,
-					outpath=outpath,
-					year_col=year_col,
-					month_col=month_col,
-					day_col=day_col,
-					station_col=station_col_actual,
-					**climatic_outliers_params,
-				),
-			)
+				if source_flags == "skip":
+					df[var] = _coerce_numeric(df[var]).mask(source_failed(df[flag_col]))
+
+		if is_subdaily:
+			for var in variable_list:
+				units = units_map.get(var)
+				try:
+					_add_result(
+						"subdaily_out_of_range",
+						subdaily_out_of_range(
+							df,
+							var_name=var,
+							station_id=station_id,
+							units=units,
+							outpath=outpath,
+							year_col=year_col,
+							month_col=month_col,
+							day_col=day_col,
+							hour_col=hour_col,
+							minute_col=minute_col,
+							**subdaily_out_of_range_params,
+						),
+					)
+				except ValueError:
+					pass
 
-			try:
 				_add_result(
-					"daily_out_of_range",
-					daily_out_of_range(
+					"subdaily_repetition",
+					subdaily_repetition(
 						df,
-											station_col=station_col_actual,
 						var_name=var,
 						station_id=station_id,
 						units=units,
@@ -1712,18 +2077,16 @@ def run_qc_pipeline(
 						year_col=year_col,
 						month_col=month_col,
 						day_col=day_col,
-						**daily_out_of_range_params,
+						hour_col=hour_col,
+						minute_col=minute_col,
+						**subdaily_repetition_params,
 					),
 				)
-			except ValueError:
-				pass
 
-			try:
 				_add_result(
-					"temporal_coherence",
-					temporal_coherence(
+					"duplicate_times",
+					duplicate_times(
 						df,
-											station_col=station_col_actual,
 						var_name=var,
 						station_id=station_id,
 						units=units,
@@ -1731,94 +2094,222 @@ def run_qc_pipeline(
 						year_col=year_col,
 						month_col=month_col,
 						day_col=day_col,
-						**temporal_coherence_params,
+						hour_col=hour_col,
+						minute_col=minute_col,
 					),
 				)
-			except ValueError:
-				pass
-
-			_add_result(
-				"daily_repetition",
-				daily_repetition(
-						df,
-								station_col=station_col_actual,
-					var_name=var,
-					station_id=station_id,
-					units=units,
-					outpath=outpath,
-					year_col=year_col,
-					month_col=month_col,
-					day_col=day_col,
-					**daily_repetition_params,
-				),
-			)
 
-			_add_result(
-				"duplicate_dates",
-				duplicate_dates(
-						df,
-								station_col=station_col_actual,
-					var_name=var,
-					station_id=station_id,
-					units=units,
-					outpath=outpath,
-					year_col=year_col,
-					month_col=month_col,
-					day_col=day_col,
-				),
+		else:
+			daily_kwargs = dict(
+				station_col=station_col,
+				station_id=station_id,
+				units_map=units_map,
+				outpath=outpath,
+				year_col=year_col,
+				month_col=month_col,
+				day_col=day_col,
+				climatic_outliers_params=climatic_outliers_params,
+				daily_out_of_range_params=daily_out_of_range_params,
+				temporal_coherence_params=temporal_coherence_params,
+				daily_repetition_params=daily_repetition_params,
+				bplot=bplot,
 			)
+			if station_col is not None and (executor is not None or (workers or 1) > 1):
+				from .engine import run_daily_sharded
 
-		consistency_pairs = [
-			("Tx", "Tn"),
-			("w", "dd"),
-			("sc", "sd"),
-			("fs", "sd"),
-			("fs", "Tn"),
-			("sd", "Tn"),
-		]
-		for var_x, var_y in consistency_pairs:
-			if var_x in variable_list and var_y in variable_list:
-				_add_result(
-					"internal_consistency",
-					internal_consistency(
-						df,
-						var_x=var_x,
-						var_y=var_y,
-						station_id=station_id,
-						units_x=units_map.get(var_x),
-						units_y=units_map.get(var_y),
-						outpath=outpath,
-						year_col=year_col,
-						month_col=month_col,
-						day_col=day_col,
-					),
+				daily_results = run_daily_sharded(
+					df, variable_list, engine=engine, workers=workers, executor=executor, **daily_kwargs
 				)
+			elif engine == "columnar":
+				from .engine import run_daily_tests
 
-	results_by_test: dict[str, pd.DataFrame] = {}
-	for test_name, out_list in results.items():
-		if not out_list:
-			continue
-		results_by_test[test_name] = pd.concat(out_list, ignore_index=True).drop_duplicates()
+				daily_results = run_daily_tests(df, variable_list, **daily_kwargs)
+			else:
+				daily_results = _run_daily_tests_legacy(df, variable_list, **daily_kwargs)
+			for test_name, out in daily_results:
+				_add_result(test_name, out)
+
+		if not is_subdaily:
+			for var_x, var_y in INTERNAL_CONSISTENCY_PAIRS:
+				if var_x in variable_list and var_y in variable_list:
+					_add_result(
+						"internal_consistency",
+						internal_consistency(
+							df,
+							var_x=var_x,
+							var_y=var_y,
+							station_id=station_id,
+							units_x=units_map.get(var_x),
+							units_y=units_map.get(var_y),
+							outpath=outpath,
+							year_col=year_col,
+							month_col=month_col,
+							day_col=day_col,
+						),
+					)
 
-	if results_by_test:
-		all_flags = pd.concat(results_by_test.values(), ignore_index=True)
-		summary = (
-			all_flags.groupby(["Test", "Var"], dropna=False)
-			.size()
-			.rename("n_flags")
-			.reset_index()
-			.sort_values(["Test", "Var"])
-			.reset_index(drop=True)
+	return results
+
+
+def run_qc_pipeline(
+	data: Union[str, Path, pd.DataFrame],
+	station_id: str = "station",
+	units_map: Optional[dict[str, str]] = None,
+	frequency: str = "auto",
+	variable_cols: Optional[Iterable[str]] = None,
+	outpath: Optional[Union[str, Path]] = None,
+	year_col: str = "Year",
+	month_col: str = "Month",
+	day_col: str = "Day",
+	hour_col: str = "Hour",
+	minute_col: str = "Minute",
+	station_col: Optional[str] = "station",
+	climatic_outliers_params: Optional[dict] = None,
+	daily_out_of_range_params: Optional[dict] = None,
+	temporal_coherence_params: Optional[dict] = None,
+	daily_repetition_params: Optional[dict] = None,
+	subdaily_out_of_range_params: Optional[dict] = None,
+	subdaily_repetition_params: Optional[dict] = None,
+	bplot: bool = False,
+	engine: str = "columnar",
+	workers: Optional[int] = None,
+	executor: Optional[Executor] = None,
+	chunksize: Optional[int] = None,
+	checkpoint_dir: Optional[Union[str, Path]] = None,
+	source_flags: Optional[str] = None,
+) -> dict[str, Union[pd.DataFrame, dict[str, pd.DataFrame]]]:
+	"""Run all applicable QC checks for a station dataset.
+
+	Inputs are CSV/DataFrame with variables in columns.
+	If station_col is provided and exists in data, will group by station and apply tests per-station.
+	Daily tests run on the columnar engine (``engine="columnar"``), which
+	groups and sorts the frame once and evaluates every test on shared arrays;
+	``engine="legacy"`` calls each test function separately. Both give the
+	same flags.
+	With ``workers > 1`` (or an ``executor``), daily tests are sharded by
+	station_col across a process pool; each shard receives plain column arrays
+	and results are merged in station order, so the output does not depend on
+	the number of workers. A caller-supplied executor is not shut down.
+	Flags written to ``outpath`` are collected in a :class:`FlagStore` and each
+	file is written once.
+	With ``chunksize`` and a CSV path, the file is streamed in chunks of that
+	many rows and QC runs station by station (see
+	:mod:`agrometflow.dataquality.streaming`); the rows of each station must be
+	contiguous in the file. With ``outpath`` as well, each station's flags are
+	written as it completes and only the ``summary`` is returned.
+	With ``checkpoint_dir``, daily QC is incremental: only the rows appended
+	since the checkpoint of each station are tested (see
+	:mod:`agrometflow.dataquality.incremental`).
+	Columns ``<var>_flags`` next to a variable hold the flags of its data
+	provider (e.g. GHCN-Daily ``extract(qc_format=True, keep_flags=True)``)
+	and are never tested as variables. With ``source_flags="seed"`` the
+	values that failed the provider's QC are reported by a ``source_qc``
+	test before the other tests; ``source_flags="skip"`` also blanks them
+	before testing, so they are neither flagged again nor bias the
+	climatology and neighbour-based tests.
+	Returns:
+	- results_by_test: dict[test_name -> flagged rows DataFrame]
+	- all_flags: concatenated flags
+	- summary: counts by test and variable (and station if multi-station)
+	"""
+	if frequency not in {"auto", "daily", "subdaily"}:
+		raise ValueError("frequency must be one of: auto, daily, subdaily")
+	if engine not in {"columnar", "legacy"}:
+		raise ValueError("engine must be one of: columnar, legacy")
+	if workers is not None and workers < 1:
+		raise ValueError("workers must be a positive integer")
+	if source_flags is not None and source_flags not in SOURCE_FLAG_MODES:
+		raise ValueError("source_flags must be one of: skip, seed")
+	if source_flags is not None and (checkpoint_dir is not None or chunksize is not None):
+		raise ValueError("source_flags supports in-memory data only")
+
+	if checkpoint_dir is not None:
+		if frequency == "subdaily" or chunksize is not None:
+			raise ValueError("checkpoint_dir supports in-memory daily data only")
+		from .incremental import run_qc_incremental
+
+		return run_qc_incremental(
+			data,
+			checkpoint_dir,
+			station_id=station_id,
+			units_map=units_map,
+			variable_cols=variable_cols,
+			outpath=outpath,
+			year_col=year_col,
+			month_col=month_col,
+			day_col=day_col,
+			station_col=station_col,
+			climatic_outliers_params=climatic_outliers_params,
+			daily_out_of_range_params=daily_out_of_range_params,
+			temporal_coherence_params=temporal_coherence_params,
+			daily_repetition_params=daily_repetition_params,
 		)
-	else:
-		all_flags = pd.DataFrame()
-		summary = pd.DataFrame(columns=["Test", "Var", "n_flags"])
 
-	return {
-		"results_by_test": results_by_test,
-		"all_flags": all_flags,
-		"summary": summary,
-	}
+	if chunksize is not None and not isinstance(data, pd.DataFrame):
+		from .streaming import run_qc_streaming
+
+		return run_qc_streaming(
+			data,
+			chunksize,
+			variable_cols=variable_cols,
+			station_col=station_col,
+			station_id=station_id,
+			units_map=units_map,
+			frequency=frequency,
+			outpath=outpath,
+			year_col=year_col,
+			month_col=month_col,
+			day_col=day_col,
+			hour_col=hour_col,
+			minute_col=minute_col,
+			climatic_outliers_params=climatic_outliers_params,
+			daily_out_of_range_params=daily_out_of_range_params,
+			temporal_coherence_params=temporal_coherence_params,
+			daily_repetition_params=daily_repetition_params,
+			subdaily_out_of_range_params=subdaily_out_of_range_params,
+			subdaily_repetition_params=subdaily_repetition_params,
+			bplot=bplot,
+			engine=engine,
+		)
+
+	df = _as_dataframe(data)
+	station_col_actual, is_subdaily, variable_list = _resolve_pipeline_columns(
+		df,
+		frequency=frequency,
+		variable_cols=variable_cols,
+		station_col=station_col,
+		year_col=year_col,
+		month_col=month_col,
+		day_col=day_col,
+		hour_col=hour_col,
+		minute_col=minute_col,
+	)
+	results = _collect_qc_results(
+		df,
+		variable_list,
+		is_subdaily,
+		station_col=station_col_actual,
+		station_id=station_id,
+		units_map=units_map,
+		outpath=outpath,
+		year_col=year_col,
+		month_col=month_col,
+		day_col=day_col,
+		hour_col=hour_col,
+		minute_col=minute_col,
+		climatic_outliers_params=climatic_outliers_params,
+		daily_out_of_range_params=daily_out_of_range_params,
+		temporal_coherence_params=temporal_coherence_params,
+		daily_repetition_params=daily_repetition_params,
+		subdaily_out_of_range_params=subdaily_out_of_range_params,
+		subdaily_repetition_params=subdaily_repetition_params,
+		bplot=bplot,
+		engine=engine,
+		workers=workers,
+		executor=executor,
+		source_flags=source_flags,
+	)
+	return _summarize_flags(results)
 
 
 def run_qc_pipeline_from_config(
@@ -1834,6 +2325,9 @@ def run_qc_pipeline_from_config(
 	- frequency: auto|daily|subdaily
 	- variable_cols: list of variable column names
 	- outpath: folder for intermediate QC files
+	- station_col: column holding station ids (default "station")
+	- chunksize: stream the CSV in chunks of this many rows, station by station
+	- checkpoint_dir: folder of the incremental QC checkpoint (daily data)
 	- columns: mapping for date/time column names
 	  : year, month, day, hour, minute
 	- tests: optional parameter dictionaries per test
@@ -1869,6 +2363,9 @@ def run_qc_pipeline_from_config(
 		frequency=cfg.get("frequency", "auto"),
 		variable_cols=cfg.get("variable_cols"),
 		outpath=cfg.get("outpath"),
+		station_col=cfg.get("station_col", "station"),
+		chunksize=cfg.get("chunksize"),
+		checkpoint_dir=cfg.get("checkpoint_dir"),
 		year_col=columns.get("year", "Year"),
 		month_col=columns.get("month", "Month"),
 		day_col=columns.get("day", "Day"),
@@ -1898,6 +2395,7 @@ def run_qc_pipeline_from_config(
 
 
 __all__ = [
+	"FlagStore",
 	"check_units",
 	"climatic_outliers",
 	"internal_consistency",
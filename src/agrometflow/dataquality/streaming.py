@@ -0,0 +1,213 @@
+"""Station-by-station QC of CSV files that do not fit in memory.
+
+The input is read with ``pandas.read_csv(chunksize=...)``. Rows are buffered
+until the station changes and each complete station is run through
+:func:`agrometflow.dataquality.qc.run_qc_pipeline`. A station that spans
+several chunks is therefore tested on its whole record: run lengths, the
+previous day of the jump test and the monthly quartiles are the same as in a
+single in-memory run. Peak memory is set by the largest station, not by the
+file size: with ``outpath``, the flags of a station are written as soon as it
+is tested and only their counts are kept.
+"""
+
+from __future__ import annotations
+
+from itertools import chain
+from pathlib import Path
+from typing import Iterator, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from .engine import DAILY_TESTS
+from .qc import _collect_qc_results, _resolve_pipeline_columns, _summarize_flags, run_qc_pipeline
+
+
+_TEST_SEQUENCE = DAILY_TESTS + ("subdaily_out_of_range", "subdaily_repetition", "duplicate_times")
+
+
+def iter_station_frames(
+	path: Union[str, Path],
+	station_col: Optional[str],
+	chunksize: int,
+) -> Iterator[tuple[object, pd.DataFrame]]:
+	"""Yield ``(station, rows)`` for each station of a station-contiguous CSV.
+
+	Rows without a station are dropped. When ``station_col`` is not a column
+	of the file, the whole file is yielded once with station ``None``.
+
+	Raises
+	------
+	ValueError
+		If the rows of a station are not contiguous in the file.
+	"""
+	reader = pd.read_csv(path, chunksize=chunksize)
+	first = next(reader, None)
+	if first is None:
+		return
+	if station_col is None or station_col not in first.columns:
+		yield None, pd.concat([first, *reader], ignore_index=True)
+		return
+
+	done: set = set()
+	current = None
+	pending: list[pd.DataFrame] = []
+	for chunk in chain([first], reader):
+		chunk = chunk[chunk[station_col].notna()]
+		if chunk.empty:
+			continue
+		ids = chunk[station_col].to_numpy()
+		bounds = np.flatnonzero(ids[1:] != ids[:-1]) + 1
+		for start, end in zip([0, *bounds], [*bounds, len(ids)]):
+			sid = ids[start]
+			if sid != current:
+				if pending:
+					yield current, pd.concat(pending, ignore_index=True)
+					done.add(current)
+					pending = []
+				if sid in done:
+					raise ValueError(
+						f"iter_station_frames: rows of station {sid!r} are not contiguous; "
+						f"sort the file by {station_col!r} before streaming"
+					)
+				current = sid
+			pending.append(chunk.iloc[start:end])
+	if pending:
+		yield current, pd.concat(pending, ignore_index=True)
+
+
+def iter_qc_by_station(
+	path: Union[str, Path],
+	chunksize: int,
+	station_col: Optional[str] = "station",
+	**kwargs,
+) -> Iterator[tuple[object, dict]]:
+	"""Run :func:`run_qc_pipeline` on each station of a CSV file in turn.
+
+	Yields ``(station, result)`` as soon as a station is complete; with
+	``outpath`` its flag files are written before the next station is read.
+	``kwargs`` are passed to :func:`run_qc_pipeline`.
+	"""
+	for sid, frame in iter_station_frames(path, station_col, chunksize):
+		yield sid, run_qc_pipeline(frame, station_col=station_col, **kwargs)
+
+
+def _merge_station_results(
+	results: Sequence[tuple[object, dict[str, list[pd.DataFrame]]]],
+	variable_list: Sequence[str],
+) -> dict[str, list[pd.DataFrame]]:
+	"""Combine per-station flag tables in the order of a whole-frame run.
+
+	Stations are merged in sorted order and single-variable tests are ordered
+	variable by variable, as :func:`run_qc_pipeline` does for a multi-station
+	frame. Pairwise ``internal_consistency`` flags follow, station by station.
+	"""
+	if not results:
+		return {}
+	codes, _ = pd.factorize(pd.Series([sid for sid, _ in results], dtype=object), sort=True)
+	ordered = [results[i][1] for i in np.argsort(codes, kind="stable")]
+	var_index = {var: i for i, var in enumerate(variable_list)}
+
+	merged: dict[str, list[pd.DataFrame]] = {}
+	rank: dict[str, tuple[float, int]] = {}
+	for test_name in dict.fromkeys(name for res in ordered for name in res):
+		out = pd.concat([frame for res in ordered for frame in res.get(test_name, [])], ignore_index=True)
+		if test_name in _TEST_SEQUENCE:
+			var_rank = out["Var"].map(var_index).to_numpy(dtype=np.float64, na_value=np.inf)
+			out = out.take(np.argsort(var_rank, kind="stable"))
+			rank[test_name] = (var_rank.min(), _TEST_SEQUENCE.index(test_name))
+		else:
+			rank[test_name] = (np.inf, len(_TEST_SEQUENCE))
+		merged[test_name] = [out]
+	return {name: merged[name] for name in sorted(merged, key=rank.__getitem__)}
+
+
+def _add_flag_counts(
+	counts: Optional[pd.DataFrame],
+	results: dict[str, list[pd.DataFrame]],
+) -> Optional[pd.DataFrame]:
+	"""Add the ``(Test, Var)`` flag counts of one station to the running ``counts``."""
+	summary = _summarize_flags(results)["summary"]
+	if summary.empty:
+		return counts
+	if counts is None:
+		return summary
+	return (
+		pd.concat([counts, summary], ignore_index=True)
+		.groupby(["Test", "Var"], dropna=False)["n_flags"]
+		.sum()
+		.reset_index()
+		.sort_values(["Test", "Var"])
+		.reset_index(drop=True)
+	)
+
+
+def run_qc_streaming(
+	path: Union[str, Path],
+	chunksize: int,
+	variable_cols: Optional[Sequence[str]] = None,
+	station_col: Optional[str] = "station",
+	frequency: str = "auto",
+	year_col: str = "Year",
+	month_col: str = "Month",
+	day_col: str = "Day",
+	hour_col: str = "Hour",
+	minute_col: str = "Minute",
+	**kwargs,
+) -> dict[str, Union[pd.DataFrame, dict[str, pd.DataFrame]]]:
+	"""Run the QC pipeline on a station-contiguous CSV, one station at a time.
+
+	The result matches ``run_qc_pipeline`` on the whole file for the
+	single-variable tests. ``internal_consistency`` and the subdaily tests,
+	which ignore ``station_col`` on a whole frame, are evaluated per station.
+	Remaining ``kwargs`` (units, outpath, test parameters, engine) are those
+	of :func:`run_qc_pipeline`.
+
+	With ``outpath``, the flag tables of each station are written to their
+	files once the station is tested and then dropped: ``results_by_test``
+	and ``all_flags`` are empty and ``summary`` is built from running counts.
+	"""
+	columns = dict(
+		year_col=year_col,
+		month_col=month_col,
+		day_col=day_col,
+		hour_col=hour_col,
+		minute_col=minute_col,
+	)
+	keep_flags = kwargs.get("outpath") is None
+	results = []
+	counts: Optional[pd.DataFrame] = None
+	variable_list: list[str] = []
+	for sid, frame in iter_station_frames(path, station_col, chunksize):
+		station_col_actual, is_subdaily, variable_list = _resolve_pipeline_columns(
+			frame,
+			frequency=frequency,
+			variable_cols=variable_cols,
+			station_col=station_col,
+			**columns,
+		)
+		station_results = _collect_qc_results(
+			frame,
+			variable_list,
+			is_subdaily,
+			station_col=station_col_actual,
+			**columns,
+			**kwargs,
+		)
+		if keep_flags:
+			results.append((sid, station_results))
+		else:
+			counts = _add_flag_counts(counts, station_results)
+	if keep_flags:
+		return _summarize_flags(_merge_station_results(results, variable_list))
+	result = _summarize_flags({})
+	if counts is not None:
+		result["summary"] = counts
+	return result
+
+
+__all__ = [
+	"iter_qc_by_station",
+	"iter_station_frames",
+	"run_qc_streaming",
+]
@@ -0,0 +1,818 @@
+"""
+Shared HTTP download layer used by every climate source.
+
+All downloaders go through one :class:`HttpClient` (see :func:`get_client`):
+
+- a single ``requests.Session`` with keep-alive connection pools, so the
+  files of a daily pull reuse the TCP/TLS connection of the previous one;
+- a concurrency limit per host (``max_per_host``), whatever the number of
+  worker threads of the caller, and an optional request-rate budget per host
+  (``max_rate``, or :meth:`HttpClient.set_rate` for a single API);
+- retries with exponential backoff and jitter (honouring ``Retry-After``) on
+  connection errors, timeouts, interrupted bodies and 429/5xx responses;
+- atomic writes: a file is streamed to a temporary name next to its target
+  and renamed once complete, so an interrupted run never leaves a truncated
+  file behind;
+- a worker count derived from the measured per-stream throughput when a
+  bandwidth budget (``max_bandwidth``) is set.
+
+Batches of daily files go through :func:`download_many`, either on a thread
+pool or, with ``backend="async"``, on an asyncio event loop that keeps many
+requests in flight per host (optional ``httpx`` dependency).
+:func:`run_pipeline` overlaps downloads with their processing: a download
+pool, a bounded extraction pool (threads or processes) and a writer stage
+in the calling thread.
+
+:class:`RangeFile` reads a remote file through HTTP range requests, so that a
+NetCDF4/HDF5 file can be opened in place and only the chunks actually read
+are transferred.
+"""
+
+import asyncio
+import hashlib
+import importlib.util
+import io
+import logging
+import math
+import os
+import random
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from tqdm.auto import tqdm
+
+
+#: HTTP status codes that are retried.
+RETRY_STATUS = frozenset({429, 500, 502, 503, 504})
+
+#: Transport errors that are retried.
+RETRY_EXCEPTIONS = (
+    requests.ConnectionError,
+    requests.Timeout,
+    requests.exceptions.ChunkedEncodingError,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@contextmanager
+def _atomic_file(path):
+    """Open a temporary file next to ``path``, renamed to ``path`` on success."""
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            yield f
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+class HttpClient:
+    """
+    Pooled, rate-limited HTTP client.
+
+    Parameters
+    ----------
+    max_per_host : int
+        Maximum number of simultaneous requests per host; also the size of
+        the connection pool of each host.
+    retries : int
+        Number of retries after the first attempt.
+    backoff : float
+        Base delay in seconds; attempt ``k`` waits about ``backoff * 2**k``.
+    max_backoff : float
+        Upper bound of a single delay, ``Retry-After`` included.
+    timeout : float or tuple
+        Default ``requests`` timeout.
+    max_bandwidth : float, optional
+        Bandwidth budget in bytes per second used by :meth:`worker_count`.
+    headers : dict, optional
+        Headers sent with every request.
+    max_rate : float, optional
+        Default budget of requests per second started towards one host
+        (retries included); see :meth:`set_rate` for per-host budgets.
+    """
+
+    def __init__(
+        self,
+        max_per_host=8,
+        retries=4,
+        backoff=1.0,
+        max_backoff=60.0,
+        timeout=60,
+        max_bandwidth=None,
+        headers=None,
+        max_rate=None,
+    ):
+        if max_per_host < 1:
+            raise ValueError("max_per_host must be a positive integer")
+        self.max_per_host = int(max_per_host)
+        self.retries = int(retries)
+        self.backoff = float(backoff)
+        self.max_backoff = float(max_backoff)
+        self.timeout = timeout
+        self.max_bandwidth = max_bandwidth
+        self.max_rate = max_rate
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=32, pool_maxsize=self.max_per_host)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        if headers:
+            self.session.headers.update(headers)
+
+        self._lock = threading.Lock()
+        self._slots = {}
+        self._stats = {}
+        self._rates = {}
+        self._next_start = {}
+
+    # ------------------------------------------------------------------
+    # Host limits and statistics
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def host(url):
+        return urlsplit(url).netloc.lower()
+
+    @contextmanager
+    def limit(self, url):
+        """Hold one of the ``max_per_host`` request slots of the host of ``url``."""
+        host = self.host(url)
+        with self._lock:
+            slot = self._slots.get(host)
+            if slot is None:
+                slot = self._slots[host] = threading.BoundedSemaphore(self.max_per_host)
+        with slot:
+            yield
+
+    def set_rate(self, url, max_rate):
+        """Start at most ``max_rate`` requests per second towards the host of ``url`` (``None``: no budget)."""
+        with self._lock:
+            self._rates[self.host(url)] = max_rate
+
+    def _wait_turn(self, url):
+        """Sleep until the request-rate budget of the host of ``url`` allows one more request."""
+        host = self.host(url)
+        with self._lock:
+            rate = self._rates.get(host, self.max_rate)
+            if not rate:
+                return
+            now = time.monotonic()
+            start = max(now, self._next_start.get(host, now))
+            self._next_start[host] = start + 1.0 / rate
+        if start > now:
+            time.sleep(start - now)
+
+    def _record(self, url, nbytes, seconds):
+        host = self.host(url)
+        with self._lock:
+            total = self._stats.setdefault(host, [0, 0.0, 0])
+            total[0] += nbytes
+            total[1] += seconds
+            total[2] += 1
+
+    def throughput(self, url):
+        """Mean throughput of one transfer from the host of ``url``, in bytes/s."""
+        with self._lock:
+            nbytes, seconds, _ = self._stats.get(self.host(url), (0, 0.0, 0))
+        if nbytes == 0 or seconds <= 0:
+            return None
+        return nbytes / seconds
+
+    def worker_count(self, url, requested=None):
+        """
+        Number of download threads to use for the host of ``url``.
+
+        ``requested`` wins when given. Otherwise this is ``max_per_host``,
+        lowered when ``max_bandwidth`` is set and the measured throughput of
+        a single transfer shows that fewer streams already fill it.
+        """
+        if requested:
+            return max(1, int(requested))
+        rate = self.throughput(url)
+        if self.max_bandwidth is None or rate is None:
+            return self.max_per_host
+        return max(1, min(self.max_per_host, math.ceil(self.max_bandwidth / rate)))
+
+    # ------------------------------------------------------------------
+    # Requests
+    # ------------------------------------------------------------------
+
+    def _delay(self, attempt, response=None):
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after and retry_after.strip().isdigit():
+                return min(float(retry_after), self.max_backoff)
+        delay = min(self.max_backoff, self.backoff * 2 ** attempt)
+        return delay * (0.5 + random.random() / 2)
+
+    def request(self, url, consume, method="GET", **kwargs):
+        """
+        Send a request and pass the streamed response to ``consume``.
+
+        ``consume(response)`` returns ``(result, nbytes)``; it runs inside
+        the retry loop, so a body interrupted mid-transfer is fetched again.
+        Retryable status codes are retried and the last response is handed
+        to ``consume`` as is. ``kwargs`` go to ``requests.Session.request``.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        with self.limit(url):
+            for attempt in range(self.retries + 1):
+                self._wait_turn(url)
+                started = time.monotonic()
+                try:
+                    with self.session.request(method, url, stream=True, **kwargs) as response:
+                        if response.status_code in RETRY_STATUS and attempt < self.retries:
+                            delay = self._delay(attempt, response)
+                            logger.debug(f"HTTP {response.status_code} for {url}, retrying in {delay:.1f} s")
+                        else:
+                            result, nbytes = consume(response)
+                            self._record(url, nbytes, time.monotonic() - started)
+                            return result
+                except RETRY_EXCEPTIONS as e:
+                    if attempt == self.retries:
+                        raise
+                    delay = self._delay(attempt)
+                    logger.debug(f"{type(e).__name__} for {url}, retrying in {delay:.1f} s")
+                time.sleep(delay)
+
+    def get(self, url, **kwargs):
+        """
+        GET ``url`` and read the whole body.
+
+        The status is not checked: call ``raise_for_status()`` as with
+        ``requests.get``.
+        """
+
+        def consume(response):
+            return response, len(response.content)
+
+        return self.request(url, consume, **kwargs)
+
+    def download(
+        self,
+        url,
+        path,
+        chunk_size=1024 * 1024,
+        check: Optional[Callable[[requests.Response], None]] = None,
+        missing_ok=False,
+        **kwargs,
+    ):
+        """
+        Stream ``url`` to ``path`` atomically.
+
+        Parameters
+        ----------
+        check : callable, optional
+            Called with the response before the body is read, e.g. to reject
+            an HTML login page; it should raise to abort.
+        missing_ok : bool
+            Return ``None`` instead of raising on HTTP 404.
+
+        Returns
+        -------
+        Path or None
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        def consume(response):
+            if missing_ok and response.status_code == 404:
+                return None, 0
+            response.raise_for_status()
+            if check is not None:
+                check(response)
+            size = 0
+            with _atomic_file(path) as f:
+                for chunk in response.iter_content(chunk_size=chunk_size):
+                    if chunk:
+                        f.write(chunk)
+                        size += len(chunk)
+            return path, size
+
+        return self.request(url, consume, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Return the process-wide :class:`HttpClient`, created on first use."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HttpClient()
+        return _client
+
+
+def configure_client(**kwargs):
+    """
+    Replace the process-wide client by ``HttpClient(**kwargs)``.
+
+    Example: ``configure_client(max_per_host=16, retries=6)`` before a large
+    daily pull.
+    """
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+        _client = HttpClient(**kwargs)
+        return _client
+
+
+# ----------------------------------------------------------------------
+# Batches of files
+# ----------------------------------------------------------------------
+
+#: Download backends accepted by :func:`download_many`.
+BACKENDS = ("threads", "async")
+
+#: Default number of requests in flight per host with ``backend="async"``.
+ASYNC_MAX_PER_HOST = 64
+
+
+def download_many(
+    jobs,
+    backend="threads",
+    max_workers=None,
+    on_complete=None,
+    log=None,
+    desc=None,
+    cache=None,
+    revalidate=False,
+    **kwargs,
+):
+    """
+    Download a batch of ``(url, path)`` files.
+
+    Parameters
+    ----------
+    jobs : list of (str, Path)
+        Files to fetch and where to write them.
+    backend : {"threads", "async"}
+        ``"threads"`` runs :meth:`HttpClient.download` in a thread pool.
+        ``"async"`` keeps up to ``max_workers`` requests in flight per host
+        on one event loop; it needs ``httpx`` (``pip install agrometflow[async]``)
+        and uses HTTP/2 when ``h2`` is installed. Both backends share the
+        retry policy of :func:`get_client`.
+    max_workers : int, optional
+        Threads, or requests in flight per host for ``"async"``. Defaults to
+        ``get_client().worker_count(...)`` and :data:`ASYNC_MAX_PER_HOST`.
+    on_complete : callable, optional
+        ``on_complete(index, path)`` runs in a worker thread as soon as a file
+        is on disk (e.g. to unzip it or extract points) while the other
+        downloads go on. Its return value replaces ``path`` in the result.
+    log : logging.Logger, optional
+        Logger for failed jobs (default: this module's logger).
+    desc : str, optional
+        Show a progress bar with this description.
+    cache : agrometflow.cache.RawCache, optional
+        Read through this raw-file cache: cached files are linked to their
+        path without any request, new downloads are added to it.
+    revalidate : bool
+        With ``cache`` and the ``"threads"`` backend, revalidate cached files
+        with a conditional request. Daily archive files never change, so
+        this is off by default.
+    kwargs : dict
+        ``check``, ``missing_ok`` and ``chunk_size`` as in
+        :meth:`HttpClient.download`, plus request options (``timeout``,
+        ``headers``, ``auth``, ``params``, ``verify``).
+
+    Returns
+    -------
+    list
+        One item per job: the path (or ``on_complete`` result), or ``None``
+        when the file is missing or its download failed.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown download backend '{backend}'. Available: {list(BACKENDS)}")
+    jobs = [(url, Path(path)) for url, path in jobs]
+    log = log or logger
+    if not jobs:
+        return []
+
+    with tqdm(total=len(jobs), desc=desc, disable=desc is None) as bar:
+        if backend == "async":
+            per_host = max_workers or ASYNC_MAX_PER_HOST
+            return _run_coroutine(_download_many_async(jobs, per_host, on_complete, log, bar, cache, **kwargs))
+        return _download_many_threads(jobs, max_workers, on_complete, log, bar, cache, revalidate, **kwargs)
+
+
+def _download_many_threads(jobs, max_workers, on_complete, log, bar, cache, revalidate, **kwargs):
+    client = get_client()
+    results = [None] * len(jobs)
+
+    def run(i):
+        url, path = jobs[i]
+        try:
+            if cache is not None:
+                path = cache.fetch_to(url, path, revalidate=revalidate, **kwargs)
+            else:
+                path = client.download(url, path, **kwargs)
+            if path is not None and on_complete is not None:
+                return on_complete(i, path)
+            return path
+        except Exception as e:
+            log.warning(f"Failed for {url}: {e}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=client.worker_count(jobs[0][0], max_workers)) as executor:
+        futures = {executor.submit(run, i): i for i in range(len(jobs))}
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
+            bar.update()
+    return results
+
+
+#: Executors of the extraction stage of :func:`run_pipeline`.
+EXTRACT_EXECUTORS = ("threads", "processes")
+
+
+def run_pipeline(
+    items,
+    download,
+    extract,
+    write=None,
+    release=None,
+    max_workers=4,
+    extract_workers=None,
+    extract_executor="threads",
+    max_pending=None,
+    log=None,
+    desc=None,
+):
+    """
+    Download, extract and write ``items`` in three overlapping stages.
+
+    Parameters
+    ----------
+    items : list
+        Work items (e.g. request dicts).
+    download : callable
+        ``download(item)`` runs on ``max_workers`` threads and returns a local
+        path, or ``None`` to skip the item.
+    extract : callable
+        ``extract(item, path)`` runs on a separate pool of ``extract_workers``
+        workers. With ``extract_executor="processes"`` the pool is made of
+        processes (for CPU-bound decoding or compression); ``extract``, the
+        items and the results must then be picklable.
+    write : callable, optional
+        ``write(item, result)`` runs in the calling thread as extractions
+        complete (e.g. to append to a store); its return value replaces the
+        result.
+    release : callable, optional
+        ``release(item, path)`` runs in the calling thread once ``path`` is
+        no longer needed (e.g. to unpin a cached file).
+    max_pending : int, optional
+        Items between the start of their download and the end of their
+        extraction (default: ``max_workers + 2 * extract_workers``). New
+        downloads wait for a free slot, so downloaded files never pile up
+        when extraction is the bottleneck.
+    log : logging.Logger, optional
+        Logger for failed items.
+    desc : str, optional
+        Show a progress bar with this description.
+
+    Returns
+    -------
+    list
+        One result per item (``None`` for skipped or failed items).
+    """
+    if extract_executor not in EXTRACT_EXECUTORS:
+        raise ValueError(
+            f"Unknown extract_executor '{extract_executor}'. Available: {list(EXTRACT_EXECUTORS)}"
+        )
+    log = log or logger
+    max_workers = max(1, max_workers or 1)
+    extract_workers = max(1, extract_workers or min(os.cpu_count() or 1, max_workers))
+    max_pending = max(1, max_pending or max_workers + 2 * extract_workers)
+    results = [None] * len(items)
+    if not items:
+        return results
+
+    if extract_executor == "processes":
+        import multiprocessing
+
+        # Spawned workers do not inherit the locks of the download threads.
+        extractors = ProcessPoolExecutor(extract_workers, mp_context=multiprocessing.get_context("spawn"))
+    else:
+        extractors = ThreadPoolExecutor(extract_workers)
+
+    todo = iter(range(len(items)))
+    running = {}
+    bar = tqdm(total=len(items), desc=desc, disable=desc is None)
+    with bar, extractors, ThreadPoolExecutor(max_workers) as downloaders:
+
+        def refill():
+            while len(running) < max_pending:
+                i = next(todo, None)
+                if i is None:
+                    return
+                running[downloaders.submit(download, items[i])] = ("download", i, None)
+
+        refill()
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, i, path = running.pop(future)
+                item = items[i]
+                if stage == "download":
+                    try:
+                        path = future.result()
+                    except Exception as e:
+                        log.warning(f"Download failed: {e}")
+                        path = None
+                    if path is None:
+                        bar.update()
+                        continue
+                    running[extractors.submit(extract, item, path)] = ("extract", i, path)
+                    continue
+
+                try:
+                    result = future.result()
+                except Exception as e:
+                    log.warning(f"Extraction failed for {Path(path).name}: {e}")
+                    result = None
+                finally:
+                    if release is not None:
+                        release(item, path)
+                if write is not None and result is not None:
+                    result = write(item, result)
+                results[i] = result
+                bar.update()
+            refill()
+    return results
+
+
+def _run_coroutine(coro):
+    """``asyncio.run`` that also works when a loop already runs (notebooks)."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coro).result()
+
+
+async def _download_many_async(
+    jobs,
+    per_host,
+    on_complete,
+    log,
+    bar,
+    cache,
+    check=None,
+    missing_ok=False,
+    chunk_size=1024 * 1024,
+    verify=True,
+    timeout=None,
+    **request_kwargs,
+):
+    try:
+        import httpx
+    except ImportError as e:
+        raise ImportError(
+            "backend='async' requires httpx: pip install 'agrometflow[async]'"
+        ) from e
+
+    policy = get_client()
+    slots = {}
+
+    async def stream_to_file(client, url, path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        for attempt in range(policy.retries + 1):
+            try:
+                async with client.stream("GET", url, **request_kwargs) as response:
+                    if response.status_code in RETRY_STATUS and attempt < policy.retries:
+                        delay = policy._delay(attempt, response)
+                    else:
+                        if missing_ok and response.status_code == 404:
+                            return None
+                        response.raise_for_status()
+                        if check is not None:
+                            check(response)
+                        with _atomic_file(path) as f:
+                            async for chunk in response.aiter_bytes(chunk_size):
+                                f.write(chunk)
+                        if cache is not None:
+                            cache.add(
+                                url,
+                                path,
+                                etag=response.headers.get("ETag"),
+                                last_modified=response.headers.get("Last-Modified"),
+                            )
+                        return path
+            except httpx.TransportError as e:
+                if attempt == policy.retries:
+                    raise
+                delay = policy._delay(attempt)
+                log.debug(f"{type(e).__name__} for {url}, retrying in {delay:.1f} s")
+            await asyncio.sleep(delay)
+
+    async def run(client, i):
+        url, path = jobs[i]
+        slot = slots.setdefault(HttpClient.host(url), asyncio.Semaphore(per_host))
+        try:
+            cached = await asyncio.to_thread(cache.materialize, url, path) if cache is not None else None
+            if cached is not None:
+                path = cached
+            else:
+                async with slot:
+                    path = await stream_to_file(client, url, path)
+            if path is not None and on_complete is not None:
+                return await asyncio.to_thread(on_complete, i, path)
+            return path
+        except Exception as e:
+            log.warning(f"Failed for {url}: {e}")
+            return None
+        finally:
+            bar.update()
+
+    async with httpx.AsyncClient(
+        http2=importlib.util.find_spec("h2") is not None,
+        verify=verify,
+        timeout=policy.timeout if timeout is None else timeout,
+        limits=httpx.Limits(max_connections=None, max_keepalive_connections=per_host),
+        follow_redirects=True,
+    ) as client:
+        return list(await asyncio.gather(*(run(client, i) for i in range(len(jobs)))))
+
+
+# ----------------------------------------------------------------------
+# Remote files read through range requests
+# ----------------------------------------------------------------------
+
+
+class RangeFile(io.RawIOBase):
+    """
+    Read-only, seekable view of a remote file fetched with HTTP range requests.
+
+    The file is split in blocks of ``block_size`` bytes. Blocks are kept in a
+    small in-memory LRU and, with ``cache_dir``, on disk, keyed by URL, size
+    and ``ETag``/``Last-Modified`` so that a file changed upstream is not
+    served from a stale cache. Consecutive missing blocks of one read are
+    fetched with a single request.
+
+    Can be passed to ``xarray.open_dataset(..., engine="h5netcdf")`` or
+    ``h5py.File`` to read NetCDF4/HDF5 files without downloading them.
+
+    Parameters
+    ----------
+    url : str
+        Remote file; the server must answer range requests with HTTP 206.
+    block_size : int
+        Size of one cached block in bytes.
+    cache_dir : str or Path, optional
+        Folder of the on-disk block cache.
+    memory_blocks : int
+        Number of blocks kept in memory.
+    client : HttpClient, optional
+        Client used for the requests (default: :func:`get_client`).
+    kwargs : dict
+        Request options (``timeout``, ``headers``, ``auth``...).
+    """
+
+    def __init__(self, url, block_size=1024 * 1024, cache_dir=None, memory_blocks=64, client=None, **kwargs):
+        super().__init__()
+        self.url = url
+        self.block_size = int(block_size)
+        self.memory_blocks = int(memory_blocks)
+        self.client = client or get_client()
+        self.kwargs = kwargs
+        self.bytes_fetched = 0
+        self.requests_sent = 0
+        self._pos = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+        data, self.size, validator = self._fetch(0, self.block_size - 1)
+        self.cache_dir = None
+        if cache_dir is not None:
+            key = hashlib.sha256(f"{url}\n{self.size}\n{validator}".encode()).hexdigest()[:32]
+            self.cache_dir = Path(cache_dir) / key
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._store(0, data)
+
+    # -- io.RawIOBase ---------------------------------------------------
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            pos = offset
+        elif whence == io.SEEK_CUR:
+            pos = self._pos + offset
+        elif whence == io.SEEK_END:
+            pos = self.size + offset
+        else:
+            raise ValueError(f"Invalid whence: {whence}")
+        if pos < 0:
+            raise ValueError("Negative seek position")
+        self._pos = pos
+        return pos
+
+    def readinto(self, buffer):
+        with self._lock:
+            n = max(0, min(len(buffer), self.size - self._pos))
+            if n == 0:
+                return 0
+            first = self._pos // self.block_size
+            last = (self._pos + n - 1) // self.block_size
+            blocks = self._blocks(first, last)
+
+            view = memoryview(buffer).cast("B")
+            done = 0
+            for i in range(first, last + 1):
+                offset = self._pos + done - i * self.block_size
+                take = min(n - done, len(blocks[i]) - offset)
+                view[done:done + take] = blocks[i][offset:offset + take]
+                done += take
+            self._pos += n
+            return n
+
+    # -- blocks ---------------------------------------------------------
+
+    def _fetch(self, start, end):
+        headers = dict(self.kwargs.get("headers") or {})
+        headers["Range"] = f"bytes={start}-{end}"
+        kwargs = {**self.kwargs, "headers": headers}
+
+        def consume(response):
+            response.raise_for_status()
+            if response.status_code != 206:
+                raise OSError(f"{self.url} does not support HTTP range requests")
+            data = response.content
+            total = response.headers.get("Content-Range", "").rpartition("/")[2]
+            validator = response.headers.get("ETag") or response.headers.get("Last-Modified") or ""
+            return (data, int(total) if total.isdigit() else None, validator), len(data)
+
+        data, total, validator = self.client.request(self.url, consume, **kwargs)
+        self.requests_sent += 1
+        self.bytes_fetched += len(data)
+        if total is None:
+            raise OSError(f"Missing Content-Range in the response of {self.url}")
+        return data, total, validator
+
+    def _block_path(self, i):
+        return self.cache_dir / f"{i}.blk"
+
+    def _remember(self, i, data):
+        self._memory[i] = data
+        self._memory.move_to_end(i)
+        while len(self._memory) > self.memory_blocks:
+            self._memory.popitem(last=False)
+
+    def _store(self, i, data):
+        self._remember(i, data)
+        if self.cache_dir is not None and not self._block_path(i).exists():
+            with _atomic_file(self._block_path(i)) as f:
+                f.write(data)
+
+    def _cached(self, i):
+        data = self._memory.get(i)
+        if data is None and self.cache_dir is not None and self._block_path(i).exists():
+            data = self._block_path(i).read_bytes()
+        if data is not None:
+            self._remember(i, data)
+        return data
+
+    def _blocks(self, first, last):
+        blocks = {i: self._cached(i) for i in range(first, last + 1)}
+        missing = [i for i, data in blocks.items() if data is None]
+        # One request per run of consecutive missing blocks.
+        runs = []
+        for i in missing:
+            if runs and runs[-1][1] == i - 1:
+                runs[-1][1] = i
+            else:
+                runs.append([i, i])
+        for start, end in runs:
+            stop = min((end + 1) * self.block_size, self.size) - 1
+            data, _, _ = self._fetch(start * self.block_size, stop)
+            for i in range(start, end + 1):
+                offset = (i - start) * self.block_size
+                blocks[i] = data[offset:offset + self.block_size]
+                self._store(i, blocks[i])
+        return blocks
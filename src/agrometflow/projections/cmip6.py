@@ -3,6 +3,9 @@ from pathlib import Path
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import xarray as xr
 from pyesgf.search import SearchConnection
+from agrometflow.cache import get_cache
+from agrometflow.cube import CubeStore, OrderedAppender
+from agrometflow.store import PointStore
 from agrometflow.utils import get_logger, extract_points_from_tuples, dataset_points_to_dataframe
 import re
 import numpy as np
@@ -17,6 +20,9 @@ ESGF_URL = 'https://esgf-data.dkrz.de/esg-search'
 # Output format options
 OUTPUT_FORMAT_BY_YEAR = "by_year"          # Un fichier CSV par année (comportement actuel)
 OUTPUT_FORMAT_BY_STATION = "by_station"    # Un fichier CSV par station avec toutes les années
+OUTPUT_FORMAT_PARQUET = "parquet"          # Magasin Parquet partitionné (agrometflow.store)
+OUTPUT_FORMAT_ZARR = "zarr"                # Cube Zarr par variable pour la bbox (agrometflow.cube)
+OUTPUT_FORMATS = [OUTPUT_FORMAT_BY_YEAR, OUTPUT_FORMAT_BY_STATION, OUTPUT_FORMAT_PARQUET, OUTPUT_FORMAT_ZARR]
 
 # Models known to use standard/gregorian calendar (365/366 days)
 # This list can be extended based on CMIP6 documentation
@@ -79,6 +85,13 @@ def cftime_to_datetime(time_values):
             return pd.Series([str(t) for t in time_values])
 
 
+def _period_key(path):
+    """Clé de tri d'un fichier CMIP6: sa période (YYYYMMDD-YYYYMMDD) puis son nom."""
+    name = Path(path).name
+    match = re.search(r"(\d{6,8})-(\d{6,8})", name)
+    return (*(match.groups() if match else ("", "")), name)
+
+
 class CMIP6Downloader:
     
     def __init__(
@@ -88,6 +101,8 @@ class CMIP6Downloader:
     ):
         self.logger = get_logger("agrometflow.cmip6", log_file=log_file, verbose=verbose)
         self.station_data_cache: Dict[Tuple[float, float], List[pd.DataFrame]] = {}  # Cache pour les données par station
+        self.points_store: Optional[PointStore] = None
+        self.store_source: Optional[str] = None
 
 
     def search(self, variable, scenario, model, member_id=None):
@@ -178,15 +193,14 @@ class CMIP6Downloader:
             self.logger.debug(f" Already exists: {dest.name}")
             return dest
         try:
-            cmd = f"wget --no-check-certificate -q -O {dest} '{url}'"
-            os.system(cmd)
+            get_cache().fetch_to(url, dest, verify=False)
             self.logger.info(f" Downloaded: {dest.name}")
             return dest
         except Exception as e:
             self.logger.error(f" Failed to download {url}: {e}")
             return None
 
-    def _correct_and_subset(self, path, bbox, points, output_dir, variable, output_format=OUTPUT_FORMAT_BY_YEAR):
+    def _correct_and_subset(self, path, bbox, points, output_dir, variable, output_format=OUTPUT_FORMAT_BY_YEAR, appender=None):
         try:
             self.logger.info(f"[INFO] Correcting and subsetting {path.name}")
             ds = xr.open_dataset(path) #, chunks=10
@@ -216,18 +230,32 @@ class CMIP6Downloader:
                 if output_format == OUTPUT_FORMAT_BY_STATION:
                     self.logger.info(f"[INFO] Caching points data for station export for variable: {variable}")
                     self.cache_points_data_for_station_export(ds_pts, variable)
+                elif output_format == OUTPUT_FORMAT_PARQUET:
+                    self.store_points(ds_pts, variable)
                 else:
                     self.export_points_csv_by_year(ds_pts, path, output_dir, variable)
                 
                 os.remove(path) 
                 self.logger.info(f"[INFO] Subsetted dataset {path.name} to points: {points}")
                 return
+
+            if output_format == OUTPUT_FORMAT_ZARR:
+                # Chargé avant suppression du fichier: l'appender écrit dans l'ordre des périodes.
+                subset = ds[[variable]].load()
+                ds.close()
+                os.remove(path)
+                appender.add(_period_key(path), subset)
+                self.logger.info(f"[CUBE] {path.name} → {self.cube.path(self.store_source, variable)}")
+                return
                 
             self.split_netcdf_by_year(ds, path, output_dir)
             ds.to_netcdf(path)
             self.logger.debug(f"[CLIP] Applied clipping & lon correction to {path.name}")
         except Exception as e:
             self.logger.error(f"[ERROR] Failed to clip/correct {path.name}: {e}")
+            if appender is not None:
+                # Ne pas bloquer les périodes suivantes
+                appender.add(_period_key(path), None)
 
     def download(self, **kwargs):
         """
@@ -260,6 +288,11 @@ class CMIP6Downloader:
             Output format for points data:
             - "by_year" (default): Un fichier CSV par année avec toutes les stations
             - "by_station": Un fichier CSV par station avec toutes les années et variables en colonnes
+            - "parquet": magasin Parquet partitionné output_dir/points
+              (source ``cmip6_<model>_<scenario>``, voir :mod:`agrometflow.store`)
+            - "zarr" (bbox): un cube Zarr par variable dans output_dir/cube
+              (source ``cmip6_<model>_<scenario>``, voir :mod:`agrometflow.cube`)
+              au lieu d'un NetCDF par année
         """
         self.username = kwargs.get("username")
         self.password = kwargs.get("password")
@@ -283,8 +316,10 @@ class CMIP6Downloader:
                 raise ValueError("Choose either 'bbox' or 'points', not both.")
             
             # Validate output_format
-            if output_format not in [OUTPUT_FORMAT_BY_YEAR, OUTPUT_FORMAT_BY_STATION]:
-                raise ValueError(f"Invalid output_format: {output_format}. Use '{OUTPUT_FORMAT_BY_YEAR}' or '{OUTPUT_FORMAT_BY_STATION}'")
+            if output_format not in OUTPUT_FORMATS:
+                raise ValueError(f"Invalid output_format: {output_format}. Use one of {OUTPUT_FORMATS}")
+            if output_format == OUTPUT_FORMAT_ZARR and points:
+                raise ValueError("output_format='zarr' applies to bbox downloads; use 'parquet' for points.")
                 
         except KeyError as e:
             raise ValueError(f"Missing required argument: {e}")
@@ -319,6 +354,10 @@ class CMIP6Downloader:
                 
                 # Reset station cache for each model/scenario combination
                 self.station_data_cache = {}
+                self.points_store = PointStore(Path(output_dir) / "points")
+                self.store_source = f"cmip6_{model}_{scenario}"
+                if output_format == OUTPUT_FORMAT_ZARR:
+                    self.cube = CubeStore(Path(output_dir) / "cube")
                 
                 # Find common member for all variables in this model/scenario
                 common_member = self.find_common_member(variables, scenario, model)
@@ -339,6 +378,8 @@ class CMIP6Downloader:
                 if points:
                     if output_format == OUTPUT_FORMAT_BY_STATION:
                         self.export_stations_to_csv(scenario_dir, variables, model, scenario)
+                    elif output_format == OUTPUT_FORMAT_PARQUET:
+                        self.logger.info(f"[STORE] {self.store_source} → {self.points_store.root}")
                     else:
                         self.merge_points_csvs_by_year(tmp_dir, scenario_dir, variables)
                     
@@ -380,10 +421,21 @@ class CMIP6Downloader:
                     result = future.result()
                     downloaded.append(result)
             self.logger.info(f" {len(downloaded)} fichiers téléchargés pour cette variable.")
+            downloaded = [p for p in downloaded if p]
 
             self.logger.info(f"[INFO] Applying spatial clipping and lon correction...")
+            # Le pool ne garde pas l'ordre: les écritures du cube Zarr passent par un
+            # OrderedAppender indexé par la période du fichier, pour ajouter en fin de cube.
+            appender = None
+            if output_format == OUTPUT_FORMAT_ZARR and not points:
+                appender = OrderedAppender(self.cube, self.store_source, [_period_key(p) for p in downloaded])
             with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                executor.map(lambda f: self._correct_and_subset(f, bbox, points, output_dir, variable, output_format), downloaded)  
+                list(executor.map(
+                    lambda f: self._correct_and_subset(f, bbox, points, output_dir, variable, output_format, appender),
+                    downloaded,
+                ))
+            if appender is not None:
+                appender.close()
                     
         except Exception as e:
             self.logger.error(f"[ERROR] General failure: {e}")
@@ -437,7 +489,7 @@ class CMIP6Downloader:
             if ds_y.time.size == 0:
                 continue
 
-            df = ds_y.to_dataframe().reset_index()
+            df = dataset_points_to_dataframe(ds_y)
 
             # time YYYYMMDD - handle cftime calendars (noleap, 360_day, etc.)
             df["time"] = cftime_to_datetime(df["time"]).dt.strftime("%Y%m%d")
@@ -496,6 +548,21 @@ class CMIP6Downloader:
 
             self.logger.info(f"[CSV final] {out_path.name}")
 
+    def store_points(self, ds_pts: xr.Dataset, variable: str):
+        """
+        Ajoute les séries extraites aux points au magasin Parquet
+        (partitions source/variable/année, sans réécrire l'existant).
+        """
+        ds_pts = ds_pts.drop_vars("time_bounds", errors="ignore")
+        ds_pts["time"].attrs.pop("bounds", None)
+        ds_pts = ds_pts.drop_dims("axis_nbounds", errors="ignore")
+
+        df = dataset_points_to_dataframe(ds_pts[[variable]])
+        # Handle cftime calendars (noleap, 360_day, etc.)
+        df["time"] = cftime_to_datetime(df["time"])
+        self.points_store.write(self.store_source, df, variables=[variable])
+        self.logger.info(f"[STORE] Stored {variable} for {ds_pts.sizes.get('point', 1)} points")
+
     def cache_points_data_for_station_export(self, ds_pts: xr.Dataset, variable: str):
         """
         Cache les données extraites pour un export ultérieur par station.
@@ -509,23 +576,25 @@ class CMIP6Downloader:
         ds_pts["time"].attrs.pop("bounds", None)
         ds_pts = ds_pts.drop_dims("axis_nbounds", errors="ignore")
         
-        # Convert to dataframe
-        df = ds_pts.to_dataframe().reset_index()
+        # Convert to dataframe: one column per point
+        df = dataset_points_to_dataframe(ds_pts[[variable]], layout="wide")
         # Handle cftime calendars (noleap, 360_day, etc.)
         df["time"] = cftime_to_datetime(df["time"])
+        df = df.sort_values("time", kind="stable").reset_index(drop=True)
         
-        # Group by station (lon, lat)
-        for (lon, lat), group in df.groupby(["lon", "lat"]):
+        # One frame per station (lon, lat)
+        lons = np.atleast_1d(ds_pts["lon"].values)
+        lats = np.atleast_1d(ds_pts["lat"].values)
+        for i, (lon, lat) in enumerate(zip(lons, lats)):
             station_key = (float(lon), float(lat))
-            station_df = group[["time", variable]].copy()
-            station_df = station_df.sort_values("time").reset_index(drop=True)
+            station_df = df[["time", f"{variable}_{i}"]].rename(columns={f"{variable}_{i}": variable})
             
             if station_key not in self.station_data_cache:
                 self.station_data_cache[station_key] = []
             
             self.station_data_cache[station_key].append(station_df)
         
-        self.logger.info(f"[CACHE] Cached variable {variable} for {len(df.groupby(['lon', 'lat']))} stations")
+        self.logger.info(f"[CACHE] Cached variable {variable} for {len(set(zip(lons, lats)))} stations")
 
     def export_stations_to_csv(self, output_dir: str, variables: List[str], model: str, scenario: str):
         """
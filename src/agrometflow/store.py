@@ -0,0 +1,390 @@
+"""
+Partitioned Parquet store of point time series.
+
+Point extractions of every source are kept in one hive-partitioned dataset::
+
+    <root>/source=<source>/variable=<variable>/year=<yyyy>/part-<version>-<id>.parquet
+
+Each file holds the columns ``point_id``, ``lon``, ``lat``, ``time``, optional
+per-point attributes (e.g. ``elevation``) and the variable itself (with its
+own dtype), plus the ``version`` of the write.
+Appending a new period or new points only adds files; reads push the time,
+year and point filters down to the Parquet scan, and rows written twice are
+resolved in favour of the latest write.
+
+Alongside the data, ``<root>/source=<source>/_extents`` records which
+(variable, point, period) were extracted, so that a period without data
+(e.g. a missing daily file) is not requested again.
+"""
+
+import time
+import uuid
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as pads
+import pyarrow.parquet as pq
+
+from agrometflow.download import _atomic_file
+
+
+EXTENTS_DIR = "_extents"
+
+_KEYS = ["time", "point_id"]
+_BASE = ["point_id", "lon", "lat", "time"]
+
+
+def point_id(lon, lat):
+    """Stable identifier of a (lon, lat) point."""
+    return f"{float(lon):.5f}_{float(lat):.5f}"
+
+
+def point_ids(points):
+    """Identifiers of a list of (lon, lat) tuples."""
+    return [point_id(lon, lat) for lon, lat in points]
+
+
+def _write_table(table, path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with _atomic_file(path) as f:
+        pq.write_table(table, f)
+
+
+def _part_name(version):
+    return f"part-{version}-{uuid.uuid4().hex[:8]}.parquet"
+
+
+def _and(expr, other):
+    return other if expr is None else expr & other
+
+
+class PointStore:
+    """
+    Partitioned Parquet dataset of point extractions.
+
+    Parameters
+    ----------
+    root : str or Path
+        Folder of the dataset.
+    """
+
+    def __init__(self, root):
+        self.root = Path(root)
+
+    def _source_dir(self, source):
+        return self.root / f"source={source}"
+
+    def _variable_dir(self, source, variable):
+        return self._source_dir(source) / f"variable={variable}"
+
+    def variables(self, source):
+        """Variables stored for ``source``."""
+        src = self._source_dir(source)
+        if not src.exists():
+            return []
+        return sorted(p.name.split("=", 1)[1] for p in src.glob("variable=*") if p.is_dir())
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    def write(
+        self, source, df, variables=None, time_col="time", id_col=None, attrs=(), start=None, end=None
+    ):
+        """
+        Append a wide frame of point data to the store.
+
+        Parameters
+        ----------
+        source : str
+            Source name (``"chirps"``, ``"power"``...).
+        df : pd.DataFrame
+            Columns ``time_col``, ``lon``, ``lat`` and one column per variable.
+        variables : list of str, optional
+            Columns to store (default: every numeric column but lon/lat).
+        time_col : str
+            Name of the time column of ``df``.
+        id_col : str, optional
+            Column holding the point identifiers (e.g. station IDs); by
+            default they are derived from lon/lat with :func:`point_id`.
+        attrs : list of str
+            Per-point attribute columns kept with every variable (e.g.
+            ``elevation``).
+        start, end : date-like, optional
+            Period that was extracted, recorded as the extent of every point
+            (default: the first and last date of each point).
+
+        Returns
+        -------
+        list of Path
+            The files written.
+        """
+        if df is None or df.empty:
+            return []
+        exclude = {time_col, "lon", "lat", id_col, *attrs}
+        if variables is None:
+            variables = [
+                c for c in df.columns
+                if c not in exclude and pd.api.types.is_numeric_dtype(df[c])
+            ]
+        times = pd.to_datetime(df[time_col]).to_numpy()
+        lon = pd.to_numeric(df["lon"], errors="coerce").to_numpy(float) if "lon" in df else np.full(len(df), np.nan)
+        lat = pd.to_numeric(df["lat"], errors="coerce").to_numpy(float) if "lat" in df else np.full(len(df), np.nan)
+        if id_col is not None:
+            ids = df[id_col].astype(str).to_numpy()
+        else:
+            ids = np.array([point_id(x, y) for x, y in zip(lon, lat)], dtype=object)
+        years = pd.DatetimeIndex(times).year.to_numpy()
+        version = time.time_ns()
+
+        written = []
+        for variable in variables:
+            values = df[variable].to_numpy()
+            for year in np.unique(years):
+                rows = years == year
+                table = pa.table(
+                    {
+                        "point_id": pa.array(ids[rows], type=pa.string()),
+                        "lon": lon[rows],
+                        "lat": lat[rows],
+                        "time": times[rows],
+                        **{attr: df[attr].to_numpy()[rows] for attr in attrs},
+                        variable: values[rows],
+                        "version": pa.array(np.full(int(rows.sum()), version), type=pa.int64()),
+                    }
+                )
+                path = self._variable_dir(source, variable) / f"year={int(year)}" / _part_name(version)
+                _write_table(table, path)
+                written.append(path)
+
+        extents = pd.DataFrame({"point_id": ids, "time": times}).groupby("point_id", sort=False)["time"]
+        extents = pd.DataFrame({"start": extents.min(), "end": extents.max()}).reset_index()
+        if start is not None:
+            extents["start"] = pd.Timestamp(start)
+        if end is not None:
+            extents["end"] = pd.Timestamp(end)
+        self._write_extents(source, variables, extents, version)
+        return written
+
+    def _write_extents(self, source, variables, extents, version):
+        frame = pd.concat(
+            [extents.assign(variable=variable) for variable in variables], ignore_index=True
+        )
+        frame["version"] = version
+        table = pa.Table.from_pandas(
+            frame[["variable", "point_id", "start", "end", "version"]], preserve_index=False
+        )
+        _write_table(table, self._source_dir(source) / EXTENTS_DIR / _part_name(version))
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+
+    def _read_variable(self, source, variable, start, end, ids):
+        var_dir = self._variable_dir(source, variable)
+        if not var_dir.exists():
+            return None
+        dataset = pads.dataset(
+            var_dir,
+            format="parquet",
+            partitioning=pads.partitioning(pa.schema([("year", pa.int32())]), flavor="hive"),
+        )
+        expr = None
+        if start is not None:
+            expr = _and(expr, pads.field("year") >= start.year)
+            expr = _and(expr, pads.field("time") >= pa.scalar(start.to_datetime64()))
+        if end is not None:
+            expr = _and(expr, pads.field("year") <= end.year)
+            expr = _and(expr, pads.field("time") <= pa.scalar(end.to_datetime64()))
+        if ids is not None:
+            expr = _and(expr, pads.field("point_id").isin(list(ids)))
+        df = dataset.to_table(filter=expr).to_pandas().drop(columns="year")
+        if df.duplicated(_KEYS).any():
+            df = df.sort_values("version", kind="stable").drop_duplicates(_KEYS, keep="last")
+        return df.drop(columns="version")
+
+    def read(
+        self,
+        source,
+        variables=None,
+        start=None,
+        end=None,
+        points=None,
+        ids=None,
+        time_col="time",
+        id_col=None,
+        as_long=False,
+    ):
+        """
+        Read point data back, pushing filters down to the Parquet files.
+
+        Parameters
+        ----------
+        source : str
+            Source name.
+        variables : list of str, optional
+            Variables to read (default: all of ``source``).
+        start, end : date-like, optional
+            Inclusive time bounds.
+        points : list of (lon, lat), optional
+            Points to read (see :func:`point_id`).
+        ids : list of str, optional
+            Point identifiers to read (e.g. station IDs).
+        time_col : str
+            Name of the time column of the result.
+        id_col : str, optional
+            Keep the point identifiers in a column of that name.
+        as_long : bool
+            Return one row per (time, point, variable) with a ``value`` column.
+
+        Returns
+        -------
+        pd.DataFrame
+            Columns ``time_col``, [``id_col``,] ``lon``, ``lat``, the stored
+            attributes and one column per variable, sorted by time, lon, lat.
+        """
+        variables = variables or self.variables(source)
+        start = pd.Timestamp(start) if start is not None else None
+        end = pd.Timestamp(end) if end is not None else None
+        if points is not None:
+            ids = list(ids or []) + point_ids(points)
+
+        merged = None
+        attrs = []
+        for variable in variables:
+            df = self._read_variable(source, variable, start, end, ids)
+            if df is None:
+                continue
+            df_attrs = [c for c in df.columns if c not in _BASE and c != variable]
+            if merged is None:
+                merged, attrs = df, df_attrs
+            else:
+                on = _BASE + [c for c in df_attrs if c in attrs]
+                attrs += [c for c in df_attrs if c not in attrs]
+                merged = merged.merge(df, on=on, how="outer")
+
+        base = ["time", "point_id", "lon", "lat"] + attrs
+        if merged is None:
+            merged = pd.DataFrame(columns=base)
+        merged = merged.sort_values(["time", "lon", "lat", "point_id"], kind="stable").reset_index(drop=True)
+        value_cols = [v for v in variables if v in merged.columns]
+        if as_long:
+            merged = merged.melt(id_vars=base, value_vars=value_cols, var_name="variable", value_name="value")
+            merged = merged.dropna(subset=["value"]).reset_index(drop=True)
+            value_cols = ["variable", "value"]
+        keep = ["time"] + (["point_id"] if id_col else []) + ["lon", "lat"] + attrs + value_cols
+        return merged[keep].rename(columns={"time": time_col, "point_id": id_col or "point_id"})
+
+    # ------------------------------------------------------------------
+    # Extents
+    # ------------------------------------------------------------------
+
+    def extents(self, source):
+        """Recorded (variable, point_id, start, end) extents of ``source``."""
+        ext_dir = self._source_dir(source) / EXTENTS_DIR
+        files = sorted(ext_dir.glob("*.parquet")) if ext_dir.exists() else []
+        if not files:
+            return pd.DataFrame(columns=["variable", "point_id", "start", "end"])
+        return pq.read_table(files).to_pandas()[["variable", "point_id", "start", "end"]]
+
+    def missing(self, source, variables, ids, start, end):
+        """
+        Gaps of the recorded extents within ``[start, end]``.
+
+        Returns
+        -------
+        dict
+            ``{(variable, point_id): [(gap_start, gap_end), ...]}`` for every
+            pair not fully covered (days are the unit of coverage).
+        """
+        start = pd.Timestamp(start).normalize()
+        end = pd.Timestamp(end).normalize()
+        extents = self.extents(source)
+        extents = extents[extents["variable"].isin(variables) & extents["point_id"].isin(ids)]
+        by_key = {
+            key: sorted(zip(group["start"].dt.normalize(), group["end"].dt.normalize()))
+            for key, group in extents.groupby(["variable", "point_id"])
+        }
+        one_day = pd.Timedelta(days=1)
+        gaps = {}
+        for variable in variables:
+            for pid in ids:
+                cursor = start
+                key_gaps = []
+                for lo, hi in by_key.get((variable, pid), []):
+                    if cursor > end:
+                        break
+                    if lo > cursor:
+                        key_gaps.append((cursor, min(lo - one_day, end)))
+                    cursor = max(cursor, hi + one_day)
+                if cursor <= end:
+                    key_gaps.append((cursor, end))
+                if key_gaps:
+                    gaps[(variable, pid)] = key_gaps
+        return gaps
+
+    def covers(self, source, variables, ids, start, end):
+        """True when every (variable, point) has been extracted over ``[start, end]``."""
+        return not self.missing(source, variables, ids, start, end)
+
+    def missing_years(self, source, variables, ids, start, end):
+        """``{year: [point_id, ...]}`` of the (point, year) pairs not fully extracted."""
+        todo = {}
+        for (_, pid), gaps in self.missing(source, variables, ids, start, end).items():
+            for lo, hi in gaps:
+                for year in range(lo.year, hi.year + 1):
+                    todo.setdefault(year, set()).add(pid)
+        order = list(dict.fromkeys(ids))
+        return {year: [pid for pid in order if pid in pids] for year, pids in sorted(todo.items())}
+
+    def pending(self, source, variables, points, start, end):
+        """
+        Extraction batches still needed for ``points`` over ``[start, end]``.
+
+        Returns
+        -------
+        list of (points, years)
+            Years needing the same points are grouped, so that each batch is
+            one pass over the yearly (or daily) files of its years.
+        """
+        by_id = dict(zip(point_ids(points), points))
+        batches = {}
+        for year, ids in self.missing_years(source, variables, list(by_id), start, end).items():
+            batches.setdefault(tuple(ids), []).append(year)
+        return [([by_id[pid] for pid in ids], years) for ids, years in batches.items()]
+
+    def write_years(self, source, df, years, start, end, time_col="time", **kwargs):
+        """
+        :meth:`write` ``df`` one year at a time, recording each year of
+        ``years`` (clipped to ``[start, end]``) as extracted.
+        """
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        df_years = pd.to_datetime(df[time_col]).dt.year
+        written = []
+        for year in years:
+            lo = max(start, pd.Timestamp(year=year, month=1, day=1))
+            hi = min(end, pd.Timestamp(year=year, month=12, day=31))
+            rows = df[(df_years == year).to_numpy()]
+            written += self.write(source, rows, time_col=time_col, start=lo, end=hi, **kwargs)
+        return written
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+
+    def compact(self, source):
+        """Rewrite every (variable, year) partition of ``source`` as a single file."""
+        for variable in self.variables(source):
+            for year_dir in sorted(self._variable_dir(source, variable).glob("year=*")):
+                parts = sorted(year_dir.glob("part-*.parquet"))
+                if len(parts) < 2:
+                    continue
+                df = pq.read_table(parts).to_pandas()
+                df = df.sort_values("version", kind="stable").drop_duplicates(_KEYS, keep="last")
+                df = df.sort_values(["time", "point_id"]).reset_index(drop=True)
+                version = int(df["version"].max())
+                _write_table(pa.Table.from_pandas(df, preserve_index=False), year_dir / _part_name(version))
+                for part in parts:
+                    part.unlink()
@@ -0,0 +1,134 @@
+"""
+Server-side subsetting of gridded files.
+
+Where a provider publishes its files behind a THREDDS server, only the
+bbox/time hyperslab needs to be transferred:
+
+- ``protocol="ncss"``: NetCDF Subset Service (``.../thredds/ncss/grid/...``);
+  the server cuts the file and returns a NetCDF of the requested
+  variables, bbox and period;
+- ``protocol="opendap"``: the dataset is opened through OPeNDAP (DAP2 support
+  of the netCDF library) and only the selected slices are read.
+
+:func:`fetch_subset` writes the hyperslab to a local file and returns
+``None`` when the endpoint cannot serve it, so that callers can fall back to
+full downloads.
+"""
+
+import logging
+import os
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+import xarray as xr
+
+from agrometflow.download import get_client
+
+
+PROTOCOLS = ("ncss", "opendap")
+
+_LON_NAMES = ("lon", "longitude", "x", "X")
+_LAT_NAMES = ("lat", "latitude", "y", "Y")
+
+logger = logging.getLogger(__name__)
+
+
+def subset_url_for(template, year):
+    """Endpoint of ``year``: ``template`` may hold a ``{year}`` field (one file per year)."""
+    return template.format(year=year) if "{year}" in template else template
+
+
+def points_bbox(points, margin=0.1):
+    """Smallest [lon_min, lat_min, lon_max, lat_max] around (lon, lat) points, plus ``margin``."""
+    lons = [float(lon) for lon, _ in points]
+    lats = [float(lat) for _, lat in points]
+    return [min(lons) - margin, min(lats) - margin, max(lons) + margin, max(lats) + margin]
+
+
+def _ncss_params(variables, bbox, start, end):
+    params = {"var": list(variables), "accept": "netcdf4"}
+    if bbox is not None:
+        lon_min, lat_min, lon_max, lat_max = bbox
+        params.update({"west": lon_min, "south": lat_min, "east": lon_max, "north": lat_max})
+    if start is not None:
+        params["time_start"] = pd.Timestamp(start).strftime("%Y-%m-%dT%H:%M:%SZ")
+    if end is not None:
+        params["time_end"] = pd.Timestamp(end).strftime("%Y-%m-%dT%H:%M:%SZ")
+    return params
+
+
+def _raise_if_not_netcdf(response):
+    content_type = response.headers.get("content-type", "").lower()
+    if "html" in content_type or "xml" in content_type or "text/plain" in content_type:
+        raise ValueError(f"Subset endpoint answered with {content_type!r} instead of NetCDF")
+
+
+def _coord_slice(values, lo, hi):
+    ascending = values[0] <= values[-1]
+    return slice(lo, hi) if ascending else slice(hi, lo)
+
+
+def select_subset(ds, variables, bbox=None, start=None, end=None):
+    """Lazily select ``variables`` over ``bbox`` and [start, end] in ``ds``."""
+    ds = ds[list(variables)]
+    if bbox is not None:
+        lon_min, lat_min, lon_max, lat_max = bbox
+        lon = next((n for n in _LON_NAMES if n in ds.dims), None)
+        lat = next((n for n in _LAT_NAMES if n in ds.dims), None)
+        if lon is None or lat is None:
+            raise ValueError("Cannot find the longitude/latitude dimensions of the dataset")
+        ds = ds.sel({
+            lon: _coord_slice(ds[lon].values, lon_min, lon_max),
+            lat: _coord_slice(ds[lat].values, lat_min, lat_max),
+        })
+    if (start is not None or end is not None) and "time" in ds.dims:
+        ds = ds.sel(time=slice(start, end))
+    return ds
+
+
+def _write_opendap_subset(url, path, variables, bbox, start, end):
+    with xr.open_dataset(url) as ds:
+        subset = select_subset(ds, variables, bbox, start, end).load()
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".part")
+    os.close(fd)
+    try:
+        subset.to_netcdf(tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+    return path
+
+
+def fetch_subset(url, path, variables, bbox=None, start=None, end=None, protocol="ncss", timeout=None, log=None):
+    """
+    Write the hyperslab (``variables`` x ``bbox`` x [start, end]) of the
+    dataset at ``url`` to ``path``.
+
+    Returns ``path``, or ``None`` (with a warning) when the endpoint is
+    missing or cannot serve the request.
+    """
+    if protocol not in PROTOCOLS:
+        raise ValueError(f"Unknown subset protocol '{protocol}'. Available: {list(PROTOCOLS)}")
+    log = log or logger
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    options = {"timeout": timeout} if timeout is not None else {}
+    try:
+        if protocol == "opendap":
+            return _write_opendap_subset(url, path, variables, bbox, start, end)
+        result = get_client().download(
+            url,
+            path,
+            params=_ncss_params(variables, bbox, start, end),
+            check=_raise_if_not_netcdf,
+            missing_ok=True,
+            **options,
+        )
+        if result is None:
+            log.warning(f"No subset endpoint at {url}")
+        return result
+    except Exception as e:
+        log.warning(f"Subset request to {url} failed: {e}")
+        return None
@@ -1,4 +1,7 @@
+import hashlib
 import logging
+import threading
+from collections import OrderedDict
 from pathlib import Path
 import re
 
@@ -149,30 +152,122 @@ def clipwithbbox(nc_path, lat_min, lat_max, lon_min, lon_max, ds=None, output_pa
         return ds_clipped  
     
 
-def extract_points_from_tuples(ds, points):
-    """
-    points: list[(lon, lat)]
-    Output: Dataset dims ('time', 'point'), avec coords req_lon/req_lat
-    """
-    import xarray as xr
+def _coord_digest(values):
     import numpy as np
-    lons = np.array([p[0] for p in points], dtype=float)
-    lats = np.array([p[1] for p in points], dtype=float)
+    values = np.ascontiguousarray(values)
+    digest = hashlib.sha1(str(values.dtype).encode())
+    digest.update(str(values.shape).encode())
+    digest.update(values.tobytes())
+    return digest.hexdigest()
 
-    lon_da = xr.DataArray(lons, dims="point")
-    lat_da = xr.DataArray(lats, dims="point")
 
-    out = ds.sel(lon=lon_da, lat=lat_da, method="nearest")
+def _nearest_indices(grid, targets):
+    """Index of the nearest grid value for each target (same ties as ``sel(method="nearest")``)."""
+    import numpy as np
+    import pandas as pd
+    index = pd.Index(grid)
+    if index.is_monotonic_increasing or index.is_monotonic_decreasing:
+        return index.get_indexer(targets, method="nearest")
+    return np.abs(grid[None, :] - targets[:, None]).argmin(axis=1)
 
-    # garder les coords demandées (celles de l'utilisateur)
-    out = out.assign_coords(lon=("point", lons), lat=("point", lats))
-    return out
 
+class PointIndex:
+    """
+    Integer grid indices of a list of points on a regular lon/lat grid.
 
-def dataset_points_to_dataframe(ds_pts):
+    The nearest-cell search is done once per grid definition; extraction is
+    then a plain ``isel`` with fancy indexing. Latitudes may be ascending or
+    descending and longitudes either in [-180, 180) or [0, 360): requested
+    longitudes are wrapped into the grid convention, and on global grids the
+    first and last columns are neighbours.
+
+    Use :meth:`for_grid` to share indices between files on the same grid.
     """
-    Retourne un DF avec colonnes: time, point, lon, lat, + variables (en colonnes)
+
+    _cache = OrderedDict()
+    _cache_lock = threading.Lock()
+    _cache_size = 64
+
+    def __init__(self, lon, lat, points):
+        import numpy as np
+        grid_lon = np.asarray(lon, dtype=float)
+        grid_lat = np.asarray(lat, dtype=float)
+        self.lons = np.array([p[0] for p in points], dtype=float)
+        self.lats = np.array([p[1] for p in points], dtype=float)
+
+        target_lon = self.lons
+        if grid_lon.size and np.nanmax(grid_lon) > 180:
+            target_lon = np.mod(target_lon, 360.0)
+        elif grid_lon.size and np.nanmin(grid_lon) < 0:
+            target_lon = np.mod(target_lon + 180.0, 360.0) - 180.0
+        self.ilon = _nearest_indices(grid_lon, target_lon)
+        self.ilat = _nearest_indices(grid_lat, self.lats)
+
+        if grid_lon.size > 1:
+            step = np.abs(np.diff(grid_lon)).min()
+            lo, hi = np.argmin(grid_lon), np.argmax(grid_lon)
+            if grid_lon[hi] - grid_lon[lo] + step >= 360.0 - 1e-6:
+                outside = (target_lon < grid_lon[lo]) | (target_lon > grid_lon[hi])
+                to_lo = np.mod(grid_lon[lo] - target_lon, 360.0)
+                to_hi = np.mod(target_lon - grid_lon[hi], 360.0)
+                self.ilon = np.where(outside & (to_lo < to_hi), lo, np.where(outside, hi, self.ilon))
+
+    @classmethod
+    def for_grid(cls, ds, points):
+        """Cached :class:`PointIndex` of ``points`` on the lon/lat grid of ``ds``."""
+        import numpy as np
+        key = (
+            _coord_digest(ds["lon"].values),
+            _coord_digest(ds["lat"].values),
+            _coord_digest(np.asarray([(p[0], p[1]) for p in points], dtype=float)),
+        )
+        with cls._cache_lock:
+            index = cls._cache.get(key)
+            if index is not None:
+                cls._cache.move_to_end(key)
+                return index
+        index = cls(ds["lon"].values, ds["lat"].values, points)
+        with cls._cache_lock:
+            cls._cache[key] = index
+            while len(cls._cache) > cls._cache_size:
+                cls._cache.popitem(last=False)
+        return index
+
+    def extract(self, ds):
+        """Dataset with dims ('time', 'point') and the requested lon/lat as coords."""
+        import xarray as xr
+        out = ds.isel(
+            lon=xr.DataArray(self.ilon, dims="point"),
+            lat=xr.DataArray(self.ilat, dims="point"),
+        )
+        return out.assign_coords(lon=("point", self.lons), lat=("point", self.lats))
+
+    def extract_by_point(self, ds):
+        """
+        Same as :meth:`extract`, but each point is read as its own column: on
+        lazily opened remote files this only touches the chunks holding the
+        points.
+        """
+        import xarray as xr
+        columns = [ds.isel(lon=int(i), lat=int(j)).load() for i, j in zip(self.ilon, self.ilat)]
+        out = xr.concat(columns, dim="point")
+        return out.assign_coords(lon=("point", self.lons), lat=("point", self.lats))
+
+
+def extract_points_from_tuples(ds, points):
     """
+    points: list[(lon, lat)]
+    Output: Dataset dims ('time', 'point'), avec coords lon/lat demandées
+
+    Les indices de grille sont calculés une fois par grille (voir PointIndex).
+    """
+    return PointIndex.for_grid(ds, points).extract(ds)
+
+
+_POINT_DIMS = ("time", "point")
+
+
+def _dataset_points_to_dataframe_generic(ds_pts):
     # on force un dataset "plat"
     df = ds_pts.to_dataframe().reset_index()
 
@@ -196,3 +291,96 @@ def dataset_points_to_dataframe(ds_pts):
     keep += var_cols
 
     return df[keep]
+
+
+def _column(values, float32=False, arrow=False):
+    import numpy as np
+    import pandas as pd
+    if float32 and values.dtype.kind == "f":
+        values = values.astype(np.float32, copy=False)
+    if arrow and values.dtype.kind in "biuf":
+        import pyarrow
+        return pd.array(values, dtype=pd.ArrowDtype(pyarrow.from_numpy_dtype(values.dtype)))
+    return values
+
+
+def dataset_points_to_dataframe(ds_pts, layout="long", float32=False, arrow=False):
+    """
+    Retourne un DF avec colonnes: time, lon, lat, + variables (en colonnes)
+
+    Le DF est assemblé directement depuis les tableaux NumPy (np.repeat /
+    np.tile), sans passer par le MultiIndex de ``Dataset.to_dataframe``.
+
+    Parameters
+    ----------
+    ds_pts : xr.Dataset
+        Extraction de ``extract_points_from_tuples`` (dims time/point).
+    layout : {"long", "wide"}
+        "long" : une ligne par (time, point), dans l'ordre des dims du dataset.
+        "wide" : une ligne par date, une colonne ``<variable>_<i>`` par
+        variable de données et par point (i = position du point dans ``ds_pts``).
+    float32 : bool
+        Convertit les variables flottantes en float32.
+    arrow : bool
+        Colonnes numériques en ``pd.ArrowDtype``.
+    """
+    import numpy as np
+    import pandas as pd
+
+    if layout not in ("long", "wide"):
+        raise ValueError(f"Unknown layout '{layout}'; expected 'long' or 'wide'")
+
+    ds_pts = ds_pts.rename({k: k[4:] for k in ("req_lon", "req_lat") if k in ds_pts.variables})
+    drop_like = {"point", "lat", "lon", "time", "bnds", "bounds"}
+    names = [
+        k for k in ds_pts.variables
+        if k not in drop_like and not str(k).endswith("_bnds")
+    ]
+    axes = [k for k in ("time", "lon", "lat") if k in ds_pts.variables]
+    flat = all(set(ds_pts[k].dims) <= set(_POINT_DIMS) for k in names + axes)
+    if not flat or any(ds_pts[k].ndim > 1 for k in axes):
+        if layout == "wide":
+            raise ValueError("layout='wide' needs variables on the (time, point) dims only")
+        df = _dataset_points_to_dataframe_generic(ds_pts)
+        for c in names:
+            if c in df.columns:
+                df[c] = _column(df[c].to_numpy(), float32, arrow)
+        return df
+
+    dims = [d for d in ds_pts.dims if d in _POINT_DIMS]
+    sizes = [ds_pts.sizes[d] for d in dims]
+    n_time = ds_pts.sizes.get("time", 1)
+    n_point = ds_pts.sizes.get("point", 1)
+
+    def values(name, order):
+        da = ds_pts[name]
+        missing = [d for d in order if d not in da.dims]
+        if missing:
+            da = da.expand_dims({d: ds_pts.sizes[d] for d in missing})
+        return np.asarray(da.transpose(*order).values)
+
+    columns = {}
+    if layout == "wide":
+        if "time" in ds_pts.variables:
+            columns["time"] = np.asarray(ds_pts["time"].values)
+        order = [d for d in _POINT_DIMS if d in ds_pts.dims]
+        for name in (n for n in names if n in ds_pts.data_vars):
+            block = values(name, order).reshape(n_time, n_point)
+            for i in range(n_point):
+                columns[f"{name}_{i}"] = _column(block[:, i], float32, arrow)
+        return pd.DataFrame(columns, copy=False)
+
+    n_rows = int(np.prod(sizes)) if sizes else 1
+    for name in axes:
+        col = np.asarray(ds_pts[name].values).reshape(-1)
+        dim = ds_pts[name].dims[0] if ds_pts[name].dims else None
+        if dim is None:
+            col = np.repeat(col, n_rows)
+        else:
+            before = int(np.prod(sizes[:dims.index(dim)]))
+            after = int(np.prod(sizes[dims.index(dim) + 1:]))
+            col = np.tile(np.repeat(col, after), before)
+        columns[name] = col
+    for name in names:
+        columns[name] = _column(values(name, dims).reshape(-1), float32, arrow)
+    return pd.DataFrame(columns, copy=False)
@@ -0,0 +1,189 @@
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest.mock import patch
+
+import requests
+
+from agrometflow.cache import RawCache
+from agrometflow.download import HttpClient, download_many
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        body = server.files.get(self.path)
+        with server.lock:
+            server.requests.append(self.path)
+        if body is None:
+            self._send(404, b"")
+        elif self.headers.get("If-None-Match") == server.etag:
+            self._send(304, b"")
+        else:
+            with server.lock:
+                server.sent += len(body)
+            self._send(200, body)
+
+    def _send(self, status, body):
+        self.send_response(status)
+        self.send_header("ETag", self.server.etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class TestRawCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self.server.files = {f"/f{i}": bytes([i]) * 100 for i in range(4)}
+        self.server.etag = '"v1"'
+        self.server.lock = threading.Lock()
+        self.server.requests = []
+        self.server.sent = 0
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.client = HttpClient(retries=0)
+        self.cache = RawCache(root=Path(self.tmp.name) / "cache", max_bytes=250, client=self.client)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp.cleanup()
+
+    def test_revalidates_with_etag(self):
+        first = self.cache.fetch(f"{self.base}/f1")
+        second = self.cache.fetch(f"{self.base}/f1")
+        self.assertEqual(first, second)
+        self.assertEqual(first.read_bytes(), b"\x01" * 100)
+        self.assertEqual(self.server.sent, 100)
+        self.assertEqual(len(self.server.requests), 2)
+
+        self.server.etag = '"v2"'
+        self.server.files["/f1"] = b"new"
+        self.assertEqual(self.cache.fetch(f"{self.base}/f1").read_bytes(), b"new")
+
+    def test_same_content_is_stored_once(self):
+        self.server.files["/copy"] = self.server.files["/f1"]
+        a = self.cache.fetch(f"{self.base}/f1")
+        b = self.cache.fetch(f"{self.base}/copy")
+        self.assertEqual(a, b)
+        self.assertEqual(self.cache.size(), 100)
+
+    def test_damaged_blob_is_fetched_again(self):
+        blob = self.cache.fetch(f"{self.base}/f2")
+        blob.chmod(0o644)
+        blob.write_bytes(b"truncated")
+        self.assertEqual(self.cache.fetch(f"{self.base}/f2").read_bytes(), b"\x02" * 100)
+        self.assertEqual(self.server.sent, 200)
+
+    def test_verify_drops_corrupt_blobs(self):
+        blob = self.cache.fetch(f"{self.base}/f2")
+        blob.chmod(0o644)
+        blob.write_bytes(b"\x00" * 100)
+        self.assertEqual(self.cache.verify(), [f"{self.base}/f2"])
+        self.assertIsNone(self.cache.lookup(f"{self.base}/f2"))
+
+    def test_lru_eviction_spares_pinned_files(self):
+        pinned = self.cache.fetch(f"{self.base}/f0", pin=True)
+        self.cache.fetch(f"{self.base}/f1")
+        self.cache.fetch(f"{self.base}/f2")
+        self.assertLessEqual(self.cache.size(), 250)
+        self.assertTrue(pinned.exists())
+        self.assertIsNone(self.cache.lookup(f"{self.base}/f1"))
+
+        self.cache.release(pinned)
+        self.cache.fetch(f"{self.base}/f3")
+        self.assertIsNone(self.cache.lookup(f"{self.base}/f0"))
+
+    def test_index_is_scanned_only_over_the_bound(self):
+        cache = RawCache(root=Path(self.tmp.name) / "local", max_bytes=10_000, client=self.client)
+        src = Path(self.tmp.name) / "src.bin"
+        with patch.object(cache, "_scan", wraps=cache._scan) as scan:
+            for i in range(50):
+                src.unlink(missing_ok=True)
+                src.write_bytes(i.to_bytes(2, "big") * 50)
+                cache.add(f"local://{i}", src)
+            self.assertEqual(scan.call_count, 1)
+            self.assertEqual(cache._total, 5_000)
+
+            cache.max_bytes = 1_000
+            src.unlink(missing_ok=True)
+            src.write_bytes(b"x" * 100)
+            cache.add("local://last", src)
+            self.assertEqual(scan.call_count, 1)
+        # Evicted down to the low-water mark.
+        self.assertEqual(cache.size(), 900)
+        self.assertEqual(cache._total, 900)
+        self.assertIsNotNone(cache.lookup("local://last"))
+        self.assertIsNone(cache.lookup("local://0"))
+
+    def test_full_cache_is_not_rescanned_on_every_insert(self):
+        cache = RawCache(root=Path(self.tmp.name) / "local", max_bytes=2_000, client=self.client)
+        src = Path(self.tmp.name) / "src.bin"
+        with patch.object(cache, "_scan", wraps=cache._scan) as scan, \
+                patch.object(cache, "_evict", wraps=cache._evict) as evict:
+            for i in range(300):
+                src.unlink(missing_ok=True)
+                src.write_bytes(i.to_bytes(2, "big") * 50)
+                cache.add(f"local://{i}", src)
+                self.assertLessEqual(cache._total, 2_000)
+            self.assertEqual(scan.call_count, 1)
+            # Each eviction frees 10% of the bound, not just the room of one entry.
+            self.assertLessEqual(evict.call_count, 100)
+
+            with patch("agrometflow.cache.RESCAN_INTERVAL", 0):
+                src.unlink(missing_ok=True)
+                src.write_bytes(b"y" * 300)
+                cache.add("local://last", src)
+            self.assertEqual(scan.call_count, 2)
+        self.assertLessEqual(cache.size(), 2_000)
+        self.assertEqual(cache.size(), cache._total)
+
+    def test_blobs_are_read_only(self):
+        target = Path(self.tmp.name) / "out" / "f1.bin"
+        self.cache.fetch_to(f"{self.base}/f1", target)
+        blob = self.cache.lookup(f"{self.base}/f1")
+        self.assertEqual(blob.stat().st_mode & 0o777, 0o444)
+        self.assertEqual(target.stat().st_mode & 0o777, 0o444)
+
+    def test_hits_are_touched_lazily(self):
+        self.cache.fetch(f"{self.base}/f1")
+        with patch.object(self.cache, "_write_entry", wraps=self.cache._write_entry) as write:
+            for _ in range(3):
+                self.cache.lookup(f"{self.base}/f1")
+            self.assertEqual(write.call_count, 0)
+
+    def test_missing_files_and_unreachable_server(self):
+        self.assertIsNone(self.cache.fetch(f"{self.base}/nothing", missing_ok=True))
+        with self.assertRaises(requests.HTTPError):
+            self.cache.fetch(f"{self.base}/nothing")
+
+        self.cache.fetch(f"{self.base}/f1")
+        self.server.shutdown()
+        self.server.server_close()
+        self.addCleanup(setattr, self.server, "shutdown", lambda: None)
+        self.assertEqual(self.cache.fetch(f"{self.base}/f1").read_bytes(), b"\x01" * 100)
+
+    def test_fetch_to_and_download_many_read_through(self):
+        out = Path(self.tmp.name) / "out"
+        self.cache.fetch_to(f"{self.base}/f1", out / "a.bin")
+        self.assertEqual((out / "a.bin").read_bytes(), b"\x01" * 100)
+
+        jobs = [(f"{self.base}/f{i}", out / f"{i}.bin") for i in (1, 2)]
+        download_many(jobs, cache=self.cache)
+        self.assertEqual(self.server.requests, ["/f1", "/f2"])
+        self.assertEqual((out / "1.bin").read_bytes(), b"\x01" * 100)
+        self.assertEqual((out / "2.bin").read_bytes(), b"\x02" * 100)
+
+
+if __name__ == "__main__":
+    unittest.main()
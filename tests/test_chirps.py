@@ -0,0 +1,411 @@
+import importlib.util
+import io
+import tempfile
+import threading
+import unittest
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest.mock import patch
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+from agrometflow.cache import RawCache
+from agrometflow.climate import chirps
+from agrometflow.climate.arc2 import Arc2Downloader
+from agrometflow.climate.chirps import ChirpsDownloader
+from agrometflow.climate.tamsat import TamsatDownloader
+
+
+class _RangeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.startswith("/thredds/ncss/"):
+            return self._ncss()
+        body = getattr(self.server, "files", {}).get(self.path, self.server.payload)
+        status = 200
+        headers = {"ETag": '"v1"'}
+        if self.headers.get("If-None-Match") == '"v1"':
+            self.send_response(304)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        spec = self.headers.get("Range")
+        if spec and self.server.ranges:
+            start, _, end = spec.removeprefix("bytes=").partition("-")
+            start, end = int(start), min(int(end), len(body) - 1)
+            headers["Content-Range"] = f"bytes {start}-{end}/{len(body)}"
+            body = body[start:end + 1]
+            status = 206
+        with self.server.lock:
+            self.server.sent += len(body)
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header("Content-Type", "application/x-netcdf")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _ncss(self):
+        """Stand-in for the NetCDF Subset Service of a THREDDS server."""
+        if not self.server.ncss:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        query = parse_qs(urlsplit(self.path).query)
+        with xr.open_dataset(self.server.source) as ds:
+            ds = ds[query["var"]].sel(
+                lon=slice(float(query["west"][0]), float(query["east"][0])),
+                lat=slice(float(query["south"][0]), float(query["north"][0])),
+                time=slice(query["time_start"][0].rstrip("Z"), query["time_end"][0].rstrip("Z")),
+            )
+            with tempfile.NamedTemporaryFile(suffix=".nc") as f:
+                ds.to_netcdf(f.name, engine="h5netcdf")
+                body = Path(f.name).read_bytes()
+        with self.server.lock:
+            self.server.sent += len(body)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-netcdf")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def _chirps_year(path):
+    time = pd.date_range("2020-01-01", periods=20, freq="D")
+    lat = np.arange(-19.975, 20, 0.05)
+    lon = np.arange(-19.975, 20, 0.05)
+    rng = np.random.default_rng(0)
+    precip = rng.random((len(time), len(lat), len(lon)), dtype=np.float32)
+    ds = xr.Dataset({"precip": (("time", "latitude", "longitude"), precip)},
+                    coords={"time": time, "latitude": lat, "longitude": lon})
+    ds = ds.rename({"latitude": "lat", "longitude": "lon"})
+    ds.to_netcdf(
+        path,
+        engine="h5netcdf",
+        encoding={"precip": {"chunksizes": (20, 50, 50), "zlib": True}},
+    )
+
+
+class TestChirpsRemoteAccess(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        source = Path(self.tmp.name) / "chirps-v2.0.2020.days_p05.nc"
+        _chirps_year(source)
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _RangeHandler)
+        self.server.payload = source.read_bytes()
+        self.server.lock = threading.Lock()
+        self.server.sent = 0
+        self.server.ranges = True
+        self.server.source = source
+        self.server.ncss = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        cache = patch("agrometflow.cache._cache", RawCache(root=Path(self.tmp.name) / "cache"))
+        cache.start()
+        self.addCleanup(cache.stop)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp.cleanup()
+
+    def _points(self, access, out, points=((1.02, 2.51), (-15.3, 12.0)), **kwargs):
+        downloader = ChirpsDownloader()
+        kwargs.setdefault("max_workers", 1)
+        with patch("agrometflow.climate.chirps.REMOTE_URL", self.url):
+            downloader.download(
+                start_date="2020-01-02",
+                end_date="2020-01-10",
+                output_dir=out,
+                points=list(points),
+                access=access,
+                **kwargs,
+            )
+        return downloader.data
+
+    def test_new_points_reuse_cached_yearly_file(self):
+        first = self._points("download", Path(self.tmp.name) / "out")
+        self.assertEqual(self.server.sent, len(self.server.payload))
+
+        second = self._points("download", Path(self.tmp.name) / "out", points=[(1.02, 2.51)])
+        self.assertEqual(self.server.sent, len(self.server.payload))
+        pd.testing.assert_frame_equal(
+            second, first[first["lon"] == 1.02].reset_index(drop=True), check_like=True
+        )
+
+    def test_only_new_points_are_extracted(self):
+        out = Path(self.tmp.name) / "out"
+        self._points("download", out)
+        new_point = (5.5, -3.3)
+        with patch(
+            "agrometflow.climate.chirps.download_points_stream",
+            wraps=chirps.download_points_stream,
+        ) as stream:
+            grown = self._points("download", out, points=[(1.02, 2.51), (-15.3, 12.0), new_point])
+        self.assertEqual(stream.call_count, 1)
+        self.assertEqual(stream.call_args.kwargs["points"], [new_point])
+
+        fresh = self._points("download", Path(self.tmp.name) / "fresh", points=[(1.02, 2.51), (-15.3, 12.0), new_point])
+        pd.testing.assert_frame_equal(grown, fresh)
+
+        with patch("agrometflow.climate.chirps.download_points_stream") as stream:
+            self._points("download", out, points=[new_point])
+        stream.assert_not_called()
+
+    def test_remote_points_match_download(self):
+        downloaded = self._points("download", Path(self.tmp.name) / "download")
+        full_size = self.server.sent
+
+        self.server.sent = 0
+        remote = self._points("remote", Path(self.tmp.name) / "remote")
+        pd.testing.assert_frame_equal(remote, downloaded)
+        self.assertLess(self.server.sent, full_size / 4)
+
+        cache = Path(self.tmp.name) / "remote" / ".chunk_cache"
+        self.assertTrue(any(cache.rglob("*.blk")))
+
+    def test_remote_bbox_matches_download(self):
+        bbox = [0.0, 0.0, 2.0, 1.0]
+        outputs = {}
+        for access in ("download", "remote"):
+            out = Path(self.tmp.name) / access
+            with patch("agrometflow.climate.chirps.REMOTE_URL", self.url):
+                ChirpsDownloader().download(
+                    start_date="2020-01-01",
+                    end_date="2020-01-20",
+                    output_dir=out,
+                    bbox=bbox,
+                    access=access,
+                    max_workers=1,
+                )
+            with xr.open_dataset(next(out.rglob("*bbox*.nc"))) as ds:
+                outputs[access] = ds.load()
+        xr.testing.assert_identical(outputs["remote"], outputs["download"])
+
+    @unittest.skipUnless(importlib.util.find_spec("zarr"), "zarr is not installed")
+    def test_bbox_cube_matches_netcdf(self):
+        bbox = [0.0, 0.0, 2.0, 1.0]
+        out = Path(self.tmp.name) / "out"
+        for output_format, start in (("netcdf", "2020-01-01"), ("zarr", "2020-01-01"), ("zarr", "2020-01-05")):
+            with patch("agrometflow.climate.chirps.REMOTE_URL", self.url):
+                ChirpsDownloader().download(
+                    start_date=start,
+                    end_date="2020-01-20",
+                    output_dir=out,
+                    bbox=bbox,
+                    output_format=output_format,
+                    max_workers=1,
+                )
+        with xr.open_dataset(next(out.rglob("*bbox*.nc"))) as ds:
+            expected = ds["PR"].load()
+        with xr.open_zarr(out / "cube" / "chirps" / "PR.zarr", consolidated=False) as ds:
+            xr.testing.assert_equal(ds["PR"].load(), expected)
+
+    def test_pipelined_extraction_matches_sequential(self):
+        sequential = self._points("download", Path(self.tmp.name) / "sequential")
+        pipelined = self._points(
+            "download",
+            Path(self.tmp.name) / "pipelined",
+            max_workers=2,
+            extract_executor="processes",
+            force_parallel=True,
+        )
+        pd.testing.assert_frame_equal(pipelined, sequential)
+
+        bbox = [0.0, 0.0, 2.0, 1.0]
+        outputs = {}
+        for max_workers in (1, 2):
+            out = Path(self.tmp.name) / f"bbox{max_workers}"
+            with patch("agrometflow.climate.chirps.REMOTE_URL", self.url):
+                ChirpsDownloader().download(
+                    start_date="2020-01-01",
+                    end_date="2020-01-20",
+                    output_dir=out,
+                    bbox=bbox,
+                    max_workers=max_workers,
+                    extract_executor="processes",
+                    force_parallel=True,
+                )
+            with xr.open_dataset(next(out.rglob("*bbox*.nc"))) as ds:
+                outputs[max_workers] = ds.load()
+        xr.testing.assert_identical(outputs[2], outputs[1])
+
+    def test_subset_matches_download(self):
+        subset_url = f"{self.url}/thredds/ncss/grid/chirps/chirps-v2.0.{{year}}.days_p05.nc"
+        downloaded = self._points("download", Path(self.tmp.name) / "download")
+        full_size = self.server.sent
+
+        self.server.sent = 0
+        subset = self._points("subset", Path(self.tmp.name) / "subset", subset_url=subset_url)
+        pd.testing.assert_frame_equal(subset, downloaded)
+        self.assertLess(self.server.sent, full_size / 4)
+
+        bbox = [0.0, 0.0, 2.0, 1.0]
+        outputs = {}
+        for access in ("download", "subset"):
+            out = Path(self.tmp.name) / f"bbox_{access}"
+            with patch("agrometflow.climate.chirps.REMOTE_URL", self.url):
+                ChirpsDownloader().download(
+                    start_date="2020-01-01",
+                    end_date="2020-01-20",
+                    output_dir=out,
+                    bbox=bbox,
+                    access=access,
+                    subset_url=subset_url,
+                    max_workers=1,
+                )
+            with xr.open_dataset(next(out.rglob("*bbox*.nc"))) as ds:
+                outputs[access] = ds.load()
+        xr.testing.assert_identical(outputs["subset"], outputs["download"])
+        self.assertFalse(any((Path(self.tmp.name) / "bbox_subset" / ".subset").iterdir()))
+
+    def test_subset_falls_back_to_download(self):
+        self.server.ncss = False
+        subset_url = f"{self.url}/thredds/ncss/grid/chirps/chirps-v2.0.{{year}}.days_p05.nc"
+        fallback = self._points("subset", Path(self.tmp.name) / "subset", subset_url=subset_url)
+        self.assertEqual(self.server.sent, len(self.server.payload))
+        pd.testing.assert_frame_equal(fallback, self._points("download", Path(self.tmp.name) / "download"))
+
+    def test_server_without_ranges_is_reported(self):
+        self.server.ranges = False
+        data = self._points("remote", Path(self.tmp.name) / "remote")
+        self.assertTrue(data.empty)
+
+    def test_unknown_access(self):
+        with self.assertRaises(ValueError):
+            self._points("ftp", Path(self.tmp.name) / "out")
+
+
+def _daily_grid(variable, days):
+    lat = np.arange(-4.75, 5, 0.5)
+    lon = np.arange(-4.75, 5, 0.5)
+    rng = np.random.default_rng(1)
+    values = rng.random((len(days), len(lat), len(lon)), dtype=np.float32) * 50
+    return xr.Dataset({variable: (("time", "lat", "lon"), values)}, coords={"time": days, "lat": lat, "lon": lon})
+
+
+class _SubsetEndpointTestCase(unittest.TestCase):
+    """A THREDDS NCSS stand-in serving ``self.grid`` and the raw files of ``self.server.files``."""
+
+    variable = None
+    bbox = [-2.0, -1.0, 1.0, 3.0]
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.grid = _daily_grid(self.variable, pd.date_range("2020-01-01", "2020-01-10", freq="D"))
+        source = self.root / "source.nc"
+        self.grid.to_netcdf(source, engine="h5netcdf")
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _RangeHandler)
+        self.server.payload = b""
+        self.server.files = {}
+        self.server.lock = threading.Lock()
+        self.server.sent = 0
+        self.server.ranges = True
+        self.server.source = source
+        self.server.ncss = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.subset_url = f"{self.url}/thredds/ncss/grid/{self.variable}.{{year}}.nc"
+        cache = patch("agrometflow.cache._cache", RawCache(root=self.root / "cache"))
+        cache.start()
+        self.addCleanup(cache.stop)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp.cleanup()
+
+    def _expected(self):
+        return self.grid[self.variable].sel(lon=slice(self.bbox[0], self.bbox[2]), lat=slice(self.bbox[1], self.bbox[3]))
+
+
+class TestArc2Subset(_SubsetEndpointTestCase):
+    variable = "precip"
+
+    def setUp(self):
+        super().setUp()
+        for day in self.grid.indexes["time"]:
+            da = self.grid["precip"].sel(time=day).rename({"lon": "x", "lat": "y"}).sortby("y", ascending=False)
+            tif = self.root / "day.tif"
+            da.rio.write_crs("EPSG:4326").rio.to_raster(tif)
+            archive = io.BytesIO()
+            with zipfile.ZipFile(archive, "w") as z:
+                z.write(tif, f"africa_arc.{day:%Y%m%d}.tif")
+            self.server.files[f"/africa_arc.{day:%Y%m%d}.tif.zip"] = archive.getvalue()
+
+    def _download(self, out):
+        with patch.object(Arc2Downloader, "BASE_URL", self.url):
+            Arc2Downloader().download(
+                start_date="2020-01-02", end_date="2020-01-06", output_dir=out, bbox=self.bbox,
+                access="subset", subset_url=self.subset_url, max_workers=1,
+            )
+        with xr.open_dataset(out / "PR" / "arc2_2020.nc") as ds:
+            return ds["precip"].load()
+
+    def test_subset_and_fallback(self):
+        expected = self._expected().sel(time=slice("2020-01-02", "2020-01-06"))
+        subset = self._download(self.root / "subset")
+        self.assertEqual(subset.dims, ("time", "y", "x"))
+        np.testing.assert_allclose(subset.values, expected.values)
+        self.assertEqual(list((self.root / "subset" / "PR" / "tifs").iterdir()), [])
+
+        self.server.ncss = False
+        fallback = self._download(self.root / "fallback").sortby("y")
+        np.testing.assert_allclose(fallback["x"].values, subset["x"].values)
+        np.testing.assert_allclose(fallback["y"].values, subset["y"].values)
+        np.testing.assert_allclose(fallback.values, subset.values)
+
+
+class TestTamsatSubset(_SubsetEndpointTestCase):
+    variable = "rfe"
+
+    def setUp(self):
+        super().setUp()
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, "w") as z:
+            for day in self.grid.indexes["time"]:
+                path = self.root / f"{day:%Y_%m_%d}.nc"
+                self.grid.sel(time=[day]).to_netcdf(path)
+                z.write(path, f"{day:%Y_%m_%d}.nc")
+        self.server.files["/TAMSATv3.1_rfe_daily_2020.zip"] = archive.getvalue()
+
+    def _downloader(self, out):
+        downloader = TamsatDownloader(output_dir=out, max_workers=1)
+        downloader.BASE_URL = self.url
+        return downloader
+
+    def _result(self, out):
+        with xr.open_dataset(out / "tamsat_2020.nc") as ds:
+            return ds["rfe"].load()
+
+    def test_subset_and_fallback(self):
+        expected = self._expected()
+        self._downloader(self.root / "subset").download(
+            2020, 2020, bbox=self.bbox, access="subset", subset_url=self.subset_url
+        )
+        xr.testing.assert_allclose(self._result(self.root / "subset"), expected)
+
+        self.server.ncss = False
+        self._downloader(self.root / "fallback").download(
+            2020, 2020, bbox=self.bbox, access="subset", subset_url=self.subset_url
+        )
+        xr.testing.assert_allclose(self._result(self.root / "fallback"), expected)
+
+    def test_process_year_clips_to_bbox(self):
+        self._downloader(self.root / "year").process_year(2020, bbox=self.bbox)
+        xr.testing.assert_allclose(self._result(self.root / "year"), self._expected())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import importlib.util
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+from agrometflow.cube import OrderedAppender, get_cube
+
+HAS_ZARR = importlib.util.find_spec("zarr") is not None
+
+
+def _days(start, periods, lon0=10.0):
+    time = pd.date_range(start, periods=periods, freq="D")
+    lat = np.arange(0.0, 3.0, 0.5)
+    lon = np.arange(lon0, lon0 + 4.0, 0.5)
+    cells = np.arange(lat.size * lon.size, dtype="float32").reshape(lat.size, lon.size)
+    precip = time.dayofyear.values[:, None, None].astype("float32") * 1000 + cells
+    return xr.Dataset(
+        {"precip": (("time", "y", "x"), precip)},
+        coords={"time": time, "y": lat, "x": lon, "spatial_ref": 0},
+    )
+
+
+@unittest.skipUnless(HAS_ZARR, "zarr is not installed")
+class TestCubeStore(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.cube = get_cube("zarr", Path(tmp.name), time_chunk=8, space_chunk=4)
+
+    def test_appends_only_new_dates(self):
+        self.assertEqual(self.cube.append("arc2", _days("2020-01-01", 5)), {"precip": 5})
+        self.assertEqual(self.cube.append("arc2", _days("2020-01-03", 10)), {"precip": 7})
+        self.assertEqual(self.cube.append("arc2", _days("2020-01-03", 10)), {"precip": 0})
+
+        with self.cube.open("arc2", "precip") as ds:
+            self.assertEqual(ds["precip"].encoding["chunks"], (8, 4, 4))
+            xr.testing.assert_equal(ds["precip"].load(), _days("2020-01-01", 12)["precip"])
+        manifest = self.cube.manifest("arc2", "precip")
+        self.assertEqual(len(manifest["dates"]), 12)
+        self.assertEqual([i["count"] for i in manifest["ingests"]], [5, 7])
+        self.assertTrue(self.cube.covers("arc2", "precip", pd.date_range("2020-01-02", "2020-01-12")))
+
+    def test_older_dates_are_rewritten_in_order(self):
+        self.cube.append("arc2", _days("2020-01-01", 5))
+        self.cube.append("arc2", _days("2019-12-28", 2))
+        with self.cube.open("arc2", "precip") as ds:
+            expected = xr.concat([_days("2019-12-28", 2), _days("2020-01-01", 5)], dim="time")
+            xr.testing.assert_identical(ds.load(), expected)
+
+    def test_grid_mismatch(self):
+        self.cube.append("arc2", _days("2020-01-01", 5))
+        with self.assertRaises(ValueError):
+            self.cube.append("arc2", _days("2020-01-06", 5, lon0=20.0))
+
+    def test_read_point(self):
+        self.cube.append("arc2", _days("2020-01-01", 12))
+        df = self.cube.read_point("arc2", "precip", [(11.1, 1.2)], start="2020-01-03", end="2020-01-04")
+        self.assertEqual(list(df.columns), ["time", "lon", "lat", "precip"])
+        self.assertEqual(df["precip"].tolist(), [3018.0, 4018.0])
+
+    def test_ordered_appender(self):
+        chunks = {day: _days(f"2020-01-{day:02d}", 3) for day in (1, 4, 7)}
+        with OrderedAppender(self.cube, "arc2", list(chunks)) as appender:
+            appender.add(7, chunks[7])
+            appender.add(4, chunks[4])
+            self.assertFalse(self.cube.path("arc2", "precip").exists())
+            appender.add(1, chunks[1])
+        self.assertEqual(len(self.cube.manifest("arc2", "precip")["ingests"]), 3)
+
+    def test_concurrent_appends(self):
+        chunks = [_days(f"2020-01-{day:02d}", 2) for day in range(1, 25, 2)]
+        with ThreadPoolExecutor(max_workers=6) as executor:
+            added = list(executor.map(lambda ds: self.cube.append("arc2", ds)["precip"], chunks))
+        self.assertEqual(added, [2] * 12)
+        with self.cube.open("arc2", "precip") as ds:
+            xr.testing.assert_equal(ds["precip"].load(), _days("2020-01-01", 24)["precip"])
+        self.assertEqual(len(self.cube.manifest("arc2", "precip")["dates"]), 24)
+
+    def test_netcdf_means_no_cube(self):
+        self.assertIsNone(get_cube("netcdf", "unused"))
+        with self.assertRaises(ValueError):
+            get_cube("grib", "unused")
+
+
+if __name__ == "__main__":
+    unittest.main()
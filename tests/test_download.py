@@ -0,0 +1,301 @@
+import asyncio
+import gzip
+import importlib.util
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest.mock import patch
+
+import requests
+
+from agrometflow.cache import RawCache
+from agrometflow.climate.cmorphv1 import Cmorphv1Downloader
+from agrometflow.download import HttpClient, configure_client, download_many, run_pipeline
+
+HAS_HTTPX = importlib.util.find_spec("httpx") is not None
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.hits[self.path] = server.hits.get(self.path, 0) + 1
+            server.ports.add(self.client_address[1])
+            server.active += 1
+            server.peak = max(server.peak, server.active)
+            hits = server.hits[self.path]
+        try:
+            if self.path == "/missing":
+                self._send(404, b"")
+            elif self.path == "/flaky" and hits < 3:
+                self._send(503, b"busy")
+            elif self.path == "/slow":
+                time.sleep(0.05)
+                self._send(200, b"slow")
+            elif self.path == "/html":
+                self._send(200, b"<html></html>", content_type="text/html")
+            elif self.path.endswith(".gz"):
+                self._send(200, gzip.compress(self.path.encode()))
+            else:
+                self._send(200, b"x" * 1000)
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    def _send(self, status, body, content_type="application/octet-stream"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class _ServerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self.server.lock = threading.Lock()
+        self.server.hits = {}
+        self.server.ports = set()
+        self.server.active = 0
+        self.server.peak = 0
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.base = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class TestHttpClient(_ServerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = HttpClient(max_per_host=2, retries=3, backoff=0.01)
+
+    def tearDown(self):
+        self.client.close()
+        super().tearDown()
+
+    def test_connection_is_reused(self):
+        for _ in range(5):
+            self.assertEqual(self.client.get(f"{self.base}/data").status_code, 200)
+        self.assertEqual(len(self.server.ports), 1)
+
+    def test_retries_on_server_errors(self):
+        response = self.client.get(f"{self.base}/flaky")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.server.hits["/flaky"], 3)
+
+    def test_download_writes_file_atomically(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = self.client.download(f"{self.base}/data", Path(tmp) / "sub" / "file.bin")
+            self.assertEqual(path.read_bytes(), b"x" * 1000)
+            self.assertEqual(sorted(p.name for p in path.parent.iterdir()), ["file.bin"])
+
+    def test_missing_and_rejected_files_leave_nothing(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            self.assertIsNone(
+                self.client.download(f"{self.base}/missing", Path(tmp) / "a.nc", missing_ok=True)
+            )
+            with self.assertRaises(requests.HTTPError):
+                self.client.download(f"{self.base}/missing", Path(tmp) / "a.nc")
+
+            def reject_html(response):
+                if "text/html" in response.headers.get("content-type", ""):
+                    raise PermissionError("html")
+
+            with self.assertRaises(PermissionError):
+                self.client.download(f"{self.base}/html", Path(tmp) / "b.nc", check=reject_html)
+            self.assertEqual(list(Path(tmp).iterdir()), [])
+
+    def test_concurrency_is_limited_per_host(self):
+        threads = [
+            threading.Thread(target=self.client.get, args=(f"{self.base}/slow",)) for _ in range(6)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(self.server.hits["/slow"], 6)
+        self.assertLessEqual(self.server.peak, 2)
+
+    def test_worker_count(self):
+        url = f"{self.base}/data"
+        self.assertEqual(self.client.worker_count(url, requested=3), 3)
+        self.assertEqual(self.client.worker_count(url), 2)
+
+        client = HttpClient(max_per_host=8, max_bandwidth=1.0)
+        client._record(url, 1000, 1.0)
+        self.assertEqual(client.worker_count(url), 1)
+        client.close()
+
+    def test_request_rate_budget(self):
+        self.client.set_rate(self.base, 5.0)
+        started = time.monotonic()
+        for _ in range(5):
+            self.client.get(f"{self.base}/data")
+        self.assertGreaterEqual(time.monotonic() - started, 4 / 5.0)
+
+        self.client.set_rate(self.base, None)
+        started = time.monotonic()
+        for _ in range(5):
+            self.client.get(f"{self.base}/data")
+        self.assertLess(time.monotonic() - started, 4 / 5.0)
+
+
+class TestDownloadMany(_ServerTestCase):
+    def setUp(self):
+        super().setUp()
+        configure_client(max_per_host=2, retries=3, backoff=0.01)
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        cache = patch("agrometflow.cache._cache", RawCache(root=cache_dir.name))
+        cache.start()
+        self.addCleanup(cache.stop)
+
+    def tearDown(self):
+        configure_client()
+        super().tearDown()
+
+    def _run(self, backend, tmp, **kwargs):
+        paths = ["/data", "/missing", "/flaky", "/html"]
+        jobs = [(f"{self.base}{p}", Path(tmp) / backend / f"{i}.bin") for i, p in enumerate(paths)]
+
+        def reject_html(response):
+            if "text/html" in response.headers.get("content-type", ""):
+                raise PermissionError("html")
+
+        return download_many(
+            jobs,
+            backend=backend,
+            on_complete=lambda i, path: (i, len(path.read_bytes())),
+            check=reject_html,
+            missing_ok=True,
+            **kwargs,
+        )
+
+    def test_threads_backend(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            self.assertEqual(self._run("threads", tmp), [(0, 1000), None, (2, 1000), None])
+
+    @unittest.skipUnless(HAS_HTTPX, "httpx is not installed")
+    def test_async_backend_matches_threads(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            self.assertEqual(self._run("async", tmp), [(0, 1000), None, (2, 1000), None])
+            self.assertEqual(sorted(p.name for p in (Path(tmp) / "async").iterdir()), ["0.bin", "2.bin"])
+
+    @unittest.skipUnless(HAS_HTTPX, "httpx is not installed")
+    def test_async_limits_requests_in_flight_per_host(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            jobs = [(f"{self.base}/slow", Path(tmp) / f"{i}.bin") for i in range(12)]
+            results = download_many(jobs, backend="async", max_workers=4)
+        self.assertTrue(all(results))
+        self.assertEqual(self.server.hits["/slow"], 12)
+        self.assertGreater(self.server.peak, 1)
+        self.assertLessEqual(self.server.peak, 4)
+
+    @unittest.skipUnless(HAS_HTTPX, "httpx is not installed")
+    def test_async_backend_inside_running_loop(self):
+        async def notebook_cell(tmp):
+            return download_many([(f"{self.base}/data", Path(tmp) / "a.bin")], backend="async")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            self.assertEqual(asyncio.run(notebook_cell(tmp)), [Path(tmp) / "a.bin"])
+
+    @unittest.skipUnless(HAS_HTTPX, "httpx is not installed")
+    def test_daily_source_async_backend(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            downloader = Cmorphv1Downloader(output_dir=tmp)
+            downloader.BASE_URL = self.base
+            downloader.download("2020-01-30", "2020-02-02", backend="async")
+            bins = sorted((Path(tmp) / "bin").glob("*_2020????"))
+            self.assertEqual(len(bins), 4)
+            self.assertTrue(bins[0].read_bytes().endswith(b"EOD_20200130.gz"))
+        self.assertEqual(self.server.hits.get("/2020/202002/CMORPH_V1.0BETA_BLD_0.25deg-DLY_EOD_20200201.gz"), 1)
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            download_many([], backend="curl")
+
+
+def _read_size(item, path):
+    return item, Path(path).stat().st_size
+
+
+class TestRunPipeline(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = Path(tmp.name)
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.peak = 0
+        self.released = []
+
+    def _download(self, item):
+        with self.lock:
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        if item == 3:
+            with self.lock:
+                self.in_flight -= 1
+            return None
+        path = self.tmp / f"{item}.bin"
+        path.write_bytes(b"x" * item)
+        return path
+
+    def _release(self, item, path):
+        path.unlink()
+        self.released.append(item)
+        with self.lock:
+            self.in_flight -= 1
+
+    def test_stages_with_backpressure(self):
+        def slow_extract(item, path):
+            time.sleep(0.01)
+            return _read_size(item, path)
+
+        written = []
+        results = run_pipeline(
+            list(range(12)),
+            self._download,
+            slow_extract,
+            write=lambda item, result: written.append(result) or result[1],
+            release=self._release,
+            max_workers=4,
+            extract_workers=1,
+            max_pending=3,
+        )
+        self.assertEqual(results, [i if i != 3 else None for i in range(12)])
+        self.assertEqual(sorted(written), [(i, i) for i in range(12) if i != 3])
+        self.assertEqual(sorted(self.released), [i for i in range(12) if i != 3])
+        self.assertLessEqual(self.peak, 3)
+        self.assertEqual(list(self.tmp.iterdir()), [])
+
+    def test_process_executor(self):
+        results = run_pipeline(
+            [1, 2, 3, 4],
+            self._download,
+            _read_size,
+            release=self._release,
+            max_workers=2,
+            extract_workers=2,
+            extract_executor="processes",
+        )
+        self.assertEqual(results, [(1, 1), (2, 2), None, (4, 4)])
+
+    def test_unknown_executor(self):
+        with self.assertRaises(ValueError):
+            run_pipeline([1], self._download, _read_size, extract_executor="gpu")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,12 +1,32 @@
 import gzip
+import io
+import tarfile
 import tempfile
+import threading
 import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
 from unittest.mock import patch
 
+import numpy as np
 import pandas as pd
+import requests
 
-from agrometflow.climate.ghcnd import GHCNDDownloader
+from agrometflow.cache import RawCache
+from agrometflow.climate import ghcnd, ghcnd_metadata, ghcnd_mirror
+from agrometflow.climate.ghcnd import (
+    GHCNDDownloader,
+    _parse_station_csv_legacy,
+    decode_flags,
+    encode_flags,
+    iter_dly_archive,
+    parse_dly,
+    parse_station_csv,
+    read_dly,
+)
+from agrometflow.dataquality.qc import run_qc_pipeline
+from agrometflow.climate.ghcnd_metadata import GhcndMetadata
+from agrometflow.climate.ghcnd_mirror import GhcndMirror
 
 
 class _FakeResponse:
@@ -45,7 +65,7 @@ class TestGhcndDownloader(unittest.TestCase):
             downloader = GHCNDDownloader()
 
             with patch.object(GHCNDDownloader, "get_stations", return_value=stations):
-                with patch("agrometflow.climate.ghcnd.requests.get", return_value=_FakeResponse(payload)):
+                with patch("agrometflow.download.HttpClient.get", return_value=_FakeResponse(payload)):
                     downloader.download(
                         station_ids=["AGM00060360"],
                         start_date="2020-01-01",
@@ -63,11 +83,398 @@ class TestGhcndDownloader(unittest.TestCase):
             self.assertEqual(downloader.data["lon"].iloc[0], 3.25)
             self.assertEqual(downloader.data["elevation"].iloc[0], 24.0)
 
-            saved = pd.read_csv(out_dir / "ghcnd_20200101_20200102.csv")
+            saved = downloader.extract(store_dir=out_dir / "points", station_ids=["AGM00060360"])
+            self.assertEqual(saved["station"].iloc[0], "AGM00060360")
             self.assertEqual(saved["lat"].iloc[0], 36.71)
             self.assertEqual(saved["lon"].iloc[0], 3.25)
             self.assertEqual(saved["elevation"].iloc[0], 24.0)
 
 
+class TestStationCsvParser(unittest.TestCase):
+    def _payload(self, header):
+        rng = np.random.default_rng(5)
+        rows = ["ID,DATE,ELEMENT,DATA_VALUE,M_FLAG,Q_FLAG,S_FLAG,OBS_TIME"] if header else []
+        for day in pd.date_range("1899-12-25", "1901-01-10"):
+            for element in ("TMAX", "TMIN", "PRCP", "SNOW"):
+                if rng.random() < 0.2:
+                    continue
+                value = -9999 if rng.random() < 0.05 else int(rng.integers(-300, 400))
+                mflag = "T" if element == "PRCP" and value == 0 else ""
+                qflag = "I" if value > 390 else ("Q" if value == -299 else "")
+                rows.append(f"USC00000001,{day:%Y%m%d},{element},{value},{mflag},{qflag},7,0700")
+        rows.append("USC00000001,19000301,TMAX,123,,,7,")  # duplicate: first value wins
+        return gzip.compress("\n".join(rows).encode())
+
+    def test_matches_legacy_parser(self):
+        for header in (False, True):
+            payload = self._payload(header)
+            for variables, convert, flags in (
+                (["TMAX", "TMIN", "PRCP"], True, False),
+                (["PRCP", "TMAX", "EVAP"], False, True),
+            ):
+                args = (payload, "USC00000001", "1900-01-01", "1900-12-31", variables, convert)
+                fast = parse_station_csv(*args, flags=flags)
+                legacy = _parse_station_csv_legacy(*args, logger=None, flags=flags)
+                legacy["date"] = legacy["date"].astype("datetime64[ns]")
+                pd.testing.assert_frame_equal(fast, legacy.reset_index(drop=True))
+
+        self.assertEqual(list(fast.columns[-2:]), ["PRCP_flags", "TMAX_flags"])
+        self.assertEqual(fast["TMAX_flags"].dtype, np.uint8)
+        self.assertTrue((fast["TMAX_flags"][fast["TMAX"] > 390] == 3).all())
+        self.assertIsNone(parse_station_csv(payload, "USC00000001", "1950-01-01", "1950-12-31", ["TMAX"]))
+        with self.assertRaises(ValueError):
+            parse_station_csv(gzip.compress(b"STATION,DATE,TMAX\nX,20200101,1"), "X", "2020", "2021", ["TMAX"])
+
+    def test_flag_codes(self):
+        codes = encode_flags(["", "I", None, "Q", "X"], ["T", "", "B", " ", "Z"])
+        self.assertEqual(codes.dtype, np.uint8)
+        self.assertEqual(codes.tolist(), [8 << 4, 3, 1 << 4, 15, (15 << 4) | 13])
+        q, m = decode_flags(codes)
+        self.assertEqual(q.tolist(), ["", "I", "", "?", "X"])
+        self.assertEqual(m.tolist(), ["T", "", "B", "", "?"])
+
+
+
+def _dly_station(station_id, seed):
+    """The same records as a .dly file and as a per-station CSV (missing days absent)."""
+    rng = np.random.default_rng(seed)
+    lines, rows = [], []
+    for month in pd.period_range("1899-11", "1901-02", freq="M"):
+        for element in ("PRCP", "SNOW", "TMAX", "TMIN"):
+            if rng.random() < 0.1:
+                continue
+            fields = []
+            for day in range(1, 32):
+                value = int(rng.integers(-300, 400)) if day <= month.days_in_month and rng.random() > 0.1 else -9999
+                mflag = "T" if element == "PRCP" and value == 0 else " "
+                qflag = "I" if value > 390 else ("Q" if value == -299 else " ")
+                fields.append(f"{value:5d}{mflag}{qflag}7")
+                if value != -9999:
+                    rows.append(f"{station_id},{month.year}{month.month:02d}{day:02d},{element},{value},{mflag.strip()},{qflag.strip()},7,")
+            lines.append(f"{station_id}{month.year}{month.month:02d}{element}" + "".join(fields))
+    rows.sort(key=lambda row: row.split(",")[1])
+    return "\n".join(lines) + "\n", gzip.compress("\n".join(rows).encode())
+
+
+class TestDlyReader(unittest.TestCase):
+    def test_matches_csv_parser(self):
+        dly, csv = _dly_station("USC00000001", 3)
+        for start, end, variables, convert, flags in (
+            ("1900-01-15", "1900-12-31", ["TMAX", "TMIN", "PRCP"], True, False),
+            ("1899-01-01", "1901-12-31", ["PRCP", "TMAX", "EVAP"], False, True),
+        ):
+            expected = parse_station_csv(csv, "USC00000001", start, end, variables, convert, flags)
+            pd.testing.assert_frame_equal(parse_dly(dly.encode(), None, start, end, variables, convert, flags), expected)
+            # CRLF line ends take the gather path
+            crlf = dly.replace("\n", "\r\n").encode()
+            pd.testing.assert_frame_equal(parse_dly(crlf, "USC00000001", start, end, variables, convert, flags), expected)
+
+        self.assertIsNone(parse_dly(dly.encode(), "USC00000001", "1950-01-01", "1950-12-31", ["TMAX"]))
+        with self.assertRaises(ValueError):
+            parse_dly(dly[:400].encode(), "USC00000001")
+
+    def test_read_files_and_archive(self):
+        stations = pd.DataFrame(
+            {"station_id": ["USC00000001", "USC00000002"], "lat": [1.0, 2.0], "lon": [3.0, 4.0], "elevation": [5.0, 6.0]}
+        )
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            (root / "ghcnd_all").mkdir()
+            archive = io.BytesIO()
+            with tarfile.open(fileobj=archive, mode="w:gz") as tar:
+                for seed, sid in enumerate(stations["station_id"]):
+                    data = _dly_station(sid, seed)[0].encode()
+                    (root / "ghcnd_all" / f"{sid}.dly").write_bytes(data)
+                    info = tarfile.TarInfo(f"ghcnd_all/{sid}.dly")
+                    info.size = len(data)
+                    tar.addfile(info, io.BytesIO(data))
+            (root / "ghcnd_all.tar.gz").write_bytes(archive.getvalue())
+
+            args = (["TMAX", "PRCP"], "1900-01-01", "1900-12-31")
+            from_files = list(iter_dly_archive(root / "ghcnd_all", *args, flags=True, stations=stations))
+            from_tar = list(iter_dly_archive(root / "ghcnd_all.tar.gz", *args, flags=True, stations=stations))
+            self.assertEqual([df["station"].iloc[0] for df in from_tar], ["USC00000001", "USC00000002"])
+            for left, right in zip(from_files, from_tar):
+                pd.testing.assert_frame_equal(left, right)
+            self.assertEqual(from_tar[1][["lat", "lon", "elevation"]].iloc[0].tolist(), [2.0, 4.0, 6.0])
+            self.assertEqual(list(from_tar[0].columns[-5:]), ["PRCP_flags", "TMAX_flags", "lat", "lon", "elevation"])
+
+            only = list(iter_dly_archive(root / "ghcnd_all.tar.gz", *args, station_ids=["USC00000002"]))
+            self.assertEqual(len(only), 1)
+            single = read_dly(root / "ghcnd_all" / "USC00000002.dly", "1900-01-01", "1900-12-31", ["TMAX", "PRCP"])
+            pd.testing.assert_frame_equal(single, only[0])
+
+
+_STATIONS = [
+    # station_id, lat, lon, elevation, name
+    ("AGM00060360", 36.71, 3.25, 24.0, "ALGIERS"),
+    ("UV000065503", 12.35, -1.52, 306.0, "OUAGADOUGOU"),
+    ("UV000065516", 11.17, -4.30, 460.0, "BOBO-DIOULASSO"),
+]
+
+
+def _stations_text(stations):
+    return "\n".join(
+        f"{sid:<11} {lat:8.4f} {lon:9.4f} {elev:6.1f}    {name:<30}" for sid, lat, lon, elev, name in stations
+    )
+
+
+def _inventory_text(inventory):
+    return "\n".join(
+        f"{sid:<11} {lat:8.4f} {lon:9.4f} {var:<4} {first:4d} {last:4d}" for sid, lat, lon, var, first, last in inventory
+    )
+
+
+def _rows(year):
+    rows = []
+    for i, (sid, *_) in enumerate(_STATIONS):
+        for day in pd.date_range(f"{year}-12-29", f"{year}-12-31"):
+            rows.append(f"{sid},{day:%Y%m%d},TMAX,{300 + i * 10 + day.day},,{'G' if i == 1 else ''},S,")
+            rows.append(f"{sid},{day:%Y%m%d},PRCP,{-9999 if day.day == 30 else i * 5},,,S,")
+        rows.append(f"{sid},{year}1231,SNWD,0,,,S,")
+    return rows
+
+
+class _GhcndHandler(BaseHTTPRequestHandler):
+    """Stand-in for the by_year, by_station and station files of NOAA."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.calls.append(self.path)
+        name = self.path.rsplit("/", 1)[-1]
+        etag = None
+        if name in server.files:
+            body = server.files[name].encode()
+            etag = f'"{hash(body)}"'
+            if self.headers.get("If-None-Match") == etag:
+                return self._send(304, b"", etag=etag)
+        elif self.path.startswith("/by_year/"):
+            year = int(name[:4])
+            if year not in server.years:
+                return self._send(404, b"")
+            etag = f'"{year}-{server.years[year]}"'
+            if self.headers.get("If-None-Match") == etag:
+                return self._send(304, b"", etag=etag)
+            rows = _rows(year)
+            if server.years[year] > 1:
+                rows = [r.replace(",TMAX,3", ",TMAX,4") for r in rows]
+            body = gzip.compress("\n".join(rows).encode())
+        elif self.path.startswith("/by_station/"):
+            sid = name.split(".")[0]
+            rows = [r for year in server.years for r in _rows(year) if r.startswith(sid)]
+            body = gzip.compress("\n".join(rows).encode())
+        else:
+            return self._send(404, b"")
+        self._send(200, body, etag=etag)
+
+    def _send(self, status, body, etag=None):
+        self.send_response(status)
+        if etag:
+            self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class _GhcndServerTestCase(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name)
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _GhcndHandler)
+        self.server.lock = threading.Lock()
+        self.server.calls = []
+        self.server.years = {2019: 1, 2020: 1}
+        self.server.files = {
+            "ghcnd-stations.txt": _stations_text(_STATIONS),
+            "ghcnd-inventory.txt": _inventory_text(
+                [(sid, lat, lon, var, 2019, 2020) for sid, lat, lon, _, _ in _STATIONS for var in ("TMAX", "PRCP")]
+            ),
+        }
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        base = f"http://127.0.0.1:{self.server.server_address[1]}"
+        urls = {
+            "GHCND_STATIONS_URL": f"{base}/ghcnd-stations.txt",
+            "GHCND_INVENTORY_URL": f"{base}/ghcnd-inventory.txt",
+        }
+        for target, value in (
+            (ghcnd_mirror, {"GHCND_BY_YEAR_BASE": f"{base}/by_year"}),
+            (ghcnd_metadata, urls),
+            (ghcnd, dict(urls, GHCND_CSV_BASE=f"{base}/by_station")),
+            ("agrometflow.cache", {"_cache": RawCache(root=self.root / "cache")}),
+        ):
+            patcher = patch.multiple(target, **value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+
+class TestGhcndMirror(_GhcndServerTestCase):
+    def _download(self, **kwargs):
+        downloader = GHCNDDownloader()
+        downloader.download(
+            start_date="2019-12-30",
+            end_date="2020-12-30",
+            variables=["TMAX", "PRCP"],
+            output_dir=self.root / "out",
+            max_workers=1,
+            **kwargs,
+        )
+        return downloader.data
+
+    def test_mirror_matches_by_station(self):
+        ids = ["AGM00060360", "UV000065503"]
+        mirrored = self._download(station_ids=ids, mirror_dir=self.root / "mirror")
+        by_station = self._download(station_ids=ids)
+        by_station = by_station.sort_values(["station", "date"]).reset_index(drop=True)
+        by_station["date"] = by_station["date"].astype("datetime64[ns]")
+        pd.testing.assert_frame_equal(mirrored[by_station.columns], by_station)
+        self.assertEqual(len(mirrored), 2 * 4)
+
+        extracted = GHCNDDownloader().extract(
+            mirror_dir=self.root / "mirror", station_ids=ids[:1], variables=["PRCP"],
+            start_date="2020-12-29", end_date="2020-12-31",
+        )
+        self.assertEqual(extracted["PRCP"].isna().tolist(), [False, True, False])
+
+        flagged = self._download(station_ids=ids, mirror_dir=self.root / "mirror", keep_flags=True)
+        by_station = self._download(station_ids=ids, keep_flags=True, overwrite_points_cache=True)
+        by_station["date"] = by_station["date"].astype("datetime64[ns]")
+        pd.testing.assert_frame_equal(flagged[by_station.columns], by_station)
+        self.assertEqual(flagged.groupby("station")["TMAX_flags"].max().tolist(), [0, 2])
+
+        qc_input = GHCNDDownloader().extract(
+            mirror_dir=self.root / "mirror", station_ids=ids, variables=["TMAX", "PRCP"],
+            keep_flags=True, qc_format=True,
+        )
+        self.assertEqual(list(qc_input.columns), ["station", "Year", "Month", "Day", "Tx", "Tx_flags", "rr", "rr_flags"])
+        seeded = run_qc_pipeline(qc_input, source_flags="seed")["results_by_test"]["source_qc"]
+        self.assertEqual(set(seeded["station"]), {"UV000065503"})
+        self.assertEqual(set(seeded["Var"]), {"Tx"})
+
+    def test_incremental_update_and_bbox(self):
+        mirror = GhcndMirror(self.root / "mirror")
+        self.assertEqual(mirror.update([2019, 2020, 2021]), [2019, 2020])
+        self.assertEqual(mirror.years(), [2019, 2020])
+        self.assertEqual(mirror.update([2019, 2020]), [])
+
+        self.server.years[2020] = 2
+        self.assertEqual(mirror.update([2019, 2020]), [2020])
+        self.assertEqual(mirror.read(["AGM00060360"], ["TMAX"], "2020-12-31", "2020-12-31")["value"].tolist(), [431])
+
+        bbox = (-6.0, 10.0, 0.0, 15.0)
+        data = self._download(bbox=bbox, mirror_dir=self.root / "mirror")
+        self.assertEqual(sorted(data["station"].unique()), ["UV000065503", "UV000065516"])
+        self.assertEqual(data["lat"].iloc[0], 12.35)
+        index = mirror.index()
+        self.assertEqual(
+            index[(index["station"] == "UV000065503") & (index["element"] == "SNWD")]["year"].tolist(), [2019, 2020]
+        )
+
+        # min_years has the same meaning with and without the mirror.
+        meta = GhcndMetadata(self.root / "meta")
+        for min_years in (1, 2):
+            expected = meta.find_stations(["TMAX"], 2019, 2020, bbox=bbox, min_years=min_years)
+            self.assertEqual(mirror.find_stations(["TMAX"], 2019, 2020, bbox=bbox, min_years=min_years), expected)
+        self.assertEqual(mirror.find_stations(["TMAX"], 2019, 2020, min_years=2), [])
+
+
+    def test_failed_years_are_skipped_and_recorded_state_is_kept(self):
+        mirror = GhcndMirror(self.root / "mirror")
+        fetch = ghcnd_mirror._fetch_if_changed
+
+        def flaky(url, *args, **kwargs):
+            if url.endswith("/2020.csv.gz"):
+                raise requests.ConnectionError("connection reset")
+            return fetch(url, *args, **kwargs)
+
+        with patch.object(ghcnd_mirror, "_fetch_if_changed", side_effect=flaky):
+            self.assertEqual(mirror.update([2019, 2020]), [2019])
+        self.assertEqual(sorted(mirror.manifest()["years"]), ["2019"])
+        self.assertEqual(sorted(mirror.index()["year"].unique()), [2019])
+        self.assertEqual(list(mirror.root.glob(".ingest-*")), [])
+        self.assertEqual(mirror.update([2019, 2020]), [2020])
+
+        # An error while ingesting still records the years ingested before it.
+        other = GhcndMirror(self.root / "other")
+        ingest = other.ingest_file
+
+        def failing(year, path):
+            if year == 2020:
+                raise ValueError("bad file")
+            return ingest(year, path)
+
+        with patch.object(other, "ingest_file", side_effect=failing):
+            with self.assertRaises(ValueError):
+                other.update([2019, 2020], max_workers=2)
+        self.assertEqual(sorted(other.manifest()["years"]), ["2019"])
+        self.assertEqual(sorted(other.index()["year"].unique()), [2019])
+        self.assertEqual(list(other.root.glob(".ingest-*")), [])
+
+
+class TestGhcndMetadata(_GhcndServerTestCase):
+    def test_cached_tables_are_revalidated_after_ttl(self):
+        root = self.root / "meta"
+        stations = GhcndMetadata(root).stations()
+        self.assertEqual(sorted(stations["station_id"]), sorted(s[0] for s in _STATIONS))
+        self.assertEqual(self.server.calls, ["/ghcnd-stations.txt"])
+        built = (root / "stations.parquet").stat().st_mtime_ns
+
+        # Another instance (or process) within the TTL reads the table from disk.
+        pd.testing.assert_frame_equal(GhcndMetadata(root).stations(), stations)
+        self.assertEqual(len(self.server.calls), 1)
+
+        # After the TTL the file is revalidated (304) and the table kept.
+        GhcndMetadata(root, ttl=0).stations()
+        self.assertEqual(len(self.server.calls), 2)
+        self.assertEqual((root / "stations.parquet").stat().st_mtime_ns, built)
+
+        self.server.files["ghcnd-stations.txt"] = _stations_text(_STATIONS[:2])
+        self.assertEqual(len(GhcndMetadata(root, ttl=0).stations()), 2)
+
+    def test_index_queries_match_table_scan(self):
+        rng = np.random.default_rng(3)
+        stations = [
+            (f"XX{i:09d}", round(rng.uniform(-60, 70), 4), round(rng.uniform(-180, 180), 4), 10.0, f"S{i}")
+            for i in range(400)
+        ]
+        inventory = []
+        for sid, lat, lon, _, _ in stations:
+            for var in rng.choice(["TMAX", "TMIN", "PRCP", "SNOW"], size=2, replace=False):
+                first = int(rng.integers(1900, 2020))
+                inventory.append((sid, lat, lon, str(var), first, int(rng.integers(first, 2025))))
+        self.server.files["ghcnd-stations.txt"] = _stations_text(stations)
+        self.server.files["ghcnd-inventory.txt"] = _inventory_text(inventory)
+        meta = GhcndMetadata(self.root / "meta")
+        inv = pd.DataFrame(inventory, columns=["station_id", "lat", "lon", "variable", "firstyear", "lastyear"])
+
+        for bbox, variables, start, end, min_years in (
+            ((-20.0, -10.0, 40.0, 30.5), ["TMAX", "PRCP"], 1990, 2000, 0),
+            ((-180.0, -90.0, 180.0, 90.0), ["SNOW"], 1950, 2020, 20),
+            ((10.3, 5.2, 10.9, 5.4), ["TMAX"], 1900, 2025, 0),
+        ):
+            min_lon, min_lat, max_lon, max_lat = bbox
+            sub = inv[
+                inv["variable"].isin(variables)
+                & (inv["lat"] >= min_lat) & (inv["lat"] <= max_lat)
+                & (inv["lon"] >= min_lon) & (inv["lon"] <= max_lon)
+                & (inv["firstyear"] <= end) & (inv["lastyear"] >= start)
+            ]
+            overlap = sub["lastyear"].clip(upper=end) - sub["firstyear"].clip(lower=start)
+            expected = sorted(set(sub[overlap >= min_years]["station_id"]))
+            self.assertEqual(meta.find_stations(variables, start, end, bbox=bbox, min_years=min_years), expected)
+
+            inside = {s[0] for s in stations if min_lat <= s[1] <= max_lat and min_lon <= s[2] <= max_lon}
+            self.assertEqual(set(meta.in_bbox(bbox)["station_id"]), inside)
+        self.assertGreater(len(meta.find_stations(["TMAX", "PRCP"], 1990, 2000, bbox=(-20.0, -10.0, 40.0, 30.5))), 0)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,129 @@
+import importlib.util
+import logging
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+from agrometflow.cube import CubeStore
+from agrometflow.climate import lsasaf
+from agrometflow.climate.lsasaf import YearlyMerger, _group_from_key, _group_key, download_bbox_stream, merge_yearly
+
+
+def _daily_file(path, day, values=None, scale_factor=0.001):
+    lat = np.linspace(10.0, 0.0, 6)
+    lon = np.linspace(-5.0, 5.0, 8)
+    if values is None:
+        rng = np.random.default_rng(day.dayofyear)
+        values = rng.random((1, lat.size, lon.size)) * 10
+        values[0, 0, 0] = np.nan
+    ds = xr.Dataset(
+        {"ET": (("time", "lat", "lon"), np.broadcast_to(values, (1, lat.size, lon.size)), {"units": "mm/day"})},
+        coords={"time": [day], "lat": lat, "lon": lon},
+    )
+    ds.to_netcdf(
+        path,
+        encoding={"ET": {"dtype": "int16", "scale_factor": scale_factor, "_FillValue": -1}},
+    )
+
+
+class TestYearlyMerge(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name)
+        self.days = pd.date_range("2020-02-27", "2020-03-03", freq="D")
+        self.group = _group_key(
+            {
+                "product": "mdmetv3",
+                "year": 2020,
+                "source_var": "ET",
+                "target_var": "ETP",
+                "final_nc": self.root / "ETP" / "lsasaf_mdmetv3_ETP_2020.nc",
+            }
+        )
+        self.tmp_dir = self.root / "ETP" / "tmp" / "2020"
+        self.tmp_dir.mkdir(parents=True)
+        self.files = []
+        for day in self.days:
+            path = self.tmp_dir / f"{day:%Y%m%d}.nc"
+            _daily_file(path, day)
+            self.files.append(path)
+        self.expected = xr.concat(
+            [xr.open_dataset(f).load() for f in self.files], dim="time"
+        ).rename({"ET": "ETP"})
+        self.logger = logging.getLogger("test_lsasaf")
+
+    def _result(self):
+        with xr.open_dataset(self.root / "ETP" / "lsasaf_mdmetv3_ETP_2020.nc") as ds:
+            return ds.load()
+
+    def test_merge_yearly_matches_concat(self):
+        merge_yearly(self.group, list(reversed(self.files)), bbox=None, logger=self.logger)
+        result = self._result()
+        xr.testing.assert_allclose(result["ETP"], self.expected["ETP"])
+        self.assertEqual(result["ETP"].encoding["dtype"], np.dtype("int16"))
+        self.assertEqual(result["ETP"].attrs["units"], "mm/day")
+        self.assertFalse(self.tmp_dir.exists())
+
+    def test_days_are_written_in_order_as_they_arrive(self):
+        merger = YearlyMerger(self.group, list(self.days), bbox=[-2.0, 2.0, 2.0, 8.0], logger=self.logger)
+        merger.add(self.days[2], self.files[2])
+        merger.add(self.days[0], self.files[0])
+        # Day 2 waits for day 1; day 0 is written and removed at once.
+        self.assertFalse(self.files[0].exists())
+        self.assertTrue(self.files[2].exists())
+        merger.add(self.days[1], None)
+        self.assertFalse(self.files[2].exists())
+        merger.add(self.days[4], self.files[4])
+        merger.close()
+
+        expected = self.expected.isel(time=[0, 2, 4]).sel(lon=slice(-2, 2), lat=slice(8, 2))
+        xr.testing.assert_allclose(self._result()["ETP"], expected["ETP"])
+
+    def test_days_are_written_with_the_encoding_on_disk(self):
+        _daily_file(self.files[0], self.days[0], values=1.5, scale_factor=0.01)
+        _daily_file(self.files[1], self.days[1], values=1.5, scale_factor=0.1)
+        merge_yearly(self.group, self.files[:2], bbox=None, logger=self.logger)
+        result = self._result()
+        np.testing.assert_allclose(result["ETP"].values, 1.5)
+        self.assertEqual(result["ETP"].encoding["scale_factor"], 0.01)
+
+    def test_bbox_stream_writes_days_through_the_merger(self):
+        group = _group_from_key(self.group)
+        requests = [{"group": group, "path": path, "url": f"https://example.test/{path.name}"} for path in self.files]
+        missing = self.files[1]
+        written = []
+        add = YearlyMerger.add
+
+        def record(merger, date, item):
+            written.append((date, type(item).__name__))
+            add(merger, date, item)
+
+        with patch.object(lsasaf, "_cached_request", lambda request, *args: None if request["path"] == missing else request["path"]), \
+                patch.object(lsasaf, "_release_cached", lambda *args: None), \
+                patch.object(lsasaf.get_cache(), "release", lambda *args: None), \
+                patch.object(YearlyMerger, "add", record):
+            download_bbox_stream(requests, None, 10, [-2.0, 2.0, 2.0, 8.0], self.logger, max_workers=1)
+
+        self.assertEqual(written[1], (self.days[1], "NoneType"))
+        self.assertEqual({kind for _, kind in written if _ != self.days[1]}, {"Dataset"})
+        keep = [i for i in range(len(self.days)) if i != 1]
+        expected = self.expected.isel(time=keep).sel(lon=slice(-2, 2), lat=slice(8, 2))
+        xr.testing.assert_allclose(self._result()["ETP"], expected["ETP"])
+
+    @unittest.skipUnless(importlib.util.find_spec("zarr"), "zarr is not installed")
+    def test_merge_into_cube(self):
+        cube = CubeStore(self.root / "cube")
+        merge_yearly(self.group, self.files, bbox=None, logger=self.logger, cube=cube)
+        with cube.open("lsasaf_mdmetv3", "ETP") as ds:
+            xr.testing.assert_allclose(ds["ETP"].load(), self.expected["ETP"])
+        self.assertEqual([p for p in (self.root / "ETP").rglob("*") if p.is_file()], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,18 @@
+import json
+import tempfile
+import threading
 import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
 from unittest.mock import patch, MagicMock
-from agrometflow.climate.power import PowerDownloader
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import xarray as xr
+
+from agrometflow.climate import power
+from agrometflow.climate.power import PowerDownloader, parameters_to_frame, plan_point_requests
+from agrometflow.store import PointStore, point_ids
 import pandas as pd
 
 class TestPowerDownloader(unittest.TestCase):
@@ -45,5 +57,164 @@ class TestPowerDownloader(unittest.TestCase):
         self.assertTrue((df["lat"] == 12.34).all())
         self.assertTrue((df["lon"] == -1.23).all())
 
+class TestPowerJson(unittest.TestCase):
+    def test_parameters_to_frame(self):
+        df = parameters_to_frame(
+            {
+                "T2M": {"20220101": 25.5, "20220102": -999.0, "20220103": 26.0},
+                "PRECTOTCORR": {"20220101": 5.1, "20220103": 0.0},
+            }
+        )
+        self.assertEqual(list(df.columns), ["Date", "T2M", "PRECTOTCORR"])
+        self.assertEqual(list(df["Date"]), list(pd.date_range("2022-01-01", periods=3)))
+        self.assertEqual(df["T2M"].dtype, np.float32)
+        np.testing.assert_array_equal(df["T2M"], np.array([25.5, np.nan, 26.0], dtype=np.float32))
+        np.testing.assert_array_equal(df["PRECTOTCORR"], np.array([5.1, np.nan, 0.0], dtype=np.float32))
+
+    def test_json_fast_path_matches_stdlib(self):
+        body = json.dumps({"properties": {"parameter": {"T2M": {"20220101": 1.5, "20220102": -999}}}}).encode()
+        fast = parameters_to_frame(power.loads_json(body)["properties"]["parameter"])
+        with patch.object(power, "orjson", None):
+            slow = parameters_to_frame(power.loads_json(body)["properties"]["parameter"])
+        pd.testing.assert_frame_equal(fast, slow)
+
+
+_LAT = np.arange(-90.0, 90.01, 0.5)
+_LON = np.arange(-180.0, 179.99, 0.625)
+
+
+def _grid_value(param, day, ilat, ilon):
+    return round((len(param) * 1000 + day.dayofyear * 10 + ilat * 0.01 + ilon * 0.0001), 4)
+
+
+class _PowerHandler(BaseHTTPRequestHandler):
+    """Stand-in for the daily point and regional endpoints of POWER on a 0.5 x 0.625 degree grid."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        days = pd.date_range(query["start"], query["end"], freq="D")
+        with self.server.lock:
+            self.server.calls.append(url.path.rsplit("/", 1)[-1])
+        if self.server.fail is not None and self.server.fail(url.path, query):
+            self.send_error(404)
+            return
+        if url.path.endswith("/point"):
+            ilat = int(np.abs(_LAT - float(query["latitude"])).argmin())
+            ilon = int(np.abs(_LON - float(query["longitude"])).argmin())
+            parameter = {
+                param: {f"{day:%Y%m%d}": _grid_value(param, day, ilat, ilon) for day in days}
+                for param in query["parameters"].split(",")
+            }
+            body = json.dumps({"properties": {"parameter": parameter}}).encode()
+            content_type = "application/json"
+        else:
+            param = query["parameters"]
+            lat = np.flatnonzero((_LAT >= float(query["latitude-min"])) & (_LAT <= float(query["latitude-max"])))
+            lon = np.flatnonzero((_LON >= float(query["longitude-min"])) & (_LON <= float(query["longitude-max"])))
+            values = np.array([[[_grid_value(param, day, i, j) for j in lon] for i in lat] for day in days])
+            ds = xr.Dataset(
+                {param: (("time", "lat", "lon"), values)},
+                coords={"time": days, "lat": _LAT[lat], "lon": _LON[lon]},
+            )
+            with tempfile.NamedTemporaryFile(suffix=".nc") as f:
+                ds.to_netcdf(f.name, engine="h5netcdf")
+                body = Path(f.name).read_bytes()
+            content_type = "application/x-netcdf"
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class TestPowerTiling(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name)
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _PowerHandler)
+        self.server.lock = threading.Lock()
+        self.server.calls = []
+        self.server.fail = None
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        base = f"http://127.0.0.1:{self.server.server_address[1]}/api/temporal/daily"
+        for name, url in (("BASE_URL_POINT", f"{base}/point"), ("BASE_URL_REGIONAL", f"{base}/regional")):
+            patcher = patch.object(PowerDownloader, name, url)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        rng = np.random.default_rng(1)
+        self.dense = [(round(12 + rng.random() * 3, 3), round(1 + rng.random() * 3, 3)) for _ in range(6)]
+        self.points = self.dense + [(-30.2, 25.7)]
+
+    def _download(self, out, **kwargs):
+        downloader = PowerDownloader()
+        downloader.download(
+            start_date="2021-12-30",
+            end_date="2022-01-03",
+            variables=[("T2M", "TMEAN"), ("PRECTOTCORR", "PR")],
+            output_dir=self.root / out,
+            points=self.points,
+            max_rate=None,
+            **kwargs,
+        )
+        return downloader.data
+
+    def test_plan(self):
+        tiles, singles = plan_point_requests(self.points, 2, "2021-12-30", "2022-01-03", window_days=3)
+        self.assertEqual(singles, [(-30.2, 25.7)])
+        self.assertEqual(len(tiles), 1)
+        self.assertEqual(sorted(tiles[0]["points"]), sorted(self.dense))
+        lon_min, lat_min, lon_max, lat_max = tiles[0]["bbox"]
+        self.assertTrue(2.0 <= lon_max - lon_min <= 10.0 and 2.0 <= lat_max - lat_min <= 10.0)
+
+        tiles, singles = plan_point_requests(self.points, 6, "2021-12-30", "2022-01-03")
+        self.assertEqual((tiles, len(singles)), ([], 7))
+        with self.assertRaises(ValueError):
+            plan_point_requests(self.points, 1, "2022-01-01", "2022-01-02", tile_size=12)
+
+    def test_tiles_match_point_requests(self):
+        tiled = self._download("tiled", window_days=3, max_workers=3)
+        self.assertEqual(self.server.calls.count("point"), 1)
+        self.assertEqual(self.server.calls.count("regional"), 2 * 2)
+
+        self.server.calls.clear()
+        single = self._download("single", tiling=False, max_workers=3)
+        self.assertEqual(self.server.calls, ["point"] * 7)
+        pd.testing.assert_frame_equal(tiled, single)
+        self.assertFalse(any((self.root / "tiled" / ".power_tiles").iterdir()))
+
+    def test_failed_window_is_not_stored(self):
+        # The second window of the tile fails for PRECTOTCORR only.
+        self.server.fail = lambda path, query: (
+            path.endswith("/regional") and query["parameters"] == "PRECTOTCORR" and query["start"] == "20220102"
+        )
+        partial = self._download("out", window_days=3)
+        dense = partial[partial["lat"] > 0]
+        self.assertTrue(dense.loc[dense["Date"] >= "2022-01-02", "PR"].isna().all())
+
+        store = PointStore(self.root / "out" / "points")
+        dense_ids = point_ids((lon, lat) for lat, lon in self.dense)
+        single_id = point_ids([(25.7, -30.2)])
+        args = ("2021-12-30", "2022-01-03")
+        self.assertTrue(store.covers("power", ["TMEAN"], dense_ids, *args))
+        self.assertTrue(store.covers("power", ["TMEAN", "PR"], single_id, *args))
+        self.assertFalse(store.covers("power", ["PR"], dense_ids, *args))
+
+        self.server.fail = None
+        self.server.calls.clear()
+        full = self._download("out", window_days=3)
+        self.assertIn("regional", self.server.calls)
+        self.assertTrue(store.covers("power", ["TMEAN", "PR"], dense_ids + single_id, *args))
+        self.assertFalse(full["PR"].isna().any())
+
+
 if __name__ == "__main__":
     unittest.main()
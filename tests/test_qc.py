@@ -1,13 +1,21 @@
 import tempfile
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from unittest.mock import patch
 
 import numpy as np
 import pandas as pd
 
+from agrometflow.dataquality.climatology import group_quartiles
+from agrometflow.dataquality.engine import run_daily_sharded, run_daily_tests
 from agrometflow.dataquality.qc import (
+    FlagStore,
     check_units,
     climatic_outliers,
+    daily_repetition,
+    duplicate_dates,
+    run_qc_pipeline,
     run_qc_pipeline_from_config,
     wmo_gross_errors,
     wmo_time_consistency,
@@ -173,6 +181,319 @@ class TestQcPipelineFromConfig(unittest.TestCase):
         self.assertEqual(set(out["Month"]), {1, 2})
 
 
+def _two_station_daily():
+    dates = pd.date_range("2014-01-01", "2019-12-31", freq="D")
+    rng = np.random.default_rng(7)
+    frames = []
+    for sid in ("B", "A"):
+        n = len(dates)
+        tx = (30 + rng.normal(0, 2, n)).round(1)
+        tx[[50, 400, 1200]] += 25
+        tx[200:206] = 33.0
+        frames.append(
+            pd.DataFrame(
+                {
+                    "station": sid,
+                    "Year": dates.year,
+                    "Month": dates.month,
+                    "Day": dates.day,
+                    "Tx": tx,
+                    "Tn": (tx - 10 + rng.normal(0, 1, n)).round(1),
+                    "rr": np.where(rng.random(n) < 0.7, 0.0, rng.gamma(0.8, 8, n)).round(1),
+                }
+            )
+        )
+    df = pd.concat(frames, ignore_index=True)
+    # Duplicate one day and drop another to exercise duplicates and gaps.
+    df = pd.concat([df, df.iloc[[10]]], ignore_index=True).drop(index=30).reset_index(drop=True)
+    return df
+
+
+class TestColumnarEngine(unittest.TestCase):
+    def test_columnar_matches_legacy_multi_station(self):
+        df = _two_station_daily()
+        with tempfile.TemporaryDirectory() as tmp:
+            legacy_dir = Path(tmp) / "legacy"
+            columnar_dir = Path(tmp) / "columnar"
+            kwargs = dict(station_col="station", variable_cols=["Tx", "Tn", "rr"])
+            legacy = run_qc_pipeline(df, outpath=legacy_dir, engine="legacy", **kwargs)
+            columnar = run_qc_pipeline(df, outpath=columnar_dir, engine="columnar", **kwargs)
+
+            self.assertFalse(columnar["all_flags"].empty)
+            self.assertEqual(list(legacy["results_by_test"]), list(columnar["results_by_test"]))
+            for name, frame in legacy["results_by_test"].items():
+                pd.testing.assert_frame_equal(frame, columnar["results_by_test"][name])
+            pd.testing.assert_frame_equal(legacy["all_flags"], columnar["all_flags"])
+            pd.testing.assert_frame_equal(legacy["summary"], columnar["summary"])
+
+            legacy_files = sorted(p.name for p in legacy_dir.iterdir())
+            self.assertEqual(legacy_files, sorted(p.name for p in columnar_dir.iterdir()))
+            for name in legacy_files:
+                self.assertEqual((legacy_dir / name).read_bytes(), (columnar_dir / name).read_bytes())
+
+    def test_columnar_matches_legacy_single_station(self):
+        df = _two_station_daily()
+        df = df[df["station"] == "A"].drop(columns="station").reset_index(drop=True)
+        legacy = run_qc_pipeline(df, station_id="A", variable_cols=["Tx", "rr"], engine="legacy")
+        columnar = run_qc_pipeline(df, station_id="A", variable_cols=["Tx", "rr"], engine="columnar")
+
+        pd.testing.assert_frame_equal(legacy["all_flags"], columnar["all_flags"])
+
+    def test_workers_match_single_process(self):
+        df = _two_station_daily()
+        with tempfile.TemporaryDirectory() as tmp:
+            single_dir = Path(tmp) / "single"
+            sharded_dir = Path(tmp) / "sharded"
+            kwargs = dict(station_col="station", variable_cols=["Tx", "Tn", "rr"])
+            single = run_qc_pipeline(df, outpath=single_dir, **kwargs)
+            sharded = run_qc_pipeline(df, outpath=sharded_dir, workers=2, **kwargs)
+
+            pd.testing.assert_frame_equal(single["all_flags"], sharded["all_flags"])
+            pd.testing.assert_frame_equal(single["summary"], sharded["summary"])
+            for path in single_dir.iterdir():
+                self.assertEqual(path.read_bytes(), (sharded_dir / path.name).read_bytes())
+
+    def test_executor_shards_match_single_process(self):
+        df = _two_station_daily()
+        kwargs = dict(station_col="station", variable_cols=["Tx", "Tn", "rr"])
+        single = run_qc_pipeline(df, **kwargs)
+        with ThreadPoolExecutor(2) as executor:
+            sharded = run_qc_pipeline(df, executor=executor, **kwargs)
+        pd.testing.assert_frame_equal(single["all_flags"], sharded["all_flags"])
+
+        variables = ["Tx", "rr"]
+        daily_kwargs = dict(station_col="station", station_id="station", year_col="Year", month_col="Month", day_col="Day")
+        expected = run_daily_tests(df, variables, **daily_kwargs)
+        with ThreadPoolExecutor(2) as executor:
+            for n_shards in (1, 2, 5):
+                got = run_daily_sharded(df, variables, executor=executor, n_shards=n_shards, **daily_kwargs)
+                self.assertEqual([name for name, _ in got], [name for name, _ in expected])
+                for (_, out), (_, ref) in zip(got, expected):
+                    pd.testing.assert_frame_equal(out, ref)
+
+    def test_unknown_engine_raises(self):
+        df = _two_station_daily()
+        with self.assertRaises(ValueError):
+            run_qc_pipeline(df, station_col="station", variable_cols=["Tx"], engine="fast")
+
+
+class TestSourceFlags(unittest.TestCase):
+    def _flagged(self):
+        df = _two_station_daily()
+        df["Tx_flags"] = np.uint8(0)
+        spikes = df.index[(df["Tx"] > 50).to_numpy()]
+        df.loc[spikes, "Tx_flags"] = np.uint8(3)
+        df.loc[spikes[:1], "Tx_flags"] = np.uint8(3 | 8 << 4)
+        return df, spikes
+
+    def test_seed_and_skip(self):
+        df, spikes = self._flagged()
+        plain = run_qc_pipeline(df.drop(columns="Tx_flags"), station_col="station")
+        ignored = run_qc_pipeline(df, station_col="station")
+        pd.testing.assert_frame_equal(plain["all_flags"], ignored["all_flags"])
+
+        seeded = run_qc_pipeline(df, station_col="station", source_flags="seed")
+        source = seeded["results_by_test"]["source_qc"]
+        self.assertEqual(len(source), len(spikes))
+        self.assertEqual(list(source.columns), ["station", "Var", "Year", "Month", "Day", "Value", "Test"])
+        self.assertEqual(list(seeded["results_by_test"])[0], "source_qc")
+        for name, frame in plain["results_by_test"].items():
+            pd.testing.assert_frame_equal(frame, seeded["results_by_test"][name])
+
+        skipped = run_qc_pipeline(df, station_col="station", source_flags="skip")
+        pd.testing.assert_frame_equal(skipped["results_by_test"]["source_qc"], source)
+        out_of_range = plain["results_by_test"]["daily_out_of_range"]
+        self.assertEqual(len(out_of_range[out_of_range["Var"] == "Tx"]), len(spikes))
+        tested = skipped["all_flags"][skipped["all_flags"]["Test"] != "source_qc"]
+        keys = ["station", "Year", "Month", "Day"]
+        spike_days = df.loc[spikes, keys]
+        self.assertTrue(tested[tested["Var"] == "Tx"].merge(spike_days, on=keys).empty)
+
+    def test_seeded_values_use_converted_units(self):
+        df, spikes = self._flagged()
+        df["Tx"] = df["Tx"] + 273.15
+        with tempfile.TemporaryDirectory() as tmp:
+            with patch("agrometflow.dataquality.qc.FlagStore.add", autospec=True, side_effect=FlagStore.add) as add:
+                seeded = run_qc_pipeline(
+                    df, station_col="station", units_map={"Tx": "K"}, outpath=tmp, source_flags="seed"
+                )
+            source = seeded["results_by_test"]["source_qc"]
+            expected = df.loc[spikes, "Tx"].to_numpy() - 273.15
+            np.testing.assert_allclose(source["Value"].to_numpy(), expected)
+            self.assertTrue(any(call.args[2]["Test"].eq("source_qc").all() for call in add.call_args_list))
+
+            flags = pd.read_csv(Path(tmp) / "qc_A_Tx_daily.txt", sep="\t")
+            self.assertFalse(flags.duplicated(["Year", "Month", "Day"]).any())
+            spiked = flags[flags["Test"].str.contains("source_qc")]
+            self.assertTrue(spiked["Test"].str.contains("daily_out_of_range").all())
+
+    def test_invalid_mode(self):
+        df, _ = self._flagged()
+        with self.assertRaises(ValueError):
+            run_qc_pipeline(df, station_col="station", source_flags="drop")
+
+
+class TestStreamingQc(unittest.TestCase):
+    def test_chunked_csv_matches_in_memory_run(self):
+        df = _two_station_daily().sort_values("station", kind="stable")
+        with tempfile.TemporaryDirectory() as tmp:
+            data_csv = Path(tmp) / "stations.csv"
+            df.to_csv(data_csv, index=False)
+            full_dir = Path(tmp) / "full"
+            chunked_dir = Path(tmp) / "chunked"
+            kwargs = dict(station_col="station", variable_cols=["Tx", "rr"])
+            full = run_qc_pipeline(data_csv, outpath=full_dir, **kwargs)
+            chunked = run_qc_pipeline(data_csv, chunksize=500, **kwargs)
+            written = run_qc_pipeline(data_csv, outpath=chunked_dir, chunksize=500, **kwargs)
+
+            self.assertEqual(list(full["results_by_test"]), list(chunked["results_by_test"]))
+            for name, frame in full["results_by_test"].items():
+                pd.testing.assert_frame_equal(frame, chunked["results_by_test"][name])
+            pd.testing.assert_frame_equal(full["summary"], chunked["summary"])
+
+            # With outpath, flags go to the files and only their counts are kept.
+            self.assertEqual(written["results_by_test"], {})
+            self.assertTrue(written["all_flags"].empty)
+            pd.testing.assert_frame_equal(full["summary"], written["summary"])
+            for path in full_dir.iterdir():
+                self.assertEqual(path.read_bytes(), (chunked_dir / path.name).read_bytes())
+
+    def test_non_contiguous_stations_raise(self):
+        df = _two_station_daily()
+        df = pd.concat([df.iloc[:10], df[df["station"] == "A"].iloc[:10], df.iloc[10:20]])
+        with tempfile.TemporaryDirectory() as tmp:
+            data_csv = Path(tmp) / "stations.csv"
+            df.to_csv(data_csv, index=False)
+            with self.assertRaises(ValueError):
+                run_qc_pipeline(data_csv, station_col="station", variable_cols=["Tx"], chunksize=7)
+
+
+class TestClimatology(unittest.TestCase):
+    def test_group_quartiles_match_pandas(self):
+        rng = np.random.default_rng(3)
+        codes = rng.integers(0, 7, 500)
+        values = rng.normal(10, 3, 500).round(1)
+        q1, q3 = group_quartiles(codes, values, 8)
+
+        expected = pd.Series(values).groupby(codes).quantile([0.25, 0.75]).unstack()
+        np.testing.assert_array_equal(q1[:7], expected[0.25].to_numpy())
+        np.testing.assert_array_equal(q3[:7], expected[0.75].to_numpy())
+        self.assertTrue(np.isnan(q1[7]))
+
+    def test_cache_is_reused_and_updated_after_append(self):
+        df = _two_station_daily()
+        last_month = (df["Year"] == 2019) & (df["Month"] == 12)
+        kwargs = dict(station_col="station", variable_cols=["Tx"])
+        with tempfile.TemporaryDirectory() as tmp:
+            params = {"cache_dir": tmp}
+            first = run_qc_pipeline(df[~last_month], climatic_outliers_params=params, **kwargs)
+            cache_file = Path(tmp) / "climatology_A_Tx.npz"
+            self.assertTrue(cache_file.exists())
+            mtime = cache_file.stat().st_mtime_ns
+
+            again = run_qc_pipeline(df[~last_month], climatic_outliers_params=params, **kwargs)
+            self.assertEqual(cache_file.stat().st_mtime_ns, mtime)
+            pd.testing.assert_frame_equal(first["all_flags"], again["all_flags"])
+
+            for engine in ("columnar", "legacy"):
+                appended = run_qc_pipeline(df, climatic_outliers_params=params, engine=engine, **kwargs)
+                uncached = run_qc_pipeline(df, engine=engine, **kwargs)
+                pd.testing.assert_frame_equal(uncached["all_flags"], appended["all_flags"])
+
+
+def _flag_set(result):
+    flags = result["all_flags"]
+    return set(flags.astype(str).itertuples(index=False, name=None)) if len(flags) else set()
+
+
+class TestIncrementalQc(unittest.TestCase):
+    def test_increments_add_up_to_full_run(self):
+        df = _two_station_daily()
+        station_a = df["station"] == "A"
+        # A run of three equal values that the first appended days extend to
+        # five, and a jump across the first boundary.
+        tail = station_a & (df["Year"] == 2019) & (df["Month"] == 10) & (df["Day"] >= 29)
+        head = station_a & (df["Year"] == 2019) & (df["Month"] == 11) & (df["Day"] <= 2)
+        df.loc[tail | head, "Tx"] = 31.5
+        jump = (df["station"] == "B") & (df["Year"] == 2019) & (df["Month"] == 11) & (df["Day"] == 1)
+        df.loc[jump, "Tx"] += 20
+        date = df["Year"] * 10000 + df["Month"] * 100 + df["Day"]
+        kwargs = dict(station_col="station", variable_cols=["Tx", "Tn", "rr"])
+
+        with tempfile.TemporaryDirectory() as tmp:
+            seen = set()
+            for cutoff in (20191101, 20191201, 20200101):
+                record = df[date < cutoff].sort_values("station", kind="stable")
+                result = run_qc_pipeline(record, checkpoint_dir=tmp, **kwargs)
+                added = _flag_set(result)
+                full = _flag_set(run_qc_pipeline(record, **kwargs))
+                self.assertTrue(added <= full)
+                # Climatic flags of the re-tested months replace the earlier ones.
+                retested = set(result["retested"].astype(str).itertuples(index=False, name=None))
+                seen = {
+                    row for row in seen
+                    if row[-1] != "climatic_outliers" or (row[0], row[1], row[3]) not in retested
+                }
+                seen |= added
+                self.assertEqual(seen, full)
+                if cutoff == 20191201:
+                    tests = set(result["all_flags"]["Test"])
+                    self.assertIn("daily_repetition", tests)
+                    self.assertIn("temporal_coherence", tests)
+
+            again = run_qc_pipeline(record, checkpoint_dir=tmp, **kwargs)
+            self.assertTrue(again["all_flags"].empty)
+
+    def test_rewritten_history_is_tested_in_full(self):
+        df = _two_station_daily()
+        kwargs = dict(station_col="station", variable_cols=["Tx", "rr"])
+        with tempfile.TemporaryDirectory() as tmp:
+            run_qc_pipeline(df.iloc[:-20], checkpoint_dir=tmp, **kwargs)
+            shuffled = df.sample(frac=1, random_state=0)
+            result = run_qc_pipeline(shuffled, checkpoint_dir=tmp, **kwargs)
+            self.assertEqual(_flag_set(result), _flag_set(run_qc_pipeline(shuffled, **kwargs)))
+
+
+class TestFlagStore(unittest.TestCase):
+    def _write_flags(self, outpath):
+        df = _two_station_daily()
+        for var in ("Tx", "rr"):
+            for func in (climatic_outliers, daily_repetition, duplicate_dates):
+                func(df, var_name=var, station_col="station", outpath=outpath)
+
+    def test_store_matches_direct_writes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            direct = Path(tmp) / "direct"
+            stored = Path(tmp) / "stored"
+            batched = Path(tmp) / "batched"
+            self._write_flags(direct)
+            with FlagStore():
+                self._write_flags(stored)
+                self.assertFalse(stored.exists())
+            with FlagStore(max_rows=5):
+                self._write_flags(batched)
+
+            names = sorted(p.name for p in direct.iterdir())
+            self.assertTrue(names)
+            for folder in (stored, batched):
+                self.assertEqual(names, sorted(p.name for p in folder.iterdir()))
+                for name in names:
+                    self.assertEqual((direct / name).read_bytes(), (folder / name).read_bytes())
+
+    def test_store_merges_into_existing_files(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            direct = Path(tmp) / "direct"
+            stored = Path(tmp) / "stored"
+            self._write_flags(direct)
+            self._write_flags(direct)
+            self._write_flags(stored)
+            with FlagStore():
+                self._write_flags(stored)
+
+            for path in direct.iterdir():
+                self.assertEqual(path.read_bytes(), (stored / path.name).read_bytes())
+
+
 class TestWmoGrossErrors(unittest.TestCase):
     def test_check_units_converts_pressure_to_hpa(self):
         values = pd.Series([101325.0, 760.0, 30.0])
@@ -0,0 +1,109 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from agrometflow.store import PointStore, point_id
+
+
+def _frame(start, periods, offset=0.0):
+    time = pd.date_range(start, periods=periods, freq="D")
+    return pd.DataFrame(
+        {
+            "time": np.repeat(time, 2),
+            "lon": np.tile([1.0, 2.5], periods),
+            "lat": np.tile([3.0, -4.25], periods),
+            "precip": (np.arange(2 * periods) + offset).astype(np.float32),
+            "tmax": np.arange(2 * periods) + 20.0 + offset,
+        }
+    )
+
+
+class TestPointStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = PointStore(Path(self.tmp.name) / "points")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip_keeps_dtypes(self):
+        df = _frame("2020-01-01", 5)
+        self.store.write("chirps", df)
+        out = self.store.read("chirps", ["precip", "tmax"])
+        pd.testing.assert_frame_equal(out, df, check_dtype=False)
+        self.assertEqual(out["precip"].dtype, np.float32)
+        self.assertTrue(pd.api.types.is_datetime64_any_dtype(out["time"]))
+
+    def test_partitions_and_appending_a_year(self):
+        self.store.write("chirps", _frame("2019-12-30", 3), variables=["precip"])
+        first = sorted(Path(self.tmp.name).rglob("*.parquet"))
+        self.store.write("chirps", _frame("2021-01-01", 2), variables=["precip"])
+        parts = sorted(p.relative_to(self.store.root).parts[:3] for p in Path(self.tmp.name).rglob("part-*.parquet"))
+        self.assertIn(("source=chirps", "variable=precip", "year=2021"), parts)
+        self.assertTrue(all(p.exists() for p in first))
+        self.assertEqual(len(self.store.read("chirps")), 10)
+
+    def test_filters_on_time_and_points(self):
+        self.store.write("chirps", _frame("2020-12-30", 4))
+        out = self.store.read("chirps", ["tmax"], start="2021-01-01", end="2021-01-01", points=[(2.5, -4.25)])
+        self.assertEqual(out.to_dict("records"), [
+            {"time": pd.Timestamp("2021-01-01"), "lon": 2.5, "lat": -4.25, "tmax": 25.0}
+        ])
+
+    def test_latest_write_wins(self):
+        self.store.write("chirps", _frame("2020-01-01", 3))
+        self.store.write("chirps", _frame("2020-01-02", 1, offset=100.0), variables=["precip"])
+        out = self.store.read("chirps", ["precip"], start="2020-01-02", end="2020-01-02")
+        self.assertEqual(out["precip"].tolist(), [100.0, 101.0])
+
+        self.store.compact("chirps")
+        year = self.store.root / "source=chirps" / "variable=precip" / "year=2020"
+        self.assertEqual(len(list(year.glob("*.parquet"))), 1)
+        self.assertEqual(self.store.read("chirps", ["precip"])["precip"].tolist(), [0, 1, 100, 101, 4, 5])
+
+    def test_extents(self):
+        df = _frame("2020-01-01", 3)
+        self.store.write("chirps", df, variables=["precip"], start="2020-01-01", end="2020-01-10")
+        ids = [point_id(1.0, 3.0), point_id(2.5, -4.25)]
+        self.assertTrue(self.store.covers("chirps", ["precip"], ids, "2020-01-02", "2020-01-10"))
+        self.assertFalse(self.store.covers("chirps", ["precip", "tmax"], ids, "2020-01-02", "2020-01-10"))
+        gaps = self.store.missing("chirps", ["precip"], ids[:1], "2019-12-25", "2020-01-12")
+        self.assertEqual(gaps, {("precip", ids[0]): [
+            (pd.Timestamp("2019-12-25"), pd.Timestamp("2019-12-31")),
+            (pd.Timestamp("2020-01-11"), pd.Timestamp("2020-01-12")),
+        ]})
+
+    def test_pending_batches(self):
+        a, b, c = (1.0, 3.0), (2.5, -4.25), (7.0, 7.0)
+        self.store.write_years("chirps", _frame("2019-01-01", 730), [2019, 2020], "2019-01-01", "2020-12-31")
+        self.assertEqual(self.store.pending("chirps", ["precip"], [a, b], "2019-03-01", "2020-06-30"), [])
+        self.assertEqual(
+            self.store.pending("chirps", ["precip"], [a, c, b], "2019-03-01", "2021-01-05"),
+            [([c], [2019, 2020]), ([a, c, b], [2021])],
+        )
+
+    def test_station_ids_and_attributes(self):
+        df = pd.DataFrame(
+            {
+                "date": pd.to_datetime(["2020-01-01", "2020-01-01"]),
+                "station": ["A1", "B2"],
+                "lat": [1.0, 2.0],
+                "lon": [3.0, 4.0],
+                "elevation": [10.0, 20.0],
+                "TMAX": [25.0, 26.0],
+                "PRCP": [np.nan, 1.5],
+            }
+        )
+        self.store.write("ghcnd", df, variables=["TMAX", "PRCP"], time_col="date", id_col="station", attrs=["elevation"])
+        out = self.store.read("ghcnd", ["TMAX", "PRCP"], ids=["B2"], time_col="date", id_col="station")
+        self.assertEqual(list(out.columns), ["date", "station", "lon", "lat", "elevation", "TMAX", "PRCP"])
+        self.assertEqual(out.iloc[0]["elevation"], 20.0)
+        long = self.store.read("ghcnd", ["TMAX", "PRCP"], time_col="date", as_long=True)
+        self.assertEqual(len(long), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
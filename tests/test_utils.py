@@ -0,0 +1,106 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+from agrometflow.utils import (
+    PointIndex,
+    _dataset_points_to_dataframe_generic,
+    dataset_points_to_dataframe,
+    extract_points_from_tuples,
+)
+
+
+def _grid(lon, lat):
+    time = pd.date_range("2020-01-01", periods=3, freq="D")
+    rng = np.random.default_rng(1)
+    values = rng.random((len(time), len(lat), len(lon)))
+    return xr.Dataset(
+        {"precip": (("time", "lat", "lon"), values)},
+        coords={"time": time, "lat": lat, "lon": lon},
+    )
+
+
+class TestPointIndex(unittest.TestCase):
+    def setUp(self):
+        PointIndex._cache.clear()
+        self.points = [(1.02, 2.51), (-15.3, 12.0), (0.125, 0.125), (19.9, -19.9)]
+
+    def _expected(self, ds, points):
+        lons = xr.DataArray([p[0] for p in points], dims="point")
+        lats = xr.DataArray([p[1] for p in points], dims="point")
+        out = ds.sel(lon=lons, lat=lats, method="nearest")
+        return out.assign_coords(lon=("point", lons.values), lat=("point", lats.values))
+
+    def test_matches_nearest_selection(self):
+        lon = np.arange(-19.975, 20, 0.05)
+        for lat in (np.arange(-19.975, 20, 0.05), np.arange(19.975, -20, -0.05)):
+            ds = _grid(lon, lat)
+            xr.testing.assert_identical(
+                extract_points_from_tuples(ds, self.points), self._expected(ds, self.points)
+            )
+
+    def test_index_is_reused_for_the_same_grid(self):
+        ds = _grid(np.arange(0.0, 10.0), np.arange(0.0, 10.0))
+        first = PointIndex.for_grid(ds, [(1.2, 3.4)])
+        self.assertIs(PointIndex.for_grid(ds.copy(), [(1.2, 3.4)]), first)
+        self.assertIsNot(PointIndex.for_grid(ds, [(1.2, 3.5)]), first)
+
+    def test_0_360_longitudes(self):
+        ds = _grid(np.arange(0.0, 360.0, 2.5), np.arange(-60.0, 61.0, 2.5))
+        out = extract_points_from_tuples(ds, [(-10.1, 5.0), (-1.0, 0.0), (179.0, 0.0)])
+        np.testing.assert_array_equal(
+            out["precip"].values,
+            self._expected(ds, [(350.0, 5.0), (0.0, 0.0), (180.0, 0.0)])["precip"].values,
+        )
+        np.testing.assert_array_equal(out["lon"].values, [-10.1, -1.0, 179.0])
+
+    def test_points_beyond_the_last_column_of_a_global_grid(self):
+        ds = _grid(np.arange(-180.0, 180.0, 2.5), np.arange(-60.0, 61.0, 2.5))
+        index = PointIndex.for_grid(ds, [(179.9, 0.0), (178.5, 0.0), (181.0, 0.0)])
+        np.testing.assert_array_equal(index.ilon, [0, len(ds["lon"]) - 1, 0])
+
+    def test_extract_by_point(self):
+        ds = _grid(np.arange(0.0, 10.0), np.arange(10.0, 0.0, -1.0))
+        index = PointIndex.for_grid(ds, self.points[:3])
+        xr.testing.assert_identical(index.extract_by_point(ds).transpose("time", "point"), index.extract(ds))
+
+
+class TestDatasetPointsToDataframe(unittest.TestCase):
+    def setUp(self):
+        ds = _grid(np.arange(0.0, 10.0), np.arange(0.0, 10.0)).assign_coords(height=2.0)
+        self.points = [(1.2, 3.4), (5.0, 5.0), (8.9, 0.1)]
+        self.ds_pts = extract_points_from_tuples(ds, self.points)
+
+    def test_long_layout_matches_to_dataframe(self):
+        for ds_pts in (self.ds_pts, self.ds_pts.transpose("point", "time")):
+            expected = _dataset_points_to_dataframe_generic(ds_pts).reset_index(drop=True)
+            pd.testing.assert_frame_equal(dataset_points_to_dataframe(ds_pts), expected)
+
+    def test_other_dims_fall_back_to_to_dataframe(self):
+        ds_pts = self.ds_pts.assign(extra=(("point", "level"), np.ones((3, 2))))
+        expected = _dataset_points_to_dataframe_generic(ds_pts)
+        pd.testing.assert_frame_equal(dataset_points_to_dataframe(ds_pts), expected)
+        with self.assertRaises(ValueError):
+            dataset_points_to_dataframe(ds_pts, layout="wide")
+
+    def test_wide_layout(self):
+        df = dataset_points_to_dataframe(self.ds_pts, layout="wide", float32=True)
+        self.assertEqual(list(df.columns), ["time", "precip_0", "precip_1", "precip_2"])
+        self.assertEqual(df["precip_1"].dtype, np.float32)
+        np.testing.assert_array_equal(
+            df["precip_1"], self.ds_pts["precip"].isel(point=1).values.astype(np.float32)
+        )
+
+    def test_arrow_columns(self):
+        df = dataset_points_to_dataframe(self.ds_pts, arrow=True)
+        self.assertIsInstance(df["precip"].dtype, pd.ArrowDtype)
+        np.testing.assert_allclose(
+            df["precip"].to_numpy(dtype=float),
+            _dataset_points_to_dataframe_generic(self.ds_pts)["precip"].to_numpy(),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()